@@ -7,11 +7,13 @@ Coordinates filters, extractors, and generators to create study configurations.
 import json
 import sys
 import copy
+import contextlib
+import io
 import os
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Any, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from datetime import datetime
 
@@ -30,12 +32,505 @@ from src.core.benchmark import HumanStudyBench
 from src.agents.llm_participant_agent import ParticipantPool
 from src.agents.prompt_builder import get_prompt_builder
 from src.core.study_config import get_study_config
+from src.utils.io import atomic_write_json
+from src.utils.response_log import ResponseLog, load_response_log
+from src.utils.compact_store import load_benchmark, write_compact_benchmark
 # Import all study configurations to register them
 import src.studies
 import time
 import json
 
 
+def stage5_config_folder(model: str, system_prompt_preset: str, reasoning: str = "default", temperature: float = 1.0) -> str:
+    """
+    Name of the Stage 5 result folder for a model configuration:
+    {model}[_{reasoning}][_temp{t}]_{prompt-preset}.
+
+    "default", "low" and "minimal" reasoning add no suffix, nor does temperature 1.0.
+    """
+    model_slug = model.replace("/", "_").replace("-", "_")
+    prompt_slug = system_prompt_preset.replace("_", "-")
+    temp_suffix = f"_temp{temperature}" if temperature != 1.0 else ""
+    if reasoning and reasoning not in ("default", "low", "minimal"):
+        return f"{model_slug}_{reasoning}{temp_suffix}_{prompt_slug}"
+    return f"{model_slug}{temp_suffix}_{prompt_slug}"
+
+
+# ---------------------------------------------------------------------------
+# Stage 6 config-folder evaluation (runs in worker processes with --jobs)
+# ---------------------------------------------------------------------------
+
+def evaluate_config_folder(
+    study_id: str,
+    cfg_dir: Path,
+    evaluator_path: Path,
+    disable_formatter: bool = True,
+    force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Evaluate one Stage 5 config folder: sanity check, evaluate_study, ECS_corr,
+    usage and failure rates, then write detailed_stats.csv and evaluation_results.json.
+
+    A folder whose stored input fingerprint (src/evaluation/fingerprint.py)
+    matches its benchmark data, evaluator, stats_lib and ground truth is not
+    re-evaluated unless ``force`` is set.
+
+    Module-level (not a method) so Stage 6 can run it in worker processes.
+
+    Args:
+        study_id: Study ID (e.g., "study_001")
+        cfg_dir: Config folder containing full_benchmark.json
+        evaluator_path: Path to the study's evaluator
+        disable_formatter: Skip re-formatting responses that fail extraction
+        force: Re-evaluate even if the fingerprint is unchanged
+
+    Returns:
+        Summary dict (study_id, config, ecs_corr, up_to_date, stale), or None
+        if the folder has no benchmark data
+    """
+    from src.evaluation.evaluator_runner import load_evaluator
+    from src.evaluation.fingerprint import FINGERPRINT_KEY, check_evaluation, compute_fingerprint
+    import csv
+
+    benchmark_file = cfg_dir / "full_benchmark.json"
+    if not benchmark_file.exists():
+        print(f"  ⚠️  Benchmark file not found in {cfg_dir.name}, skipping.")
+        return None
+    
+    # ===== Skip folders whose inputs have not changed since the last evaluation =====
+    study_data_dir = Path("data/studies") / study_id
+    stale, fingerprint, previous_results = check_evaluation(cfg_dir, evaluator_path, study_data_dir)
+    if not stale and not force:
+        print(f"  ✓ Up to date (fingerprint {fingerprint['digest'][:12]}), skipping")
+        return {
+            "study_id": study_id, "config": cfg_dir.name, "ecs_corr": previous_results.get('ecs_corr'),
+            "up_to_date": True, "stale": [],
+        }
+    print(f"  - Evaluating ({'forced' if not stale else 'stale: ' + ', '.join(stale)})")
+    
+    # ===== Load benchmark data (plain or compact storage) =====
+    print(f"  - Loading benchmark data...")
+    benchmark_data = load_benchmark(benchmark_file)
+    print(f"    ✓ Loaded benchmark data")
+    
+    # ===== Parsed-response index (classify + parse every response once) =====
+    from src.evaluation.response_index import load_parsed_index
+    parsed_index = load_parsed_index(
+        benchmark_file, evaluator_path, evaluator_module=load_evaluator(study_id), benchmark_data=benchmark_data
+    )
+    
+    # ===== Calculate Raw Failure Rate =====
+    print(f"  - Calculating raw failure rate...")
+    from src.evaluation.sanity_check import calculate_raw_failure_rate
+    
+    raw_failure_stats = calculate_raw_failure_rate(benchmark_data, parsed_index=parsed_index)
+    raw_failure_rate = raw_failure_stats.get("raw_failure_rate", 0.0)
+    print(f"    → Raw failure rate: {raw_failure_rate:.2f}% ({raw_failure_stats.get('raw_failed', 0)}/{raw_failure_stats.get('raw_total', 0)})")
+    if raw_failure_stats.get('raw_failure_breakdown'):
+        breakdown = raw_failure_stats['raw_failure_breakdown']
+        print(f"      Breakdown: {breakdown.get('empty', 0)} empty, {breakdown.get('refusal', 0)} refusal, {breakdown.get('other', 0)} other")
+    
+    # ===== Sanity Check: Verify response extraction (Final Failure Rate) =====
+    print(f"  - Running sanity check for response extraction...")
+    from src.evaluation.sanity_check import run_sanity_check, format_failed_responses
+    
+    # Count total responses for progress indication
+    total_resp_count = len(benchmark_data.get('individual_data', []))
+    if total_resp_count > 0:
+        print(f"    → Checking {total_resp_count} responses...")
+    
+    sanity_check_result = run_sanity_check(
+        study_id, benchmark_file, evaluator_path, parsed_index=parsed_index, benchmark_data=benchmark_data
+    )
+    
+    if not sanity_check_result.get("all_passed", True):
+        failed_responses = sanity_check_result.get("failed_responses", [])
+        print(f"  ⚠️  Found {len(failed_responses)}/{sanity_check_result.get('total_checked', 0)} responses that cannot be fully extracted")
+        
+        # 打印一个失败的例子
+        if failed_responses:
+            example = failed_responses[0]
+            print(f"\n  Example failed response:")
+            print(f"    Participant {example['participant_id']}, Response {example['response_index']}")
+            print(f"    Missing Q numbers: {example['missing_q_numbers']}")
+            print(f"    Required: {example['required_q_numbers']}")
+            print(f"    Extracted: {example['extracted_q_numbers']}")
+            print(f"    Response preview: {example['response_text_preview'][:300]}")
+        
+        # Formatter disabled - skip automatic formatting of failed responses
+        # disable_formatter=True means formatter is disabled (default)
+        # Only run formatter if disable_formatter is False (explicitly enabled)
+        if not disable_formatter:
+            print(f"  - Activating formatter for failed responses (multithreading enabled)...")
+            
+            # 使用多线程格式化失败的响应
+            formatted_count = format_failed_responses(
+                study_id=study_id,
+                benchmark_file=benchmark_file,
+                failed_responses=failed_responses,
+                evaluator_path=evaluator_path,
+                num_workers=32
+            )
+            
+            print(f"  ✓ Formatted {formatted_count}/{len(failed_responses)} responses")
+
+            # The formatter rewrote full_benchmark.json: score (and later fingerprint)
+            # the formatted responses, not the copy loaded before formatting
+            benchmark_data = load_benchmark(benchmark_file)
+            parsed_index = load_parsed_index(
+                benchmark_file, evaluator_path, evaluator_module=load_evaluator(study_id), benchmark_data=benchmark_data
+            )
+
+            # 重新运行sanity check验证格式化结果
+            sanity_check_result = run_sanity_check(
+                study_id, benchmark_file, evaluator_path, parsed_index=parsed_index, benchmark_data=benchmark_data
+            )
+            if not sanity_check_result.get("all_passed", True):
+                remaining_failed = len(sanity_check_result.get("failed_responses", []))
+                print(f"  ⚠️  Warning: {remaining_failed} responses still cannot be extracted after formatting")
+            else:
+                print(f"  ✓ All responses passed sanity check after formatting")
+        else:
+            print(f"  ⚠️  Skipping formatter (disabled) - {len(failed_responses)} responses failed extraction")
+    else:
+        total_checked = sanity_check_result.get('total_checked', 0)
+        passed = sanity_check_result.get('passed', 0)
+        skipped = sanity_check_result.get('skipped_responses', 0)
+        total = sanity_check_result.get('total_responses', total_checked)
+        if skipped > 0:
+            print(f"  ✓ All responses passed sanity check ({passed}/{total_checked} checked, {skipped} skipped out of {total} total)")
+        else:
+            print(f"  ✓ All responses passed sanity check ({passed}/{total_checked})")
+    
+    # ===== Use already loaded benchmark data for evaluation =====
+    individual_data = benchmark_data.get('individual_data', [])
+    all_runs_data = []
+    if benchmark_data.get('all_runs_raw_results'):
+        for run_data in benchmark_data['all_runs_raw_results']:
+            all_runs_data.append(run_data.get('individual_data', []))
+    else:
+        all_runs_data = [individual_data] if individual_data else []
+    
+    if not all_runs_data or not all_runs_data[0]:
+        print(f"  ⚠️  No raw response data found in benchmark results for {cfg_dir.name}")
+        return None
+    
+    # Load evaluator module once (for bootstrap efficiency)
+    print(f"  - Loading evaluator module...")
+    # #region agent log
+    import json
+    import time
+    from pathlib import Path as _Path
+    def _debug_log_pipe(location, message, data, hypothesis_id=None):
+        try:
+            log_path = _Path("/Users/assassin808/Desktop/xuan-hs/HS_bench/.cursor/debug.log")
+            with open(log_path, "a", encoding="utf-8") as f:
+                log_entry = {"sessionId": "debug-session", "runId": "run1", "hypothesisId": hypothesis_id, "location": location, "message": message, "data": data, "timestamp": int(time.time() * 1000)}
+                f.write(json.dumps(log_entry) + "\n")
+        except Exception:
+            pass
+    _debug_log_pipe("pipeline.py:1436", "Before load_evaluator call", {"study_id": study_id, "cfg_dir_name": cfg_dir.name}, "D")
+    # #endregion
+    evaluator_module = load_evaluator(study_id)
+    # #region agent log
+    _debug_log_pipe("pipeline.py:1438", "After load_evaluator call", {"study_id": study_id, "cfg_dir_name": cfg_dir.name, "evaluator_module_is_none": evaluator_module is None}, "D")
+    # #endregion
+    if evaluator_module is None:
+        print(f"    ❌ Failed to load evaluator for {cfg_dir.name}")
+        # #region agent log
+        _debug_log_pipe("pipeline.py:1441", "Evaluator load failed", {"study_id": study_id, "cfg_dir_name": cfg_dir.name}, "D")
+        # #endregion
+        return None
+    print(f"    ✓ Evaluator module loaded")
+    
+    # Combine all participant data from all runs into a single pool
+    combined_participant_pool = []
+    for run_individual_data in all_runs_data:
+        if run_individual_data:
+            combined_participant_pool.extend(run_individual_data)
+    
+    if not combined_participant_pool:
+        print(f"    ❌ No participant data available for bootstrap")
+        return None
+    
+    # Check if data is flat structure (legacy format) or nested structure (from Stage 5)
+    # Note: Flat structure is kept for backward compatibility with legacy results
+    is_flat_structure = len(combined_participant_pool) > 0 and 'responses' not in combined_participant_pool[0]
+    
+    if is_flat_structure:
+        # Convert flat structure to nested structure for evaluator
+        print(f"    - Converting flat structure to nested structure for evaluator...")
+        nested_participants = defaultdict(lambda: {"responses": [], "profile": {}})
+        
+        for item_response in combined_participant_pool:
+            p_id = item_response.get("participant_id", 0)
+            # Ensure profile is copied from the trial_info if available
+            if not nested_participants[p_id]["profile"] and "trial_info" in item_response and "profile" in item_response["trial_info"]:
+                nested_participants[p_id]["profile"] = item_response["trial_info"]["profile"]
+            # Add the response to the participant's responses list
+            nested_participants[p_id]["responses"].append(item_response)
+        
+        # Convert defaultdict to regular list with participant_id set
+        combined_participant_pool = []
+        for p_id, p_data in nested_participants.items():
+            p_data["participant_id"] = p_id
+            combined_participant_pool.append(p_data)
+        
+        print(f"    - Converted {len(nested_participants)} flat responses to {len(combined_participant_pool)} nested participants")
+    
+    n_runs = len(all_runs_data)
+    print(f"    - Processing {n_runs} run(s) with {len(combined_participant_pool)} total participants...")
+    
+    # Get evaluation result (main metric: ECS_corr = CCC)
+    print(f"  - Computing detailed evaluation results...")
+    full_raw_results = {"individual_data": combined_participant_pool}
+    with parsed_index.bind(evaluator_module):
+        pas_result = evaluator_module.evaluate_study(full_raw_results)
+    
+    if "error" in pas_result:
+        print(f"    ❌ Evaluation failed on full data: {pas_result.get('error')}")
+        return None
+    print(f"    ✓ Detailed evaluation complete")
+    
+    test_results = pas_result.get('test_results', [])
+    from src.evaluation.stats_lib import compute_ecs_corr
+    
+    STUDY_GROUPS = {
+        "Cognition": ["study_001", "study_002", "study_003", "study_004"],
+        "Strategic": ["study_009", "study_010", "study_011", "study_012"],
+        "Social": ["study_005", "study_006", "study_007", "study_008"]
+    }
+    
+    # Compute ECS_corr (CCC = Lin's Concordance Correlation Coefficient) — primary metric only
+    ecs_corr_result = compute_ecs_corr(test_results, study_groups=STUDY_GROUPS)
+    pas_result['ecs_corr'] = ecs_corr_result.get('ecs_overall')  # CCC overall (for this study's tests)
+    pas_result['ecs_corr_details'] = {
+        'n_tests_overall': ecs_corr_result.get('n_tests_overall', 0),
+        'n_tests_per_study': ecs_corr_result.get('n_tests_per_study', {}),
+        'ecs_per_study': ecs_corr_result.get('ecs_per_study', {}),
+        'ecs_domain': ecs_corr_result.get('ecs_domain', {}),
+        'caricature_overall': ecs_corr_result.get('caricature_overall', {'a': None, 'b': None}),
+    }
+    result_study_id = pas_result.get('study_id')
+    if result_study_id and result_study_id in ecs_corr_result.get('ecs_per_study', {}):
+        pas_result['ecs_corr_study'] = ecs_corr_result['ecs_per_study'][result_study_id]
+    else:
+        pas_result['ecs_corr_study'] = pas_result.get('ecs_corr')
+    
+    # ECS missing rate: fraction of tests without valid human_effect_d / agent_effect_d
+    n_total = len(test_results)
+    n_valid = ecs_corr_result.get('n_tests_overall', 0)
+    pas_result['ecs_corr_details']['ecs_missing_rate'] = (1.0 - (n_valid / n_total)) if n_total > 0 else None
+    
+    pas_result.update({
+        'n_participants': len(combined_participant_pool),
+        'n_runs': n_runs,
+    })
+
+    # ===== Calculate Usage Statistics =====
+    total_prompt_tokens = 0
+    total_completion_tokens = 0
+    total_cached_tokens = 0
+    total_tokens = 0
+    total_cost = 0.0
+    
+    # Check if data is flat or nested to iterate correctly
+    is_flat_structure = len(combined_participant_pool) > 0 and 'responses' not in combined_participant_pool[0]
+    
+    if is_flat_structure:
+        # Handle flat structure: each item is a trial response
+        for resp in combined_participant_pool:
+            usage = resp.get('usage', {})
+            total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
+            total_completion_tokens += usage.get('completion_tokens', 0) or 0
+            total_cached_tokens += usage.get('cached_tokens', 0) or 0
+            total_tokens += usage.get('total_tokens', 0) or 0
+            total_cost += usage.get('cost', 0.0) or 0.0
+        n_participants_count = len(set(resp.get('participant_id') for resp in combined_participant_pool))
+    else:
+        # Handle nested structure: each item is a participant with multiple responses
+        for participant in combined_participant_pool:
+            for resp in participant.get('responses', []):
+                usage = resp.get('usage', {})
+                total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
+                total_completion_tokens += usage.get('completion_tokens', 0) or 0
+                total_cached_tokens += usage.get('cached_tokens', 0) or 0
+                total_tokens += usage.get('total_tokens', 0) or 0
+                total_cost += usage.get('cost', 0.0) or 0.0
+        n_participants_count = len(combined_participant_pool)
+    
+    avg_tokens_per_participant = total_tokens / n_participants_count if n_participants_count > 0 else 0
+    avg_cost_per_participant = total_cost / n_participants_count if n_participants_count > 0 else 0
+    
+    # ===== Calculate Final Failure Rate (from sanity check) =====
+    final_failed = sanity_check_result.get('failed', 0)
+    final_total = sanity_check_result.get('total_checked', 0)
+    final_failure_rate = (final_failed / final_total * 100.0) if final_total > 0 else 0.0
+    
+    print(f"      → Final failure rate: {final_failure_rate:.2f}% ({final_failed}/{final_total})")
+    
+    pas_result.update({
+        'usage_stats': {
+            'total_prompt_tokens': total_prompt_tokens,
+            'total_completion_tokens': total_completion_tokens,
+            'total_cached_tokens': total_cached_tokens,
+            'total_tokens': total_tokens,
+            'total_cost': float(total_cost),
+            'avg_tokens_per_participant': float(avg_tokens_per_participant),
+            'avg_cost_per_participant': float(avg_cost_per_participant)
+        },
+        'failure_rates': {
+            'raw_failure_rate': float(raw_failure_rate),
+            'raw_failed': raw_failure_stats.get('raw_failed', 0),
+            'raw_total': raw_failure_stats.get('raw_total', 0),
+            'raw_failure_breakdown': raw_failure_stats.get('raw_failure_breakdown', {}),
+            'final_failure_rate': float(final_failure_rate),
+            'final_failed': final_failed,
+            'final_total': final_total
+        }
+    })
+    
+    # Print usage summary
+    print(f"      → Usage: Total {total_tokens} tokens, Total Cost ${total_cost:.4f}")
+    print(f"      → Average per participant: {avg_tokens_per_participant:.1f} tokens, ${avg_cost_per_participant:.6f}")
+    
+    # Save detailed CSV
+    print(f"  - Saving results...")
+    csv_path = cfg_dir / "detailed_stats.csv"
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        header = [
+            "Study_ID", "Sub_Study_ID", "Finding_ID", "Test_Name", "Scenario",
+            "Statistical_Test_Type", "Human_Test_Statistic", "Agent_Test_Statistic",
+            "Z_Diff", "ECS_Test", "Agent_Effect_Size", "Human_Effect_Size",
+            "Agent_Effect_d", "Human_Effect_d"
+        ]
+        writer.writerow(header)
+        for test in pas_result.get('test_results', []):
+            z_diff = test.get('z_diff')
+            rep_cons = test.get('replication_consistency')
+            agent_es = test.get('agent_effect_size')
+            human_es = test.get('human_effect_size')
+            agent_ed = test.get('agent_effect_d')
+            human_ed = test.get('human_effect_d')
+            z_diff_str = f"{z_diff:.4f}" if z_diff is not None else ""
+            rep_cons_str = f"{rep_cons:.4f}" if rep_cons is not None else ""
+            agent_es_str = f"{agent_es:.4f}" if agent_es is not None else ""
+            human_es_str = f"{human_es:.4f}" if human_es is not None else ""
+            agent_ed_str = f"{agent_ed:.4f}" if agent_ed is not None else ""
+            human_ed_str = f"{human_ed:.4f}" if human_ed is not None else ""
+            row = [
+                study_id,
+                test.get('sub_study_id', ''),
+                test.get('finding_id', ''),
+                test.get('test_name', ''),
+                test.get('scenario', ''),
+                test.get('statistical_test_type', ''),
+                test.get('human_test_statistic', ''),
+                test.get('agent_test_statistic', ''),
+                z_diff_str,
+                rep_cons_str,
+                agent_es_str,
+                human_es_str,
+                agent_ed_str,
+                human_ed_str
+            ]
+            writer.writerow(row)
+    
+    json_path = cfg_dir / "evaluation_results.json"
+    from src.utils.io import atomic_write_json
+    # Re-stamped here: the formatter may have rewritten the benchmark file (the data
+    # scored above was reloaded after it did, so the stamp matches what was evaluated)
+    pas_result[FINGERPRINT_KEY] = compute_fingerprint(cfg_dir, evaluator_path, study_data_dir, previous=fingerprint)
+    atomic_write_json(json_path, pas_result, indent=2, ensure_ascii=False, encoding='utf-8', errors='replace')
+    
+    ecs_val = pas_result.get('ecs_corr')
+    ecs_str = f"{ecs_val:.4f}" if ecs_val is not None else "N/A (need ≥3 tests)"
+    print(f"    ✅ Results saved: ECS_corr (CCC) = {ecs_str}")
+    print(f"    ✓ Saved to: {csv_path.name}, {json_path.name}")
+
+    return {
+        "study_id": study_id, "config": cfg_dir.name, "ecs_corr": pas_result.get('ecs_corr'),
+        "up_to_date": False, "stale": stale,
+    }
+
+
+def _warm_stage6_worker(study_ids: List[str]) -> None:
+    """Process-pool initializer: import each study's evaluator once per worker."""
+    from src.evaluation.evaluator_runner import load_evaluator
+    for study_id in study_ids:
+        load_evaluator(study_id)
+
+
+def _evaluate_config_folder_captured(task: Tuple) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Run evaluate_config_folder in a worker, returning (captured stdout, summary, error)."""
+    buffer = io.StringIO()
+    summary, error = None, None
+    with contextlib.redirect_stdout(buffer):
+        try:
+            summary = evaluate_config_folder(*task)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return buffer.getvalue(), summary, error
+
+
+def run_stage6_tasks(tasks: List[Tuple], jobs: int = 1) -> List[Optional[Dict[str, Any]]]:
+    """
+    Evaluate (study_id, cfg_dir, evaluator_path, disable_formatter, force) tasks.
+
+    With ``jobs`` > 1 the tasks run on a process pool. Each worker imports the
+    evaluators once and keeps them (and the per-study human references) warm
+    across the tasks it receives. A worker's output is buffered and printed in
+    task order, so logs and results match a sequential run. A closing line
+    reports how many folders were re-evaluated and why, and how many were up to date.
+
+    Args:
+        tasks: Argument tuples for evaluate_config_folder
+        jobs: Worker processes (1 = in this process)
+
+    Returns:
+        evaluate_config_folder summaries, in task order
+
+    Raises:
+        RuntimeError: If any task failed in a worker (after all tasks have finished)
+    """
+    multi_study = len({task[0] for task in tasks}) > 1
+
+    def header(idx: int, task: Tuple) -> str:
+        label = f"{task[0]}/{task[1].name}" if multi_study else task[1].name
+        return f"\n  >>> [{idx}/{len(tasks)}] Evaluating: {label}"
+
+    jobs = min(max(1, int(jobs or 1)), len(tasks))
+    results, failures = [], []
+    if jobs <= 1:
+        for idx, task in enumerate(tasks, 1):
+            print(header(idx, task))
+            results.append(evaluate_config_folder(*task))
+    else:
+        study_ids = sorted({task[0] for task in tasks})
+        print(f"  Evaluating on {jobs} worker processes...")
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_stage6_worker, initargs=(study_ids,)) as executor:
+            futures = [executor.submit(_evaluate_config_folder_captured, task) for task in tasks]
+            for idx, (task, future) in enumerate(zip(tasks, futures), 1):
+                output, summary, error = future.result()
+                print(header(idx, task))
+                print(output, end="")
+                if error is not None:
+                    print(f"    ❌ Evaluation failed for {task[1].name}: {error}")
+                    failures.append(f"{task[0]}/{task[1].name}: {error}")
+                results.append(summary)
+
+    evaluated = [r for r in results if r and not r.get("up_to_date")]
+    up_to_date = [r for r in results if r and r.get("up_to_date")]
+    print(f"\n  Stage 6: {len(evaluated)} config folder(s) evaluated, {len(up_to_date)} up to date")
+    for r in evaluated:
+        label = f"{r['study_id']}/{r['config']}" if multi_study else r['config']
+        print(f"    - {label}: {', '.join(r.get('stale') or ['forced'])}")
+    if failures:
+        raise RuntimeError(f"Stage 6 failed for {len(failures)} config folder(s): " + "; ".join(failures))
+    return results
+
+
 class GenerationPipeline:
     """Main pipeline orchestrator"""
     
@@ -395,7 +890,22 @@ class GenerationPipeline:
         merge_existing_repeats: bool = False,
         reasoning: str = "default",
         enable_reasoning: bool = False,
-        temperature: float = 1.0
+        temperature: float = 1.0,
+        execution_mode: str = "threads",
+        max_concurrency: Optional[int] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        response_cache: Optional[str] = None,
+        response_cache_max_mb: int = 2048,
+        batch_poll_interval: float = 30.0,
+        storage_format: str = "json",
+        prompt_caching: bool = False,
+        api_base: Optional[str] = None,
+        streaming: bool = False,
+        max_tokens_percentile: Optional[float] = None,
+        hedge_quantile: Optional[float] = None,
+        hedge_max_extra: float = 0.1,
+        progress_callback: Optional[Callable[[int, Optional[int]], None]] = None
     ) -> Path:
         """
         Run stage 5 (Simulation - run agents and collect raw responses).
@@ -417,12 +927,53 @@ class GenerationPipeline:
             merge_existing_repeats: Whether to merge new repeats with existing results
             reasoning: Reasoning effort level
             enable_reasoning: Force enable reasoning for OpenRouter models
+            execution_mode: "threads" (default), "async" (asyncio engine) or "batch"
+                (OpenAI/Anthropic Batch API; JSONL files are kept under <config>/batch/)
+            max_concurrency: Max requests in flight in async mode
+            rpm: Requests/min budget for this model (shared rate limiter; None = unlimited)
+            tpm: Tokens/min budget for this model (shared rate limiter; None = unlimited)
+            response_cache: Path to the SQLite per-request response cache (None = disabled,
+                unless HS_BENCH_RESPONSE_CACHE is set)
+            response_cache_max_mb: Size budget of the response cache before LRU eviction
+            batch_poll_interval: Seconds between Batch API status checks in batch mode
+            storage_format: "json" (plain full_benchmark.json + raw_responses.json) or
+                "compact" (deduplicated, compressed; see src.utils.compact_store)
+            prompt_caching: Order prompts so the prefix shared by all participants can be
+                reused by provider-side prompt caching (changes the prompt layout)
+            api_base: Base URL for the participant agents' API (e.g. an OpenAI-compatible
+                endpoint or the local mock server, see src.llm.mock_server)
+            streaming: Stream completions and close each stream as soon as the study
+                evaluator parses every required Q number (see src.llm.streaming);
+                responses then record time-to-first-token / time-to-complete
+            max_tokens_percentile: Enable adaptive max_tokens: budget each trial at this
+                percentile of completion lengths seen for the study / sub-study in earlier
+                raw_responses.jsonl logs of this configuration and in this run, and retry
+                truncated replies with a larger budget (None = fixed 8192, see src.llm.token_budget)
+            hedge_quantile: Enable request hedging: a call slower than this quantile of recent
+                latencies for the model gets a duplicate request and the first reply wins
+                (None = off, see src.llm.hedging)
+            hedge_max_extra: Max fraction of requests that may be duplicated by hedging
+            progress_callback: Called as ``progress_callback(done, expected)`` once the resume
+                state is known and after every collected response, with the number of
+                responses collected by this call and the number still expected
+                (None if unknown, e.g. group experiments); used by sweep schedulers
             
         Returns:
             Path to saved benchmark results
         """
         print(f"Running Stage 5: Simulation for {study_id}")
         
+        if rpm or tpm:
+            from src.llm.rate_limiter import configure_rate_limits
+            configure_rate_limits(model=model, rpm=rpm, tpm=tpm)
+        # Hedging is process-wide: set it on every call (None = off) so a run without
+        # hedging does not inherit the settings of an earlier run or sweep cell
+        from src.llm.hedging import configure_hedging
+        configure_hedging(quantile=hedge_quantile if use_real_llm else None, max_extra_fraction=hedge_max_extra)
+        if response_cache:
+            from src.llm.response_cache import configure_response_cache
+            configure_response_cache(response_cache, max_bytes=response_cache_max_mb * 1024 ** 2)
+        
         # Load benchmark and study
         benchmark = HumanStudyBench("data")
         study = benchmark.load_study(study_id)
@@ -503,16 +1054,7 @@ class GenerationPipeline:
             run_dir = output_dir / benchmark_folder
         
         # Create config subfolder
-        model_slug = model.replace("/", "_").replace("-", "_")
-        prompt_slug = system_prompt_preset.replace("_", "-")
-        
-        # Include temperature in folder name if it's not the default
-        temp_suffix = f"_temp{temperature}" if temperature != 1.0 else ""
-        
-        if reasoning and reasoning != "default" and reasoning != "low" and reasoning != "minimal":
-            config_folder = f"{model_slug}_{reasoning}{temp_suffix}_{prompt_slug}"
-        else:
-            config_folder = f"{model_slug}{temp_suffix}_{prompt_slug}"
+        config_folder = stage5_config_folder(model, system_prompt_preset, reasoning, temperature)
         
         study_dir = run_dir / study_id
         config_dir = study_dir / config_folder
@@ -521,66 +1063,107 @@ class GenerationPipeline:
         raw_responses_json = config_dir / "raw_responses.json"
         log_file_jsonl = config_dir / "raw_responses.jsonl"
         
-        # RESUME LOGIC: Check if we can resume from a partial run
+        # Adaptive max_tokens learned from earlier logs of the same study and configuration
+        token_budget = None
+        if use_real_llm and max_tokens_percentile is not None:
+            from src.llm.token_budget import TokenBudgetPlanner, history_logs
+            token_budget = TokenBudgetPlanner(percentile=max_tokens_percentile)
+            history = history_logs(Path("results"), study_id, config_folder)
+            n_history = token_budget.learn_from_logs(study_id, history)
+            print(f"📏 Token budget: learned from {n_history} logged responses in {len(history)} file(s), "
+                  f"p{max_tokens_percentile * 100:g} budgets: {token_budget.stats()['budgets'] or 'none yet (using 8192)'}")
+        
+        # Responses per repeat, used to tell complete repeats from partial ones on resume.
+        # Group experiments only log a repeat once it has finished, so every logged one is complete.
+        requires_group_trials = getattr(study_config, 'REQUIRES_GROUP_TRIALS', False)
+        if requires_group_trials:
+            expected_per_repeat = None
+        elif n_participants is not None or by_sub_study_spec:
+            expected_per_repeat = len(trials)
+        else:
+            expected_per_repeat = (study.specification.get('participants', {}).get('n') or 30) * len(trials)
+        
+        # RESUME LOGIC: raw_responses.jsonl is the append-only source of truth
         existing_progress_data = None
         all_runs_raw_results = []
+        partial_repeat_responses = None
+        
+        logged_runs = load_response_log(log_file_jsonl)
+        if logged_runs:
+            n_logged = sum(len(v) for v in logged_runs.values())
+            print(f"📦 Found {n_logged} responses in {log_file_jsonl.name}")
+            for r_idx in range(max(logged_runs) + 1):
+                run_records = logged_runs.get(r_idx, [])
+                if expected_per_repeat is None or len(run_records) >= expected_per_repeat:
+                    all_runs_raw_results.append({"individual_data": run_records})
+                else:
+                    # First incomplete repeat is resumed; anything logged after it is discarded
+                    partial_repeat_responses = run_records
+                    break
+            existing_progress_data = {"source": log_file_jsonl.name}
         
-        # 1. Try to load from raw_responses.json first (the most reliable full format)
-        if raw_responses_json.exists():
+        # Legacy result folders without a log: fall back to raw_responses.json
+        elif raw_responses_json.exists():
             try:
                 with open(raw_responses_json, 'r', encoding='utf-8') as f:
                     old_raw_data = json.load(f)
-                
-                # Check if this file already has all the data we need
-                total_collected = 0
-                if old_raw_data.get('all_runs_raw_responses'):
-                    for run in old_raw_data['all_runs_raw_responses']:
-                        total_collected += len(run.get('participants', []))
-                
-                # If we have data, we'll use it to resume
-                if total_collected > 0:
-                    print(f"📦 Found {total_collected} responses in {raw_responses_json.name}")
-                    # Convert raw_responses format to the internal all_runs_raw_results format
-                    resumed_runs = []
-                    for run in old_raw_data.get('all_runs_raw_responses', []):
-                        individual_data = []
-                        for p in run.get('participants', []):
-                            # Construct back the individual response objects
-                            for resp in p.get('raw_responses', []):
-                                individual_data.append(resp)
-                        resumed_runs.append({"individual_data": individual_data})
-                    
+                resumed_runs = []
+                for run in old_raw_data.get('all_runs_raw_responses', []):
+                    individual_data = []
+                    for p in run.get('participants', []):
+                        individual_data.extend(p.get('raw_responses', []))
+                    resumed_runs.append({"individual_data": individual_data})
+                if any(run["individual_data"] for run in resumed_runs):
+                    print(f"📦 Found {sum(len(r['individual_data']) for r in resumed_runs)} responses in {raw_responses_json.name}")
                     all_runs_raw_results = resumed_runs
                     existing_progress_data = old_raw_data
             except Exception as e:
                 print(f"⚠️  Could not read existing raw_responses.json: {e}")
 
-        # 2. If still no data, try full_benchmark.json
-        if not all_runs_raw_results and incremental_output_file.exists():
+        # Adding repeats to a finished run: the finished ones are already in the log,
+        # so the target becomes finished + requested
+        if merge_existing_repeats and existing_progress_data:
             try:
-                with open(incremental_output_file, 'r', encoding='utf-8') as f:
-                    existing_progress_data = json.load(f)
-                if existing_progress_data.get('all_runs_raw_results'):
-                    print(f"📦 Found existing data in {incremental_output_file.name}, will attempt to resume...")
-                    all_runs_raw_results = existing_progress_data['all_runs_raw_results']
+                finished_data = load_benchmark(incremental_output_file)
+                if finished_data.get('individual_data') is not None:
+                    n_finished = len(finished_data.get('all_runs_raw_results') or []) or 1
+                    repeats = n_finished + repeats
+                    print(f"📦 Found {n_finished} finished run(s), adding {repeats - n_finished} more...")
             except Exception:
                 pass
 
-        # 3. Last resort: recovery from raw_responses.jsonl
-        if log_file_jsonl.exists():
-            # ... (rest of log recovery logic) ...
-            pass
-
         # PRE-FLIGHT CHECK: Is this study actually already finished?
-        if existing_progress_data:
-            # Calculate total participants we actually have across all repeats
+        if existing_progress_data and len(all_runs_raw_results) >= repeats:
+            try:
+                already_complete = load_benchmark(incremental_output_file).get('individual_data') is not None
+            except Exception:
+                already_complete = False
             total_we_have = sum(len(run.get('individual_data', [])) for run in all_runs_raw_results)
-            # Calculate how many we expect (roughly)
-            # This is a safety check: if we have 504 participants and it asks for 504, we are done.
-            expected_n = n_participants or study.specification.get("participants", {}).get("n", 30)
-            if total_we_have >= (expected_n * repeats):
+            if already_complete:
                 print(f"✅ Study {study_id} already has complete data ({total_we_have} responses). Skipping simulation.")
                 return incremental_output_file
+            print(f"✅ All {repeats} repeat(s) found in {log_file_jsonl.name}; building {incremental_output_file.name}")
+            all_runs_raw_results = all_runs_raw_results[:repeats]
+
+        # Progress for callers tracking several runs (e.g. generation_pipeline.scheduler)
+        responses_expected = None
+        if expected_per_repeat is not None:
+            responses_expected = max(
+                0, (repeats - len(all_runs_raw_results)) * expected_per_repeat - len(partial_repeat_responses or [])
+            )
+        import threading as _threading_module
+        progress_lock = _threading_module.Lock()
+        responses_done = [0]
+
+        def report_progress(n_new: int) -> None:
+            if progress_callback is None:
+                return
+            with progress_lock:
+                responses_done[0] += n_new
+                done = responses_done[0]
+            progress_callback(done, responses_expected)
+
+        report_progress(0)
 
         # Create initial file ONLY if not resuming
         if not existing_progress_data:
@@ -598,14 +1181,15 @@ class GenerationPipeline:
                     "repeats_completed": 0,
                     "repeats_total": repeats,
                     "status": "starting",
-                    "all_runs_raw_results": []
+                    "source": log_file_jsonl.name
                 }
-                with open(incremental_output_file, 'w', encoding='utf-8', errors='replace') as f:
-                    json.dump(initial_data, f, indent=2, ensure_ascii=False)
+                atomic_write_json(incremental_output_file, initial_data)
                 print(f"💾 Created initial save file: {incremental_output_file}", flush=True)
             except Exception as e:
                 print(f"⚠️  Warning: Could not create initial save file: {e}", flush=True)
         
+        response_log = ResponseLog(log_file_jsonl)
+        
         for r_idx in range(len(all_runs_raw_results), repeats):
             if repeats > 1:
                 print(f"\n>>> Run {r_idx + 1}/{repeats}")
@@ -615,13 +1199,17 @@ class GenerationPipeline:
             
             current_run_raw_results = None
             
-            # RESUME: Extract existing responses for this specific repeat
+            # RESUME: responses already logged for this (partial) repeat
             existing_repeat_responses = None
-            if existing_progress_data and len(all_runs_raw_results) > r_idx:
-                existing_repeat_responses = all_runs_raw_results[r_idx].get('individual_data', [])
+            if partial_repeat_responses:
+                existing_repeat_responses = partial_repeat_responses
+                partial_repeat_responses = None
                 print(f"🔄 Resuming repeat {r_idx + 1}/{repeats} with {len(existing_repeat_responses)} existing responses")
+            
+            # Whether this repeat's responses were appended to the log as they arrived
+            streamed_to_log = False
 
-            if use_cache and cache_path.exists():
+            if use_cache and cache_path.exists() and not existing_repeat_responses:
                 print(f"🔄 Loading cached results from {cache_path}")
                 try:
                     with open(cache_path, 'r', encoding='utf-8', errors='replace') as f:
@@ -659,7 +1247,11 @@ class GenerationPipeline:
                         "system_prompt_preset": system_prompt_preset,
                         "reasoning": reasoning,
                         "enable_reasoning": enable_reasoning,
-                        "temperature": temperature
+                        "temperature": temperature,
+                        "prompt_caching": prompt_caching,
+                        "api_base": api_base,
+                        "streaming": streaming,
+                        "token_budget": token_budget
                     }
                     
                     # Call custom group experiment runner
@@ -702,71 +1294,30 @@ class GenerationPipeline:
                         reasoning=reasoning,
                         enable_reasoning=enable_reasoning,
                         existing_responses=existing_repeat_responses,
-                        temperature=temperature
+                        temperature=temperature,
+                        execution_mode=execution_mode,
+                        max_concurrency=max_concurrency,
+                        batch_dir=str(config_dir / "batch"),
+                        batch_poll_interval=batch_poll_interval,
+                        prompt_caching=prompt_caching,
+                        api_base=api_base,
+                        streaming=streaming,
+                        token_budget=token_budget
                     )
                     
-                    # Create save callback that saves after each API call returns
-                    # Use throttling to avoid saving too frequently (max once per second)
-                    # Import datetime at function level to avoid scoping issues in closures
-                    from datetime import datetime as _dt_module
-                    last_save_time = [0]  # Use list to allow modification in closure
-                    last_progress_print = [0]  # Track last progress print time
                     def save_after_api_call(new_resp_data=None):
-                        """Save current state after each API call completes"""
-                        import time as _time
-                        current_time = _time.time()
-                        
+                        """Append each response to raw_responses.jsonl as soon as its API call returns"""
                         try:
-                            # 1. PROGRESSIVE LOGGING: Append to JSONL immediately (No throttle!)
                             if new_resp_data:
-                                try:
-                                    with open(log_file_jsonl, 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps(new_resp_data, ensure_ascii=False) + "\n")
-                                except Exception as e:
-                                    pass # Don't let log failure stop the run
-
-                            # 2. TERMINAL UPDATE: Show progress immediately
-                            # Get current count from pool
+                                response_log.append(new_resp_data, r_idx)
+                                report_progress(1)
                             current_progress = sum(len(p.trial_responses) for p in pool.participants)
                             total_trials = len(trials)
-                            
-                            # Print progress immediately whenever there's a change
                             progress_pct = (current_progress / total_trials * 100) if total_trials > 0 else 0
                             print(f"\r   📊 Progress: {current_progress}/{total_trials} trials ({progress_pct:.1f}%) - Repeat {r_idx + 1}/{repeats}", end='', flush=True)
-                            
-                            # 3. THROTTLED DISK SAVE: Update full_benchmark.json every 5 seconds
-                            if current_time - last_save_time[0] < 5.0:
-                                return
-                            last_save_time[0] = current_time
-                            
-                            # Get current partial results from pool for the main file
-                            partial_results = pool.aggregate_results()
-                            
-                            # Combine with previous repeats
-                            all_runs_so_far = all_runs_raw_results + [partial_results]
-                            incremental_runs = [{"individual_data": run_data.get('individual_data', [])} for run_data in all_runs_so_far]
-                            incremental_data = {
-                                "timestamp": _dt_module.now().strftime("%Y%m%d_%H%M%S"),
-                                "study_id": study_id,
-                                "title": study.metadata.get('title', ''),
-                                "model": model,
-                                "reasoning": reasoning,
-                                "use_real_llm": use_real_llm,
-                                "system_prompt_preset": system_prompt_preset,
-                                "random_seed": random_seed,
-                                "repeats_completed": len(all_runs_raw_results),
-                                "repeats_total": repeats,
-                                "current_repeat_progress": current_progress,
-                                "status": "in_progress",
-                                "all_runs_raw_results": incremental_runs
-                            }
-                            # Atomic save: write to tmp then rename
-                            tmp_file = incremental_output_file.with_suffix('.tmp')
-                            with open(tmp_file, 'w', encoding='utf-8', errors='replace') as f:
-                                json.dump(incremental_data, f, indent=2, ensure_ascii=False)
-                            tmp_file.replace(incremental_output_file)
-                        except Exception as e:
-                            pass
+                        except Exception:
+                            pass # Don't let log failure stop the run
+                    streamed_to_log = True
                     
                     # Run experiment in one-to-one mode (each participant runs exactly one trial)
                     # This uses ParticipantPool's internal ThreadPoolExecutor with num_workers
@@ -823,70 +1374,30 @@ class GenerationPipeline:
                         reasoning=reasoning,
                         enable_reasoning=enable_reasoning,
                         existing_responses=existing_repeat_responses,
-                        temperature=temperature
+                        temperature=temperature,
+                        execution_mode=execution_mode,
+                        max_concurrency=max_concurrency,
+                        batch_dir=str(config_dir / "batch"),
+                        batch_poll_interval=batch_poll_interval,
+                        prompt_caching=prompt_caching,
+                        api_base=api_base,
+                        streaming=streaming,
+                        token_budget=token_budget
                     )
                     
-                    # Create save callback that saves after each API call returns
-                    # Use throttling to avoid saving too frequently (max once per second)
-                    # Import datetime at function level to avoid scoping issues in closures
-                    from datetime import datetime as _dt_module_fallback
-                    last_save_time_fallback = [0]  # Use list to allow modification in closure
-                    last_progress_print_fallback = [0]  # Track last progress print time
                     def save_after_api_call_fallback(new_resp_data=None):
-                        """Save current state after each API call completes"""
-                        import time as _time
-                        current_time = _time.time()
-                        
+                        """Append each response to raw_responses.jsonl as soon as its API call returns"""
                         try:
-                            # 1. PROGRESSIVE LOGGING: Append to JSONL immediately
                             if new_resp_data:
-                                try:
-                                    with open(log_file_jsonl, 'a', encoding='utf-8') as f:
-                                        f.write(json.dumps(new_resp_data, ensure_ascii=False) + "\n")
-                                except Exception:
-                                    pass
-
-                            # 2. TERMINAL UPDATE: Show progress immediately
+                                response_log.append(new_resp_data, r_idx)
+                                report_progress(1)
                             current_progress = sum(len(p.trial_responses) for p in pool.participants)
                             total_expected = n_def * len(trials) if n_def else len(trials) * len(pool.participants)
-                            
-                            # Print progress immediately
                             progress_pct = (current_progress / total_expected * 100) if total_expected > 0 else 0
                             print(f"\r   📊 Progress: {current_progress}/{total_expected} responses ({progress_pct:.1f}%) - Repeat {r_idx + 1}/{repeats}", end='', flush=True)
-                            
-                            # 3. THROTTLED DISK SAVE: Update full_benchmark.json every 5 seconds
-                            if current_time - last_save_time_fallback[0] < 5.0:
-                                return
-                            last_save_time_fallback[0] = current_time
-                            
-                            # Get current partial results from pool
-                            partial_results = pool.aggregate_results()
-                            
-                            # Combine with previous repeats
-                            all_runs_so_far = all_runs_raw_results + [partial_results]
-                            incremental_runs = [{"individual_data": run_data.get('individual_data', [])} for run_data in all_runs_so_far]
-                            incremental_data = {
-                                "timestamp": _dt_module_fallback.now().strftime("%Y%m%d_%H%M%S"),
-                                "study_id": study_id,
-                                "title": study.metadata.get('title', ''),
-                                "model": model,
-                                "reasoning": reasoning,
-                                "use_real_llm": use_real_llm,
-                                "system_prompt_preset": system_prompt_preset,
-                                "random_seed": random_seed,
-                                "repeats_completed": len(all_runs_raw_results),
-                                "repeats_total": repeats,
-                                "current_repeat_progress": current_progress,
-                                "status": "in_progress",
-                                "all_runs_raw_results": incremental_runs
-                            }
-                            # Atomic save: write to tmp then rename
-                            tmp_file = incremental_output_file.with_suffix('.tmp')
-                            with open(tmp_file, 'w', encoding='utf-8', errors='replace') as f:
-                                json.dump(incremental_data, f, indent=2, ensure_ascii=False)
-                            tmp_file.replace(incremental_output_file)
-                        except Exception as e:
+                        except Exception:
                             pass
+                    streamed_to_log = True
                     
                     print(f"\n🚀 Starting simulation: {len(trials)} trials per participant, {n_def} participants, {num_workers or 1} worker(s)", flush=True)
                     
@@ -938,14 +1449,15 @@ class GenerationPipeline:
             
             all_runs_raw_results.append(current_run_raw_results)
             
-            # INCREMENTAL SAVE: Save results after each repeat to prevent data loss
-            # (Output directory structure is set up before the loop)
+            # Group runs and cache hits were not streamed; log the finished repeat now
+            if not streamed_to_log:
+                response_log.extend(current_run_raw_results.get('individual_data', []), r_idx)
+                report_progress(len(current_run_raw_results.get('individual_data', [])))
+            
+            # Compact progress index; the full file is built once after the last repeat
             try:
-                # Prepare incremental save data
-                # Use function-level datetime import to avoid scoping issues
                 from datetime import datetime as _dt_module_incremental
-                incremental_runs = [{"individual_data": run_data.get('individual_data', [])} for run_data in all_runs_raw_results]
-                incremental_data = {
+                atomic_write_json(incremental_output_file, {
                     "timestamp": _dt_module_incremental.now().strftime("%Y%m%d_%H%M%S"),
                     "study_id": study_id,
                     "title": study.metadata.get('title', ''),
@@ -956,17 +1468,15 @@ class GenerationPipeline:
                     "random_seed": random_seed,
                     "repeats_completed": len(all_runs_raw_results),
                     "repeats_total": repeats,
-                    "status": "in_progress" if len(all_runs_raw_results) < repeats else "complete",
-                    "all_runs_raw_results": incremental_runs
-                }
-                
-                # Save incrementally (will be overwritten at final save)
-                with open(incremental_output_file, 'w', encoding='utf-8', errors='replace') as f:
-                    json.dump(incremental_data, f, indent=2, ensure_ascii=False)
-                
-                print(f"💾 Incremental save: {len(all_runs_raw_results)}/{repeats} repeats completed", flush=True)
+                    "status": "in_progress",
+                    "source": log_file_jsonl.name,
+                    "responses_per_repeat": [len(run.get('individual_data', [])) for run in all_runs_raw_results]
+                })
+                print(f"💾 Progress saved: {len(all_runs_raw_results)}/{repeats} repeats completed", flush=True)
             except Exception as e:
-                print(f"⚠️  Warning: Could not save incrementally: {e}", flush=True)
+                print(f"⚠️  Warning: Could not save progress index: {e}", flush=True)
+        
+        response_log.close()
         
         # Try to aggregate results (optional)
         try:
@@ -993,17 +1503,7 @@ class GenerationPipeline:
             run_dir = output_dir / benchmark_folder
         
         # Create config subfolder: {model}_{reasoning}_{prompt_preset}
-        model_slug = model.replace("/", "_").replace("-", "_")
-        prompt_slug = system_prompt_preset.replace("_", "-")
-        
-        # Include temperature in folder name if it's not the default
-        temp_suffix = f"_temp{temperature}" if temperature != 1.0 else ""
-        
-        # Don't add reasoning postfix for "default", "low", or "minimal" (treat as default)
-        if reasoning and reasoning != "default" and reasoning != "low" and reasoning != "minimal":
-            config_folder = f"{model_slug}_{reasoning}{temp_suffix}_{prompt_slug}"
-        else:
-            config_folder = f"{model_slug}{temp_suffix}_{prompt_slug}"
+        config_folder = stage5_config_folder(model, system_prompt_preset, reasoning, temperature)
         
         # Structure: results/{benchmark|runs/{run_name}}/{study_id}/{config_folder}/
         study_dir = run_dir / study_id
@@ -1018,11 +1518,12 @@ class GenerationPipeline:
         existing_metadata = {}
         if merge_existing_repeats and output_file.exists():
             try:
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                existing_data = load_benchmark(output_file, include_raw=True)
                 
-                # Extract existing runs
-                if existing_data.get('all_runs_raw_results'):
+                # Extract existing runs (unless they were already resumed from the log)
+                if existing_progress_data:
+                    existing_runs = []
+                elif existing_data.get('all_runs_raw_results'):
                     existing_runs = existing_data['all_runs_raw_results']
                 elif existing_data.get('individual_data'):
                     # Convert single run to list format
@@ -1038,7 +1539,8 @@ class GenerationPipeline:
                     "random_seed": existing_data.get('random_seed', random_seed),
                 }
                 
-                print(f"📦 Found {len(existing_runs)} existing run(s), adding {repeats} more...")
+                if existing_runs:
+                    print(f"📦 Found {len(existing_runs)} existing run(s), adding {repeats} more...")
             except Exception as e:
                 print(f"⚠️  Could not load existing results for merging: {e}")
                 existing_runs = []
@@ -1160,9 +1662,11 @@ class GenerationPipeline:
         # Calculate overall usage statistics for the saved data
         total_prompt_tokens = 0
         total_completion_tokens = 0
+        total_cached_tokens = 0
         total_tokens = 0
         total_cost = 0.0
         total_participants_all_runs = 0
+        all_responses = []
         
         for run in all_merged_runs:
             participants_data = run.get('individual_data', [])
@@ -1171,20 +1675,24 @@ class GenerationPipeline:
             if is_flat:
                 # Handle flat structure
                 total_participants_all_runs += len(set(resp.get('participant_id') for resp in participants_data))
+                all_responses.extend(participants_data)
                 for resp in participants_data:
                     usage = resp.get('usage', {})
                     total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
                     total_completion_tokens += usage.get('completion_tokens', 0) or 0
+                    total_cached_tokens += usage.get('cached_tokens', 0) or 0
                     total_tokens += usage.get('total_tokens', 0) or 0
                     total_cost += usage.get('cost', 0.0) or 0.0
             else:
                 # Handle nested structure
                 total_participants_all_runs += len(participants_data)
                 for participant in participants_data:
+                    all_responses.extend(participant.get('responses', []))
                     for resp in participant.get('responses', []):
                         usage = resp.get('usage', {})
                         total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
                         total_completion_tokens += usage.get('completion_tokens', 0) or 0
+                        total_cached_tokens += usage.get('cached_tokens', 0) or 0
                         total_tokens += usage.get('total_tokens', 0) or 0
                         total_cost += usage.get('cost', 0.0) or 0.0
         
@@ -1205,6 +1713,7 @@ class GenerationPipeline:
             "usage_stats": {
                 "total_prompt_tokens": total_prompt_tokens,
                 "total_completion_tokens": total_completion_tokens,
+                "total_cached_tokens": total_cached_tokens,
                 "total_tokens": total_tokens,
                 "total_cost": float(total_cost),
                 "avg_tokens_per_participant": float(avg_tokens_per_participant),
@@ -1218,25 +1727,83 @@ class GenerationPipeline:
                 "total_participants": len(cleaned_individual_data) if cleaned_individual_data else 0
             }
         }
-        
-        # Save (overwrite with merged data)
-        with open(output_file, 'w', encoding='utf-8', errors='replace') as f:
-            json.dump(save_data, f, indent=2, ensure_ascii=False)
-        
-        # Save raw responses to separate file
-        raw_responses_file = config_dir / "raw_responses.json"
-        with open(raw_responses_file, 'w', encoding='utf-8', errors='replace') as f:
-            json.dump(raw_responses_data, f, indent=2, ensure_ascii=False)
+        from src.llm.response_cache import get_response_cache
+        active_response_cache = get_response_cache() if use_real_llm else None
+        if active_response_cache is not None:
+            save_data["summary"]["response_cache"] = active_response_cache.stats()
+        if streaming:
+            from src.llm.streaming import summarize_stream_timings
+            stream_summary = summarize_stream_timings(all_responses)
+            if stream_summary is not None:
+                save_data["summary"]["streaming"] = stream_summary
+        if token_budget is not None:
+            save_data["summary"]["token_budget"] = token_budget.stats()
+        if use_real_llm and hedge_quantile is not None:
+            from src.llm.hedging import hedging_stats
+            save_data["summary"]["hedging"] = hedging_stats()
+        
+        # Save (overwrite with merged data) - the only full write of this file per run
+        if storage_format == "compact":
+            # Compact storage keeps raw_response_text itself, so no raw_responses.json
+            write_compact_benchmark(
+                output_file, save_data, runs=[run.get('individual_data', []) for run in all_merged_runs]
+            )
+            raw_responses_file = None
+        else:
+            atomic_write_json(output_file, save_data)
+            
+            # Save raw responses to separate file
+            raw_responses_file = config_dir / "raw_responses.json"
+            with open(raw_responses_file, 'w', encoding='utf-8', errors='replace') as f:
+                json.dump(raw_responses_data, f, indent=2, ensure_ascii=False)
         
         elapsed = time.time() - start_time
         print(f"\n✅ Stage 5 complete!")
         print(f"  - Simulation time: {elapsed:.1f}s")
         print(f"  - Results saved to: {output_file}")
-        print(f"  - Raw responses saved to: {raw_responses_file}")
+        if raw_responses_file is not None:
+            print(f"  - Raw responses saved to: {raw_responses_file}")
+        else:
+            print(f"  - Storage: compact (responses and raw texts in {config_dir})")
         if merge_existing_repeats and total_repeats > repeats:
             print(f"  - Participants: {n_participants}, Total Runs: {total_repeats} ({len(existing_runs)} existing + {repeats} new)")
         else:
             print(f"  - Participants: {n_participants}, Runs: {total_repeats}")
+        if active_response_cache is not None:
+            cache_stats = save_data["summary"]["response_cache"]
+            print(
+                f"  - Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)"
+            )
+        if save_data["summary"].get("streaming"):
+            stream_stats = save_data["summary"]["streaming"]
+            print(
+                f"  - Streaming: {stream_stats['early_stopped']}/{stream_stats['responses']} stopped early, "
+                f"median TTFT {stream_stats['ttft_s']['median']}s, median time-to-complete {stream_stats['total_s']['median']}s"
+            )
+        if save_data["summary"].get("token_budget"):
+            budget_stats = save_data["summary"]["token_budget"]
+            print(
+                f"  - Token budget: {budget_stats['retries']} truncation retries, "
+                f"{budget_stats['truncated']}/{budget_stats['observed']} replies cut before their answers"
+            )
+        for hedger_key, hedge_stats in (save_data["summary"].get("hedging") or {}).items():
+            win_rate = hedge_stats["hedge_win_rate"]
+            print(
+                f"  - Hedging {hedger_key}: {hedge_stats['hedged']}/{hedge_stats['requests']} requests hedged "
+                f"({hedge_stats['extra_fraction']:.1%} extra), hedge won {hedge_stats['hedge_wins']}"
+                + (f" ({win_rate:.0%} win rate)" if win_rate is not None else "")
+                + f", delay {hedge_stats['delay_s']}s"
+            )
+        if use_real_llm:
+            from src.llm.rate_limiter import rate_limiter_stats
+            for limiter_key, limiter_stats in rate_limiter_stats().items():
+                if limiter_stats["rate_limited"] or limiter_stats["wait_seconds"]:
+                    print(
+                        f"  - Rate limiter {limiter_key}: {limiter_stats['rate_limited']} throttled, "
+                        f"{limiter_stats['wait_seconds']:.1f}s waited, "
+                        f"concurrency window {limiter_stats['concurrency_limit'] or 'unbounded'}"
+                    )
         print(f"\nNext step: Run Stage 6 to generate scores")
         print(f"  python generation_pipeline/run.py --stage 6 --study-id {study_id}")
         
@@ -1249,7 +1816,9 @@ class GenerationPipeline:
         skip_generation: bool = False,
         run_name: Optional[str] = None,
         config_folder: Optional[str] = None,
-        disable_formatter: bool = True
+        disable_formatter: bool = True,
+        jobs: int = 1,
+        force: bool = False
     ) -> Path:
         """
         Run stage 6 (Evaluator generation and scoring).
@@ -1260,35 +1829,84 @@ class GenerationPipeline:
             skip_generation: Skip evaluator code generation
             run_name: Name of the run
             config_folder: Specific config folder to evaluate (optional)
+            jobs: Worker processes for evaluating config folders (1 = in this process)
+            force: Re-evaluate config folders whose input fingerprint is unchanged
             
         Returns:
             Path to generated evaluator file
         """
         print(f"Running Stage 6: Generating Evaluator and Computing Scores for {study_id}")
-        import json
-        import os as _os_module
-        from pathlib import Path
+        evaluator_path, config_dirs_to_process = self._prepare_stage6(
+            study_id, study_dir, skip_generation, run_name, config_folder
+        )
         
-        # Determine study directory
-        if study_dir is None:
-            study_dir = Path("data/studies") / study_id
+        print(f"  Processing {len(config_dirs_to_process)} config folder(s)...")
+        run_stage6_tasks(
+            [(study_id, cfg_dir, evaluator_path, disable_formatter, force) for cfg_dir in config_dirs_to_process],
+            jobs=jobs
+        )
+        return evaluator_path
+
+    def run_stage6_studies(
+        self,
+        study_ids: List[str],
+        skip_generation: bool = False,
+        run_name: Optional[str] = None,
+        config_folder: Optional[str] = None,
+        disable_formatter: bool = True,
+        jobs: int = 1,
+        force: bool = False
+    ) -> Dict[str, Path]:
+        """
+        Run stage 6 for several studies, evaluating all their config folders on one worker pool.
         
-        study_dir = Path(study_dir)
-        if not study_dir.exists():
-            raise FileNotFoundError(f"Study directory not found: {study_dir}")
+        Evaluators are generated (or checked) per study first; then every
+        (study, config folder) pair is one task, so a study with many configs
+        does not leave workers idle while another study's single config runs.
         
-        # Check required files exist
-        required_files = ["ground_truth.json", "specification.json"]
-        for fname in required_files:
-            if not (study_dir / fname).exists():
-                raise FileNotFoundError(f"Required file not found: {study_dir / fname}")
+        Args:
+            study_ids: Study IDs to evaluate
+            skip_generation: Skip evaluator code generation
+            run_name: Name of the run
+            config_folder: Specific config folder to evaluate in every study (optional)
+            disable_formatter: Skip re-formatting responses that fail extraction
+            jobs: Worker processes (1 = in this process)
+            force: Re-evaluate config folders whose input fingerprint is unchanged
+            
+        Returns:
+            Study ID -> evaluator path
+        """
+        evaluator_paths: Dict[str, Path] = {}
+        tasks = []
+        for study_id in study_ids:
+            print(f"Running Stage 6: Generating Evaluator and Computing Scores for {study_id}")
+            evaluator_path, config_dirs = self._prepare_stage6(
+                study_id, None, skip_generation, run_name, config_folder
+            )
+            evaluator_paths[study_id] = evaluator_path
+            tasks.extend((study_id, cfg_dir, evaluator_path, disable_formatter, force) for cfg_dir in config_dirs)
         
-        # Generate evaluator (unless skipping)
+        print(f"  Processing {len(tasks)} config folder(s) across {len(study_ids)} studies...")
+        run_stage6_tasks(tasks, jobs=jobs)
+        return evaluator_paths
+
+    def prepare_evaluator(self, study_id: str, study_dir: Optional[Path] = None, skip_generation: bool = False) -> Path:
+        """
+        Generate the study's evaluator with the pipeline's LLM, or check that it exists.
+        
+        Args:
+            study_id: Study ID (e.g., "study_001")
+            study_dir: Study directory path (default: data/studies/{study_id})
+            skip_generation: Only check for an existing evaluator
+            
+        Returns:
+            Path to src/studies/{study_id}_evaluator.py
+        """
+        study_dir = Path(study_dir) if study_dir is not None else Path("data/studies") / study_id
         evaluator_path = Path("src/studies") / f"{study_id}_evaluator.py"
         evaluator_path.parent.mkdir(parents=True, exist_ok=True)
         
         if not skip_generation:
-            from src.generators.evaluator_generator import EvaluatorGenerator
             generator = EvaluatorGenerator(llm_client=self.client)
             success = generator.generate_evaluator(study_id, study_dir, evaluator_path)
             
@@ -1300,6 +1918,34 @@ class GenerationPipeline:
             if not evaluator_path.exists():
                 raise FileNotFoundError(f"Evaluator not found: {evaluator_path}. Run without --skip-generation to generate it first.")
             print(f"  - Using existing evaluator: {evaluator_path}")
+        return evaluator_path
+
+    def _prepare_stage6(
+        self,
+        study_id: str,
+        study_dir: Optional[Path],
+        skip_generation: bool,
+        run_name: Optional[str],
+        config_folder: Optional[str]
+    ) -> Tuple[Path, List[Path]]:
+        """Generate or locate the evaluator and list the config folders to evaluate."""
+        import os as _os_module
+        
+        # Determine study directory
+        if study_dir is None:
+            study_dir = Path("data/studies") / study_id
+        
+        study_dir = Path(study_dir)
+        if not study_dir.exists():
+            raise FileNotFoundError(f"Study directory not found: {study_dir}")
+        
+        # Check required files exist
+        required_files = ["ground_truth.json", "specification.json"]
+        for fname in required_files:
+            if not (study_dir / fname).exists():
+                raise FileNotFoundError(f"Required file not found: {study_dir / fname}")
+        
+        evaluator_path = self.prepare_evaluator(study_id, study_dir, skip_generation)
         
         # Find results base directory
         if run_name:
@@ -1328,340 +1974,5 @@ class GenerationPipeline:
             if len(config_dirs_to_process) > 1:
                 print(f"  - Found {len(config_dirs_to_process)} config folders, evaluating all...")
         
-        # Process each config folder
-        from src.evaluation.evaluator_runner import run_evaluator, load_evaluator
-        import csv
-        import numpy as np
-        from scipy import stats
-        from src.evaluation.stats_lib import aggregate_study_pas
-        
-        last_evaluator_path = evaluator_path
-        
-        print(f"  Processing {len(config_dirs_to_process)} config folder(s)...")
-        for idx, cfg_dir in enumerate(config_dirs_to_process, 1):
-            print(f"\n  >>> [{idx}/{len(config_dirs_to_process)}] Evaluating: {cfg_dir.name}")
-            
-            benchmark_file = cfg_dir / "full_benchmark.json"
-            if not benchmark_file.exists():
-                print(f"  ⚠️  Benchmark file not found in {cfg_dir.name}, skipping.")
-                continue
-            
-            # ===== Load benchmark data =====
-            print(f"  - Loading benchmark data...")
-            with open(benchmark_file, 'r', encoding='utf-8') as f:
-                benchmark_data = json.load(f)
-            print(f"    ✓ Loaded benchmark data")
-            
-            # ===== Calculate Raw Failure Rate =====
-            print(f"  - Calculating raw failure rate...")
-            from src.evaluation.sanity_check import calculate_raw_failure_rate
-            
-            raw_failure_stats = calculate_raw_failure_rate(benchmark_data)
-            raw_failure_rate = raw_failure_stats.get("raw_failure_rate", 0.0)
-            print(f"    → Raw failure rate: {raw_failure_rate:.2f}% ({raw_failure_stats.get('raw_failed', 0)}/{raw_failure_stats.get('raw_total', 0)})")
-            if raw_failure_stats.get('raw_failure_breakdown'):
-                breakdown = raw_failure_stats['raw_failure_breakdown']
-                print(f"      Breakdown: {breakdown.get('empty', 0)} empty, {breakdown.get('refusal', 0)} refusal, {breakdown.get('other', 0)} other")
-            
-            # ===== Sanity Check: Verify response extraction (Final Failure Rate) =====
-            print(f"  - Running sanity check for response extraction...")
-            from src.evaluation.sanity_check import run_sanity_check, format_failed_responses
-            
-            # Count total responses for progress indication
-            total_resp_count = len(benchmark_data.get('individual_data', []))
-            if total_resp_count > 0:
-                print(f"    → Checking {total_resp_count} responses...")
-            
-            sanity_check_result = run_sanity_check(study_id, benchmark_file, evaluator_path)
-            
-            if not sanity_check_result.get("all_passed", True):
-                failed_responses = sanity_check_result.get("failed_responses", [])
-                print(f"  ⚠️  Found {len(failed_responses)}/{sanity_check_result.get('total_checked', 0)} responses that cannot be fully extracted")
-                
-                # 打印一个失败的例子
-                if failed_responses:
-                    example = failed_responses[0]
-                    print(f"\n  Example failed response:")
-                    print(f"    Participant {example['participant_id']}, Response {example['response_index']}")
-                    print(f"    Missing Q numbers: {example['missing_q_numbers']}")
-                    print(f"    Required: {example['required_q_numbers']}")
-                    print(f"    Extracted: {example['extracted_q_numbers']}")
-                    print(f"    Response preview: {example['response_text_preview'][:300]}")
-                
-                # Formatter disabled - skip automatic formatting of failed responses
-                # disable_formatter=True means formatter is disabled (default)
-                # Only run formatter if disable_formatter is False (explicitly enabled)
-                if not disable_formatter:
-                    print(f"  - Activating formatter for failed responses (multithreading enabled)...")
-                    
-                    # 使用多线程格式化失败的响应
-                    formatted_count = format_failed_responses(
-                        study_id=study_id,
-                        benchmark_file=benchmark_file,
-                        failed_responses=failed_responses,
-                        evaluator_path=evaluator_path,
-                        num_workers=32
-                    )
-                    
-                    print(f"  ✓ Formatted {formatted_count}/{len(failed_responses)} responses")
-                    
-                    # 重新运行sanity check验证格式化结果
-                    sanity_check_result = run_sanity_check(study_id, benchmark_file, evaluator_path)
-                    if not sanity_check_result.get("all_passed", True):
-                        remaining_failed = len(sanity_check_result.get("failed_responses", []))
-                        print(f"  ⚠️  Warning: {remaining_failed} responses still cannot be extracted after formatting")
-                    else:
-                        print(f"  ✓ All responses passed sanity check after formatting")
-                else:
-                    print(f"  ⚠️  Skipping formatter (disabled) - {len(failed_responses)} responses failed extraction")
-            else:
-                total_checked = sanity_check_result.get('total_checked', 0)
-                passed = sanity_check_result.get('passed', 0)
-                skipped = sanity_check_result.get('skipped_responses', 0)
-                total = sanity_check_result.get('total_responses', total_checked)
-                if skipped > 0:
-                    print(f"  ✓ All responses passed sanity check ({passed}/{total_checked} checked, {skipped} skipped out of {total} total)")
-                else:
-                    print(f"  ✓ All responses passed sanity check ({passed}/{total_checked})")
-            
-            # ===== Use already loaded benchmark data for evaluation =====
-            individual_data = benchmark_data.get('individual_data', [])
-            all_runs_data = []
-            if benchmark_data.get('all_runs_raw_results'):
-                for run_data in benchmark_data['all_runs_raw_results']:
-                    all_runs_data.append(run_data.get('individual_data', []))
-            else:
-                all_runs_data = [individual_data] if individual_data else []
-            
-            if not all_runs_data or not all_runs_data[0]:
-                print(f"  ⚠️  No raw response data found in benchmark results for {cfg_dir.name}")
-                continue
-            
-            # Load evaluator module once (for bootstrap efficiency)
-            print(f"  - Loading evaluator module...")
-            # #region agent log
-            import json
-            import time
-            from pathlib import Path as _Path
-            def _debug_log_pipe(location, message, data, hypothesis_id=None):
-                try:
-                    log_path = _Path("/Users/assassin808/Desktop/xuan-hs/HS_bench/.cursor/debug.log")
-                    with open(log_path, "a", encoding="utf-8") as f:
-                        log_entry = {"sessionId": "debug-session", "runId": "run1", "hypothesisId": hypothesis_id, "location": location, "message": message, "data": data, "timestamp": int(time.time() * 1000)}
-                        f.write(json.dumps(log_entry) + "\n")
-                except Exception:
-                    pass
-            _debug_log_pipe("pipeline.py:1436", "Before load_evaluator call", {"study_id": study_id, "cfg_dir_name": cfg_dir.name}, "D")
-            # #endregion
-            evaluator_module = load_evaluator(study_id)
-            # #region agent log
-            _debug_log_pipe("pipeline.py:1438", "After load_evaluator call", {"study_id": study_id, "cfg_dir_name": cfg_dir.name, "evaluator_module_is_none": evaluator_module is None}, "D")
-            # #endregion
-            if evaluator_module is None:
-                print(f"    ❌ Failed to load evaluator for {cfg_dir.name}")
-                # #region agent log
-                _debug_log_pipe("pipeline.py:1441", "Evaluator load failed", {"study_id": study_id, "cfg_dir_name": cfg_dir.name}, "D")
-                # #endregion
-                continue
-            print(f"    ✓ Evaluator module loaded")
-            
-            # Combine all participant data from all runs into a single pool
-            combined_participant_pool = []
-            for run_individual_data in all_runs_data:
-                if run_individual_data:
-                    combined_participant_pool.extend(run_individual_data)
-            
-            if not combined_participant_pool:
-                print(f"    ❌ No participant data available for bootstrap")
-                continue
-            
-            # Check if data is flat structure (legacy format) or nested structure (from Stage 5)
-            # Note: Flat structure is kept for backward compatibility with legacy results
-            is_flat_structure = len(combined_participant_pool) > 0 and 'responses' not in combined_participant_pool[0]
-            
-            if is_flat_structure:
-                # Convert flat structure to nested structure for evaluator
-                print(f"    - Converting flat structure to nested structure for evaluator...")
-                nested_participants = defaultdict(lambda: {"responses": [], "profile": {}})
-                
-                for item_response in combined_participant_pool:
-                    p_id = item_response.get("participant_id", 0)
-                    # Ensure profile is copied from the trial_info if available
-                    if not nested_participants[p_id]["profile"] and "trial_info" in item_response and "profile" in item_response["trial_info"]:
-                        nested_participants[p_id]["profile"] = item_response["trial_info"]["profile"]
-                    # Add the response to the participant's responses list
-                    nested_participants[p_id]["responses"].append(item_response)
-                
-                # Convert defaultdict to regular list with participant_id set
-                combined_participant_pool = []
-                for p_id, p_data in nested_participants.items():
-                    p_data["participant_id"] = p_id
-                    combined_participant_pool.append(p_data)
-                
-                print(f"    - Converted {len(nested_participants)} flat responses to {len(combined_participant_pool)} nested participants")
-            
-            n_runs = len(all_runs_data)
-            print(f"    - Processing {n_runs} run(s) with {len(combined_participant_pool)} total participants...")
-            
-            # Get evaluation result (main metric: ECS_corr = CCC)
-            print(f"  - Computing detailed evaluation results...")
-            full_raw_results = {"individual_data": combined_participant_pool}
-            pas_result = evaluator_module.evaluate_study(full_raw_results)
-            
-            if "error" in pas_result:
-                print(f"    ❌ Evaluation failed on full data: {pas_result.get('error')}")
-                continue
-            print(f"    ✓ Detailed evaluation complete")
-            
-            test_results = pas_result.get('test_results', [])
-            from src.evaluation.stats_lib import compute_ecs_corr
-            
-            STUDY_GROUPS = {
-                "Cognition": ["study_001", "study_002", "study_003", "study_004"],
-                "Strategic": ["study_009", "study_010", "study_011", "study_012"],
-                "Social": ["study_005", "study_006", "study_007", "study_008"]
-            }
-            
-            # Compute ECS_corr (CCC = Lin's Concordance Correlation Coefficient) — primary metric only
-            ecs_corr_result = compute_ecs_corr(test_results, study_groups=STUDY_GROUPS)
-            pas_result['ecs_corr'] = ecs_corr_result.get('ecs_overall')  # CCC overall (for this study's tests)
-            pas_result['ecs_corr_details'] = {
-                'n_tests_overall': ecs_corr_result.get('n_tests_overall', 0),
-                'n_tests_per_study': ecs_corr_result.get('n_tests_per_study', {}),
-                'ecs_per_study': ecs_corr_result.get('ecs_per_study', {}),
-                'ecs_domain': ecs_corr_result.get('ecs_domain', {}),
-                'caricature_overall': ecs_corr_result.get('caricature_overall', {'a': None, 'b': None}),
-            }
-            result_study_id = pas_result.get('study_id')
-            if result_study_id and result_study_id in ecs_corr_result.get('ecs_per_study', {}):
-                pas_result['ecs_corr_study'] = ecs_corr_result['ecs_per_study'][result_study_id]
-            else:
-                pas_result['ecs_corr_study'] = pas_result.get('ecs_corr')
-            
-            # ECS missing rate: fraction of tests without valid human_effect_d / agent_effect_d
-            n_total = len(test_results)
-            n_valid = ecs_corr_result.get('n_tests_overall', 0)
-            pas_result['ecs_corr_details']['ecs_missing_rate'] = (1.0 - (n_valid / n_total)) if n_total > 0 else None
-            
-            pas_result.update({
-                'n_participants': len(combined_participant_pool),
-                'n_runs': n_runs,
-            })
-
-            # ===== Calculate Usage Statistics =====
-            total_prompt_tokens = 0
-            total_completion_tokens = 0
-            total_tokens = 0
-            total_cost = 0.0
-            
-            # Check if data is flat or nested to iterate correctly
-            is_flat_structure = len(combined_participant_pool) > 0 and 'responses' not in combined_participant_pool[0]
-            
-            if is_flat_structure:
-                # Handle flat structure: each item is a trial response
-                for resp in combined_participant_pool:
-                    usage = resp.get('usage', {})
-                    total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
-                    total_completion_tokens += usage.get('completion_tokens', 0) or 0
-                    total_tokens += usage.get('total_tokens', 0) or 0
-                    total_cost += usage.get('cost', 0.0) or 0.0
-                n_participants_count = len(set(resp.get('participant_id') for resp in combined_participant_pool))
-            else:
-                # Handle nested structure: each item is a participant with multiple responses
-                for participant in combined_participant_pool:
-                    for resp in participant.get('responses', []):
-                        usage = resp.get('usage', {})
-                        total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
-                        total_completion_tokens += usage.get('completion_tokens', 0) or 0
-                        total_tokens += usage.get('total_tokens', 0) or 0
-                        total_cost += usage.get('cost', 0.0) or 0.0
-                n_participants_count = len(combined_participant_pool)
-            
-            avg_tokens_per_participant = total_tokens / n_participants_count if n_participants_count > 0 else 0
-            avg_cost_per_participant = total_cost / n_participants_count if n_participants_count > 0 else 0
-            
-            # ===== Calculate Final Failure Rate (from sanity check) =====
-            final_failed = sanity_check_result.get('failed', 0)
-            final_total = sanity_check_result.get('total_checked', 0)
-            final_failure_rate = (final_failed / final_total * 100.0) if final_total > 0 else 0.0
-            
-            print(f"      → Final failure rate: {final_failure_rate:.2f}% ({final_failed}/{final_total})")
-            
-            pas_result.update({
-                'usage_stats': {
-                    'total_prompt_tokens': total_prompt_tokens,
-                    'total_completion_tokens': total_completion_tokens,
-                    'total_tokens': total_tokens,
-                    'total_cost': float(total_cost),
-                    'avg_tokens_per_participant': float(avg_tokens_per_participant),
-                    'avg_cost_per_participant': float(avg_cost_per_participant)
-                },
-                'failure_rates': {
-                    'raw_failure_rate': float(raw_failure_rate),
-                    'raw_failed': raw_failure_stats.get('raw_failed', 0),
-                    'raw_total': raw_failure_stats.get('raw_total', 0),
-                    'raw_failure_breakdown': raw_failure_stats.get('raw_failure_breakdown', {}),
-                    'final_failure_rate': float(final_failure_rate),
-                    'final_failed': final_failed,
-                    'final_total': final_total
-                }
-            })
-            
-            # Print usage summary
-            print(f"      → Usage: Total {total_tokens} tokens, Total Cost ${total_cost:.4f}")
-            print(f"      → Average per participant: {avg_tokens_per_participant:.1f} tokens, ${avg_cost_per_participant:.6f}")
-            
-            # Save detailed CSV
-            print(f"  - Saving results...")
-            csv_path = cfg_dir / "detailed_stats.csv"
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                header = [
-                    "Study_ID", "Sub_Study_ID", "Finding_ID", "Test_Name", "Scenario",
-                    "Statistical_Test_Type", "Human_Test_Statistic", "Agent_Test_Statistic",
-                    "Z_Diff", "ECS_Test", "Agent_Effect_Size", "Human_Effect_Size",
-                    "Agent_Effect_d", "Human_Effect_d"
-                ]
-                writer.writerow(header)
-                for test in pas_result.get('test_results', []):
-                    z_diff = test.get('z_diff')
-                    rep_cons = test.get('replication_consistency')
-                    agent_es = test.get('agent_effect_size')
-                    human_es = test.get('human_effect_size')
-                    agent_ed = test.get('agent_effect_d')
-                    human_ed = test.get('human_effect_d')
-                    z_diff_str = f"{z_diff:.4f}" if z_diff is not None else ""
-                    rep_cons_str = f"{rep_cons:.4f}" if rep_cons is not None else ""
-                    agent_es_str = f"{agent_es:.4f}" if agent_es is not None else ""
-                    human_es_str = f"{human_es:.4f}" if human_es is not None else ""
-                    agent_ed_str = f"{agent_ed:.4f}" if agent_ed is not None else ""
-                    human_ed_str = f"{human_ed:.4f}" if human_ed is not None else ""
-                    row = [
-                        study_id,
-                        test.get('sub_study_id', ''),
-                        test.get('finding_id', ''),
-                        test.get('test_name', ''),
-                        test.get('scenario', ''),
-                        test.get('statistical_test_type', ''),
-                        test.get('human_test_statistic', ''),
-                        test.get('agent_test_statistic', ''),
-                        z_diff_str,
-                        rep_cons_str,
-                        agent_es_str,
-                        human_es_str,
-                        agent_ed_str,
-                        human_ed_str
-                    ]
-                    writer.writerow(row)
-            
-            json_path = cfg_dir / "evaluation_results.json"
-            from src.utils.io import atomic_write_json
-            atomic_write_json(json_path, pas_result, indent=2, ensure_ascii=False, encoding='utf-8', errors='replace')
-            
-            ecs_val = pas_result.get('ecs_corr')
-            ecs_str = f"{ecs_val:.4f}" if ecs_val is not None else "N/A (need ≥3 tests)"
-            print(f"    ✅ Results saved: ECS_corr (CCC) = {ecs_str}")
-            print(f"    ✓ Saved to: {csv_path.name}, {json_path.name}")
-        
-        return last_evaluator_path
+        return evaluator_path, config_dirs_to_process
 
@@ -8,6 +8,7 @@ Usage:
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -117,7 +118,8 @@ def main():
         "--api-base",
         type=str,
         default=None,
-        help="API base URL (e.g. for OpenRouter: https://openrouter.ai/api/v1)"
+        help="API base URL (e.g. for OpenRouter: https://openrouter.ai/api/v1). Stage 5 sends the "
+             "participant calls there too, e.g. to the local mock server (python -m src.llm.mock_server)"
     )
     parser.add_argument(
         "--file",
@@ -161,6 +163,86 @@ def main():
         type=int,
         help="Number of parallel workers (for Stage 5)"
     )
+    parser.add_argument(
+        "--execution-mode",
+        type=str,
+        default="threads",
+        choices=["threads", "async", "batch"],
+        help="Stage 5 execution engine: thread pool (default), asyncio with async LLM clients, "
+             "or the OpenAI/Anthropic Batch API"
+    )
+    parser.add_argument(
+        "--batch-poll-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between Batch API status checks with --execution-mode batch (default: 30)"
+    )
+    parser.add_argument(
+        "--prompt-caching",
+        action="store_true",
+        help="Put the prompt prefix shared by all participants first so providers can cache it "
+             "(Anthropic cache_control; automatic prefix caching on OpenAI-compatible APIs). Changes the prompt layout."
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stage 5: stream completions and stop each one as soon as all required Q answers are parsed "
+             "(threads/async modes); records time-to-first-token and time-to-complete per response"
+    )
+    parser.add_argument(
+        "--max-tokens-percentile",
+        type=float,
+        default=None,
+        help="Stage 5: adaptive max_tokens at this percentile (e.g. 0.99) of completion lengths from earlier "
+             "raw_responses.jsonl logs of the same study/configuration; truncated replies are retried with a "
+             "larger budget (default: fixed 8192)"
+    )
+    parser.add_argument(
+        "--hedge-quantile",
+        type=float,
+        default=None,
+        help="Stage 5: hedge LLM calls slower than this quantile (e.g. 0.95) of recent latencies for the model "
+             "with a duplicate request; the first reply wins and the other is cancelled (default: off)"
+    )
+    parser.add_argument(
+        "--hedge-max-extra",
+        type=float,
+        default=0.1,
+        help="Max fraction of requests that hedging may duplicate (default: 0.1)"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Max in-flight requests for --execution-mode async (for Stage 5)"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests/min budget for the model, shared by all workers (for Stage 5; env: HS_BENCH_RPM)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens/min budget for the model, shared by all workers (for Stage 5; env: HS_BENCH_TPM)"
+    )
+    parser.add_argument(
+        "--response-cache",
+        type=str,
+        help="SQLite file for the per-request LLM response cache (for Stage 5; env: HS_BENCH_RESPONSE_CACHE)"
+    )
+    parser.add_argument(
+        "--response-cache-max-mb",
+        type=int,
+        default=2048,
+        help="Response cache size budget in MB before LRU eviction (default: 2048)"
+    )
+    parser.add_argument(
+        "--storage-format",
+        type=str,
+        choices=["json", "compact"],
+        default="json",
+        help="Stage 5 output format: plain JSON, or deduplicated + compressed 'compact' storage (default: json)"
+    )
     parser.add_argument(
         "--use-cache",
         action="store_true",
@@ -222,6 +304,18 @@ def main():
         type=str,
         help="Specific config folder to evaluate (for Stage 6, e.g., 'mistralai_mistral_small_creative_temp0.7_v2-human')"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-evaluate config folders even if their input fingerprint is unchanged (for Stage 6)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for Stage 6 evaluation of config folders (default: 1; <= 0 uses all CPUs). "
+             "With several --study-id values (comma-separated), all their config folders share the pool."
+    )
     
     args = parser.parse_args()
     stage = int(args.stage) if args.stage.isdigit() else args.stage
@@ -412,7 +506,21 @@ def main():
                 merge_existing_repeats=args.merge_repeats,
                 reasoning=args.reasoning,
                 enable_reasoning=args.enable_reasoning,
-                temperature=args.temperature
+                temperature=args.temperature,
+                execution_mode=args.execution_mode,
+                max_concurrency=args.max_concurrency,
+                rpm=args.rpm,
+                tpm=args.tpm,
+                response_cache=args.response_cache,
+                response_cache_max_mb=args.response_cache_max_mb,
+                batch_poll_interval=args.batch_poll_interval,
+                storage_format=args.storage_format,
+                prompt_caching=args.prompt_caching,
+                api_base=args.api_base,
+                streaming=args.streaming,
+                max_tokens_percentile=args.max_tokens_percentile,
+                hedge_quantile=args.hedge_quantile,
+                hedge_max_extra=args.hedge_max_extra
             )
             print(f"\n✓ Stage 5 complete!")
             print(f"  Results saved to: {result_path}")
@@ -422,18 +530,33 @@ def main():
             if not args.study_id:
                 raise ValueError("--study-id is required for Stage 6")
             
-            if args.skip_generation:
-                print(f"Re-running Evaluation for {args.study_id} (skipping generation)")
+            jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+            study_ids = [s.strip() for s in args.study_id.split(",") if s.strip()]
+            if len(study_ids) > 1:
+                evaluator_paths = pipeline.run_stage6_studies(
+                    study_ids,
+                    skip_generation=args.skip_generation,
+                    run_name=args.run_name,
+                    config_folder=args.config_folder,
+                    jobs=jobs,
+                    force=args.force
+                )
+                print(f"\n✓ Stage 6 complete for {len(evaluator_paths)} studies!")
             else:
-                print(f"Generating Evaluator and Computing Scores for {args.study_id}")
-            evaluator_path = pipeline.run_stage6(
-                args.study_id, 
-                skip_generation=args.skip_generation, 
-                run_name=args.run_name,
-                config_folder=args.config_folder
-            )
-            print(f"\n✓ Stage 6 complete!")
-            print(f"  Evaluator code saved to: {evaluator_path}")
+                if args.skip_generation:
+                    print(f"Re-running Evaluation for {args.study_id} (skipping generation)")
+                else:
+                    print(f"Generating Evaluator and Computing Scores for {args.study_id}")
+                evaluator_path = pipeline.run_stage6(
+                    args.study_id, 
+                    skip_generation=args.skip_generation, 
+                    run_name=args.run_name,
+                    config_folder=args.config_folder,
+                    jobs=jobs,
+                    force=args.force
+                )
+                print(f"\n✓ Stage 6 complete!")
+                print(f"  Evaluator code saved to: {evaluator_path}")
 
         # stage "final" handled above (early return)
     
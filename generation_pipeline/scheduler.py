@@ -0,0 +1,481 @@
+"""
+In-process scheduler for Stage 5/6 sweeps over models × presets × studies × repeats.
+
+The orchestration scripts used to start ``generation_pipeline/run.py --stage N``
+once per study × preset × stage. Every subprocess re-imported the scientific
+stack and the SDKs and owned its own worker pool, HTTP clients, rate limiters
+and caches. The sweep had no shared view of a provider's limits, and the
+provider sat idle whenever one study's slow tail held up the next subprocess.
+
+SweepScheduler runs the sweep in one process as a task graph:
+
+- ``simulate`` (study × model × preset): GenerationPipeline.run_stage5 with all
+  repeats of the configuration. Up to ``max_parallel`` run at once, so the next
+  configurations start while earlier ones drain their tail. They all share the
+  process-wide client pool, rate limiters (budgets are set once for the sweep),
+  hedgers and response cache.
+- ``evaluator`` (per study, only with ``generate_evaluators``): evaluator code
+  generation, which runs alongside the simulations.
+- ``evaluate`` (per configuration): Stage 6 scoring of the configuration's
+  folder, started as soon as its simulation (and evaluator) is done. It runs on
+  separate workers, so CPU-bound scoring overlaps API-bound simulation.
+
+A failed task skips the tasks that depend on it; the rest of the sweep goes on.
+Task output goes to a sweep log file. The console gets periodic progress lines
+with throughput and an ETA for the whole sweep.
+"""
+
+import io
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+from generation_pipeline.pipeline import (
+    _evaluate_config_folder_captured,
+    _warm_stage6_worker,
+    evaluate_config_folder,
+    stage5_config_folder,
+)
+
+# run_stage5 arguments set per task or once per sweep by the scheduler
+_SCHEDULER_STAGE5_ARGS = ("study_id", "model", "system_prompt_preset", "rpm", "tpm", "progress_callback")
+
+_FINISHED = ("done", "failed", "skipped")
+
+
+@dataclass
+class SweepTask:
+    """One node of the sweep graph."""
+
+    task_id: str
+    kind: str  # "simulate" | "evaluator" | "evaluate"
+    study_id: str
+    model: Optional[str] = None
+    preset: Optional[str] = None
+    config_folder: Optional[str] = None
+    deps: List[str] = field(default_factory=list)
+    status: str = "pending"  # pending | running | done | failed | skipped
+    error: Optional[str] = None
+    result: Any = None
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    # Simulations: responses collected so far / expected by this run (None = unknown)
+    responses_done: int = 0
+    responses_expected: Optional[int] = None
+
+    @property
+    def seconds(self) -> Optional[float]:
+        if self.started is None:
+            return None
+        return (self.finished or time.monotonic()) - self.started
+
+
+def build_sweep(
+    models: Sequence[str],
+    presets: Sequence[str],
+    study_ids: Sequence[str],
+    reasoning: str = "default",
+    temperature: float = 1.0,
+    evaluate: bool = True,
+    generate_evaluators: bool = False,
+) -> List[SweepTask]:
+    """
+    Task graph of a sweep (repeats are run within each simulate task).
+
+    Simulations are listed study by study with the models innermost, so the
+    simulations running at the same time are spread over the sweep's models
+    (and providers). Each is followed by its evaluate task.
+
+    Args:
+        models: Participant models
+        presets: System prompt presets
+        study_ids: Studies
+        reasoning: Reasoning effort (must match the run_stage5 arguments; it names the config folders)
+        temperature: Sampling temperature (idem)
+        evaluate: Add an evaluate task per configuration
+        generate_evaluators: Add an evaluator generation task per study that evaluations wait for
+    """
+    tasks: List[SweepTask] = []
+    seen = set()
+    if evaluate and generate_evaluators:
+        tasks.extend(SweepTask(f"evaluator:{study_id}", "evaluator", study_id) for study_id in study_ids)
+    for study_id in study_ids:
+        for preset in presets:
+            for model in models:
+                folder = stage5_config_folder(model, preset, reasoning, temperature)
+                if (study_id, folder) in seen:
+                    continue
+                seen.add((study_id, folder))
+                simulate = SweepTask(f"simulate:{study_id}/{folder}", "simulate", study_id, model, preset, folder)
+                tasks.append(simulate)
+                if evaluate:
+                    deps = [simulate.task_id] + ([f"evaluator:{study_id}"] if generate_evaluators else [])
+                    tasks.append(SweepTask(f"evaluate:{study_id}/{folder}", "evaluate", study_id, model, preset, folder, deps=deps))
+    return tasks
+
+
+class _RoutedStream(io.TextIOBase):
+    """sys.stdout / sys.stderr stand-in: the main thread writes to the console, task threads to the sweep log."""
+
+    def __init__(self, console: TextIO, log: TextIO, lock: threading.Lock):
+        self._console = console
+        self._log = log
+        self._lock = lock
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if threading.current_thread() is threading.main_thread():
+            return self._console.write(text)
+        with self._lock:
+            self._log.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self._console.flush()
+        with self._lock:
+            self._log.flush()
+
+
+class SweepScheduler:
+    """
+    Run a sweep task graph (see build_sweep) in this process.
+
+    Example:
+        tasks = build_sweep(["gpt-4o-mini", "mistralai/mistral-nemo"], ["v1_empty", "v3_human_plus_demo"], studies)
+        scheduler = SweepScheduler(pipeline, tasks, {"use_real_llm": True, "repeats": 3, "num_workers": 32},
+                                   rpm=3000, max_in_flight=64, log_path=Path("results/sweep.log"))
+        summary = scheduler.run()
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        tasks: List[SweepTask],
+        stage5_kwargs: Optional[Dict[str, Any]] = None,
+        max_parallel: int = 4,
+        eval_jobs: int = 1,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        force_evaluation: bool = False,
+        log_path: Optional[Path] = None,
+        report_interval: float = 30.0,
+    ):
+        """
+        Args:
+            pipeline: GenerationPipeline (its LLM client is only used for evaluator generation)
+            tasks: Task graph from build_sweep
+            stage5_kwargs: Arguments for every run_stage5 call (use_real_llm, repeats,
+                num_workers, run_name, reasoning, temperature, ...)
+            max_parallel: Simulations (and evaluator generations) running at once
+            eval_jobs: Worker processes for evaluate tasks (1 = one thread in this process)
+            rpm: Requests/min budget per model, shared by all its simulations
+            tpm: Tokens/min budget per model, shared by all its simulations
+            max_in_flight: Max concurrent requests per model across the sweep
+            force_evaluation: Re-evaluate config folders whose input fingerprint is unchanged
+            log_path: File receiving the output of all tasks (None = print it as it comes)
+            report_interval: Seconds between console progress lines
+        """
+        stage5_kwargs = dict(stage5_kwargs or {})
+        reserved = [key for key in _SCHEDULER_STAGE5_ARGS if key in stage5_kwargs]
+        if reserved:
+            raise ValueError(f"stage5_kwargs must not set {reserved}; they are set per task or by the scheduler")
+        ids = [task.task_id for task in tasks]
+        if len(set(ids)) != len(ids):
+            raise ValueError("task ids must be unique")
+        self.pipeline = pipeline
+        self.tasks = tasks
+        self.stage5_kwargs = stage5_kwargs
+        self.max_parallel = max(1, int(max_parallel))
+        self.eval_jobs = max(1, int(eval_jobs))
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self.force_evaluation = force_evaluation
+        self.log_path = Path(log_path) if log_path else None
+        self.report_interval = report_interval
+        self._by_id = {task.task_id: task for task in tasks}
+        self._start: Optional[float] = None
+        self._console_stream: TextIO = sys.stdout
+        self._log_file: Optional[TextIO] = None
+        self._log_lock = threading.Lock()
+
+    # Running -----------------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        """Run every task to completion (or failure); returns summary()."""
+        self._configure_rate_limits()
+        self._start = time.monotonic()
+        study_ids = sorted({task.study_id for task in self.tasks})
+        task_pool = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="sweep")
+        if self.eval_jobs > 1:
+            eval_pool = ProcessPoolExecutor(max_workers=self.eval_jobs, initializer=_warm_stage6_worker, initargs=(study_ids,))
+        else:
+            eval_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sweep-eval")
+        running: Dict[Future, SweepTask] = {}
+        clean_exit = False
+        with self._routed_output():
+            n_sim = sum(1 for task in self.tasks if task.kind == "simulate")
+            self._console(
+                f"🗓️  Sweep: {len(self.tasks)} tasks ({n_sim} simulations) over {len(study_ids)} studies, "
+                f"{self.max_parallel} at a time" + (f"; task output in {self.log_path}" if self.log_path else "")
+            )
+            next_report = self._start + self.report_interval
+            try:
+                while True:
+                    self._submit_ready(task_pool, eval_pool, running)
+                    if not running:
+                        break
+                    done, _ = wait(list(running), timeout=max(0.0, next_report - time.monotonic()), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(running.pop(future), future)
+                    if time.monotonic() >= next_report:
+                        self._console(self.progress_line())
+                        next_report = time.monotonic() + self.report_interval
+                clean_exit = True
+            finally:
+                task_pool.shutdown(wait=clean_exit, cancel_futures=True)
+                eval_pool.shutdown(wait=clean_exit, cancel_futures=True)
+            self._console(self.progress_line())
+        return self.summary()
+
+    def _configure_rate_limits(self) -> None:
+        if not (self.rpm or self.tpm or self.max_in_flight):
+            return
+        from src.llm.rate_limiter import configure_rate_limits
+        for model in sorted({task.model for task in self.tasks if task.kind == "simulate"}):
+            configure_rate_limits(model=model, rpm=self.rpm, tpm=self.tpm, max_concurrency=self.max_in_flight)
+
+    def _submit_ready(self, task_pool: ThreadPoolExecutor, eval_pool: Any, running: Dict[Future, SweepTask]) -> None:
+        """Start every task whose dependencies are done; skip those with a failed dependency."""
+        n_active = sum(1 for task in running.values() if task.kind != "evaluate")
+        for task in self.tasks:
+            if task.status != "pending":
+                continue
+            deps = [self._by_id[dep] for dep in task.deps]
+            failed = [dep.task_id for dep in deps if dep.status in ("failed", "skipped")]
+            if failed:
+                task.status = "skipped"
+                task.error = f"dependency not done: {', '.join(failed)}"
+                self._console(f"  ⏭️  {task.task_id} skipped ({task.error})")
+                continue
+            if not all(dep.status == "done" for dep in deps):
+                continue
+            if task.kind != "evaluate" and n_active >= self.max_parallel:
+                continue
+            self._log(f"\n===== [{task.task_id}] started =====\n")
+            task.status = "running"
+            task.started = time.monotonic()
+            if task.kind == "evaluate":
+                future = self._submit_evaluate(eval_pool, task)
+            else:
+                future = task_pool.submit(self._run_task, task)
+                n_active += 1
+            running[future] = task
+
+    def _run_task(self, task: SweepTask) -> Any:
+        """Worker-thread body of simulate and evaluator tasks."""
+        if task.kind == "evaluator":
+            return self.pipeline.prepare_evaluator(task.study_id)
+
+        def progress(done: int, expected: Optional[int]) -> None:
+            task.responses_done = done
+            task.responses_expected = expected
+
+        return self.pipeline.run_stage5(
+            task.study_id,
+            model=task.model,
+            system_prompt_preset=task.preset,
+            progress_callback=progress,
+            **self.stage5_kwargs,
+        )
+
+    def _submit_evaluate(self, eval_pool: Any, task: SweepTask) -> Future:
+        simulate = self._by_id[task.deps[0]]
+        cfg_dir = Path(simulate.result).parent
+        evaluator_path = Path("src/studies") / f"{task.study_id}_evaluator.py"
+        args = (task.study_id, cfg_dir, evaluator_path, True, self.force_evaluation)
+        if self.eval_jobs > 1:
+            return eval_pool.submit(_evaluate_config_folder_captured, args)
+        return eval_pool.submit(evaluate_config_folder, *args)
+
+    def _finish(self, task: SweepTask, future: Future) -> None:
+        task.finished = time.monotonic()
+        try:
+            result = future.result()
+            if task.kind == "evaluate" and self.eval_jobs > 1:
+                output, result, error = result
+                self._log(output, console_fallback=True)
+                if error is not None:
+                    raise RuntimeError(error)
+        except (Exception, SystemExit) as e:
+            task.status = "failed"
+            task.error = f"{type(e).__name__}: {e}"
+            self._log(f"\n===== [{task.task_id}] failed =====\n{traceback.format_exc()}", console_fallback=True)
+            self._console(f"  ❌ {task.task_id} failed after {task.seconds:.0f}s: {task.error}")
+            return
+        task.result = result
+        task.status = "done"
+        self._log(f"\n===== [{task.task_id}] done in {task.seconds:.1f}s =====\n")
+        detail = f", {task.responses_done} responses" if task.kind == "simulate" else ""
+        if task.kind == "evaluate" and isinstance(result, dict) and result.get("ecs_corr") is not None:
+            detail = f", ECS_corr {result['ecs_corr']:.4f}"
+        self._console(f"  ✅ {task.task_id} ({task.seconds:.0f}s{detail})")
+
+    # Output ------------------------------------------------------------------------
+
+    @contextmanager
+    def _routed_output(self) -> Iterator[None]:
+        """Send task threads' stdout/stderr to the sweep log while the sweep runs."""
+        self._console_stream = sys.stdout
+        if self.log_path is None:
+            yield
+            return
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        saved = (sys.stdout, sys.stderr)
+        with open(self.log_path, "a", encoding="utf-8", errors="replace") as log_file:
+            self._log_file = log_file
+            sys.stdout = _RoutedStream(saved[0], log_file, self._log_lock)
+            sys.stderr = _RoutedStream(saved[1], log_file, self._log_lock)
+            try:
+                yield
+            finally:
+                sys.stdout, sys.stderr = saved
+                self._log_file = None
+
+    def _log(self, text: str, console_fallback: bool = False) -> None:
+        """Write to the sweep log; without one, ``console_fallback`` text goes to the console."""
+        if not text:
+            return
+        if self._log_file is None:
+            if console_fallback:
+                print(text, end="" if text.endswith("\n") else "\n", file=self._console_stream, flush=True)
+            return
+        with self._log_lock:
+            self._log_file.write(text)
+            self._log_file.flush()
+
+    def _console(self, line: str) -> None:
+        print(line, file=self._console_stream, flush=True)
+        if self._log_file is not None:
+            self._log(line + "\n")
+
+    # Reporting ---------------------------------------------------------------------
+
+    def progress(self) -> Dict[str, Any]:
+        """
+        Sweep-wide progress: task counts, responses collected, throughput and ETA.
+
+        Responses still to come are known for started simulations. Simulations
+        that have not started yet (and group experiments) are estimated from the
+        known response counts of the same study, else of the whole sweep. The
+        ETA is None until there is a rate and an estimate for every simulation.
+        """
+        elapsed = time.monotonic() - self._start if self._start is not None else 0.0
+        simulations = [task for task in self.tasks if task.kind == "simulate"]
+        sizes: Dict[str, List[int]] = {}
+        for task in simulations:
+            size = task.responses_done if task.status == "done" else task.responses_expected
+            if size:
+                sizes.setdefault(task.study_id, []).append(size)
+        all_sizes = [size for study_sizes in sizes.values() for size in study_sizes]
+
+        remaining: Optional[float] = 0.0
+        for task in simulations:
+            if task.status in _FINISHED:
+                continue
+            if task.responses_expected is not None:
+                expected = task.responses_expected
+            else:
+                samples = sizes.get(task.study_id) or all_sizes
+                if not samples:
+                    remaining = None
+                    break
+                expected = sum(samples) / len(samples)
+            remaining += max(0.0, expected - task.responses_done)
+
+        responses = sum(task.responses_done for task in simulations)
+        rate = responses / elapsed if elapsed > 0 else 0.0
+        eta = remaining / rate if remaining is not None and rate > 0 else (0.0 if remaining == 0 else None)
+        by_status = {status: sum(1 for task in self.tasks if task.status == status) for status in ("pending", "running", "done", "failed", "skipped")}
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "tasks": len(self.tasks),
+            **by_status,
+            "responses": responses,
+            "responses_remaining": int(round(remaining)) if remaining is not None else None,
+            "responses_per_second": round(rate, 2),
+            "eta_s": round(eta, 1) if eta is not None else None,
+        }
+
+    def progress_line(self) -> str:
+        p = self.progress()
+        finished = p["done"] + p["failed"] + p["skipped"]
+        line = f"[sweep {_format_duration(p['elapsed_s'])}] {finished}/{p['tasks']} tasks finished, {p['running']} running"
+        if p["failed"] or p["skipped"]:
+            line += f" ({p['failed']} failed, {p['skipped']} skipped)"
+        line += f" | {p['responses']} responses, {p['responses_per_second']:.1f}/s"
+        if p["responses_remaining"]:
+            line += f", ~{p['responses_remaining']} to go"
+        return line + f" | ETA {_format_duration(p['eta_s']) if p['eta_s'] is not None else '?'}"
+
+    def summary(self) -> Dict[str, Any]:
+        """Progress, per-model throughput, per-task results and the shared limiter/hedging/cache stats."""
+        from src.llm.hedging import hedging_stats
+        from src.llm.rate_limiter import rate_limiter_stats
+        from src.llm.response_cache import get_response_cache
+
+        progress = self.progress()
+        elapsed = progress["elapsed_s"] or 0.0
+        by_model: Dict[str, Dict[str, Any]] = {}
+        simulations, evaluations = [], []
+        for task in self.tasks:
+            record = {
+                "study_id": task.study_id, "config": task.config_folder, "status": task.status,
+                "seconds": round(task.seconds, 1) if task.seconds is not None else None, "error": task.error,
+            }
+            if task.kind == "simulate":
+                record.update(model=task.model, preset=task.preset, responses=task.responses_done,
+                              results=str(task.result) if task.result else None)
+                simulations.append(record)
+                model_stats = by_model.setdefault(task.model, {"responses": 0})
+                model_stats["responses"] += task.responses_done
+            elif task.kind == "evaluate":
+                result = task.result if isinstance(task.result, dict) else {}
+                record.update(ecs_corr=result.get("ecs_corr"), up_to_date=result.get("up_to_date"))
+                evaluations.append(record)
+        for model_stats in by_model.values():
+            model_stats["responses_per_second"] = round(model_stats["responses"] / elapsed, 2) if elapsed else 0.0
+        cache = get_response_cache() if self.stage5_kwargs.get("use_real_llm") else None
+        return {
+            **progress,
+            "failed_tasks": [{"task": task.task_id, "error": task.error} for task in self.tasks if task.status == "failed"],
+            "skipped_tasks": [task.task_id for task in self.tasks if task.status == "skipped"],
+            "by_model": by_model,
+            "simulations": simulations,
+            "evaluations": evaluations,
+            "rate_limiters": rate_limiter_stats(),
+            "hedging": hedging_stats(),
+            "response_cache": cache.stats() if cache is not None else None,
+        }
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
@@ -8,7 +8,6 @@ This script generates LaTeX tables showing:
 3. All other metrics (PAS, ECS, APR) at all hierarchical levels
 """
 
-import json
 import argparse
 from pathlib import Path
 from collections import defaultdict
@@ -126,8 +125,9 @@ def compute_p_null_fisher_pooled(z_values: List[float], weights: List[float]) ->
 
 
 def load_evaluation_results(results_dir: Path, model: str, method: str) -> Dict:
-    """Load evaluation_results.json for a specific model-method combination."""
-    # Try to find the evaluation_results.json file
+    """Load evaluation_results.json for a specific model-method combination (via the results warehouse)."""
+    from src.utils.results_warehouse import open_warehouse
+
     # Structure: results/benchmark/{study_id}/{model}_{method}/evaluation_results.json
     all_results = {}
     
@@ -135,18 +135,10 @@ def load_evaluation_results(results_dir: Path, model: str, method: str) -> Dict:
     if not benchmark_dir.exists():
         return all_results
     
-    for study_dir in benchmark_dir.glob("study_*"):
-        study_id = study_dir.name
-        config_dir = study_dir / f"{model}_{method}"
-        
-        eval_file = config_dir / "evaluation_results.json"
-        if eval_file.exists():
-            try:
-                with open(eval_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                all_results[study_id] = data
-            except Exception as e:
-                print(f"Warning: Failed to load {eval_file}: {e}")
+    with open_warehouse(benchmark_dir) as warehouse:
+        for row in warehouse.configs(config=f"{model}_{method}"):
+            if row["evaluation"]:
+                all_results[row["study_id"]] = row["evaluation"]
     
     return all_results
 
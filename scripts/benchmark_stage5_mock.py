@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark of Stage 5 against the local mock LLM server.
+
+Runs GenerationPipeline.run_stage5 with use_real_llm=True, so requests go
+through the real SDK clients, rate limiter, retries and raw_responses.jsonl
+logging; only the provider is replaced by src.llm.mock_server.
+
+Usage:
+    python scripts/benchmark_stage5_mock.py --study-id study_002 --n-trials 10000 --num-workers 128
+    python scripts/benchmark_stage5_mock.py --execution-mode async --max-concurrency 512 --error-rate-429 0.02
+    python scripts/benchmark_stage5_mock.py --streaming --extra-tokens uniform:200,800  # early-stop savings
+    python scripts/benchmark_stage5_mock.py --hedge-quantile 0.95 --latency lognormal:0.6,1.2  # heavy tail
+    python scripts/benchmark_stage5_mock.py --api-base http://127.0.0.1:8765/v1  # external mock server
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.llm.mock_server import MockLLMServer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Stage 5 throughput against the local mock LLM server")
+    parser.add_argument("--study-id", default="study_002")
+    parser.add_argument("--n-trials", type=int, default=10000, help="Trials per repeat (1 participant per trial)")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--model", default="gpt-4o-mini",
+                        help="Model name; it selects the wire format (e.g. gpt-* = OpenAI, claude-* = Anthropic)")
+    parser.add_argument("--execution-mode", choices=["threads", "async", "batch"], default="threads")
+    parser.add_argument("--num-workers", type=int, default=64)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--rpm", type=float, default=None)
+    parser.add_argument("--tpm", type=float, default=None)
+    parser.add_argument("--streaming", action="store_true", help="Stream completions with early stop")
+    parser.add_argument("--max-tokens-percentile", type=float, default=None, help="Adaptive max_tokens percentile")
+    parser.add_argument("--hedge-quantile", type=float, default=None, help="Hedge calls slower than this latency quantile")
+    parser.add_argument("--hedge-max-extra", type=float, default=0.1)
+    parser.add_argument("--run-name", default=None, help="Output run name (default: mock_load_<timestamp>)")
+    parser.add_argument("--api-base", default=None, help="Use an already running mock server instead of an in-process one")
+    server_group = parser.add_argument_group("in-process mock server")
+    server_group.add_argument("--latency", default="lognormal:0.6,0.5", help="Time-to-first-token distribution")
+    server_group.add_argument("--tokens-per-second", type=float, default=80.0)
+    server_group.add_argument("--extra-tokens", default="none", help="Trailing filler tokens after the answers")
+    server_group.add_argument("--error-rate-429", type=float, default=0.0)
+    server_group.add_argument("--error-rate-5xx", type=float, default=0.0)
+    server_group.add_argument("--retry-after", type=float, default=1.0)
+    server_group.add_argument("--batch-delay", type=float, default=2.0)
+    server_group.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    api_base = args.api_base
+    if api_base is None:
+        server = MockLLMServer(
+            latency=args.latency, tokens_per_second=args.tokens_per_second, extra_tokens=args.extra_tokens,
+            error_rate_429=args.error_rate_429, error_rate_5xx=args.error_rate_5xx,
+            retry_after=args.retry_after, batch_delay=args.batch_delay, seed=args.seed,
+        ).start()
+        api_base = server.base_url
+    print(f"Mock LLM server: {api_base}")
+
+    # The agents read their key from the environment; never send a real one to the mock
+    for key_name in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "OPENROUTER_API_KEY", "XAI_API_KEY"):
+        os.environ[key_name] = "mock-key"
+
+    from generation_pipeline.pipeline import GenerationPipeline
+
+    run_name = args.run_name or f"mock_load_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    pipeline = GenerationPipeline(provider="openai", model=args.model, api_key="mock-key", api_base=api_base)
+    start = time.perf_counter()
+    try:
+        result_path = pipeline.run_stage5(
+            args.study_id,
+            use_real_llm=True,
+            model=args.model,
+            n_participants=args.n_trials,
+            num_workers=args.num_workers,
+            repeats=args.repeats,
+            run_name=run_name,
+            execution_mode=args.execution_mode,
+            max_concurrency=args.max_concurrency,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            api_base=api_base,
+            streaming=args.streaming,
+            max_tokens_percentile=args.max_tokens_percentile,
+            hedge_quantile=args.hedge_quantile,
+            hedge_max_extra=args.hedge_max_extra,
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        if server is not None:
+            server.stop()
+
+    n_trials = args.n_trials * args.repeats
+    summary = {
+        "study_id": args.study_id,
+        "execution_mode": args.execution_mode,
+        "streaming": args.streaming,
+        "trials": n_trials,
+        "seconds": round(elapsed, 2),
+        "trials_per_second": round(n_trials / elapsed, 2) if elapsed > 0 else None,
+        "results": str(result_path),
+    }
+    if server is not None:
+        summary["server"] = server.stats()
+    print("\n" + json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,8 @@ from tqdm import tqdm
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.utils.compact_store import load_benchmark
+
 def load_all_participants_by_method(results_dir: Path, study_id: str) -> Dict[str, List[Dict[str, Any]]]:
     """Load all participant data for a given study, grouped by experimental method (v1-v4).
     
@@ -76,11 +78,10 @@ def load_all_participants_by_method(results_dir: Path, study_id: str) -> Dict[st
         
         if benchmark_file.exists():
             try:
-                with open(benchmark_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    participants = data.get('individual_data', [])
-                    # Get the actual system_prompt_preset from metadata
-                    metadata_system_preset = data.get('system_prompt_preset')
+                data = load_benchmark(benchmark_file)
+                participants = data.get('individual_data', [])
+                # Get the actual system_prompt_preset from metadata
+                metadata_system_preset = data.get('system_prompt_preset')
             except Exception as e:
                 print(f"Warning: Could not load {benchmark_file}: {e}")
         
@@ -159,24 +160,16 @@ from datetime import datetime
 
 def get_target_sample_size(results_dir: Path, study_id: str) -> int:
     """Find the target sample size from existing benchmark results for this study."""
-    study_dir = results_dir / "benchmark" / study_id
-    if not study_dir.exists():
+    from src.utils.results_warehouse import open_warehouse
+
+    benchmark_dir = results_dir / "benchmark"
+    if not (benchmark_dir / study_id).exists():
         return 100  # Default fallback
     
-    for config_dir in study_dir.iterdir():
-        if not config_dir.is_dir():
-            continue
-        
-        benchmark_file = config_dir / "full_benchmark.json"
-        if benchmark_file.exists():
-            try:
-                with open(benchmark_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    participants = data.get('individual_data', [])
-                    if participants:
-                        return len(participants)
-            except:
-                continue
+    with open_warehouse(benchmark_dir) as warehouse:
+        for row in warehouse.configs(study_id=study_id, with_evaluation=False):
+            if row["n_participants"]:
+                return row["n_participants"]
                 
     return 100  # Default fallback
 
@@ -305,35 +298,64 @@ def save_as_model_result(output_dir: Path, study_id: str, method: str, sample: L
         
     return target_dir
 
-def evaluate_worker(args):
-    """Worker function for parallel random sampling and evaluation."""
-    study_id, pool, sample_size, seed, evaluator_path = args
-    
-    # Set random seed
-    random.seed(seed)
-    np.random.seed(seed)
-    
-    # Sample with replacement
-    if not pool:
-        return None
-    sample = random.choices(pool, k=sample_size)
-    
-    # Import evaluator
+# Per-process state populated once by _init_worker: the study evaluator module
+# and the participant pool it samples from. Tasks then only carry seeds.
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def load_evaluator(study_id: str, evaluator_path: str):
+    """Import a study evaluator module from its file path."""
     spec = importlib.util.spec_from_file_location(f"{study_id}_evaluator", evaluator_path)
     evaluator_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(evaluator_module)
-    
+    return evaluator_module
+
+
+def draw_sample(pool: List[Dict[str, Any]], sample_size: int, seed: int) -> List[Dict[str, Any]]:
+    """Sample ``sample_size`` participants with replacement; identical for identical seeds."""
+    return random.Random(seed).choices(pool, k=sample_size)
+
+
+def _init_worker(study_id: str, pool: List[Dict[str, Any]], sample_size: int, evaluator_path: str):
+    """Pool initializer: load the evaluator and the participant pool once per worker process."""
+    from src.evaluation.response_index import ParsedResponseIndex
+
+    _WORKER_STATE["evaluator"] = load_evaluator(study_id, evaluator_path)
+    # Samples repeat pool members, so memoize parse_agent_responses per response text
+    ParsedResponseIndex().install(_WORKER_STATE["evaluator"])
+    _WORKER_STATE["pool"] = pool
+    _WORKER_STATE["sample_size"] = sample_size
+
+
+def evaluate_worker(seed):
+    """
+    Worker function for parallel random sampling and evaluation.
+
+    The sample is drawn from the worker's own copy of the pool, so neither the
+    pool nor the sample crosses the process boundary; call draw_sample() with
+    the returned seed to reconstruct it.
+    """
+    pool = _WORKER_STATE["pool"]
+    if not pool:
+        return None
+
+    # Sample with replacement
+    sample = draw_sample(pool, _WORKER_STATE["sample_size"], seed)
+
+    # Seed global RNGs for evaluators that draw random numbers themselves
+    random.seed(seed)
+    np.random.seed(seed)
+
     # Prepare results for evaluator
     results = {"individual_data": sample}
     
     try:
-        score_result = evaluator_module.evaluate_study(results)
+        score_result = _WORKER_STATE["evaluator"].evaluate_study(results)
         return {
             "score": score_result.get("score", 0.0),
             "finding_results": score_result.get("finding_results", []),
             "test_results": score_result.get("test_results", []),
             "seed": seed,
-            "sample": sample # Include sample if needed for saving
         }
     except Exception as e:
         # print(f"Error evaluating sample for {study_id}: {e}")
@@ -389,15 +411,17 @@ def main():
             # 3. Run bootstrapping in parallel for this method
             # We'll use one specific iteration to save as the "mixed_model" result
             # but still run iterations for statistics
-            worker_args = [(study_id, pool, target_n, random.randint(0, 1000000), str(evaluator_path)) 
-                           for _ in range(args.iterations)]
+            seeds = [random.randint(0, 1000000) for _ in range(args.iterations)]
+            chunksize = max(1, args.iterations // (args.jobs * 4))
             
             all_scores = []
             finding_scores = defaultdict(list)
             representative_result = None
             
-            with mp.Pool(args.jobs) as p:
-                results = list(tqdm(p.imap(evaluate_worker, worker_args), total=args.iterations, desc=f"    Bootstrapping {study_id} ({method})"))
+            # Each worker imports the evaluator and receives the pool once (initializer);
+            # tasks are bare seeds and results carry scores only
+            with mp.Pool(args.jobs, initializer=_init_worker, initargs=(study_id, pool, target_n, str(evaluator_path))) as p:
+                results = list(tqdm(p.imap(evaluate_worker, seeds, chunksize=chunksize), total=args.iterations, desc=f"    Bootstrapping {study_id} ({method})"))
                 
             for r in results:
                 if r is not None:
@@ -415,8 +439,8 @@ def main():
             # 4. Aggregate all iterations into a single averaged result
             aggregated_result = aggregate_evaluation_results(valid_results)
             
-            # Use first result's sample as representative sample for full_benchmark.json
-            representative_sample = valid_results[0]["sample"]
+            # Rebuild the first result's sample as representative sample for full_benchmark.json
+            representative_sample = draw_sample(pool, target_n, valid_results[0]["seed"])
             
             # 5. Calculate stats
             mean_score = np.mean(all_scores)
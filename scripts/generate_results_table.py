@@ -8,6 +8,7 @@ Generates benchmark_summary.json, markdown summary table, and CSV.
 
 import json
 import argparse
+import hashlib
 import sys
 import numpy as np
 from pathlib import Path
@@ -16,111 +17,61 @@ from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.utils.results_warehouse import open_warehouse
+from src.evaluation.fingerprint import check_evaluation
 
-def calculate_usage_from_individual_data(benchmark_data: dict) -> dict:
-    """Calculate usage stats from individual_data if usage_stats is missing or zero."""
-    usage_stats = benchmark_data.get('usage_stats', {})
-    if usage_stats.get('total_tokens', 0) > 0:
-        return usage_stats
-    individual_data = benchmark_data.get('individual_data', [])
-    if not individual_data:
-        return usage_stats
-    is_flat = len(individual_data) > 0 and 'responses' not in individual_data[0]
-    total_prompt_tokens = total_completion_tokens = total_tokens = 0
-    total_cost = 0.0
-    participant_count = 0
-    if is_flat:
-        seen = set()
-        for resp in individual_data:
-            pid = resp.get('participant_id')
-            if pid not in seen:
-                seen.add(pid)
-                participant_count += 1
-            usage = resp.get('usage', {})
-            if usage and usage.get('total_tokens', 0):
-                total_prompt_tokens += usage.get('prompt_tokens', 0) or 0
-                total_completion_tokens += usage.get('completion_tokens', 0) or 0
-                total_tokens += usage.get('total_tokens', 0) or 0
-                total_cost += usage.get('cost', 0.0) or 0.0
-    else:
-        participant_count = len(individual_data)
-        for participant in individual_data:
-            u = participant.get('usage', {})
-            if u and u.get('total_tokens', 0):
-                total_prompt_tokens += u.get('prompt_tokens', 0) or 0
-                total_completion_tokens += u.get('completion_tokens', 0) or 0
-                total_tokens += u.get('total_tokens', 0) or 0
-                total_cost += u.get('cost', 0.0) or 0.0
-            else:
-                for resp in participant.get('responses', []):
-                    u = resp.get('usage', {})
-                    if u:
-                        total_prompt_tokens += u.get('prompt_tokens', 0) or 0
-                        total_completion_tokens += u.get('completion_tokens', 0) or 0
-                        total_tokens += u.get('total_tokens', 0) or 0
-                        total_cost += u.get('cost', 0.0) or 0.0
-    if participant_count > 0 and total_tokens > 0:
-        return {
-            "total_prompt_tokens": total_prompt_tokens,
-            "total_completion_tokens": total_completion_tokens,
-            "total_tokens": total_tokens,
-            "total_cost": float(total_cost),
-            "avg_tokens_per_participant": float(total_tokens / participant_count),
-            "avg_cost_per_participant": float(total_cost / participant_count),
-        }
-    return usage_stats
+
+def _search_base(results_dir: Path) -> Path:
+    """Directory holding the study_* folders for a --results-dir."""
+    if results_dir.name != "results" and (results_dir / results_dir.name).exists():
+        return results_dir / results_dir.name
+    if "benchmark" in str(results_dir):
+        return results_dir
+    subdirs = [d for d in results_dir.iterdir() if d.is_dir() and d.name in ["benchmark", "benchmark_baseline", "runs"]]
+    return subdirs[0] if subdirs else results_dir
+
+
+def compute_inputs_digest(results_dir: Path) -> str:
+    """Hash of the (path, mtime, size) of every full_benchmark.json and evaluation_results.json read by the report."""
+    search_base = _search_base(results_dir)
+    entries = []
+    for path in sorted(search_base.glob("study_*/*/*.json")):
+        if path.name in ("full_benchmark.json", "evaluation_results.json"):
+            st = path.stat()
+            entries.append(f"{path.relative_to(search_base)}:{st.st_mtime_ns}:{st.st_size}")
+    return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+
+def find_stale_evaluations(results: dict) -> list:
+    """(study_id, config, changed inputs) for loaded results whose evaluation fingerprint is out of date."""
+    stale = []
+    for config_name, studies in sorted(results.items()):
+        for sid, s in sorted(studies.items()):
+            changed = check_evaluation(
+                s['_dir'], Path("src/studies") / f"{sid}_evaluator.py", Path("data/studies") / sid
+            )[0]
+            if changed:
+                stale.append((sid, config_name, changed))
+    return stale
 
 
 def load_all_results(results_dir: Path) -> dict:
-    """Load all benchmark results. Returns {model_config: {study_id: study_result}}."""
+    """Load all benchmark results from the results warehouse. Returns {model_config: {study_id: study_result}}."""
     all_results = defaultdict(dict)
-    if results_dir.name != "results" and (results_dir / results_dir.name).exists():
-        search_base = results_dir / results_dir.name
-    elif "benchmark" in str(results_dir):
-        search_base = results_dir
-    else:
-        subdirs = [d for d in results_dir.iterdir() if d.is_dir() and d.name in ["benchmark", "benchmark_baseline", "runs"]]
-        search_base = subdirs[0] if subdirs else results_dir
-
-    for study_dir in search_base.iterdir():
-        if not study_dir.is_dir() or not study_dir.name.startswith("study_"):
-            continue
-        study_id = study_dir.name
-        for config_dir in study_dir.iterdir():
-            if not config_dir.is_dir():
-                continue
-            benchmark_file = config_dir / "full_benchmark.json"
-            eval_file = config_dir / "evaluation_results.json"
-            if not benchmark_file.exists():
-                continue
-            try:
-                with open(benchmark_file, 'r', encoding='utf-8') as fp:
-                    benchmark_data = json.load(fp)
-                eval_data = {}
-                if eval_file.exists():
-                    try:
-                        with open(eval_file, 'r', encoding='utf-8') as fp:
-                            eval_data = json.load(fp)
-                    except Exception:
-                        pass
-                usage_stats = calculate_usage_from_individual_data(benchmark_data)
-                config_name = config_dir.name
-                study_result = {
-                    'study_id': study_id,
-                    'title': benchmark_data.get('title', 'N/A'),
-                    'model': benchmark_data.get('model', 'unknown'),
-                    'system_prompt_preset': benchmark_data.get('system_prompt_preset', 'unknown'),
-                    'n_participants': len(benchmark_data.get('individual_data', [])),
-                    'usage_stats': usage_stats,
-                    'pas_result': eval_data,
-                    '_mtime': benchmark_file.stat().st_mtime,
-                    '_config': config_name,
-                }
-                if study_id not in all_results[config_name] or study_result['_mtime'] > all_results[config_name][study_id].get('_mtime', 0):
-                    all_results[config_name][study_id] = study_result
-            except Exception as e:
-                print(f"Warning: Could not load {benchmark_file}: {e}")
-
+    with open_warehouse(_search_base(results_dir)) as warehouse:
+        for row in warehouse.configs():
+            all_results[row['config']][row['study_id']] = {
+                'study_id': row['study_id'],
+                'title': row['title'] or 'N/A',
+                'model': row['model'] or 'unknown',
+                'system_prompt_preset': row['system_prompt_preset'] or 'unknown',
+                'n_participants': row['n_participants'],
+                'usage_stats': row['usage_stats'],
+                'pas_result': row['evaluation'],
+                '_mtime': row['benchmark_mtime'],
+                '_config': row['config'],
+                '_dir': row['path'],
+            }
     return all_results
 
 
@@ -177,8 +128,8 @@ def generate_summary_table(results: dict, **kwargs) -> str:
     return "\n".join(lines) if lines else "No results."
 
 
-def generate_json_summary(results: dict, **kwargs) -> dict:
-    """Build benchmark_summary.json with ECS_corr (CCC) only."""
+def generate_json_summary(results: dict, bootstrap: int = 0, seed: int = 0, **kwargs) -> dict:
+    """Build benchmark_summary.json with ECS_corr (CCC) only; bootstrap > 0 adds 95% ECS intervals."""
     from src.evaluation.stats_lib import compute_ecs_corr
 
     STUDY_GROUPS = {
@@ -192,6 +143,7 @@ def generate_json_summary(results: dict, **kwargs) -> dict:
             "generated_at": datetime.now().isoformat(),
             "version": "1.0",
             "format": "humanstudy_bench_summary_ecs_only",
+            "ecs_bootstrap": bootstrap,
         },
         "models": {},
     }
@@ -209,13 +161,17 @@ def generate_json_summary(results: dict, **kwargs) -> dict:
         overall_ecs = None
         ecs_per_study = {}
         ecs_domain = {}
+        ecs_ci = {}
         caricature_overall = {'a': None, 'b': None}
         n_tests_total = len(all_test_results)
         n_tests_valid = 0
         ecs_missing_rate_overall = None
 
         if all_test_results:
-            ecs_result = compute_ecs_corr(all_test_results, study_groups=STUDY_GROUPS)
+            ecs_result = compute_ecs_corr(all_test_results, study_groups=STUDY_GROUPS,
+                                          n_bootstrap=bootstrap, seed=seed)
+            ecs_ci = {key: ecs_result[key] for key in ("ecs_overall_ci", "ecs_domain_ci", "ecs_per_study_ci")
+                      if key in ecs_result}
             overall_ecs = ecs_result.get('ecs_overall')
             ecs_per_study = ecs_result.get('ecs_per_study', {})
             ecs_domain = ecs_result.get('ecs_domain', {})
@@ -255,6 +211,7 @@ def generate_json_summary(results: dict, **kwargs) -> dict:
                 "average_ecs": float(overall_ecs) if overall_ecs is not None else None,
                 "ecs_per_study": ecs_per_study,
                 "ecs_domain": ecs_domain,
+                **ecs_ci,
                 "caricature_overall": caricature_overall,
                 "ecs_missing_rate_overall": ecs_missing_rate_overall,
                 "ecs_n_tests_total": n_tests_total,
@@ -297,6 +254,10 @@ def main():
     parser.add_argument("--format", choices=['summary', 'detailed', 'csv', 'json', 'all'], default='all', help="Output format")
     parser.add_argument("--output", type=str, help="Output file (default: stdout)")
     parser.add_argument("--verbose", action="store_true", help="Verbose output")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild the outputs even if no benchmark or evaluation file changed since the last build")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="Add 95%% bootstrap confidence intervals of ECS to the JSON summary (N replicates, e.g. 2000)")
     args = parser.parse_args()
 
     results_dir = Path(args.results_dir)
@@ -304,11 +265,35 @@ def main():
         print(f"Error: Results directory '{results_dir}' not found")
         return 1
 
+    # The JSON summary records a digest of its input files; skip the rebuild if none changed
+    inputs_digest = compute_inputs_digest(results_dir)
+    if args.output and args.format in ['json', 'all'] and not args.force:
+        json_path = Path(args.output)
+        if json_path.suffix != '.json':
+            json_path = json_path.with_suffix('.json')
+        text_ok = args.format == 'json' or Path(args.output).exists()
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                previous_metadata = json.load(f).get("metadata", {})
+        except (OSError, ValueError):
+            previous_metadata = {}
+        if (text_ok and previous_metadata.get("inputs_digest") == inputs_digest
+                and previous_metadata.get("ecs_bootstrap", 0) == args.bootstrap):
+            print(f"{json_path} is up to date (no benchmark or evaluation file changed); use --force to rebuild")
+            return 0
+
     results = load_all_results(results_dir)
     if not results:
         print("No results found!")
         return 1
 
+    stale = find_stale_evaluations(results)
+    if stale:
+        print(f"Warning: {len(stale)} evaluation(s) are stale (inputs changed since Stage 6); "
+              "re-run Stage 6 or run_baseline_pipeline.py --evaluation-only:")
+        for sid, config_name, changed in stale:
+            print(f"  - {sid}/{config_name}: {', '.join(changed)}")
+
     output_lines = [
         "# HumanStudy-Bench Results Report (ECS_corr only)",
         f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
@@ -334,7 +319,8 @@ def main():
         output_lines.append("```")
 
     if args.format in ['json', 'all']:
-        json_data = generate_json_summary(results)
+        json_data = generate_json_summary(results, bootstrap=args.bootstrap)
+        json_data["metadata"]["inputs_digest"] = inputs_digest
         if args.output:
             json_path = Path(args.output)
             if json_path.suffix != '.json':
@@ -4,6 +4,11 @@ Single end-to-end pipeline: PDF -> study files -> config -> simulation -> evalua
 
 Default: run Stage 5 (simulation) + Stage 6 (evaluation) for all studies/presets. Optional: Stage 1-4 from PDF, validation, final explain, summary/production.
 
+Stage 5 runs in this process as one sweep over all studies x presets (generation_pipeline.scheduler):
+configs share the HTTP clients, rate limiter and response cache, --max-parallel of them run at once,
+and each is evaluated as soon as its simulation finishes. Task output goes to
+{results dir}/sweep_<timestamp>.log; the console shows progress with throughput and ETA.
+
 Usage:
     # Run simulation + evaluation (default)
     python scripts/run_baseline_pipeline.py --study-id study_001 --real-llm --model mistralai/mistral-nemo --presets v1_empty v2_human v3_human_plus_demo
@@ -14,8 +19,14 @@ Usage:
     # Optional: validation after Stage 3/4, skip summary/production
     python scripts/run_baseline_pipeline.py --study-id study_001 --from-pdf --with-validation --skip-summary --skip-production
 
+    # All active studies, 8 configs at a time under one shared 3000 requests/min budget
+    python scripts/run_baseline_pipeline.py --real-llm --max-parallel 8 --rpm 3000 --max-in-flight 64
+
     # Named run (results under results/runs/{run_name}/)
     python scripts/run_baseline_pipeline.py --study-id study_001 --real-llm --run-name myrun
+
+    # Re-evaluate only configs whose benchmark data, evaluator, stats_lib or ground truth changed
+    python scripts/run_baseline_pipeline.py --evaluation-only --skip-summary --skip-production
 """
 
 import subprocess
@@ -31,6 +42,9 @@ repo_root = Path(__file__).resolve().parents[1]
 if str(repo_root) not in sys.path:
     sys.path.insert(0, str(repo_root))
 
+from src.utils.compact_store import load_benchmark
+from src.evaluation.fingerprint import NOT_EVALUATED, check_evaluation
+
 # Environment setup
 venv_python = repo_root / ".venv" / "bin" / "python"
 PYTHON_EXE = str(venv_python) if venv_python.exists() else sys.executable
@@ -118,11 +132,61 @@ def _results_base_dir(args):
     return Path("results/benchmark")
 
 
+def run_simulation_sweep(args, studies, sweep_configs):
+    """
+    Run Stage 5 for the queued (study_id, preset) pairs in this process, evaluating
+    each config folder as soon as its simulation finishes (generation_pipeline.scheduler).
+    All simulations share one client pool, rate limiter and response cache.
+    """
+    from generation_pipeline.pipeline import GenerationPipeline
+    from generation_pipeline.scheduler import SweepScheduler, build_sweep
+
+    tasks = [
+        task for task in build_sweep([args.model], args.presets, studies, reasoning=args.reasoning, temperature=args.temperature)
+        if (task.study_id, task.preset) in sweep_configs
+    ]
+    stage5_kwargs = {
+        "use_real_llm": args.real_llm,
+        "num_workers": args.num_workers,
+        "repeats": args.repeats,
+        "use_cache": args.use_cache,
+        "run_name": args.run_name,
+        "reasoning": args.reasoning,
+        "enable_reasoning": args.enable_reasoning,
+        "temperature": args.temperature,
+    }
+    log_path = _results_base_dir(args) / f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    scheduler = SweepScheduler(
+        GenerationPipeline(),
+        tasks,
+        stage5_kwargs,
+        max_parallel=args.max_parallel,
+        eval_jobs=args.eval_jobs,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        max_in_flight=args.max_in_flight,
+        force_evaluation=args.force_evaluation,
+        log_path=log_path,
+    )
+    summary = scheduler.run()
+    with open(log_path.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+    return summary
+
+
 def main():
     parser = argparse.ArgumentParser(description="Single end-to-end pipeline: PDF -> study -> simulation -> evaluation -> explain -> summary/production")
     parser.add_argument("--real-llm", action="store_true", help="Make actual LLM API calls")
     parser.add_argument("--model", default="mistralai/mistral-nemo", help="LLM model to use")
-    parser.add_argument("--num-workers", type=int, default=16, help="Parallel workers for Stage 5")
+    parser.add_argument("--num-workers", type=int, default=16, help="Parallel workers per simulated config for Stage 5")
+    parser.add_argument("--max-parallel", type=int, default=4,
+                        help="Configs (study x preset) simulated at once in the Stage 5 sweep (default: 4)")
+    parser.add_argument("--rpm", type=float, default=None, help="Requests/min budget for the model, shared by the whole sweep")
+    parser.add_argument("--tpm", type=float, default=None, help="Tokens/min budget for the model, shared by the whole sweep")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Max concurrent requests to the model across the whole sweep")
+    parser.add_argument("--eval-jobs", type=int, default=1,
+                        help="Worker processes for evaluating simulated configs during the sweep (default: 1)")
     parser.add_argument("--repeats", type=int, default=1, help="Number of simulation repeats")
     parser.add_argument("--use-cache", action="store_true", help="Use LLM response cache")
     parser.add_argument("--continue", dest="continue_mode", action="store_true", help="Only run missing configs")
@@ -150,6 +214,8 @@ def main():
                         help="Skip Stage 5 (simulation) and only run Stage 6 (evaluation) for all configs")
     parser.add_argument("--config-filter", type=str, default=None,
                         help="Filter config folders by name pattern (e.g., 'qwen.*thinking' to evaluate only qwen thinking models)")
+    parser.add_argument("--force-evaluation", action="store_true",
+                        help="Run Stage 6 on every config, even those whose evaluation fingerprint is unchanged")
     
     args = parser.parse_args()
 
@@ -166,12 +232,13 @@ def main():
         return
 
     if args.evaluation_only:
-        print(f"Running evaluation only for {len(studies)} studies (all configs will be evaluated)...")
+        print(f"Running evaluation only for {len(studies)} studies (configs with unchanged inputs are skipped)...")
     else:
         print(f"Starting pipeline for {len(studies)} studies and {len(args.presets)} presets...")
     results = {}
 
     run_stages_5_6 = not (args.until and args.until <= 4)
+    sweep_configs = set()  # (study_id, preset) pairs Stage 5 still has to run
 
     for study_id in studies:
         print(f"\n{'='*80}\n[STUDY: {study_id}]\n{'='*80}")
@@ -210,25 +277,23 @@ def main():
                 
                 if args.continue_mode and config_dir.exists():
                     try:
-                        with open(config_dir / "full_benchmark.json", 'r') as f:
-                            data = json.load(f)
-                            
-                            # A run is truly complete only if status is "complete" OR we have enough repeats
-                            is_complete = data.get('status') == 'complete'
-                            current_repeats = len(data.get('all_runs_raw_results', []))
-                            
-                            if is_complete or current_repeats >= args.repeats:
-                                print(f"   Preset {preset:15s} ... ✅ Stage 5 complete ({current_repeats} repeats)")
-                                results[study_id][preset] = {"stage5": True}
-                                stage5_complete = True
+                        data = load_benchmark(config_dir / "full_benchmark.json")
+                        # A run is truly complete only if status is "complete" OR we have enough repeats
+                        is_complete = data.get('status') == 'complete'
+                        current_repeats = len(data.get('all_runs_raw_results', []))
+                        
+                        if is_complete or current_repeats >= args.repeats:
+                            print(f"   Preset {preset:15s} ... ✅ Stage 5 complete ({current_repeats} repeats)")
+                            results[study_id][preset] = {"stage5": True}
+                            stage5_complete = True
+                        else:
+                            needed = args.repeats - current_repeats
+                            if data.get('status') in ['in_progress', 'starting']:
+                                print(f"   Preset {preset:15s} ... 🔄 Resuming partial run (at repeat {current_repeats+1}/{args.repeats})")
                             else:
-                                needed = args.repeats - current_repeats
-                                if data.get('status') in ['in_progress', 'starting']:
-                                    print(f"   Preset {preset:15s} ... 🔄 Resuming partial run (at repeat {current_repeats+1}/{args.repeats})")
-                                else:
-                                    print(f"   Preset {preset:15s} ... ➕ Adding {needed} more repeats (will have {args.repeats} total)")
-                                actual_repeats = needed
-                                needs_merge = True # This will trigger resume logic in pipeline.py
+                                print(f"   Preset {preset:15s} ... ➕ Adding {needed} more repeats (will have {args.repeats} total)")
+                            actual_repeats = needed
+                            needs_merge = True # This will trigger resume logic in pipeline.py
                     except Exception as e:
                         # If we can't read the file, run normally (folder exists but no valid data)
                         print(f"   Preset {preset:15s} ... ⚠️  Found folder but couldn't read data, will run fresh")
@@ -239,37 +304,34 @@ def main():
                 if not stage5_complete:
                     # Show what will be run
                     if needs_merge:
-                        print(f"   Preset {preset:15s} ... Running {actual_repeats} additional repeat(s) (merging with existing)")
-                    else:
-                        print(f"   Preset {preset:15s} ... Running {actual_repeats} repeat(s)")
-                    
-                    cmd = [PYTHON_EXE, "generation_pipeline/run.py", "--stage", "5", "--study-id", study_id,
-                           "--model", args.model, "--system-prompt-preset", preset, "--repeats", str(actual_repeats),
-                           "--reasoning", args.reasoning, "--temperature", str(args.temperature)]
-                    if args.run_name: cmd.extend(["--run-name", args.run_name])
-                    if args.enable_reasoning: cmd.append("--enable-reasoning")
-                    if args.real_llm: cmd.append("--real-llm")
-                    if args.num_workers: cmd.extend(["--num-workers", str(args.num_workers)])
-                    if args.use_cache: cmd.append("--use-cache")
-                    if needs_merge:  # Only use --merge-repeats if we're adding to existing runs
-                        cmd.append("--merge-repeats")
-                    
-                    success = run_stage(cmd, f"Simulation (Preset: {preset})")
-                    if success:
-                        print(f"   Preset {preset:15s} ... ✅ Completed")
+                        print(f"   Preset {preset:15s} ... Queued {actual_repeats} additional repeat(s) (merging with existing)")
                     else:
-                        print(f"   Preset {preset:15s} ... ❌ Failed")
-                    results[study_id][preset] = {"stage5": success}
+                        print(f"   Preset {preset:15s} ... Queued {actual_repeats} repeat(s)")
+                    # Stage 5 resumes from raw_responses.jsonl, so the sweep asks for the total repeat count
+                    sweep_configs.add((study_id, preset))
                 else:
                     # Stage 5 is complete, but we still need to check Stage 6
                     results[study_id][preset] = {"stage5": True}
 
-        # Stage 6: Evaluation (skip when --until 1..4)
+    # Stage 5 (and Stage 6 of each simulated config): one in-process sweep over all studies and presets
+    if sweep_configs:
+        print(f"\n{'='*80}\n[SIMULATION SWEEP: {len(sweep_configs)} config(s)]\n{'='*80}")
+        sweep_summary = run_simulation_sweep(args, studies, sweep_configs)
+        for sim in sweep_summary["simulations"]:
+            success = sim["status"] == "done"
+            print(f"   {sim['study_id']} / {sim['preset']:15s} ... {'✅ Completed' if success else '❌ Failed'}")
+            results[sim["study_id"]][sim["preset"]] = {"stage5": success}
+
+    for study_id in studies:
         if not (run_stages_5_6 or args.evaluation_only):
             continue
+        print(f"\n{'='*80}\n[STUDY: {study_id}] Evaluation\n{'='*80}")
+
+        # Stage 6: Evaluation (configs simulated by the sweep are already up to date)
         study_dir = _results_base_dir(args) / study_id
         needs_stage6 = False
         missing_evaluations = []  # Track configs missing Stage 6
+        stale_evaluations = {}  # Config -> inputs changed since its evaluation (fingerprint mismatch)
         missing_stage5 = []  # Track configs missing Stage 5 entirely
         complete_configs = []  # Track configs with both Stage 5 and Stage 6
         qwen_thinking_missing = []  # Track qwen thinking configs that are missing
@@ -294,20 +356,23 @@ def main():
                 is_qwen_thinking = "qwen" in config_name.lower() and "thinking" in config_name.lower()
                 
                 has_stage5 = (config_dir / "full_benchmark.json").exists()
-                has_stage6 = (
-                    (config_dir / "evaluation_results.json").exists() and
-                    (config_dir / "detailed_stats.csv").exists()
-                )
+                # Up to date = evaluated and the stored fingerprint matches the current inputs
+                stale = check_evaluation(
+                    config_dir, Path("src/studies") / f"{study_id}_evaluator.py", Path("data/studies") / study_id
+                )[0] if has_stage5 else [NOT_EVALUATED]
                 
-                if has_stage5 and has_stage6:
+                if has_stage5 and not stale:
                     complete_configs.append(config_name)
                     if is_qwen_thinking:
                         qwen_thinking_complete.append(config_name)
-                elif has_stage5 and not has_stage6:
+                elif has_stage5 and stale == [NOT_EVALUATED]:
                     missing_evaluations.append(config_name)
                     needs_stage6 = True
                     if is_qwen_thinking:
                         qwen_thinking_needs_eval.append(config_name)
+                elif has_stage5:
+                    stale_evaluations[config_name] = stale
+                    needs_stage6 = True
                 elif not has_stage5:
                     missing_stage5.append(config_name)
                     if is_qwen_thinking:
@@ -343,21 +408,30 @@ def main():
                     print(f"      ⚠️  Missing Stage 5 data ({len(non_qwen_stage5)}): {', '.join(non_qwen_stage5[:5])}")
                     if len(non_qwen_stage5) > 5:
                         print(f"         ... and {len(non_qwen_stage5) - 5} more")
+            if stale_evaluations:
+                print(f"      🔄 Stale evaluations ({len(stale_evaluations)}):")
+                for config_name, changed in sorted(stale_evaluations.items()):
+                    print(f"         - {config_name}: {', '.join(changed)}")
             if complete_configs:
                 non_qwen_complete = [c for c in complete_configs if c not in qwen_thinking_complete]
                 if non_qwen_complete:
-                    print(f"      ✅ Complete ({len(non_qwen_complete)} configs)")
+                    print(f"      ✅ Up to date ({len(non_qwen_complete)} configs)")
             
-            if needs_stage6 or not args.continue_mode:
+            # Stage 6 itself skips up-to-date configs; only launch it if something is stale
+            if needs_stage6 or args.force_evaluation:
                 print(f"\n   --- Evaluation ---")
                 if missing_evaluations:
                     print(f"   Evaluating {len(missing_evaluations)} config(s) missing evaluation...")
+                if stale_evaluations:
+                    print(f"   Re-evaluating {len(stale_evaluations)} config(s) with changed inputs...")
                 eval_cmd = [PYTHON_EXE, "generation_pipeline/run.py", "--stage", "6", "--study-id", study_id, "--skip-generation"]
                 if args.run_name: eval_cmd.extend(["--run-name", args.run_name])
+                if args.force_evaluation: eval_cmd.append("--force")
                 success = run_stage(eval_cmd, "Evaluation")
                 # In evaluation-only mode, we don't track by preset since we evaluate all configs
                 results[study_id]["evaluation"] = success
                 results[study_id]["missing_evaluations"] = missing_evaluations
+                results[study_id]["stale_evaluations"] = stale_evaluations
                 results[study_id]["missing_stage5"] = missing_stage5
                 results[study_id]["complete_configs"] = complete_configs
                 results[study_id]["qwen_thinking"] = {
@@ -367,9 +441,10 @@ def main():
                 }
             else:
                 print(f"\n   --- Evaluation ---")
-                print(f"   ✅ All configs already evaluated")
+                print(f"   ✅ All configs up to date")
                 results[study_id]["evaluation"] = True
                 results[study_id]["missing_evaluations"] = []
+                results[study_id]["stale_evaluations"] = {}
                 results[study_id]["missing_stage5"] = missing_stage5
                 results[study_id]["complete_configs"] = complete_configs
                 results[study_id]["qwen_thinking"] = {
@@ -378,11 +453,12 @@ def main():
                     "complete": qwen_thinking_complete
                 }
         else:
-            # Normal mode: check if evaluation is needed
-            if needs_stage6 or not args.continue_mode:
+            # Normal mode: check if evaluation is needed (new Stage 5 data makes its config stale)
+            if needs_stage6 or args.force_evaluation:
                 print(f"\n   --- Evaluation ---")
                 eval_cmd = [PYTHON_EXE, "generation_pipeline/run.py", "--stage", "6", "--study-id", study_id, "--skip-generation"]
                 if args.run_name: eval_cmd.extend(["--run-name", args.run_name])
+                if args.force_evaluation: eval_cmd.append("--force")
                 success = run_stage(eval_cmd, "Evaluation")
                 
                 # Check each preset's evaluation status individually
@@ -401,7 +477,7 @@ def main():
                     results[study_id][preset]["stage6"] = has_stage6
             else:
                 print(f"\n   --- Evaluation ---")
-                print(f"   ✅ All configs already evaluated")
+                print(f"   ✅ All configs up to date")
                 for preset in args.presets:
                     if preset not in results[study_id]:
                         results[study_id][preset] = {}
@@ -458,6 +534,17 @@ def main():
             if len(all_missing_eval) > 20:
                 print(f"   ... and {len(all_missing_eval) - 20} more")
         
+        all_stale = []
+        for study_id in sorted(studies):
+            for config, changed in sorted(results[study_id].get("stale_evaluations", {}).items()):
+                all_stale.append(f"{study_id}/{config} ({', '.join(changed)})")
+        if all_stale:
+            print(f"\n🔄 Configs Re-evaluated for Changed Inputs ({len(all_stale)} total):")
+            for config_path in all_stale[:20]:
+                print(f"   - {config_path}")
+            if len(all_stale) > 20:
+                print(f"   ... and {len(all_stale) - 20} more")
+        
         if all_missing_s5:
             print(f"\n⚠️  Configs Missing Stage 5 Data ({len(all_missing_s5)} total):")
             for config_path in sorted(all_missing_s5)[:20]:  # Show first 20
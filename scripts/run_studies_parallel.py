@@ -2,12 +2,21 @@
 """
 Run pipeline stages 3-6 for multiple studies in parallel.
 
+Stages 3-4 (study files and StudyConfig agent) run as one subprocess per study
+and stage. Stages 5-6 then run as one in-process sweep over models × presets ×
+studies (generation_pipeline.scheduler): all simulations share one client pool,
+rate limiter and response cache, and each config folder is evaluated as soon as
+its simulation finishes.
+
 Usage:
     python scripts/run_studies_parallel.py --studies study_003 study_004 ...
     python scripts/run_studies_parallel.py --all  # Run study_003 to study_012
+    python scripts/run_studies_parallel.py --all --skip-generation --real-llm \
+        --models mistralai/mistral-nemo openai/gpt-4o-mini --presets v1_empty v3_human_plus_demo --rpm 600
 """
 
 import argparse
+import json
 import subprocess
 import sys
 from pathlib import Path
@@ -18,42 +27,15 @@ import time
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def run_stage(study_id: str, stage: int, **kwargs) -> tuple:
+def run_stage(study_id: str, stage: int) -> tuple:
     """
-    Run a single stage for a study.
-    
+    Run a single generation stage (3 or 4) for a study in a subprocess.
+
     Returns:
         (study_id, stage, success: bool, output: str, error: str)
     """
     cmd = ["python", "generation_pipeline/run.py", f"--stage", str(stage), f"--study-id", study_id]
-    
-    # Add stage-specific arguments
-    if stage == 5:
-        if kwargs.get("model"):
-            cmd.append("--model")
-            cmd.append(kwargs["model"])
-        if kwargs.get("real_llm"):
-            cmd.append("--real-llm")
-        if kwargs.get("num_workers"):
-            cmd.append("--num-workers")
-            cmd.append(str(kwargs["num_workers"]))
-        if kwargs.get("n_participants"):
-            cmd.append("--n-participants")
-            cmd.append(str(kwargs["n_participants"]))
-        if kwargs.get("run_name"):
-            cmd.append("--run-name")
-            cmd.append(kwargs["run_name"])
-        if kwargs.get("reasoning"):
-            cmd.append("--reasoning")
-            cmd.append(kwargs["reasoning"])
-        if kwargs.get("temperature") is not None:
-            cmd.append("--temperature")
-            cmd.append(str(kwargs["temperature"]))
-    elif stage == 6:
-        if kwargs.get("run_name"):
-            cmd.append("--run-name")
-            cmd.append(kwargs["run_name"])
-    
+
     try:
         print(f"[{study_id}] Starting Stage {stage}...")
         result = subprocess.run(
@@ -62,19 +44,19 @@ def run_stage(study_id: str, stage: int, **kwargs) -> tuple:
             text=True,
             timeout=3600  # 1 hour timeout per stage
         )
-        
+
         success = result.returncode == 0
         output = result.stdout
         error = result.stderr
-        
+
         if success:
             print(f"[{study_id}] ✅ Stage {stage} completed")
         else:
             print(f"[{study_id}] ❌ Stage {stage} failed")
             print(f"Error: {error[:500]}")
-        
+
         return (study_id, stage, success, output, error)
-    
+
     except subprocess.TimeoutExpired:
         error_msg = f"Stage {stage} timed out after 1 hour"
         print(f"[{study_id}] ⏱️  {error_msg}")
@@ -85,10 +67,10 @@ def run_stage(study_id: str, stage: int, **kwargs) -> tuple:
         return (study_id, stage, False, "", error_msg)
 
 
-def run_study_pipeline(study_id: str, **kwargs) -> dict:
+def run_study_generation(study_id: str) -> dict:
     """
-    Run stages 3-6 sequentially for a single study.
-    
+    Run stages 3-4 sequentially for a single study.
+
     Returns:
         dict with results for each stage
     """
@@ -96,31 +78,27 @@ def run_study_pipeline(study_id: str, **kwargs) -> dict:
         "study_id": study_id,
         "stages": {},
         "success": True,
-        "start_time": datetime.now()
     }
-    
-    stages = [3, 4, 5, 6]
-    
-    for stage in stages:
+
+    start = time.time()
+    for stage in [3, 4]:
         stage_start = time.time()
-        study_id_result, stage_num, success, output, error = run_stage(study_id, stage, **kwargs)
+        study_id_result, stage_num, success, output, error = run_stage(study_id, stage)
         stage_elapsed = time.time() - stage_start
-        
+
         results["stages"][stage] = {
             "success": success,
             "elapsed": stage_elapsed,
             "output": output[-1000:] if output else "",  # Keep last 1000 chars
             "error": error[-1000:] if error else ""  # Keep last 1000 chars
         }
-        
+
         if not success:
             results["success"] = False
             print(f"[{study_id}] ⚠️  Stopping pipeline after Stage {stage} failure")
             break
-    
-    results["end_time"] = datetime.now()
-    results["total_elapsed"] = (results["end_time"] - results["start_time"]).total_seconds()
-    
+
+    results["total_elapsed"] = time.time() - start
     return results
 
 
@@ -140,13 +118,26 @@ def main():
         "--max-workers",
         type=int,
         default=3,
-        help="Maximum number of studies to run in parallel (default: 3)"
+        help="Studies generated (Stages 3-4) and configs simulated (Stage 5) in parallel (default: 3)"
     )
     parser.add_argument(
-        "--model",
-        type=str,
-        default="mistralai/mistral-nemo",
-        help="Model to use for Stage 5 (default: mistralai/mistral-nemo)"
+        "--models", "--model",
+        dest="models",
+        nargs="+",
+        default=["mistralai/mistral-nemo"],
+        help="Model(s) to use for Stage 5 (default: mistralai/mistral-nemo)"
+    )
+    parser.add_argument(
+        "--presets",
+        nargs="+",
+        default=["v3_human_plus_demo"],
+        help="System prompt preset(s) for Stage 5 (default: v3_human_plus_demo)"
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=1,
+        help="Simulation repeats per study/model/preset (default: 1)"
     )
     parser.add_argument(
         "--real-llm",
@@ -157,7 +148,7 @@ def main():
         "--num-workers",
         type=int,
         default=5,
-        help="Number of parallel workers for Stage 5 (default: 5)"
+        help="Number of parallel workers per simulated config for Stage 5 (default: 5)"
     )
     parser.add_argument(
         "--n-participants",
@@ -182,9 +173,35 @@ def main():
         default=1.0,
         help="Sampling temperature for the LLM (default: 1.0)"
     )
-    
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        help="Requests/min budget per model, shared by the whole sweep"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        help="Tokens/min budget per model, shared by the whole sweep"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        help="Max concurrent requests per model across the whole sweep"
+    )
+    parser.add_argument(
+        "--eval-jobs",
+        type=int,
+        default=1,
+        help="Worker processes for Stage 6 evaluation (default: 1)"
+    )
+    parser.add_argument(
+        "--skip-generation",
+        action="store_true",
+        help="Skip Stages 3-4 and evaluator generation; use the existing study files and evaluators"
+    )
+
     args = parser.parse_args()
-    
+
     # Determine which studies to run
     if args.all:
         study_ids = [f"study_{i:03d}" for i in range(3, 13)]  # study_003 to study_012
@@ -194,102 +211,123 @@ def main():
         print("Error: Must specify --studies or --all")
         parser.print_help()
         sys.exit(1)
-    
+
     print(f"\n{'='*80}")
     print(f"Running Pipeline for {len(study_ids)} Studies")
     print(f"{'='*80}")
     print(f"Studies: {', '.join(study_ids)}")
-    print(f"Max parallel studies: {args.max_workers}")
-    print(f"Stage 5 options: model={args.model}, real_llm={args.real_llm}, num_workers={args.num_workers}, temperature={args.temperature}")
+    print(f"Max parallel studies/configs: {args.max_workers}")
+    print(f"Stage 5 options: models={', '.join(args.models)}, presets={', '.join(args.presets)}, repeats={args.repeats}, "
+          f"real_llm={args.real_llm}, num_workers={args.num_workers}, temperature={args.temperature}")
     if args.n_participants:
         print(f"  n_participants: {args.n_participants}")
     print(f"{'='*80}\n")
-    
-    # Prepare kwargs for stage 5
-    kwargs = {
-        "model": args.model,
-        "real_llm": args.real_llm,
-        "num_workers": args.num_workers,
-        "temperature": args.temperature,
-    }
-    if args.n_participants:
-        kwargs["n_participants"] = args.n_participants
-    if args.run_name:
-        kwargs["run_name"] = args.run_name
-    if args.reasoning:
-        kwargs["reasoning"] = args.reasoning
-    
-    # Run studies in parallel
-    all_results = []
+
     start_time = time.time()
-    
-    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
-        # Submit all studies
-        future_to_study = {
-            executor.submit(run_study_pipeline, study_id, **kwargs): study_id
-            for study_id in study_ids
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Stages 3-4: generate study files and configs in parallel
+    generation_results = []
+    ready_studies = list(study_ids)
+    if not args.skip_generation:
+        with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+            future_to_study = {
+                executor.submit(run_study_generation, study_id): study_id
+                for study_id in study_ids
+            }
+
+            for future in as_completed(future_to_study):
+                study_id = future_to_study[future]
+                try:
+                    generation_results.append(future.result())
+                except Exception as e:
+                    print(f"[{study_id}] ❌ Exception: {e}")
+                    generation_results.append({"study_id": study_id, "success": False, "error": str(e)})
+        ready_studies = [s for s in study_ids if any(r["study_id"] == s and r.get("success") for r in generation_results)]
+
+    # Stages 5-6: one in-process sweep over all studies
+    sweep_summary = None
+    if ready_studies:
+        from generation_pipeline.pipeline import GenerationPipeline
+        from generation_pipeline.scheduler import SweepScheduler, build_sweep
+
+        print(f"\n{'='*80}")
+        print(f"Stages 5-6: {len(ready_studies)} studies × {len(args.models)} model(s) × {len(args.presets)} preset(s)")
+        print(f"{'='*80}")
+        tasks = build_sweep(
+            args.models, args.presets, ready_studies,
+            reasoning=args.reasoning, temperature=args.temperature,
+            generate_evaluators=not args.skip_generation
+        )
+        stage5_kwargs = {
+            "use_real_llm": args.real_llm,
+            "n_participants": args.n_participants,
+            "num_workers": args.num_workers,
+            "repeats": args.repeats,
+            "run_name": args.run_name,
+            "reasoning": args.reasoning,
+            "temperature": args.temperature,
         }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_study):
-            study_id = future_to_study[future]
-            try:
-                result = future.result()
-                all_results.append(result)
-            except Exception as e:
-                print(f"[{study_id}] ❌ Exception: {e}")
-                all_results.append({
-                    "study_id": study_id,
-                    "success": False,
-                    "error": str(e)
-                })
-    
+        scheduler = SweepScheduler(
+            GenerationPipeline(),
+            tasks,
+            stage5_kwargs,
+            max_parallel=args.max_workers,
+            eval_jobs=args.eval_jobs,
+            rpm=args.rpm,
+            tpm=args.tpm,
+            max_in_flight=args.max_in_flight,
+            log_path=Path("results") / f"pipeline_run_{timestamp}.log"
+        )
+        sweep_summary = scheduler.run()
+
     total_elapsed = time.time() - start_time
-    
+
     # Print summary
     print(f"\n{'='*80}")
     print(f"Pipeline Summary")
     print(f"{'='*80}")
-    
-    successful = [r for r in all_results if r.get("success", False)]
-    failed = [r for r in all_results if not r.get("success", False)]
-    
-    print(f"\n✅ Successful: {len(successful)}/{len(all_results)}")
-    for r in successful:
-        print(f"   {r['study_id']}: {r.get('total_elapsed', 0):.1f}s")
-    
-    if failed:
-        print(f"\n❌ Failed: {len(failed)}/{len(all_results)}")
-        for r in failed:
-            print(f"   {r['study_id']}")
+
+    failed_generation = [r for r in generation_results if not r.get("success", False)]
+    if generation_results:
+        print(f"\nStages 3-4: ✅ {len(generation_results) - len(failed_generation)}/{len(generation_results)} studies")
+        for r in failed_generation:
+            print(f"   ❌ {r['study_id']}")
             # Show which stage failed
-            if "stages" in r:
-                for stage_num, stage_result in r["stages"].items():
-                    if not stage_result.get("success", False):
-                        print(f"      Stage {stage_num} failed")
-                        if stage_result.get("error"):
-                            print(f"      Error: {stage_result['error'][:200]}")
-    
+            for stage_num, stage_result in r.get("stages", {}).items():
+                if not stage_result.get("success", False):
+                    print(f"      Stage {stage_num} failed")
+                    if stage_result.get("error"):
+                        print(f"      Error: {stage_result['error'][:200]}")
+
+    if sweep_summary is not None:
+        simulations = sweep_summary["simulations"]
+        print(f"\nStage 5: ✅ {sum(1 for s in simulations if s['status'] == 'done')}/{len(simulations)} configs, "
+              f"{sweep_summary['responses']} responses ({sweep_summary['responses_per_second']:.1f}/s)")
+        evaluations = sweep_summary["evaluations"]
+        print(f"Stage 6: ✅ {sum(1 for e in evaluations if e['status'] == 'done')}/{len(evaluations)} configs")
+        for failure in sweep_summary["failed_tasks"]:
+            print(f"   ❌ {failure['task']}: {failure['error'][:200]}")
+        for skipped in sweep_summary["skipped_tasks"]:
+            print(f"   ⏭️  {skipped}")
+
     print(f"\n⏱️  Total time: {total_elapsed:.1f}s ({total_elapsed/60:.1f} minutes)")
     print(f"{'='*80}\n")
-    
+
     # Save results to file
-    output_file = Path("results") / f"pipeline_run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output_file = Path("results") / f"pipeline_run_{timestamp}.json"
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    import json
+
     with open(output_file, 'w') as f:
         json.dump({
             "timestamp": datetime.now().isoformat(),
             "total_elapsed": total_elapsed,
-            "successful": len(successful),
-            "failed": len(failed),
-            "results": all_results
-        }, f, indent=2)
-    
+            "generation": generation_results,
+            "sweep": sweep_summary
+        }, f, indent=2, default=str)
+
     print(f"Results saved to: {output_file}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -7,7 +7,8 @@ User-friendly script that outputs:
 - Per-study: PAS_raw, tokens, cost, ECS (if available)
 - Per-finding: finding score (PAS_raw) with stable sequential index 0..N-1
 
-Data sources: evaluation_results.json (scores), full_benchmark.json (tokens/cost).
+Data sources: evaluation_results.json (scores), full_benchmark.json (tokens/cost),
+read through the results warehouse (src/utils/results_warehouse.py).
 """
 
 import json
@@ -22,6 +23,8 @@ from typing import Dict, List, Tuple, Optional, Any
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.utils.results_warehouse import open_warehouse
+
 STUDY_GROUPS = {
     "Cognition": ["study_001", "study_002", "study_003", "study_004"],
     "Strategic": ["study_009", "study_010", "study_011", "study_012"],
@@ -39,7 +42,12 @@ def _sort_key_finding(fr: dict) -> Tuple[str, int, str]:
 
 
 def calculate_usage(benchmark_data: dict, raw_responses_path: Optional[Path] = None) -> dict:
-    """Get usage stats from full_benchmark, or compute from individual_data/raw_responses."""
+    """
+    Get usage stats from full_benchmark, or compute from individual_data/raw_responses.
+
+    ``total_cached_tokens`` counts prompt tokens served from the provider's prompt
+    cache (0 for runs without --prompt-caching or from before it was recorded).
+    """
     usage = benchmark_data.get("usage_stats", {})
     if usage.get("total_tokens", 0) > 0:
         return usage
@@ -48,7 +56,7 @@ def calculate_usage(benchmark_data: dict, raw_responses_path: Optional[Path] = N
     individual_data = benchmark_data.get("individual_data", [])
     if individual_data:
         is_flat = "responses" not in individual_data[0] if individual_data else True
-        total_tok = total_cost = 0
+        total_tok = total_cost = total_cached = 0
         seen = set()
         for item in individual_data:
             if is_flat:
@@ -66,11 +74,13 @@ def calculate_usage(benchmark_data: dict, raw_responses_path: Optional[Path] = N
             if u and u.get("total_tokens", 0):
                 total_tok += u.get("total_tokens", 0)
                 total_cost += u.get("cost", 0.0) or 0.0
+                total_cached += u.get("cached_tokens", 0) or 0
         if total_tok > 0:
             n = len(seen) if is_flat else len(individual_data)
             return {
                 "total_prompt_tokens": 0,
                 "total_completion_tokens": 0,
+                "total_cached_tokens": total_cached,
                 "total_tokens": total_tok,
                 "total_cost": float(total_cost),
                 "avg_tokens_per_participant": total_tok / n if n else 0,
@@ -82,7 +92,7 @@ def calculate_usage(benchmark_data: dict, raw_responses_path: Optional[Path] = N
         try:
             with open(raw_responses_path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
-            total_tok = total_cost = 0
+            total_tok = total_cost = total_cached = 0
             for run in raw.get("all_runs_raw_responses", []):
                 for p in run.get("participants", []):
                     for r in p.get("raw_responses", []):
@@ -90,10 +100,12 @@ def calculate_usage(benchmark_data: dict, raw_responses_path: Optional[Path] = N
                         if u:
                             total_tok += u.get("total_tokens", 0)
                             total_cost += u.get("cost", 0.0) or 0.0
+                            total_cached += u.get("cached_tokens", 0) or 0
             if total_tok > 0:
                 return {
                     "total_prompt_tokens": 0,
                     "total_completion_tokens": 0,
+                    "total_cached_tokens": total_cached,
                     "total_tokens": total_tok,
                     "total_cost": float(total_cost),
                 }
@@ -108,7 +120,7 @@ def load_all_results(
     study_filter: Optional[str] = None,
     config_filter: Optional[str] = None,
 ) -> Dict[str, Dict[str, dict]]:
-    """Load results: {config_name: {study_id: study_result}}."""
+    """Load results from the results warehouse: {config_name: {study_id: study_result}}."""
     if "benchmark" in str(results_dir):
         search_base = results_dir
     elif (results_dir / "benchmark").exists():
@@ -117,50 +129,19 @@ def load_all_results(
         search_base = results_dir
 
     all_results = defaultdict(dict)
-    for study_dir in sorted(search_base.iterdir()):
-        if not study_dir.is_dir() or not study_dir.name.startswith("study_"):
-            continue
-        study_id = study_dir.name
-        if study_filter and study_id != study_filter:
-            continue
-
-        for config_dir in sorted(study_dir.iterdir()):
-            if not config_dir.is_dir():
-                continue
-            config_name = config_dir.name
-            if config_filter and config_name != config_filter:
-                continue
-
-            benchmark_file = config_dir / "full_benchmark.json"
-            eval_file = config_dir / "evaluation_results.json"
-            raw_file = config_dir / "raw_responses.json"
-
-            if not benchmark_file.exists():
-                continue
-
-            try:
-                with open(benchmark_file, "r", encoding="utf-8") as fp:
-                    benchmark_data = json.load(fp)
-                eval_data = {}
-                if eval_file.exists():
-                    try:
-                        with open(eval_file, "r", encoding="utf-8") as fp:
-                            eval_data = json.load(fp)
-                    except Exception:
-                        pass
-
-                usage = calculate_usage(benchmark_data, raw_file)
-                study_result = {
-                    "study_id": study_id,
-                    "title": benchmark_data.get("title", "N/A"),
-                    "usage_stats": usage,
-                    "pas_result": eval_data,
-                    "_mtime": benchmark_file.stat().st_mtime,
-                }
-                if study_id not in all_results[config_name] or study_result["_mtime"] > all_results[config_name][study_id].get("_mtime", 0):
-                    all_results[config_name][study_id] = study_result
-            except Exception as e:
-                print(f"Warning: Could not load {benchmark_file}: {e}", file=sys.stderr)
+    with open_warehouse(search_base) as warehouse:
+        for row in warehouse.configs(study_id=study_filter, config=config_filter):
+            usage = row["usage_stats"]
+            if not usage.get("total_tokens", 0):
+                # Legacy folders: usage only in raw_responses.json
+                usage = calculate_usage({"usage_stats": usage}, Path(row["path"]) / "raw_responses.json")
+            all_results[row["config"]][row["study_id"]] = {
+                "study_id": row["study_id"],
+                "title": row["title"] or "N/A",
+                "usage_stats": usage,
+                "pas_result": row["evaluation"],
+                "_mtime": row["benchmark_mtime"],
+            }
 
     return dict(all_results)
 
@@ -225,6 +206,8 @@ def build_simple_data(results: Dict[str, Dict[str, dict]]) -> Dict[str, Any]:
     pas_scores = []
     total_tokens = 0
     total_cost = 0.0
+    total_prompt_tokens = 0
+    total_cached_tokens = 0
     studies_data = []
     findings_data = []
 
@@ -236,8 +219,11 @@ def build_simple_data(results: Dict[str, Dict[str, dict]]) -> Dict[str, Any]:
         usage = s.get("usage_stats", {}) or pr.get("usage_stats", {})
         tok = usage.get("total_tokens", 0)
         cost = usage.get("total_cost", 0.0)
+        cached = usage.get("total_cached_tokens", 0) or 0
         total_tokens += tok
         total_cost += cost
+        total_prompt_tokens += usage.get("total_prompt_tokens", 0) or 0
+        total_cached_tokens += cached
 
         pas = pr.get("score")
         if pas is not None:
@@ -252,6 +238,7 @@ def build_simple_data(results: Dict[str, Dict[str, dict]]) -> Dict[str, Any]:
             "ecs": float(ecs_s) if ecs_s is not None else None,
             "total_tokens": tok,
             "total_cost": float(cost),
+            "cached_tokens": cached,
         })
 
         for fr in ordered_findings_with_idx(pr):
@@ -271,11 +258,21 @@ def build_simple_data(results: Dict[str, Dict[str, dict]]) -> Dict[str, Any]:
         "ecs": ecs_overall,
         "total_tokens": total_tokens,
         "total_cost": total_cost,
+        "total_cached_tokens": total_cached_tokens,
+        # Share of prompt tokens served from the provider prompt cache
+        "cached_prompt_share": total_cached_tokens / total_prompt_tokens if total_prompt_tokens else None,
         "studies": studies_data,
         "findings": findings_data,
     }
 
 
+def _cached_tokens_row(data: dict) -> str:
+    cached = data.get("total_cached_tokens", 0)
+    share = data.get("cached_prompt_share")
+    share_s = f" ({share:.1%} of prompt tokens)" if share is not None else ""
+    return f"| Cached Prompt Tokens | {cached:,}{share_s} |"
+
+
 def generate_md_single(config_name: str, data: dict) -> str:
     """Generate markdown for one config."""
     lines = [
@@ -289,17 +286,18 @@ def generate_md_single(config_name: str, data: dict) -> str:
         f"| ECS (CCC) | {data['ecs']:.4f} |" if data["ecs"] is not None else "| ECS (CCC) | N/A |",
         f"| Total Tokens | {data['total_tokens']:,} |",
         f"| Total Cost | ${data['total_cost']:.4f} |",
+        _cached_tokens_row(data),
         "",
         "### Per-Study",
         "",
-        "| Study | Title | PAS_raw | ECS | Tokens | Cost |",
-        "|-------|-------|---------|-----|--------|------|",
+        "| Study | Title | PAS_raw | ECS | Tokens | Cached | Cost |",
+        "|-------|-------|---------|-----|--------|--------|------|",
     ]
     for row in data["studies"]:
         pas_s = f"{row['pas_raw']:.4f}" if row["pas_raw"] is not None else "N/A"
         ecs_s = f"{row['ecs']:.4f}" if row["ecs"] is not None else "N/A"
         title = (row["title"][:40] or "N/A").replace("|", " ")
-        lines.append(f"| {row['study_id']} | {title} | {pas_s} | {ecs_s} | {row['total_tokens']:,} | ${row['total_cost']:.4f} |")
+        lines.append(f"| {row['study_id']} | {title} | {pas_s} | {ecs_s} | {row['total_tokens']:,} | {row.get('cached_tokens', 0):,} | ${row['total_cost']:.4f} |")
 
     lines.extend(["", "### Per-Finding (index 0..N-1)", ""])
     current_study = None
@@ -328,14 +326,14 @@ def generate_md(all_configs_data: Dict[str, dict]) -> str:
 
 
 def generate_studies_csv(all_configs_data: Dict[str, dict]) -> str:
-    """CSV: config, study_id, title, pas_raw, ecs, total_tokens, total_cost."""
-    lines = ["config,study_id,title,pas_raw,ecs,total_tokens,total_cost"]
+    """CSV: config, study_id, title, pas_raw, ecs, total_tokens, total_cost, cached_tokens."""
+    lines = ["config,study_id,title,pas_raw,ecs,total_tokens,total_cost,cached_tokens"]
     for config, data in sorted(all_configs_data.items()):
         for row in data["studies"]:
             pas = f"{row['pas_raw']:.4f}" if row["pas_raw"] is not None else ""
             ecs = f"{row['ecs']:.4f}" if row["ecs"] is not None else ""
             title = (row["title"] or "").replace(",", ";")
-            lines.append(f"{config},{row['study_id']},{title},{pas},{ecs},{row['total_tokens']},{row['total_cost']:.4f}")
+            lines.append(f"{config},{row['study_id']},{title},{pas},{ecs},{row['total_tokens']},{row['total_cost']:.4f},{row.get('cached_tokens', 0)}")
     return "\n".join(lines)
 
 
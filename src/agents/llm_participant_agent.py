@@ -7,7 +7,7 @@ and responds to experimental trials.
 """
 
 import os
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Tuple
 import json
 from src.agents.prompt_registry import SystemPromptRegistry
 
@@ -36,7 +36,11 @@ class LLMParticipantAgent:
         system_prompt_preset: str = "v3_human_plus_demo",
         reasoning: str = "default",
         enable_reasoning: bool = False,
-        temperature: float = 1.0
+        temperature: float = 1.0,
+        cache_salt: Optional[str] = None,
+        prompt_caching: bool = False,
+        streaming: bool = False,
+        token_budget: Optional[Any] = None
     ):
         """
         Initialize a participant agent.
@@ -55,6 +59,17 @@ class LLMParticipantAgent:
             reasoning: Reasoning effort for supported models ("default", "none", "low", "medium", "high", "xhigh", "minimal")
             enable_reasoning: Force enable reasoning for OpenRouter models
             temperature: Sampling temperature for the LLM (default: 1.0)
+            cache_salt: Extra response-cache key component (e.g. the run seed) so that
+                independent samples of an identical prompt are cached separately
+            prompt_caching: Lay out trial prompts so the part shared by all participants
+                forms a stable prefix for provider-side prompt caching (see _trial_messages)
+                and mark it with cache_control on Anthropic
+            streaming: Stream completions and close the stream as soon as the study
+                evaluator can parse every required Q number (see src.llm.streaming);
+                records also get time-to-first-token / time-to-complete
+            token_budget: Optional TokenBudgetPlanner (src.llm.token_budget) choosing
+                max_tokens from past completion lengths; truncated replies are retried
+                with a larger budget
         """
         self.participant_id = participant_id
         self.profile = profile
@@ -64,6 +79,10 @@ class LLMParticipantAgent:
         self.reasoning = reasoning
         self.enable_reasoning = enable_reasoning
         self.temperature = temperature
+        self.cache_salt = cache_salt
+        self.prompt_caching = prompt_caching
+        self.streaming = streaming
+        self.token_budget = token_budget
         
         # Infer provider from model name (backward compatible)
         self.provider = self._infer_provider(model, api_base)
@@ -99,6 +118,9 @@ class LLMParticipantAgent:
         # Store formatter usage info
         self._last_formatter_usage = {}
         
+        # Async client for the asyncio execution mode (shared per run by ParticipantPool)
+        self._async_client = None
+        
         if use_real_llm and not self.api_key:
             key_map = {
                 "anthropic": "ANTHROPIC_API_KEY",
@@ -141,26 +163,66 @@ class LLMParticipantAgent:
         """
         Construct system prompt based on the selected preset using the SystemPromptRegistry.
         """
+        participant_part, shared_part = self._system_prompt_parts()
+        if not shared_part:
+            return participant_part
+        # Don't append to empty prompt
+        if not participant_part:
+            return shared_part
+        return f"{participant_part}\n\n{shared_part}"
+    
+    def _system_prompt_parts(self) -> Tuple[str, str]:
+        """
+        Split the system prompt into (participant-specific part, part shared by all participants).
+        
+        The participant part is the preset prompt (identity, demographics); the shared
+        part is the study's custom system content, or the override if one is set.
+        """
         # 1. Legacy support: if system_prompt_override is provided, use it
         if self.system_prompt_override:
-            return self.system_prompt_override
+            return "", self.system_prompt_override
         
         # 2. Get prompt from registry
         base_prompt = SystemPromptRegistry.get_prompt(self.system_prompt_preset, self.profile)
         
-        # 3. If prompt_builder has custom system prompt template, append it
+        # 3. If prompt_builder has custom system prompt template, it is appended
+        custom_content = None
         if self.prompt_builder and hasattr(self.prompt_builder, 'build_system_prompt'):
             try:
                 custom_content = self.prompt_builder.build_system_prompt()
-                if custom_content:
-                    # Don't append to empty prompt
-                    if not base_prompt:
-                        return custom_content
-                    return f"{base_prompt}\n\n{custom_content}"
             except Exception:
                 pass
         
-        return base_prompt
+        return base_prompt or "", custom_content or ""
+    
+    def _trial_messages(self, trial_prompt: str) -> List[Dict[str, Any]]:
+        """
+        Messages for a single stateless trial.
+        
+        Default layout: the full system prompt, then the trial prompt. With
+        prompt_caching the parts every participant shares come first so that
+        providers can reuse the prefix across the pool (OpenAI-compatible
+        endpoints cache identical prefixes automatically; Anthropic gets
+        cache_control breakpoints in _build_anthropic_request): the shared
+        system content as the system message, then a user message whose first
+        block is the trial prompt and whose second block is this participant's
+        identity prompt. The layout changes the prompt text the model sees, so
+        it is opt-in.
+        """
+        if not self.prompt_caching:
+            return [
+                {"role": "system", "content": self._construct_system_prompt()},
+                {"role": "user", "content": trial_prompt}
+            ]
+        participant_part, shared_part = self._system_prompt_parts()
+        messages = []
+        if shared_part:
+            messages.append({"role": "system", "content": shared_part})
+        content = [{"type": "text", "text": trial_prompt}]
+        if participant_part:
+            content.append({"type": "text", "text": participant_part})
+        messages.append({"role": "user", "content": content})
+        return messages
     
     def _clean_llm_response_text(self, text: str) -> str:
         """
@@ -405,16 +467,13 @@ FORMATTED OUTPUT:"""
         
         # Route to anthropic if needed
         if formatter_provider == "anthropic" or "claude" in formatter_model:
-            try:
-                from anthropic import Anthropic
-            except ImportError:
-                raise ImportError("anthropic package required. Install with: pip install anthropic")
+            from src.llm.client_pool import get_anthropic_client
             
             api_key = os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY required for formatter")
             
-            client = Anthropic(api_key=api_key)
+            client = get_anthropic_client(api_key)
             response = client.messages.create(
                 model=formatter_model,
                 max_tokens=max_tokens,
@@ -431,10 +490,7 @@ FORMATTED OUTPUT:"""
             return {"response_text": result, "usage": usage_info, "full_api_response": {}}
         
         # Use OpenAI SDK for openai/xai/openrouter
-        try:
-            from openai import OpenAI
-        except ImportError:
-            raise ImportError("OpenAI package required. Install with: pip install openai")
+        from src.llm.client_pool import get_openai_client
         
         # Determine API key and base URL
         if formatter_provider == "xai":
@@ -450,12 +506,7 @@ FORMATTED OUTPUT:"""
         if not api_key:
             raise ValueError(f"API key required for formatter provider: {formatter_provider}")
         
-        client = OpenAI(
-            api_key=api_key,
-            base_url=base_url,
-            timeout=30.0,
-            max_retries=0
-        )
+        client = get_openai_client(api_key, base_url=base_url, timeout=30.0, max_retries=0)
         
         try:
             response = client.chat.completions.create(
@@ -538,7 +589,8 @@ FORMATTED OUTPUT:"""
     def complete_trial(
         self,
         trial_prompt: str,  # 改为直接接受 prompt
-        trial_info: Optional[Dict[str, Any]] = None
+        trial_info: Optional[Dict[str, Any]] = None,
+        truncated_at: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Participant completes a single experimental trial.
@@ -546,19 +598,157 @@ FORMATTED OUTPUT:"""
         Args:
             trial_prompt: Pre-built trial prompt (from PromptBuilder)
             trial_info: Optional metadata about the trial
+            truncated_at: max_tokens at which an earlier reply to this trial (a Batch
+                API result) was cut off before its answers; the call then starts
+                from the token budget planner's retry budget
             
         Returns:
             Participant's response and metadata
         """
+        if self.use_real_llm:
+            # Determine max_tokens based on trial type
+            max_tokens = self._get_max_tokens_for_trial(trial_info or {})
+            messages = self._trial_messages(trial_prompt)
+            stream_kwargs = self._early_stop_kwargs(trial_info)
+            retries = 0
+            if truncated_at is not None and self.token_budget is not None:
+                max_tokens = self.token_budget.retry_budget(truncated_at)
+                retries = 1
+            while True:
+                llm_result = self._call_llm_with_history(messages, max_tokens=max_tokens, **stream_kwargs)
+                if not self._budget_retry_needed(llm_result, max_tokens, trial_info):
+                    break
+                max_tokens = self.token_budget.retry_budget(max_tokens)
+                retries += 1
+            return self._record_trial_response(self._with_budget_info(llm_result, max_tokens, retries), trial_info)
+        
+        # Simulated response
+        choice, response_text = self._simulate_response(trial_info or {}, None)
+        return self._record_trial_response(None, trial_info, simulated=(choice, response_text))
+    
+    async def acomplete_trial(
+        self,
+        trial_prompt: str,
+        trial_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of complete_trial() for the asyncio execution mode.
+        
+        Produces exactly the same response record; only the transport differs
+        (AsyncOpenAI / AsyncAnthropic instead of blocking clients).
+        """
+        if self.use_real_llm:
+            max_tokens = self._get_max_tokens_for_trial(trial_info or {})
+            messages = self._trial_messages(trial_prompt)
+            stream_kwargs = self._early_stop_kwargs(trial_info)
+            retries = 0
+            while True:
+                llm_result = await self._acall_llm_with_history(messages, max_tokens=max_tokens, **stream_kwargs)
+                if not self._budget_retry_needed(llm_result, max_tokens, trial_info):
+                    break
+                max_tokens = self.token_budget.retry_budget(max_tokens)
+                retries += 1
+            return self._record_trial_response(self._with_budget_info(llm_result, max_tokens, retries), trial_info)
+        
+        choice, response_text = self._simulate_response(trial_info or {}, None)
+        return self._record_trial_response(None, trial_info, simulated=(choice, response_text))
+    
+    def _early_stop_kwargs(self, trial_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        ``early_stop`` for the LLM call of a trial: stop the stream once every required
+        Q number is parsed. Empty unless streaming (and the study has evaluator hooks).
+        """
+        if not self.streaming:
+            return {}
+        from src.llm.streaming import required_answers_check
+        check = required_answers_check(self.profile.get("study_id"), trial_info)
+        return {"early_stop": check} if check is not None else {}
+    
+    def _budget_retry_needed(self, llm_result: Dict[str, Any], max_tokens: int, trial_info: Optional[Dict[str, Any]]) -> bool:
+        """
+        Feed a reply to the token budget planner and tell whether it was cut off by
+        max_tokens before answering every required Q (so it should be retried with a
+        larger budget). Always False without a planner.
+        """
+        if self.token_budget is None:
+            return False
+        record = {**llm_result, "trial_info": trial_info}
+        cut_off = self.token_budget.observe_response(self.profile.get("study_id"), record)
+        return cut_off and self.token_budget.can_retry(max_tokens)
+    
+    def _with_budget_info(self, llm_result: Dict[str, Any], max_tokens: int, retries: int) -> Dict[str, Any]:
+        if self.token_budget is None:
+            return llm_result
+        return dict(llm_result, token_budget={"max_tokens": max_tokens, "retries": retries})
+    
+    def build_batch_request(self, trial_prompt: str, trial_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build the request body for one trial in the provider's Batch API format.
+        
+        The body is exactly what complete_trial() would send (same system prompt,
+        max_tokens and reasoning settings), with SDK-only ``extra_body`` fields
+        merged into the top level as they are on the wire.
+        """
+        messages = self._trial_messages(trial_prompt)
+        max_tokens = self._get_max_tokens_for_trial(trial_info or {})
+        if self.provider == "anthropic":
+            return self._build_anthropic_request(messages, max_tokens)
+        body = self._build_chat_request(messages, max_tokens)
+        body.update(body.pop("extra_body", {}) or {})
+        return body
+    
+    def complete_trial_from_batch(
+        self,
+        response_body: Dict[str, Any],
+        trial_info: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record a trial whose completion came back from a Batch API job.
+        
+        Args:
+            response_body: chat.completions response (OpenAI) or Message (Anthropic) as a dict
+            trial_info: Trial metadata, as passed to complete_trial()
+            max_tokens: max_tokens of the batch request (feeds the token budget planner)
+            
+        Returns:
+            The same response record complete_trial() would have produced, or None
+            when the token budget planner finds the reply cut off by max_tokens
+            before its answers; the caller then retries with
+            complete_trial(..., truncated_at=max_tokens)
+        """
+        if self.provider == "anthropic":
+            from anthropic.types import Message
+            llm_result = self._parse_anthropic_response(Message.model_validate(response_body))
+        else:
+            from openai.types.chat import ChatCompletion
+            llm_result = self._parse_chat_response(ChatCompletion.model_validate(response_body))
+        if max_tokens is not None:
+            if self._budget_retry_needed(llm_result, max_tokens, trial_info):
+                return None
+            llm_result = self._with_budget_info(llm_result, max_tokens, 0)
+        return self._record_trial_response(llm_result, trial_info)
+    
+    def _record_trial_response(
+        self,
+        llm_result: Optional[Dict[str, Any]],
+        trial_info: Optional[Dict[str, Any]],
+        simulated: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the response record for a finished trial and append it to trial_responses.
+        
+        Args:
+            llm_result: Result of an LLM call (None in simulation mode)
+            trial_info: Trial metadata
+            simulated: (choice, response_text) from _simulate_response when not using a real LLM
+        """
         raw_response_text = ""  # Store raw API response (default to empty string, not None)
         usage_info = {}  # Store token usage and cost info
+        full_api_response = {}
         formatter_used = False  # Track if formatter was used
         
-        if self.use_real_llm:
-            system_prompt = self._construct_system_prompt()
-            # Determine max_tokens based on trial type
-            max_tokens = self._get_max_tokens_for_trial(trial_info or {})
-            llm_result = self._call_llm(system_prompt, trial_prompt, max_tokens=max_tokens)  # Save raw response
+        if llm_result is not None:
             raw_response_text = llm_result.get("response_text", "") or ""
             # Clean response text to ensure UTF-8 compatibility
             raw_response_text = self._clean_llm_response_text(raw_response_text)
@@ -568,13 +758,11 @@ FORMATTED OUTPUT:"""
             # Stage 5: No formatter - use raw response directly
             # Formatting will be done in Stage 6 if needed (sanity check)
             response_text = raw_response_text
-            formatter_used = False
             
             # Parse response to extract choice
             choice = self._parse_response(response_text, trial_info or {})
         else:
-            # Simulated response
-            choice, response_text = self._simulate_response(trial_info or {}, None)
+            choice, response_text = simulated
             raw_response_text = response_text  # In simulation mode, raw response is the same as response_text
         
         # Record response - include raw_response_text for later extraction
@@ -586,11 +774,19 @@ FORMATTED OUTPUT:"""
             "raw_response_text": raw_response_text or "",  # Store raw response (formatted if formatter was used)
             "usage": usage_info,  # Store token usage and cost
             "formatter_used": formatter_used,  # Track if formatter was used
-            "full_api_response": full_api_response if self.use_real_llm else {},  # Store complete API response dictionary
+            "full_api_response": full_api_response,  # Store complete API response dictionary
             "correct_answer": trial_info.get("correct_answer") if trial_info else None,
             "is_correct": choice == trial_info.get("correct_answer") if trial_info and trial_info.get("correct_answer") else None,
             "trial_info": trial_info
         }
+        if llm_result is not None and llm_result.get("timing"):
+            # Streamed completion: time-to-first-token / time-to-complete and whether it was cut short
+            response_data["timing"] = llm_result["timing"]
+            response_data["early_stop"] = bool(llm_result.get("early_stop"))
+        if llm_result is not None and llm_result.get("token_budget"):
+            response_data["token_budget"] = llm_result["token_budget"]
+        if llm_result is not None and llm_result.get("hedge"):
+            response_data["hedge"] = llm_result["hedge"]
         
         self.trial_responses.append(response_data)
         
@@ -606,10 +802,80 @@ FORMATTED OUTPUT:"""
         Returns:
             Max tokens for this trial
         """
+        if self.token_budget is not None:
+            return self.token_budget.max_tokens_for(self.profile.get("study_id"), trial_info)
         # All trials use 8192 (4096 * 2) max tokens
         return 8192
     
-    def _call_llm_with_history(self, messages: List[Dict[str, str]], max_retries: int = 3, max_tokens: int = 8192) -> Dict[str, Any]:
+    def _call_llm_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        max_retries: int = 3,
+        max_tokens: int = 8192,
+        early_stop: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the LLM reply for a conversation, served from the response cache when enabled.
+        
+        Args:
+            messages: List of message dicts with "role" and "content" keys
+            max_retries: Maximum number of retry attempts (default: 3)
+            max_tokens: Maximum tokens for response
+            early_stop: In streaming mode, predicate on the text so far that ends the stream
+            
+        Returns:
+            Dict with "response_text" and "usage" keys containing token usage and cost info
+        """
+        from src.llm.response_cache import get_response_cache
+        
+        cache = get_response_cache()
+        stream_kwargs = {"early_stop": early_stop} if early_stop is not None else {}
+        if cache is None:
+            return self._request_llm_with_history(messages, max_retries=max_retries, max_tokens=max_tokens, **stream_kwargs)
+        
+        key = self._response_cache_key(messages, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            return self._mark_cache_hit(cached)
+        result = self._request_llm_with_history(messages, max_retries=max_retries, max_tokens=max_tokens, **stream_kwargs)
+        # Never pin an empty/failed reply, nor a stream cut short at the answers:
+        # a non-streamed run with the same key expects the complete reply
+        if result.get("response_text") and not result.get("early_stop"):
+            cache.put(key, result)
+        return result
+    
+    def _response_cache_key(self, messages: List[Dict[str, Any]], max_tokens: int) -> str:
+        """Content hash of everything that determines the completion for this agent."""
+        from src.llm.response_cache import make_cache_key
+        return make_cache_key(
+            provider=self.provider,
+            # Same model name on another endpoint (mock server, proxy) is a different source
+            endpoint=(self.api_base or "").rstrip("/") or None,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            reasoning=self.reasoning,
+            enable_reasoning=self.enable_reasoning,
+            # Separate samples for separate participants/runs even if prompts coincide
+            participant_id=self.participant_id,
+            salt=self.cache_salt,
+        )
+    
+    @staticmethod
+    def _mark_cache_hit(cached: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(cached)
+        result.pop("hedge", None)  # describes the original request, not this one
+        result["cache_hit"] = True
+        return result
+    
+    def _request_llm_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        max_retries: int = 3,
+        max_tokens: int = 8192,
+        early_stop: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
         """
         Make actual API call to LLM with conversation history.
         
@@ -617,266 +883,48 @@ FORMATTED OUTPUT:"""
             messages: List of message dicts with "role" and "content" keys
             max_retries: Maximum number of retry attempts (default: 3)
             max_tokens: Maximum tokens for response
+            early_stop: In streaming mode, predicate on the text so far that ends the stream
             
         Returns:
             Dict with "response_text" and "usage" keys containing token usage and cost info
         """
         import logging
         import time
-        import random as _rnd
         logger = logging.getLogger(__name__)
         
         # Route to Anthropic SDK if provider is anthropic
         if self.provider == "anthropic":
-            return self._call_anthropic_with_history(messages, max_retries=max_retries, max_tokens=max_tokens)
+            return self._call_anthropic_with_history(messages, max_retries=max_retries, max_tokens=max_tokens, early_stop=early_stop)
         
-        # Otherwise use OpenAI SDK (openai/xai/openrouter)
-        try:
-            from openai import OpenAI
-            # Import exception classes for robust retry detection (best-effort)
-            try:
-                from openai import APITimeoutError, APIConnectionError, APIStatusError  # type: ignore
-            except Exception:  # pragma: no cover - optional availability across versions
-                APITimeoutError = APIConnectionError = APIStatusError = None  # type: ignore
-            try:
-                import httpx  # type: ignore
-            except Exception:  # pragma: no cover
-                httpx = None  # type: ignore
-            try:
-                import httpcore  # type: ignore
-            except Exception:  # pragma: no cover
-                httpcore = None  # type: ignore
-        except ImportError:
-            raise ImportError(
-                "OpenAI package required for LLM agent. "
-                "Install with: pip install openai"
-            )
-        
-        # Create client with appropriate base URL and timeout
-        http_client = None
-        try:
-            if httpx is not None:
-                http_client = httpx.Client(
-                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=20)
-                )
-        except Exception:
-            http_client = None
-        
-        if self.is_openrouter:
-            client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.api_base,
-                timeout=45.0,
-                max_retries=0,
-                http_client=http_client
-            )
-        else:
-            client = OpenAI(
-                api_key=self.api_key,
-                timeout=45.0,
-                max_retries=0,
-                http_client=http_client
-            )
+        # Otherwise use OpenAI SDK (openai/xai/openrouter); the client and its
+        # connection pool are shared process-wide, so only the first call pays the handshake
+        client = self._get_sync_client()
+        limiter = self._get_rate_limiter()
+        prompt_tokens = self._estimate_prompt_tokens(messages)
         
         last_exception = None
         
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
-                    base_wait = 2 ** (attempt - 1)
-                    wait_time = base_wait + _rnd.uniform(0.0, 0.75)
-                    time.sleep(wait_time)
+                    time.sleep(self._retry_wait_time(attempt, last_exception))
                 
-                # Prepare request parameters
-                kwargs = {
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": self.temperature,
-                    "max_tokens": max_tokens
-                }
-                
-                # Add reasoning configuration for OpenRouter if specified and not default
-                if self.is_openrouter and (getattr(self, "reasoning", "default") != "default" or getattr(self, "enable_reasoning", False)):
-                    # If reasoning is "none", explicitly disable reasoning
-                    if self.reasoning.lower() == "none":
-                        kwargs["extra_body"] = {
-                            "reasoning": {
-                                "enabled": False
-                            }
-                        }
-                    else:
-                        # Initialize extra_body if not exists
-                        if "extra_body" not in kwargs:
-                            kwargs["extra_body"] = {}
-                        
-                        reasoning_config = {"enabled": True}
-                        # If reasoning is a numeric string, treat it as max_tokens
-                        if self.reasoning.isdigit():
-                            reasoning_config["max_tokens"] = int(self.reasoning)
-                            # For Qwen models, OpenRouter may map max_tokens to thinking_budget
-                            # According to OpenRouter docs, some Qwen models support thinking_budget
-                            # We set it both in reasoning.max_tokens and top-level extra_body.thinking_budget
-                            if "qwen" in self.model.lower():
-                                kwargs["extra_body"]["thinking_budget"] = int(self.reasoning)
-                        elif self.reasoning != "default":
-                            # Otherwise treat as effort (OpenAI-style: "low", "medium", "high", etc.)
-                            reasoning_config["effort"] = self.reasoning
-                        
-                        # Set reasoning config (standard OpenRouter format)
-                        kwargs["extra_body"]["reasoning"] = reasoning_config
-                        # Note: include_reasoning should be in extra_body, not as a top-level parameter
-                        # Some models may also support include_reasoning in extra_body if needed
-                        if "qwen" in self.model.lower():
-                            kwargs["extra_body"]["include_reasoning"] = True
-                
-                response = client.chat.completions.create(**kwargs)
-                
-                # Validate response
-                if response is None:
-                    raise ValueError("LLM API returned None response")
-                if not hasattr(response, 'choices') or not response.choices:
-                    raise ValueError("LLM API response has no choices")
-                if len(response.choices) == 0:
-                    raise ValueError("LLM API response has empty choices list")
-                
-                # Capture full API response dictionary
-                try:
-                    if hasattr(response, 'model_dump'):
-                        # Pydantic v2
-                        full_api_response = response.model_dump()
-                    elif hasattr(response, 'dict'):
-                        # Pydantic v1
-                        full_api_response = response.dict()
-                    else:
-                        # Fallback: convert to dict manually
-                        full_api_response = {
-                            "id": getattr(response, 'id', None),
-                            "object": getattr(response, 'object', None),
-                            "created": getattr(response, 'created', None),
-                            "model": getattr(response, 'model', None),
-                            "choices": [
-                                {
-                                    "index": getattr(choice, 'index', None),
-                                    "message": {
-                                        "role": getattr(choice.message, 'role', None),
-                                        "content": getattr(choice.message, 'content', None),
-                                        "reasoning": getattr(choice.message, 'reasoning', None),
-                                    },
-                                    "finish_reason": getattr(choice, 'finish_reason', None),
-                                }
-                                for choice in response.choices
-                            ],
-                            "usage": {
-                                "prompt_tokens": getattr(response.usage, 'prompt_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
-                                "completion_tokens": getattr(response.usage, 'completion_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
-                                "total_tokens": getattr(response.usage, 'total_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
-                            }
-                        }
-                        # Add any additional fields that might exist
-                        if hasattr(response, 'system_fingerprint'):
-                            full_api_response["system_fingerprint"] = getattr(response, 'system_fingerprint', None)
-                except Exception as e:
-                    logger.warning(f"Failed to capture full API response: {e}")
-                    full_api_response = {}
-                
-                # Extract usage information
-                usage_info = {}
-                if hasattr(response, 'usage') and response.usage:
-                    usage = response.usage
-                    usage_info = {
-                        "prompt_tokens": getattr(usage, 'prompt_tokens', 0) or 0,
-                        "completion_tokens": getattr(usage, 'completion_tokens', 0) or 0,
-                        "total_tokens": getattr(usage, 'total_tokens', 0) or 0
-                    }
-                    # Try to get cost if available (OpenRouter provides this)
-                    if hasattr(usage, 'total_cost') or hasattr(usage, 'cost'):
-                        usage_info["cost"] = getattr(usage, 'total_cost', None) or getattr(usage, 'cost', None)
-                    elif hasattr(response, 'total_cost') or hasattr(response, 'cost'):
-                        usage_info["cost"] = getattr(response, 'total_cost', None) or getattr(response, 'cost', None)
-                
-                # Get main content
-                message = response.choices[0].message
-                result = message.content.strip() if message.content else ""
-                
-                # Check finish_reason to detect truncation
-                finish_reason = None
-                if hasattr(response.choices[0], 'finish_reason'):
-                    finish_reason = response.choices[0].finish_reason
-                elif hasattr(response.choices[0], 'finishReason'):  # Alternative naming
-                    finish_reason = response.choices[0].finishReason
-                
-                # For reasoning models (DeepSeek R1, o1, o3, etc.), check for reasoning content
-                reasoning_text = None
-                
-                # Check for explicit reasoning field (DeepSeek R1, OpenAI o1/o3)
-                if hasattr(message, 'reasoning') and message.reasoning:
-                    reasoning_text = message.reasoning
-                # Check for reasoning_details array (some models provide structured reasoning)
-                elif hasattr(message, 'reasoning_details') and message.reasoning_details:
-                    # Extract text from reasoning_details (for models like DeepSeek R1)
-                    reasoning_parts = []
-                    for detail in message.reasoning_details:
-                        if hasattr(detail, 'text') and detail.text:
-                            reasoning_parts.append(detail.text)
-                        elif isinstance(detail, dict) and detail.get('text'):
-                            reasoning_parts.append(detail['text'])
-                    if reasoning_parts:
-                        reasoning_text = '\n\n'.join(reasoning_parts)
-                # Check for reasoning in response object (alternative location)
-                elif hasattr(response.choices[0], 'reasoning') and response.choices[0].reasoning:
-                    reasoning_text = response.choices[0].reasoning
-                # Check if content itself contains reasoning tags (some models embed reasoning)
-                elif result and any(tag in result.lower() for tag in ['<thinking>', '<reasoning>', '<think>']):
-                    # Content already contains reasoning, return as-is with usage
-                    return {"response_text": result, "usage": usage_info}
-                
-                # Combine reasoning and content if reasoning exists
-                if reasoning_text:
-                    if result:
-                        full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>\n\n{result}"
-                    else:
-                        # For models where content is empty but reasoning exists
-                        # This can happen when:
-                        # 1. Model hit max_tokens limit before outputting final answer (finish_reason == "length")
-                        # 2. Model only output reasoning without final answer
-                        # Try to extract answer from reasoning if possible
-                        import re
-                        q_pattern = re.compile(r'Q\d+(?:\.\d+)?\s*=\s*[^\n]+', re.IGNORECASE)
-                        q_matches = q_pattern.findall(reasoning_text)
-                        
-                        if q_matches:
-                            # Found Q format in reasoning, extract it
-                            extracted = '\n'.join(q_matches)
-                            logger.warning(f"Content empty but found Q format in reasoning. Extracted: {extracted[:100]}...")
-                            full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>\n\n{extracted}"
+                kwargs = self._build_chat_request(messages, max_tokens)
+                def send(cancel=None):
+                    # Each copy of a hedged request takes its own limiter slot
+                    with limiter.request(prompt_tokens, cancel) as slot:
+                        if self.streaming:
+                            result = self._stream_chat_response(client, kwargs, prompt_tokens, early_stop, cancel)
                         else:
-                            # No Q format found, just return reasoning with warning
-                            if finish_reason == "length":
-                                logger.warning(f"Response truncated (finish_reason=length). Only reasoning available, no final answer. Consider increasing max_tokens.")
-                            else:
-                                logger.warning(f"Content empty but reasoning exists (finish_reason={finish_reason}). Only reasoning available, no final answer.")
-                            full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>"
-                    return {"response_text": full_response, "usage": usage_info, "full_api_response": full_api_response}
+                            result = self._parse_chat_response(client.chat.completions.create(**kwargs))
+                        slot.record_usage(result.get("usage"))
+                    return result
                 
-                return {"response_text": result, "usage": usage_info, "full_api_response": full_api_response}
+                return self._hedged(send)
             
             except Exception as e:
                 last_exception = e
-                error_msg = str(e).lower()
-                
-                retryable_exc = False
-                try:
-                    if APITimeoutError is not None and isinstance(e, APITimeoutError):
-                        retryable_exc = True
-                except Exception:
-                    pass
-                
-                if not retryable_exc:
-                    retryable_exc = any(indicator in error_msg for indicator in [
-                        "timeout", "connection", "rate limit", "429", "503", "502", "500"
-                    ])
-                
-                if retryable_exc and attempt < max_retries - 1:
+                if self._is_retryable_error(e) and attempt < max_retries - 1:
                     logger.warning(f"Retryable error on attempt {attempt + 1}/{max_retries}: {e}")
                     continue
                 else:
@@ -887,7 +935,239 @@ FORMATTED OUTPUT:"""
             raise last_exception
         raise RuntimeError("Failed to call LLM: unknown error")
     
-    def _call_anthropic_with_history(self, messages: List[Dict[str, str]], max_retries: int = 3, max_tokens: int = 8192) -> Dict[str, Any]:
+    @staticmethod
+    def _retry_wait_time(attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        Backoff before retry number ``attempt`` (1-based): exponential with jitter, or just
+        jitter when the server sent Retry-After (the shared rate limiter already waits for it).
+        """
+        from src.llm.rate_limiter import backoff_with_jitter
+        return backoff_with_jitter(attempt, error)
+    
+    def _get_rate_limiter(self) -> Any:
+        """Process-wide adaptive rate limiter for this agent's provider and model."""
+        from src.llm.rate_limiter import get_rate_limiter
+        return get_rate_limiter(self.provider, self.model)
+    
+    @staticmethod
+    def _estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+        """Rough prompt size (~4 characters per token) used for tokens/min reservations."""
+        return sum(len(str(m.get("content") or "")) for m in messages) // 4
+    
+    @staticmethod
+    def _is_retryable_error(e: Exception) -> bool:
+        """Whether an API exception is transient (timeout, connection, rate limit, 5xx)."""
+        try:
+            from openai import APITimeoutError  # type: ignore
+            if isinstance(e, APITimeoutError):
+                return True
+        except Exception:  # pragma: no cover - optional availability across versions
+            pass
+        error_msg = str(e).lower()
+        return any(indicator in error_msg for indicator in [
+            "timeout", "connection", "rate limit", "429", "503", "502", "500"
+        ])
+    
+    def _build_chat_request(self, messages: List[Dict[str, str]], max_tokens: int) -> Dict[str, Any]:
+        """
+        Build the chat.completions.create kwargs (OpenAI/xAI/OpenRouter), including
+        the OpenRouter reasoning configuration.
+        """
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": max_tokens
+        }
+        
+        # Add reasoning configuration for OpenRouter if specified and not default
+        if self.is_openrouter and (getattr(self, "reasoning", "default") != "default" or getattr(self, "enable_reasoning", False)):
+            # If reasoning is "none", explicitly disable reasoning
+            if self.reasoning.lower() == "none":
+                kwargs["extra_body"] = {
+                    "reasoning": {
+                        "enabled": False
+                    }
+                }
+            else:
+                # Initialize extra_body if not exists
+                if "extra_body" not in kwargs:
+                    kwargs["extra_body"] = {}
+                
+                reasoning_config = {"enabled": True}
+                # If reasoning is a numeric string, treat it as max_tokens
+                if self.reasoning.isdigit():
+                    reasoning_config["max_tokens"] = int(self.reasoning)
+                    # For Qwen models, OpenRouter may map max_tokens to thinking_budget
+                    # According to OpenRouter docs, some Qwen models support thinking_budget
+                    # We set it both in reasoning.max_tokens and top-level extra_body.thinking_budget
+                    if "qwen" in self.model.lower():
+                        kwargs["extra_body"]["thinking_budget"] = int(self.reasoning)
+                elif self.reasoning != "default":
+                    # Otherwise treat as effort (OpenAI-style: "low", "medium", "high", etc.)
+                    reasoning_config["effort"] = self.reasoning
+                
+                # Set reasoning config (standard OpenRouter format)
+                kwargs["extra_body"]["reasoning"] = reasoning_config
+                # Note: include_reasoning should be in extra_body, not as a top-level parameter
+                # Some models may also support include_reasoning in extra_body if needed
+                if "qwen" in self.model.lower():
+                    kwargs["extra_body"]["include_reasoning"] = True
+        
+        return kwargs
+    
+    def _parse_chat_response(self, response: Any) -> Dict[str, Any]:
+        """
+        Convert a chat completion into {"response_text", "usage", "full_api_response"}.
+        
+        Reasoning content (DeepSeek R1, o1/o3, ...) is wrapped in <reasoning> tags
+        ahead of the final answer.
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+        
+        # Validate response
+        if response is None:
+            raise ValueError("LLM API returned None response")
+        if not hasattr(response, 'choices') or not response.choices:
+            raise ValueError("LLM API response has no choices")
+        if len(response.choices) == 0:
+            raise ValueError("LLM API response has empty choices list")
+        
+        # Capture full API response dictionary
+        try:
+            if hasattr(response, 'model_dump'):
+                # Pydantic v2
+                full_api_response = response.model_dump()
+            elif hasattr(response, 'dict'):
+                # Pydantic v1
+                full_api_response = response.dict()
+            else:
+                # Fallback: convert to dict manually
+                full_api_response = {
+                    "id": getattr(response, 'id', None),
+                    "object": getattr(response, 'object', None),
+                    "created": getattr(response, 'created', None),
+                    "model": getattr(response, 'model', None),
+                    "choices": [
+                        {
+                            "index": getattr(choice, 'index', None),
+                            "message": {
+                                "role": getattr(choice.message, 'role', None),
+                                "content": getattr(choice.message, 'content', None),
+                                "reasoning": getattr(choice.message, 'reasoning', None),
+                            },
+                            "finish_reason": getattr(choice, 'finish_reason', None),
+                        }
+                        for choice in response.choices
+                    ],
+                    "usage": {
+                        "prompt_tokens": getattr(response.usage, 'prompt_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
+                        "completion_tokens": getattr(response.usage, 'completion_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
+                        "total_tokens": getattr(response.usage, 'total_tokens', 0) if hasattr(response, 'usage') and response.usage else 0,
+                    }
+                }
+                # Add any additional fields that might exist
+                if hasattr(response, 'system_fingerprint'):
+                    full_api_response["system_fingerprint"] = getattr(response, 'system_fingerprint', None)
+        except Exception as e:
+            logger.warning(f"Failed to capture full API response: {e}")
+            full_api_response = {}
+        
+        # Extract usage information
+        usage_info = {}
+        if hasattr(response, 'usage') and response.usage:
+            usage = response.usage
+            usage_info = {
+                "prompt_tokens": getattr(usage, 'prompt_tokens', 0) or 0,
+                "completion_tokens": getattr(usage, 'completion_tokens', 0) or 0,
+                "total_tokens": getattr(usage, 'total_tokens', 0) or 0
+            }
+            # Prompt-prefix cache hits (OpenAI / OpenRouter / xAI report them here)
+            details = getattr(usage, 'prompt_tokens_details', None)
+            if details:
+                cached_tokens = details.get('cached_tokens') if isinstance(details, dict) else getattr(details, 'cached_tokens', None)
+                if cached_tokens:
+                    usage_info["cached_tokens"] = cached_tokens
+            # Try to get cost if available (OpenRouter provides this)
+            if hasattr(usage, 'total_cost') or hasattr(usage, 'cost'):
+                usage_info["cost"] = getattr(usage, 'total_cost', None) or getattr(usage, 'cost', None)
+            elif hasattr(response, 'total_cost') or hasattr(response, 'cost'):
+                usage_info["cost"] = getattr(response, 'total_cost', None) or getattr(response, 'cost', None)
+        
+        # Get main content
+        message = response.choices[0].message
+        result = message.content.strip() if message.content else ""
+        
+        # Check finish_reason to detect truncation
+        finish_reason = None
+        if hasattr(response.choices[0], 'finish_reason'):
+            finish_reason = response.choices[0].finish_reason
+        elif hasattr(response.choices[0], 'finishReason'):  # Alternative naming
+            finish_reason = response.choices[0].finishReason
+        
+        # For reasoning models (DeepSeek R1, o1, o3, etc.), check for reasoning content
+        reasoning_text = None
+        
+        # Check for explicit reasoning field (DeepSeek R1, OpenAI o1/o3)
+        if hasattr(message, 'reasoning') and message.reasoning:
+            reasoning_text = message.reasoning
+        # Check for reasoning_details array (some models provide structured reasoning)
+        elif hasattr(message, 'reasoning_details') and message.reasoning_details:
+            # Extract text from reasoning_details (for models like DeepSeek R1)
+            reasoning_parts = []
+            for detail in message.reasoning_details:
+                if hasattr(detail, 'text') and detail.text:
+                    reasoning_parts.append(detail.text)
+                elif isinstance(detail, dict) and detail.get('text'):
+                    reasoning_parts.append(detail['text'])
+            if reasoning_parts:
+                reasoning_text = '\n\n'.join(reasoning_parts)
+        # Check for reasoning in response object (alternative location)
+        elif hasattr(response.choices[0], 'reasoning') and response.choices[0].reasoning:
+            reasoning_text = response.choices[0].reasoning
+        # Check if content itself contains reasoning tags (some models embed reasoning)
+        elif result and any(tag in result.lower() for tag in ['<thinking>', '<reasoning>', '<think>']):
+            # Content already contains reasoning, return as-is with usage
+            return {"response_text": result, "usage": usage_info}
+        
+        # Combine reasoning and content if reasoning exists
+        if reasoning_text:
+            if result:
+                full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>\n\n{result}"
+            else:
+                # For models where content is empty but reasoning exists
+                # This can happen when:
+                # 1. Model hit max_tokens limit before outputting final answer (finish_reason == "length")
+                # 2. Model only output reasoning without final answer
+                # Try to extract answer from reasoning if possible
+                import re
+                q_pattern = re.compile(r'Q\d+(?:\.\d+)?\s*=\s*[^\n]+', re.IGNORECASE)
+                q_matches = q_pattern.findall(reasoning_text)
+                
+                if q_matches:
+                    # Found Q format in reasoning, extract it
+                    extracted = '\n'.join(q_matches)
+                    logger.warning(f"Content empty but found Q format in reasoning. Extracted: {extracted[:100]}...")
+                    full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>\n\n{extracted}"
+                else:
+                    # No Q format found, just return reasoning with warning
+                    if finish_reason == "length":
+                        logger.warning(f"Response truncated (finish_reason=length). Only reasoning available, no final answer. Consider increasing max_tokens.")
+                    else:
+                        logger.warning(f"Content empty but reasoning exists (finish_reason={finish_reason}). Only reasoning available, no final answer.")
+                    full_response = f"<reasoning>\n{reasoning_text}\n</reasoning>"
+            return {"response_text": full_response, "usage": usage_info, "full_api_response": full_api_response}
+        
+        return {"response_text": result, "usage": usage_info, "full_api_response": full_api_response}
+    
+    def _call_anthropic_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        max_retries: int = 3,
+        max_tokens: int = 8192,
+        early_stop: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
         """
         Call Anthropic Claude API with conversation history.
         
@@ -895,23 +1175,58 @@ FORMATTED OUTPUT:"""
             messages: List of message dicts with "role" and "content" keys
             max_retries: Maximum retry attempts
             max_tokens: Maximum tokens for response
+            early_stop: In streaming mode, predicate on the text so far that ends the stream
             
         Returns:
             Dict with "response_text" and "usage" keys
         """
         import logging
         import time
-        import random as _rnd
         logger = logging.getLogger(__name__)
         
-        try:
-            from anthropic import Anthropic
-        except ImportError:
-            raise ImportError("anthropic package required. Install with: pip install anthropic")
+        client = self._get_sync_client()
+        limiter = self._get_rate_limiter()
+        prompt_tokens = self._estimate_prompt_tokens(messages)
+        
+        last_exception = None
+        for attempt in range(max_retries):
+            try:
+                if attempt > 0:
+                    time.sleep(self._retry_wait_time(attempt, last_exception))
+                
+                kwargs = self._build_anthropic_request(messages, max_tokens)
+                def send(cancel=None):
+                    # Each copy of a hedged request takes its own limiter slot
+                    with limiter.request(prompt_tokens, cancel) as slot:
+                        if self.streaming:
+                            result = self._stream_anthropic_response(client, kwargs, prompt_tokens, early_stop, cancel)
+                        else:
+                            result = self._parse_anthropic_response(client.messages.create(**kwargs))
+                        slot.record_usage(result.get("usage"))
+                    return result
+                
+                return self._hedged(send)
+            
+            except Exception as e:
+                last_exception = e
+                logger.warning(f"Anthropic API error (attempt {attempt + 1}/{max_retries}): {e}")
+                if attempt == max_retries - 1:
+                    break
         
-        client = Anthropic(api_key=self.api_key)
+        error_msg = f"Failed to get response from Anthropic after {max_retries} attempts: {last_exception}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    
+    def _build_anthropic_request(self, messages: List[Dict[str, str]], max_tokens: int) -> Dict[str, Any]:
+        """
+        Build messages.create kwargs: extract the system prompt and make sure the
+        conversation starts with a user turn.
         
-        # Convert messages to Anthropic format (extract system, ensure user/assistant alternation)
+        With prompt_caching, cache_control breakpoints go on the system prompt, on
+        the first block of the first user turn (the trial prompt shared across
+        participants) and on the last user turn (so each round of a conversation
+        reads the previous rounds from the cache).
+        """
         system_msg = None
         claude_messages = []
         for m in messages:
@@ -926,56 +1241,294 @@ FORMATTED OUTPUT:"""
             # Anthropic requires first message to be user
             claude_messages.insert(0, {"role": "user", "content": "Hello"})
         
+        if self.prompt_caching:
+            claude_messages = self._with_cache_breakpoints(claude_messages)
+        
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": claude_messages,
+        }
+        if system_msg:
+            kwargs["system"] = system_msg
+            if self.prompt_caching:
+                kwargs["system"] = [{"type": "text", "text": system_msg, "cache_control": {"type": "ephemeral"}}]
+        if self.temperature is not None:
+            kwargs["temperature"] = self.temperature
+        return kwargs
+    
+    @staticmethod
+    def _with_cache_breakpoints(claude_messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy of the messages with ephemeral cache_control on the first and last user turns."""
+        user_indices = [i for i, m in enumerate(claude_messages) if m["role"] == "user"]
+        breakpoints = [(user_indices[0], 0)]
+        if len(user_indices) > 1:
+            breakpoints.append((user_indices[-1], -1))
+        marked = list(claude_messages)
+        for i, block_idx in breakpoints:
+            content = marked[i]["content"]
+            blocks = [dict(b) for b in content] if isinstance(content, list) else [{"type": "text", "text": content}]
+            blocks[block_idx]["cache_control"] = {"type": "ephemeral"}
+            marked[i] = {**marked[i], "content": blocks}
+        return marked
+    
+    def _parse_anthropic_response(self, response: Any) -> Dict[str, Any]:
+        """Convert an Anthropic message into {"response_text", "usage", "full_api_response"}."""
+        result = response.content[0].text if response.content else ""
+        result = self._clean_llm_response_text(result)
+        
+        # Extract usage
+        usage_info = {}
+        if hasattr(response, "usage") and response.usage:
+            # input_tokens excludes prompt-cache reads/writes; count them in prompt_tokens
+            # (as OpenAI does) and report them separately
+            cache_read = getattr(response.usage, "cache_read_input_tokens", None) or 0
+            cache_creation = getattr(response.usage, "cache_creation_input_tokens", None) or 0
+            prompt_tokens = getattr(response.usage, "input_tokens", 0) + cache_read + cache_creation
+            usage_info = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": getattr(response.usage, "output_tokens", 0),
+                "total_tokens": prompt_tokens + getattr(response.usage, "output_tokens", 0),
+            }
+            if cache_read or cache_creation:
+                usage_info["cached_tokens"] = cache_read
+                usage_info["cache_creation_tokens"] = cache_creation
+        
+        full_api_response = {}
+        try:
+            if hasattr(response, 'model_dump'):
+                full_api_response = response.model_dump()
+            elif hasattr(response, 'dict'):
+                full_api_response = response.dict()
+        except:
+            pass
+        
+        return {"response_text": result, "usage": usage_info, "full_api_response": full_api_response}
+    
+    def _hedged(self, send: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run one API attempt, hedged with a duplicate request when it is slower than the
+        usual latency of this provider/model (see src.llm.hedging; plain call when off).
+        """
+        from src.llm.hedging import get_hedger
+        hedger = get_hedger(self.provider, self.model)
+        if hedger is None:
+            return send()
+        return hedger.call(send)
+    
+    async def _ahedged(self, send: Callable[[], Any]) -> Dict[str, Any]:
+        """Async counterpart of _hedged(): the losing request's task is cancelled."""
+        from src.llm.hedging import get_hedger
+        hedger = get_hedger(self.provider, self.model)
+        if hedger is None:
+            return await send()
+        return await hedger.acall(send)
+    
+    @staticmethod
+    def _stream_chat_response(
+        client: Any,
+        kwargs: Dict[str, Any],
+        prompt_tokens: int,
+        early_stop: Optional[Callable[[str], bool]] = None,
+        cancel: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Streamed chat completion, closed early once ``early_stop`` passes (see
+        src.llm.streaming) or ``cancel`` (a threading.Event, set when a hedged
+        duplicate won) is set.
+        """
+        from src.llm.streaming import StreamAccumulator
+        accumulator = StreamAccumulator(prompt_tokens, early_stop)
+        stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs)
+        try:
+            for chunk in stream:
+                if accumulator.add_openai_chunk(chunk) or (cancel is not None and cancel.is_set()):
+                    break
+        finally:
+            stream.close()
+        return accumulator.result()
+    
+    @staticmethod
+    def _stream_anthropic_response(
+        client: Any,
+        kwargs: Dict[str, Any],
+        prompt_tokens: int,
+        early_stop: Optional[Callable[[str], bool]] = None,
+        cancel: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """Streamed Anthropic message, closed early once ``early_stop`` passes or ``cancel`` is set."""
+        from src.llm.streaming import StreamAccumulator
+        accumulator = StreamAccumulator(prompt_tokens, early_stop)
+        stream = client.messages.create(stream=True, **kwargs)
+        try:
+            for event in stream:
+                if accumulator.add_anthropic_event(event) or (cancel is not None and cancel.is_set()):
+                    break
+        finally:
+            stream.close()
+        return accumulator.result()
+    
+    @staticmethod
+    async def _astream_response(client: Any, kwargs: Dict[str, Any], prompt_tokens: int, is_anthropic: bool, early_stop: Optional[Callable[[str], bool]] = None) -> Dict[str, Any]:
+        """Async counterpart of _stream_chat_response() / _stream_anthropic_response()."""
+        from src.llm.streaming import StreamAccumulator
+        accumulator = StreamAccumulator(prompt_tokens, early_stop)
+        if is_anthropic:
+            stream = await client.messages.create(stream=True, **kwargs)
+            add = accumulator.add_anthropic_event
+        else:
+            stream = await client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs)
+            add = accumulator.add_openai_chunk
+        try:
+            async for item in stream:
+                if add(item):
+                    break
+        finally:
+            await stream.close()
+        return accumulator.result()
+    
+    def _get_sync_client(self) -> Any:
+        """
+        Return the shared synchronous SDK client for this agent's provider.
+
+        Clients come from src.llm.client_pool and are keyed by provider, base URL
+        and API key, so every agent in a pool (and every repeat of a run) reuses
+        the same HTTP connection pool. A custom api_base (e.g. the local mock
+        server in src.llm.mock_server) is honored for every provider.
+        """
+        from src.llm.client_pool import get_anthropic_client, get_openai_client
+
+        if self.provider == "anthropic":
+            return get_anthropic_client(self.api_key, base_url=self.api_base)
+        return get_openai_client(
+            self.api_key,
+            base_url=self.api_base,
+            timeout=45.0,
+            max_retries=0,
+        )
+
+    def _create_async_client(self) -> Any:
+        """
+        Create an asyncio client (AsyncOpenAI or AsyncAnthropic) for this agent's provider.
+        
+        Async clients are bound to the event loop they are first used on, so the
+        pool creates one per run and shares it across participants.
+        """
+        if self.provider == "anthropic":
+            try:
+                from anthropic import AsyncAnthropic
+            except ImportError:
+                raise ImportError("anthropic package required. Install with: pip install anthropic")
+            return AsyncAnthropic(api_key=self.api_key, base_url=self.api_base, max_retries=0)
+        
+        try:
+            from openai import AsyncOpenAI
+        except ImportError:
+            raise ImportError(
+                "OpenAI package required for LLM agent. "
+                "Install with: pip install openai"
+            )
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.api_base,
+            timeout=45.0,
+            max_retries=0
+        )
+    
+    async def _acall_llm_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        max_retries: int = 3,
+        max_tokens: int = 8192,
+        early_stop: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of _call_llm_with_history() (response cache included).
+        """
+        from src.llm.response_cache import get_response_cache
+        
+        cache = get_response_cache()
+        stream_kwargs = {"early_stop": early_stop} if early_stop is not None else {}
+        if cache is None:
+            return await self._arequest_llm_with_history(messages, max_retries=max_retries, max_tokens=max_tokens, **stream_kwargs)
+        
+        key = self._response_cache_key(messages, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            return self._mark_cache_hit(cached)
+        result = await self._arequest_llm_with_history(messages, max_retries=max_retries, max_tokens=max_tokens, **stream_kwargs)
+        if result.get("response_text") and not result.get("early_stop"):
+            cache.put(key, result)
+        return result
+    
+    async def _arequest_llm_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        max_retries: int = 3,
+        max_tokens: int = 8192,
+        early_stop: Optional[Callable[[str], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of _request_llm_with_history().
+        
+        Uses the client in self._async_client (assigned by ParticipantPool for the
+        duration of an async run), creating one lazily when called standalone.
+        """
+        import asyncio
+        import logging
+        logger = logging.getLogger(__name__)
+        
+        if self._async_client is None:
+            self._async_client = self._create_async_client()
+        client = self._async_client
+        is_anthropic = self.provider == "anthropic"
+        limiter = self._get_rate_limiter()
+        prompt_tokens = self._estimate_prompt_tokens(messages)
+        
         last_exception = None
         for attempt in range(max_retries):
             try:
                 if attempt > 0:
-                    wait_time = 2 ** (attempt - 1) + _rnd.uniform(0, 0.75)
-                    time.sleep(wait_time)
+                    await asyncio.sleep(self._retry_wait_time(attempt, last_exception))
                 
-                kwargs = {
-                    "model": self.model,
-                    "max_tokens": max_tokens,
-                    "messages": claude_messages,
-                }
-                if system_msg:
-                    kwargs["system"] = system_msg
-                if self.temperature is not None:
-                    kwargs["temperature"] = self.temperature
-                
-                response = client.messages.create(**kwargs)
-                result = response.content[0].text if response.content else ""
-                result = self._clean_llm_response_text(result)
-                
-                # Extract usage
-                usage_info = {}
-                if hasattr(response, "usage") and response.usage:
-                    usage_info = {
-                        "prompt_tokens": getattr(response.usage, "input_tokens", 0),
-                        "completion_tokens": getattr(response.usage, "output_tokens", 0),
-                        "total_tokens": getattr(response.usage, "input_tokens", 0) + getattr(response.usage, "output_tokens", 0),
-                    }
-                
-                full_api_response = {}
-                try:
-                    if hasattr(response, 'model_dump'):
-                        full_api_response = response.model_dump()
-                    elif hasattr(response, 'dict'):
-                        full_api_response = response.dict()
-                except:
-                    pass
+                async def send():
+                    # Each copy of a hedged request takes its own limiter slot; a
+                    # cancelled hedge stops waiting for it
+                    async with limiter.arequest(prompt_tokens) as slot:
+                        if self.streaming:
+                            build = self._build_anthropic_request if is_anthropic else self._build_chat_request
+                            result = await self._astream_response(
+                                client, build(messages, max_tokens), prompt_tokens, is_anthropic, early_stop
+                            )
+                        elif is_anthropic:
+                            kwargs = self._build_anthropic_request(messages, max_tokens)
+                            result = self._parse_anthropic_response(await client.messages.create(**kwargs))
+                        else:
+                            kwargs = self._build_chat_request(messages, max_tokens)
+                            result = self._parse_chat_response(await client.chat.completions.create(**kwargs))
+                        slot.record_usage(result.get("usage"))
+                    return result
                 
-                return {"response_text": result, "usage": usage_info, "full_api_response": full_api_response}
+                return await self._ahedged(send)
             
             except Exception as e:
                 last_exception = e
-                logger.warning(f"Anthropic API error (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    break
+                if is_anthropic:
+                    logger.warning(f"Anthropic API error (attempt {attempt + 1}/{max_retries}): {e}")
+                    continue
+                if self._is_retryable_error(e) and attempt < max_retries - 1:
+                    logger.warning(f"Retryable error on attempt {attempt + 1}/{max_retries}: {e}")
+                    continue
+                logger.error(f"Failed to call LLM after {attempt + 1} attempts: {e}")
+                raise
         
-        error_msg = f"Failed to get response from Anthropic after {max_retries} attempts: {last_exception}"
-        logger.error(error_msg)
-        raise RuntimeError(error_msg)
+        if is_anthropic:
+            error_msg = f"Failed to get response from Anthropic after {max_retries} attempts: {last_exception}"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        if last_exception:
+            raise last_exception
+        raise RuntimeError("Failed to call LLM: unknown error")
     
     def _call_llm(self, system_prompt: str, user_message: str, max_retries: int = 3, max_tokens: int = 8192) -> Dict[str, Any]:
         """
@@ -1541,7 +2094,14 @@ class ParticipantPool:
         enable_reasoning: bool = False,
         study_id: Optional[str] = None,
         existing_responses: Optional[List[Dict[str, Any]]] = None,
-        temperature: float = 1.0
+        temperature: float = 1.0,
+        execution_mode: str = "threads",
+        max_concurrency: Optional[int] = None,
+        batch_dir: Optional[str] = None,
+        batch_poll_interval: float = 30.0,
+        prompt_caching: bool = False,
+        streaming: bool = False,
+        token_budget: Optional[Any] = None
     ):
         """
         Initialize participant pool based on study specification.
@@ -1564,7 +2124,19 @@ class ParticipantPool:
             study_id: Optional study identifier (needed for v4_background preset to load backgrounds)
             existing_responses: Optional list of already collected responses to resume from
             temperature: Sampling temperature for the LLM (default: 1.0)
+            execution_mode: "threads" (ThreadPoolExecutor, default) or "async" (asyncio clients)
+            max_concurrency: Max requests in flight in async mode (default: num_workers if given, else min(128, n))
+            batch_dir: Directory for Batch API JSONL files in batch mode (None = not persisted)
+            batch_poll_interval: Seconds between batch status checks in batch mode
+            prompt_caching: Put the prompt prefix shared by all participants first and mark
+                it for provider-side prompt caching (see LLMParticipantAgent._trial_messages)
+            streaming: Stream completions and stop each one once all required Q answers
+                are parsed (threads/async modes; batch mode is unaffected)
+            token_budget: Optional TokenBudgetPlanner shared by all agents for adaptive
+                max_tokens (see src.llm.token_budget)
         """
+        if execution_mode not in ("threads", "async", "batch"):
+            raise ValueError(f"Unknown execution_mode: {execution_mode}. Use 'threads', 'async' or 'batch'.")
         self.specification = study_specification
         self.n_participants = n_participants or study_specification["participants"]["n"]
         self.use_real_llm = use_real_llm
@@ -1583,6 +2155,14 @@ class ParticipantPool:
         self.num_workers = num_workers if num_workers is not None else (
             min(8, self.n_participants) if self.use_real_llm else 1
         )
+        self.execution_mode = execution_mode
+        # Requests in flight for the asyncio engine (coroutines are cheap, so default much higher)
+        self.max_concurrency = max_concurrency or num_workers or min(128, max(1, self.n_participants))
+        self.batch_dir = batch_dir
+        self.batch_poll_interval = batch_poll_interval
+        self.prompt_caching = prompt_caching
+        self.streaming = streaming
+        self.token_budget = token_budget
         
         # Create participant profiles from specification or use provided ones
         if profiles is not None:
@@ -1614,7 +2194,11 @@ class ParticipantPool:
                 system_prompt_preset=system_prompt_preset,
                 reasoning=reasoning,
                 enable_reasoning=enable_reasoning,
-                temperature=temperature
+                temperature=temperature,
+                cache_salt=f"seed{random_seed}",
+                prompt_caching=prompt_caching,
+                streaming=streaming,
+                token_budget=token_budget
             )
             
             # Load existing responses for this participant if provided
@@ -1632,9 +2216,11 @@ class ParticipantPool:
         """
         import numpy as np
         
-        # Set random seed for reproducibility
-        if self.random_seed is not None:
-            np.random.seed(self.random_seed)
+        # Local generator seeded for reproducibility: pools built concurrently (sweep
+        # cells in threads) must not interleave draws from the global RNG.
+        # RandomState replays the same stream np.random.seed() gave, so existing
+        # seeds keep their profiles.
+        rng = np.random.RandomState(self.random_seed)
         
         spec = self.specification["participants"]
         profiles = []
@@ -1661,17 +2247,17 @@ class ParticipantPool:
         for i in range(self.n_participants):
             # Sample age
             if age_mean is not None and age_sd is not None:
-                age = np.random.normal(age_mean, age_sd)
+                age = rng.normal(age_mean, age_sd)
                 age = int(np.clip(age, age_range[0], age_range[1]))
             else:
                 # Uniform integer age within [min,max]
                 lo, hi = int(age_range[0]), int(age_range[1])
                 if hi < lo:
                     lo, hi = hi, lo
-                age = int(np.random.randint(lo, hi + 1))
+                age = int(rng.randint(lo, hi + 1))
             
             # Sample gender based on distribution
-            rand = np.random.random() * total_gender
+            rand = rng.random_sample() * total_gender
             cumsum = 0
             gender = "male"
             for g, count in gender_dist.items():
@@ -1738,13 +2324,46 @@ class ParticipantPool:
             total_api_calls = len(self.participants) * len(trials)
             print(f"Running {len(trials)} trials per participant... (total API calls: {total_api_calls})")
 
+        batch_provider = self.participants[0].provider if self.participants else None
+        if self.execution_mode == "batch" and self.use_real_llm and batch_provider not in ("openai", "anthropic"):
+            print(f"Batch API not available for provider '{batch_provider}'; using the thread pool instead")
+        
+        # Provider Batch API: one job for every pending trial, results mapped back afterwards
+        if self.execution_mode == "batch" and self.use_real_llm and batch_provider in ("openai", "anthropic"):
+            self._run_experiment_batch(
+                trials,
+                prompt_builder=prompt_builder,
+                one_to_one=one_to_one,
+                save_callback=save_callback,
+                total_api_calls=total_api_calls
+            )
+            print("Experiment complete!\n")
+        # asyncio engine: hundreds of requests in flight from a single thread
+        elif self.execution_mode == "async" and self.use_real_llm:
+            import asyncio
+            print(f"Async execution: up to {self.max_concurrency} concurrent requests")
+            asyncio.run(self._run_experiment_async(
+                trials,
+                prompt_builder=prompt_builder,
+                one_to_one=one_to_one,
+                save_callback=save_callback,
+                total_api_calls=total_api_calls
+            ))
+            print("Experiment complete!\n")
         # If only one worker or not using real LLMs, run sequentially but keep progress prints
-        if self.num_workers <= 1 or not self.use_real_llm:
+        elif self.num_workers <= 1 or not self.use_real_llm:
             from tqdm import tqdm
             pbar = tqdm(total=total_api_calls, desc="API calls", unit="call")
             
+            initial_count = sum(len(p.trial_responses) for p in self.participants)
+            if initial_count > 0:
+                pbar.update(initial_count)
+            
             if one_to_one:
                 for i, (participant, trial) in enumerate(zip(self.participants, trials)):
+                    # RESUME: Skip if already has response
+                    if len(participant.trial_responses) > 0:
+                        continue
                     trial_with_profile = {**trial, "participant_profile": participant.profile}
                     if prompt_builder:
                         trial_prompt = prompt_builder.build_trial_prompt(trial_with_profile)
@@ -1762,17 +2381,20 @@ class ParticipantPool:
             else:
                 for trial_idx, trial in enumerate(trials):
                     for participant in self.participants:
+                        # RESUME: Skip if already has response for this trial index
+                        if len(participant.trial_responses) > trial_idx:
+                            continue
                         trial_with_profile = {**trial, "participant_profile": participant.profile}
                         if prompt_builder:
                             trial_prompt = prompt_builder.build_trial_prompt(trial_with_profile)
                         else:
                             trial_prompt = trial.get("prompt", f"Trial {trial.get('trial_number', '?')}: Please respond.")
-                        participant.complete_trial(trial_prompt, trial_with_profile)
+                        resp_data = participant.complete_trial(trial_prompt, trial_with_profile)
                         pbar.update(1)
                         # Call save callback after each API call completes
                         if save_callback:
                             try:
-                                save_callback()
+                                save_callback(resp_data)
                             except Exception as e:
                                 import logging
                                 logging.getLogger(__name__).warning(f"Save callback failed: {e}")
@@ -1798,9 +2420,6 @@ class ParticipantPool:
                         return idx
                         
                     try:
-                        import time as _t
-                        import random as _r
-                        _t.sleep(_r.uniform(0.0, 0.5))
                         trial_with_profile = {**trial, "participant_profile": participant.profile}
                         if prompt_builder:
                             trial_prompt = prompt_builder.build_trial_prompt(trial_with_profile)
@@ -1866,9 +2485,6 @@ class ParticipantPool:
                 def run_for_participant(participant: LLMParticipantAgent):
                     """Run all trials for a single participant."""
                     try:
-                        import time as _t
-                        import random as _r
-                        _t.sleep(_r.uniform(0.0, 0.5))
                         for trial_idx, trial in enumerate(trials):
                             # RESUME: Skip if already has response for this trial index
                             if len(participant.trial_responses) > trial_idx:
@@ -1880,7 +2496,6 @@ class ParticipantPool:
                                     trial_prompt = prompt_builder.build_trial_prompt(trial_with_profile)
                                 else:
                                     trial_prompt = trial.get("prompt", f"Trial {trial.get('trial_number', '?')}: Please respond.")
-                                _t.sleep(_r.uniform(0.0, 0.2))
                                 resp_data = participant.complete_trial(trial_prompt, trial_with_profile)
                                 
                                 # Call callback immediately
@@ -1939,11 +2554,189 @@ class ParticipantPool:
 
             print("Experiment complete!\n")
         
-        return self.aggregate_results()
-        
         # Collect all results
         return self.aggregate_results()
     
+    def _build_trial(self, participant: LLMParticipantAgent, trial: Dict[str, Any], prompt_builder: Optional[Any]) -> tuple:
+        """Return (trial_prompt, trial_with_profile) for one participant/trial pair."""
+        trial_with_profile = {**trial, "participant_profile": participant.profile}
+        if prompt_builder:
+            trial_prompt = prompt_builder.build_trial_prompt(trial_with_profile)
+        else:
+            trial_prompt = trial.get("prompt", f"Trial {trial.get('trial_number', '?')}: Please respond.")
+        return trial_prompt, trial_with_profile
+    
+    def _run_experiment_batch(
+        self,
+        trials: List[Dict[str, Any]],
+        prompt_builder: Optional[Any],
+        one_to_one: bool,
+        save_callback: Optional[Callable[..., None]],
+        total_api_calls: int
+    ) -> None:
+        """
+        Batch API execution engine.
+        
+        Every trial is an independent system+user conversation, so all pending
+        trials (resumed ones are skipped) go into a single batch job. Results are
+        recorded per participant in trial order, exactly like complete_trial().
+        Requests the provider reports as failed, and replies cut off by a learned
+        max_tokens before their answers, are retried synchronously.
+        """
+        import logging
+        from pathlib import Path
+        from tqdm import tqdm
+        from src.llm.batch import create_batch_runner
+        logger = logging.getLogger(__name__)
+        
+        if one_to_one:
+            work = [(p, [t]) for p, t in zip(self.participants, trials)]
+        else:
+            work = [(p, trials) for p in self.participants]
+        
+        pending = []  # (custom_id, participant, trial_prompt, trial_with_profile)
+        for participant, participant_trials in work:
+            for trial_idx, trial in enumerate(participant_trials):
+                # RESUME: Skip if already has response for this trial index
+                if len(participant.trial_responses) > trial_idx:
+                    continue
+                trial_prompt, trial_with_profile = self._build_trial(participant, trial, prompt_builder)
+                pending.append((f"p{participant.participant_id}-t{trial_idx}", participant, trial_prompt, trial_with_profile))
+        
+        if not pending:
+            return
+        
+        lead = self.participants[0]
+        runner = create_batch_runner(lead.provider, lead._get_sync_client(), poll_interval=self.batch_poll_interval)
+        requests = [(cid, p.build_batch_request(prompt, info)) for cid, p, prompt, info in pending]
+        request_bodies = dict(requests)
+        jsonl_path = None
+        if self.batch_dir:
+            model_slug = self.model.replace("/", "_")
+            jsonl_path = Path(self.batch_dir) / f"batch_{model_slug}_seed{self.random_seed}.jsonl"
+        print(f"Batch mode: submitting {len(requests)} requests to the {lead.provider} Batch API")
+        results = runner.run(requests, jsonl_path=jsonl_path)
+        
+        pbar = tqdm(total=total_api_calls, desc="Progress", unit="call", ncols=80, bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}')
+        pbar.update(total_api_calls - len(pending))
+        n_fallback = 0
+        try:
+            for custom_id, participant, trial_prompt, trial_with_profile in pending:
+                result = results.get(custom_id) or {"body": None, "error": "missing from batch output"}
+                resp_data = None
+                truncated_at = None
+                reason = result.get("error")
+                if result.get("body") is not None:
+                    max_tokens = request_bodies[custom_id].get("max_tokens")
+                    resp_data = participant.complete_trial_from_batch(result["body"], trial_with_profile, max_tokens=max_tokens)
+                    if resp_data is None:
+                        truncated_at = max_tokens
+                        reason = f"cut off at max_tokens={max_tokens} before its answers"
+                if resp_data is None:
+                    logger.warning(f"[{custom_id}] Batch request failed ({reason}); retrying synchronously")
+                    n_fallback += 1
+                    resp_data = participant.complete_trial(trial_prompt, trial_with_profile, truncated_at=truncated_at)
+                pbar.update(1)
+                if save_callback:
+                    try:
+                        save_callback(resp_data)
+                    except Exception as e:
+                        logger.warning(f"Save callback failed: {e}")
+        finally:
+            pbar.close()
+        if n_fallback:
+            print(f"Batch mode: {n_fallback}/{len(pending)} requests fell back to synchronous calls")
+    
+    async def _run_experiment_async(
+        self,
+        trials: List[Dict[str, Any]],
+        prompt_builder: Optional[Any],
+        one_to_one: bool,
+        save_callback: Optional[Callable[..., None]],
+        total_api_calls: int
+    ) -> None:
+        """
+        asyncio execution engine: every participant is a coroutine and an
+        asyncio.Semaphore caps the number of requests in flight.
+        
+        Participants still run their own trials in order, so trial_responses
+        (and therefore aggregate_results()) match the thread-pool mode. Progress
+        and save_callback are driven by completion events instead of polling.
+        """
+        import asyncio
+        import logging
+        from tqdm import tqdm
+        logger = logging.getLogger(__name__)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        completed: "asyncio.Queue" = asyncio.Queue()
+        max_stall_time = 60
+        
+        # One client (and connection pool) per run, shared by all participants
+        shared_client = self.participants[0]._create_async_client() if self.participants else None
+        for participant in self.participants:
+            participant._async_client = shared_client
+        
+        async def run_for_participant(participant: LLMParticipantAgent, participant_trials: List[Dict[str, Any]]):
+            try:
+                for trial_idx, trial in enumerate(participant_trials):
+                    # RESUME: Skip if already has response for this trial index
+                    if len(participant.trial_responses) > trial_idx:
+                        continue
+                    trial_prompt, trial_with_profile = self._build_trial(participant, trial, prompt_builder)
+                    async with semaphore:
+                        resp_data = await participant.acomplete_trial(trial_prompt, trial_with_profile)
+                    completed.put_nowait(resp_data)
+            except Exception as e:
+                logger.error(f"[P{participant.participant_id}] Failed: {e}")
+                # Surface the failure to the consumer loop below
+                completed.put_nowait(e)
+        
+        if one_to_one:
+            work = [(p, [t]) for p, t in zip(self.participants, trials)]
+        else:
+            work = [(p, trials) for p in self.participants]
+        
+        initial_count = sum(len(p.trial_responses) for p in self.participants)
+        remaining = total_api_calls - initial_count
+        pbar = tqdm(total=total_api_calls, desc="Progress", unit="call", ncols=80, bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt}')
+        if initial_count > 0:
+            pbar.update(initial_count)
+        
+        tasks = [asyncio.ensure_future(run_for_participant(p, t)) for p, t in work]
+        try:
+            while remaining > 0:
+                try:
+                    item = await asyncio.wait_for(completed.get(), timeout=max_stall_time)
+                except asyncio.TimeoutError:
+                    current_count = sum(len(p.trial_responses) for p in self.participants)
+                    raise TimeoutError(f"Stalled at {current_count}/{total_api_calls} calls")
+                if isinstance(item, Exception):
+                    raise item
+                remaining -= 1
+                pbar.update(1)
+                if save_callback:
+                    try:
+                        save_callback(item)
+                    except Exception as e:
+                        logger.warning(f"Save callback failed: {e}")
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            logger.error(f"Experiment failed: {e}")
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            pbar.close()
+            for participant in self.participants:
+                participant._async_client = None
+            if shared_client is not None:
+                try:
+                    await shared_client.close()
+                except Exception:
+                    pass
+    
     def aggregate_results(self) -> Dict[str, Any]:
         """
         Aggregate results from all participants for analysis.
@@ -6,10 +6,11 @@ to actual prompts that LLM agents receive as participants.
 """
 
 import json
-import re
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from src.agents.template_engine import render_template
+
 
 class PromptBuilder:
     """
@@ -105,78 +106,12 @@ class PromptBuilder:
         - {{variable}}: Simple substitution
         - {{object.key}}: Nested property access
         - {{#if variable}}...{{/if}}: Conditional blocks
-        - {{#each array}}{{this}}{{/each}}: Loops (simplified)
-        """
-        result = template
-        
-        # Handle nested property access (e.g., {{comparison_lines.A}})
-        nested_pattern = r'\{\{([\w.]+)\}\}'
-        
-        def replace_nested(match):
-            path = match.group(1)
-            parts = path.split('.')
-            
-            value = data
-            for part in parts:
-                if isinstance(value, dict) and part in value:
-                    value = value[part]
-                else:
-                    return match.group(0)  # Keep original if not found
-            
-            return str(value)
-        
-        result = re.sub(nested_pattern, replace_nested, result)
-        
-        # Handle conditional blocks (simplified)
-        # {{#if variable}}...{{/if}}
-        if_pattern = r'\{\{#if\s+(\w+)\}\}(.*?)\{\{/if\}\}'
-        
-        def replace_if(match):
-            var_name = match.group(1)
-            content = match.group(2)
-            # Check if variable exists and is truthy
-            if var_name in data and data[var_name]:
-                return content
-            return ""
+        - {{#each array}}{{this}}{{/each}}: Loops ({{@index}} for lists, {{@key}} for dicts)
         
-        result = re.sub(if_pattern, replace_if, result, flags=re.DOTALL)
-        
-        # Handle each loops (simplified)
-        # {{#each array}}{{this}}{{/each}}
-        each_pattern = r'\{\{#each\s+(\w+)\}\}(.*?)\{\{/each\}\}'
-        
-        def replace_each(match):
-            var_name = match.group(1)
-            content = match.group(2)
-            
-            if var_name not in data:
-                return ""
-            
-            items = data[var_name]
-            if isinstance(items, dict):
-                # Dictionary: replace {{@key}} and {{this}}
-                parts = []
-                for key, value in items.items():
-                    item_content = content.replace("{{@key}}", str(key))
-                    item_content = item_content.replace("{{this}}", str(value))
-                    parts.append(item_content)
-                return "\n".join(parts)
-            elif isinstance(items, list):
-                # List: replace {{this}} and {{@index}}
-                parts = []
-                for idx, item in enumerate(items):
-                    item_content = content.replace("{{@index}}", str(idx + 1))
-                    item_content = item_content.replace("{{this}}", str(item))
-                    parts.append(item_content)
-                return "\n".join(parts)
-            return ""
-        
-        result = re.sub(each_pattern, replace_each, result, flags=re.DOTALL)
-        
-        # Clean up any remaining unfilled placeholders
-        result = re.sub(r'\{\{[^}]+\}\}', '', result)
-        
-        return result
+        Blocks may be nested. Each template string is compiled once and cached
+        (see src.agents.template_engine), so per-trial calls only render.
+        """
+        return render_template(template, data)
     
     def _build_generic_system_prompt(self, profile: Dict[str, Any]) -> str:
         """Fallback generic system prompt."""
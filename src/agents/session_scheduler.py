@@ -0,0 +1,130 @@
+"""
+Shared-worker scheduler for multi-round group experiments.
+
+Group studies (study_009's repeated guessing game, study_012's Room A -> Room B
+investment game) are made of many independent sessions, each a chain of rounds
+where round r+1 needs the results of round r. Running every session on its own
+thread pool either serializes the sessions or multiplies the worker count.
+
+``SessionScheduler`` runs all sessions on one ThreadPoolExecutor:
+
+- A session is a generator. It yields the calls of its next round (a list of
+  zero-argument callables), receives their results in the same order, and
+  ``return``s its final result.
+- The first round of every session is submitted together, so all sessions
+  start as one global wave, and the worker pool (and the pooled HTTP clients
+  behind the agents) is shared by the whole study.
+- The barrier between rounds is per session: a session's next round is
+  submitted as soon as its own calls are done, without waiting for slower
+  sessions. Work is queued FIFO, so rounds still advance roughly in lockstep.
+"""
+
+import logging
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generator, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SessionGenerator = Generator[Sequence[Callable[[], Any]], List[Any], Any]
+
+
+class SessionScheduler:
+    """
+    Run many multi-round sessions on one shared worker pool.
+
+    Example:
+        def session(players):
+            choices = yield [functools.partial(ask, p, "Round 1") for p in players]
+            choices = yield [functools.partial(ask, p, feedback(choices)) for p in players]
+            return choices
+
+        results = SessionScheduler(max_workers=16).run({i: session(g) for i, g in enumerate(groups)})
+
+    If a call raises, the first exception of the round is thrown into the
+    session generator (at its ``yield``) once the round's other calls finish,
+    so a session can handle it. A session that raises is recorded in
+    ``errors`` and left out of the results; the other sessions keep running.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        """
+        Args:
+            max_workers: Worker threads shared by all sessions (the study-wide call budget)
+        """
+        self.max_workers = max(1, int(max_workers or 1))
+        self.errors: Dict[Hashable, BaseException] = {}
+        self.calls_completed = 0
+
+    def run(
+        self,
+        sessions: Dict[Hashable, SessionGenerator],
+        progress: Optional[Any] = None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Drive every session to completion.
+
+        Args:
+            sessions: Session key -> session generator (not yet started)
+            progress: Optional tqdm-like object; ``update(1)`` is called per finished call
+
+        Returns:
+            Session key -> value returned by the session, in ``sessions`` order
+            (failed sessions are omitted; see ``errors``)
+        """
+        self.errors = {}
+        self.calls_completed = 0
+        finished: Dict[Hashable, Any] = {}
+        # key -> [result slots, calls outstanding, first exception of the round]
+        rounds: Dict[Hashable, List[Any]] = {}
+        done_queue: "queue.Queue[Future]" = queue.Queue()
+        owners: Dict[Future, tuple] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            def advance(key: Hashable, results: Optional[List[Any]], error: Optional[BaseException]) -> None:
+                session = sessions[key]
+                while True:
+                    try:
+                        calls = session.throw(error) if error is not None else session.send(results)
+                    except StopIteration as stop:
+                        finished[key] = stop.value
+                        return
+                    except Exception as e:
+                        logger.error(f"Session {key!r} failed: {e}", exc_info=True)
+                        self.errors[key] = e
+                        return
+                    calls = list(calls)
+                    if calls:
+                        break
+                    # Empty round: nothing to wait for
+                    results, error = [], None
+                rounds[key] = [[None] * len(calls), len(calls), None]
+                for slot, call in enumerate(calls):
+                    future = executor.submit(call)
+                    owners[future] = (key, slot)
+                    future.add_done_callback(done_queue.put)
+
+            # First round of every session: one global wave
+            for key in sessions:
+                advance(key, None, None)
+
+            while owners:
+                future = done_queue.get()
+                key, slot = owners.pop(future)
+                state = rounds[key]
+                try:
+                    state[0][slot] = future.result()
+                except Exception as e:
+                    if state[2] is None:
+                        state[2] = e
+                state[1] -= 1
+                self.calls_completed += 1
+                if progress is not None:
+                    progress.update(1)
+                if state[1] == 0:
+                    # Per-session barrier: only this session moves to its next round
+                    results, _, error = rounds.pop(key)
+                    advance(key, results, error)
+
+        return {key: finished[key] for key in sessions if key in finished}
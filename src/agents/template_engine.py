@@ -0,0 +1,155 @@
+"""
+Compiled {{mustache}}-style templates for PromptBuilder._fill_template.
+
+A template is tokenized and parsed once into a tree of render closures, cached
+per template string, and then rendered in a single pass per trial. Syntax:
+
+- ``{{name}}`` / ``{{object.key}}``: value from the data (nested dict access);
+  unknown names render as ""
+- ``{{#if name}}...{{/if}}``: block rendered if ``data[name]`` is truthy
+- ``{{#each name}}...{{/each}}``: block rendered per list item (``{{this}}``,
+  ``{{@index}}`` from 1) or dict item (``{{this}}``, ``{{@key}}``), joined by newlines
+- any other ``{{...}}`` tag is dropped
+
+Blocks nest properly (an ``#each`` inside an ``#if``, an ``#if`` or ``#each``
+inside an ``#each``). An unclosed block tag, or a close tag that does not match
+the open block, is dropped and its content rendered inline. Names in ``#if`` /
+``#each`` and outside ``{{this}}`` are looked up in the top-level data.
+"""
+
+import functools
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_TAG = re.compile(r"\{\{([^{}]+)\}\}")
+_IF_OPEN = re.compile(r"#if\s+(\w+)")
+_EACH_OPEN = re.compile(r"#each\s+(\w+)")
+_VAR = re.compile(r"[\w.]+")
+
+TEMPLATE_CACHE_SIZE = 256
+
+# A render function takes (data, current each-item or None) and returns text
+RenderFn = Callable[[Dict[str, Any], Optional[Tuple[Any, Any, Any]]], str]
+
+
+def _lookup(data: Dict[str, Any], path: Tuple[str, ...]) -> Tuple[bool, Any]:
+    value: Any = data
+    for part in path:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return False, None
+    return True, value
+
+
+def _var(name: str) -> RenderFn:
+    path = tuple(name.split("."))
+    if name == "this":
+        def render_this(data, item):
+            if item is not None:
+                return str(item[1])
+            found, value = _lookup(data, path)
+            return str(value) if found else ""
+        return render_this
+
+    def render_var(data, item):
+        found, value = _lookup(data, path)
+        return str(value) if found else ""
+    return render_var
+
+
+def _item_field(field: int) -> RenderFn:
+    # field 0 = @key, 2 = @index; unset for the other container type
+    def render_item_field(data, item):
+        if item is None or item[field] is None:
+            return ""
+        return str(item[field])
+    return render_item_field
+
+
+def _join(parts: List[Any]) -> RenderFn:
+    """Render function for a sequence of literal strings and render functions."""
+    if not parts:
+        return lambda data, item: ""
+    if len(parts) == 1:
+        part = parts[0]
+        return (lambda data, item: part) if isinstance(part, str) else part
+    parts = tuple(parts)
+    return lambda data, item: "".join([part if part.__class__ is str else part(data, item) for part in parts])
+
+
+def _if(name: str, body: RenderFn) -> RenderFn:
+    def render_if(data, item):
+        return body(data, item) if data.get(name) else ""
+    return render_if
+
+
+def _each(name: str, body: RenderFn) -> RenderFn:
+    def render_each(data, item):
+        items = data.get(name)
+        if isinstance(items, dict):
+            return "\n".join(body(data, (key, value, None)) for key, value in items.items())
+        if isinstance(items, list):
+            return "\n".join(body(data, (None, value, idx)) for idx, value in enumerate(items, start=1))
+        return ""
+    return render_each
+
+
+class CompiledTemplate:
+    """A parsed template; ``render(data)`` fills it in one pass."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self._render = self._compile(template)
+
+    @staticmethod
+    def _compile(template: str) -> RenderFn:
+        # Stack of open blocks: (kind, name, parts, open tag text); the root has kind None.
+        # Parts are literal strings or render functions.
+        stack: List[Tuple[Optional[str], str, List[Any], str]] = [(None, "", [], "")]
+        pos = 0
+        for match in _TAG.finditer(template):
+            parts = stack[-1][2]
+            if match.start() > pos:
+                parts.append(template[pos:match.start()])
+            pos = match.end()
+            tag = match.group(1)
+
+            open_match = _IF_OPEN.fullmatch(tag) or _EACH_OPEN.fullmatch(tag)
+            if open_match:
+                stack.append(("if" if tag.startswith("#if") else "each", open_match.group(1), [], tag))
+            elif tag in ("/if", "/each"):
+                if len(stack) > 1 and stack[-1][0] == tag[1:]:
+                    kind, name, body, _ = stack.pop()
+                    block = _if if kind == "if" else _each
+                    stack[-1][2].append(block(name, _join(body)))
+                # else: stray close tag, dropped
+            elif tag == "@key":
+                parts.append(_item_field(0))
+            elif tag == "@index":
+                parts.append(_item_field(2))
+            elif _VAR.fullmatch(tag):
+                parts.append(_var(tag))
+            # else: unsupported tag, dropped
+        if pos < len(template):
+            stack[-1][2].append(template[pos:])
+
+        # Unclosed blocks: drop the open tag, keep the content inline
+        while len(stack) > 1:
+            _, _, body, _ = stack.pop()
+            stack[-1][2].extend(body)
+        return _join(stack[0][2])
+
+    def render(self, data: Dict[str, Any]) -> str:
+        return self._render(data, None)
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> CompiledTemplate:
+    """Parse ``template`` once; repeated calls with the same string return the cached result."""
+    return CompiledTemplate(template)
+
+
+def render_template(template: str, data: Dict[str, Any]) -> str:
+    """Fill ``template`` with ``data`` (see module docstring for the syntax)."""
+    return compile_template(template).render(data)
@@ -2,5 +2,6 @@
 
 from src.core.study import Study
 from src.core.benchmark import HumanStudyBench
+from src.core.catalog import StudyCatalog, StudyEntry, get_catalog
 
-__all__ = ["Study", "HumanStudyBench"]
+__all__ = ["Study", "HumanStudyBench", "StudyCatalog", "StudyEntry", "get_catalog"]
@@ -2,13 +2,12 @@
 Main benchmark class for HumanStudyBench.
 """
 
-import json
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from tqdm import tqdm
 
 from src.core.study import Study
-from src.core.exceptions import StudyNotFoundError, DataLoadError
+from src.core.catalog import get_catalog
 from src.agents.base_agent import BaseAgent
 # Delay Scorer import to avoid circular dependency
 # from src.evaluation.scorer import Scorer
@@ -36,21 +35,11 @@ class HumanStudyBench:
         self.schemas_dir = self.data_dir / "schemas"
         self.config = config or {}
         
-        # Load registry
-        self.registry = self._load_registry()
-        
-        # Cache for loaded studies
-        self.studies: Dict[str, Study] = {}
-    
-    def _load_registry(self) -> Dict[str, Any]:
-        """Load the study registry."""
-        registry_path = self.data_dir / "registry.json"
-        
-        if not registry_path.exists():
-            raise DataLoadError(f"Registry not found: {registry_path}")
-        
-        with open(registry_path, "r", encoding='utf-8', errors='replace') as f:
-            return json.load(f)
+        # Process-wide study index and LRU of loaded studies, shared by every
+        # instance on the same data directory
+        self.catalog = get_catalog(self.data_dir, cache_size=self.config.get("study_cache_size"))
+        self.registry = self.catalog.registry
+        self.studies: Dict[str, Study] = self.catalog.cache
     
     def load_study(self, study_id: str) -> Study:
         """
@@ -65,31 +54,12 @@ class HumanStudyBench:
         Raises:
             StudyNotFoundError: If study doesn't exist
         """
-        # Check cache first
-        if study_id in self.studies:
-            return self.studies[study_id]
-        
-        # Check if study exists in registry
-        study_info = self._get_study_info(study_id)
-        if study_info is None:
-            raise StudyNotFoundError(f"Study '{study_id}' not found in registry")
-        
-        # Load study
-        study_path = self.studies_dir / study_id
-        if not study_path.exists():
-            raise StudyNotFoundError(f"Study directory not found: {study_path}")
-        
-        study = Study.load(study_path)
-        self.studies[study_id] = study
-        
-        return study
+        return self.catalog.load(study_id)
     
     def _get_study_info(self, study_id: str) -> Optional[Dict[str, Any]]:
         """Get study info from registry."""
-        for study_info in self.registry["studies"]:
-            if study_info["id"] == study_id:
-                return study_info
-        return None
+        entry = self.catalog.get(study_id)
+        return entry.info if entry is not None else None
     
     def get_studies(
         self,
@@ -112,28 +82,13 @@ class HumanStudyBench:
         """
         matching_studies = []
         
-        for study_info in self.registry["studies"]:
-            # Apply filters
-            if status and study_info.get("status") != status:
-                continue
-            
-            if domain and study_info.get("domain") != domain:
-                continue
-            
-            if difficulty and study_info.get("difficulty") != difficulty:
-                continue
-            
-            if tags:
-                study_tags = study_info.get("tags", [])
-                if not any(tag in study_tags for tag in tags):
-                    continue
-            
-            # Load study
+        # Filter on the catalog; only matching studies are loaded
+        for entry in self.catalog.query(domain=domain, difficulty=difficulty, tags=tags, status=status):
             try:
-                study = self.load_study(study_info["id"])
+                study = self.load_study(entry.id)
                 matching_studies.append(study)
             except Exception as e:
-                print(f"Warning: Failed to load study {study_info['id']}: {e}")
+                print(f"Warning: Failed to load study {entry.id}: {e}")
         
         return matching_studies
     
@@ -147,11 +102,7 @@ class HumanStudyBench:
         Returns:
             List of study IDs
         """
-        return [
-            study_info["id"]
-            for study_info in self.registry["studies"]
-            if study_info.get("status") == status
-        ]
+        return [entry.id for entry in self.catalog if entry.status == status]
     
     def evaluate(
         self,
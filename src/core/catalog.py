@@ -0,0 +1,222 @@
+"""
+Process-wide study catalog for HumanStudyBench.
+
+``StudyCatalog`` answers listing and filter queries (id, title, domain,
+difficulty, tags, status) from the parsed registry.json without opening any
+study directory. ``get_catalog`` keeps one catalog per data directory for the
+whole process, so every ``HumanStudyBench`` on the same data shares the parsed
+registry and the study cache. The registry is re-read only when its mtime or
+size changes.
+
+Studies are loaded lazily: ``load`` returns a Study whose metadata,
+specification and ground truth are each read on first access. Loaded studies
+live in an LRU cache whose size comes from ``HS_BENCH_STUDY_CACHE_SIZE``
+(default 32). A cached study is served only while the mtime and size of its
+files match those recorded when it was loaded.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.core.exceptions import DataLoadError, StudyNotFoundError
+from src.core.study import Study
+
+STUDY_FILES = ("metadata.json", "specification.json", "ground_truth.json")
+DEFAULT_CACHE_SIZE = int(os.getenv("HS_BENCH_STUDY_CACHE_SIZE", "32"))
+
+
+def _stat(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+class StudyEntry:
+    """
+    One catalog row: a study's listing attributes, available without opening its files.
+
+    Attributes:
+        id, title, domain, difficulty, tags, status: As in registry.json
+        info: The study's full registry.json entry
+        files: File name -> {"mtime_ns", "size"} recorded when the cached study was loaded
+            (empty while the study is not cached)
+    """
+
+    def __init__(self, study_id: str, info: Dict[str, Any]):
+        self.id = study_id
+        self.info = info
+        self.title = info.get("title")
+        self.domain = info.get("domain")
+        self.difficulty = info.get("difficulty")
+        self.tags: List[str] = list(info.get("tags") or [])
+        self.status = info.get("status")
+        self.files: Dict[str, Optional[Dict[str, int]]] = {}
+
+    def matches(
+        self,
+        domain: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        status: Optional[str] = "active",
+    ) -> bool:
+        """Same filter semantics as HumanStudyBench.get_studies (tags: any match)."""
+        if status and self.status != status:
+            return False
+        if domain and self.domain != domain:
+            return False
+        if difficulty and self.difficulty != difficulty:
+            return False
+        if tags and not any(tag in self.tags for tag in tags):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"StudyEntry(id='{self.id}', domain='{self.domain}', difficulty='{self.difficulty}')"
+
+
+class StudyCatalog:
+    """
+    Registry-backed index of the benchmark's studies with an LRU of loaded studies.
+
+    Use ``get_catalog`` to share one instance per data directory.
+
+    Example:
+        catalog = get_catalog("data")
+        ids = [e.id for e in catalog.query(domain="social_psychology")]  # no study files opened
+        study = catalog.load("study_001")  # files are read on first attribute access
+    """
+
+    def __init__(self, data_dir: str | Path, cache_size: Optional[int] = None):
+        """
+        Args:
+            data_dir: Data directory containing registry.json and studies/
+            cache_size: Maximum number of loaded studies kept in memory
+                (default: HS_BENCH_STUDY_CACHE_SIZE or 32)
+
+        Raises:
+            DataLoadError: If registry.json does not exist
+        """
+        self.data_dir = Path(data_dir)
+        self.studies_dir = self.data_dir / "studies"
+        self.registry_path = self.data_dir / "registry.json"
+        self.cache_size = max(1, int(cache_size if cache_size is not None else DEFAULT_CACHE_SIZE))
+        self.cache: "OrderedDict[str, Study]" = OrderedDict()
+        self.loads = 0
+        self._lock = threading.Lock()
+
+        self.registry_stat = _stat(self.registry_path)
+        if self.registry_stat is None:
+            raise DataLoadError(f"Registry not found: {self.registry_path}")
+        with open(self.registry_path, "r", encoding="utf-8", errors="replace") as f:
+            self.registry: Dict[str, Any] = json.load(f)
+        self._entries: Dict[str, StudyEntry] = {
+            info["id"]: StudyEntry(info["id"], info) for info in self.registry.get("studies", [])
+        }
+
+    def is_stale(self) -> bool:
+        """Whether registry.json changed since this catalog read it."""
+        return _stat(self.registry_path) != self.registry_stat
+
+    # Queries ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, study_id: str) -> bool:
+        return study_id in self._entries
+
+    def __iter__(self) -> Iterator[StudyEntry]:
+        return iter(self._entries.values())
+
+    def get(self, study_id: str) -> Optional[StudyEntry]:
+        """Catalog row for ``study_id``, or None if it is not in the registry."""
+        return self._entries.get(study_id)
+
+    def query(
+        self,
+        domain: Optional[str] = None,
+        difficulty: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        status: Optional[str] = "active",
+    ) -> List[StudyEntry]:
+        """Rows matching the filters, in registry order; no study files are opened."""
+        return [entry for entry in self._entries.values() if entry.matches(domain, difficulty, tags, status)]
+
+    # Loading ------------------------------------------------------------------
+
+    def load(self, study_id: str) -> Study:
+        """
+        Return the Study for ``study_id``, served from the LRU while its files are unchanged.
+
+        Raises:
+            StudyNotFoundError: If the study is not in the registry or its directory is missing
+        """
+        entry = self._entries.get(study_id)
+        if entry is None:
+            raise StudyNotFoundError(f"Study '{study_id}' not found in registry")
+        study_path = self.studies_dir / study_id
+        if not study_path.exists():
+            raise StudyNotFoundError(f"Study directory not found: {study_path}")
+
+        # Stat before reading, so an edit made while loading is caught next time
+        files = {name: _stat(study_path / name) for name in STUDY_FILES}
+        with self._lock:
+            study = self.cache.get(study_id)
+            if study is not None and files == entry.files:
+                self.cache.move_to_end(study_id)
+                return study
+
+            study = Study.load_lazy(study_path)
+            self.loads += 1
+            entry.files = files
+            self.cache[study_id] = study
+            self.cache.move_to_end(study_id)
+            while len(self.cache) > self.cache_size:
+                evicted, _ = self.cache.popitem(last=False)
+                self._entries[evicted].files = {}
+            return study
+
+    def clear_cache(self) -> None:
+        """Drop all loaded studies."""
+        with self._lock:
+            self.cache.clear()
+            for entry in self._entries.values():
+                entry.files = {}
+
+
+_catalogs: Dict[Path, StudyCatalog] = {}
+_registry_lock = threading.Lock()
+
+
+def get_catalog(data_dir: str | Path, cache_size: Optional[int] = None) -> StudyCatalog:
+    """
+    Return the process-wide catalog for ``data_dir``, re-reading it if registry.json changed.
+
+    Args:
+        data_dir: Data directory containing registry.json and studies/
+        cache_size: If given, resize the catalog's LRU to this many studies
+
+    Raises:
+        DataLoadError: If registry.json does not exist
+    """
+    key = Path(data_dir).resolve()
+    with _registry_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None or catalog.is_stale():
+            catalog = StudyCatalog(data_dir, cache_size=cache_size)
+            _catalogs[key] = catalog
+        elif cache_size is not None:
+            catalog.cache_size = max(1, int(cache_size))
+        return catalog
+
+
+def reset_catalogs() -> None:
+    """Forget all process-wide catalogs (the next get_catalog re-reads the registry)."""
+    with _registry_lock:
+        _catalogs.clear()
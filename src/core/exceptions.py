@@ -36,3 +36,8 @@ class ConfigurationError(HumanStudyBenchError):
 class DataLoadError(HumanStudyBenchError):
     """Raised when data cannot be loaded."""
     pass
+
+
+class BatchJobError(AgentError):
+    """Raised when a provider batch job fails, expires or times out."""
+    pass
@@ -4,12 +4,27 @@ Study class representing a single human study in the benchmark.
 
 import json
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
 from src.core.exceptions import DataLoadError, ValidationError
 
 
+def _read_study_file(study_path: Path, filename: str) -> Dict[str, Any]:
+    """Read one of a study's JSON files, raising DataLoadError on failure."""
+    study_id = study_path.name
+    try:
+        with open(study_path / filename, "r", encoding='utf-8', errors='replace') as f:
+            return json.load(f)
+    except FileNotFoundError as e:
+        raise DataLoadError(f"Required file missing in study {study_id}: {e}")
+    except json.JSONDecodeError as e:
+        raise DataLoadError(f"Invalid JSON in study {study_id}: {e}")
+    except Exception as e:
+        raise DataLoadError(f"Error loading study {study_id}: {e}")
+
+
 @dataclass
 class Study:
     """Represents a single human study in the benchmark."""
@@ -44,37 +59,29 @@ class Study:
         if not study_path.exists():
             raise DataLoadError(f"Study directory not found: {study_path}")
         
-        study_id = study_path.name
+        return cls(
+            id=study_path.name,
+            metadata=_read_study_file(study_path, "metadata.json"),
+            specification=_read_study_file(study_path, "specification.json"),
+            ground_truth=_read_study_file(study_path, "ground_truth.json"),
+            materials_path=study_path / "materials"
+        )
+    
+    @classmethod
+    def load_lazy(cls, study_path: Path) -> "Study":
+        """
+        Like load(), but each JSON file is read on first access to its attribute.
         
-        try:
-            # Load metadata
-            with open(study_path / "metadata.json", "r", encoding='utf-8', errors='replace') as f:
-                metadata = json.load(f)
-            
-            # Load specification
-            with open(study_path / "specification.json", "r", encoding='utf-8', errors='replace') as f:
-                specification = json.load(f)
-            
-            # Load ground truth
-            with open(study_path / "ground_truth.json", "r", encoding='utf-8', errors='replace') as f:
-                ground_truth = json.load(f)
-            
-            materials_path = study_path / "materials"
-            
-            return cls(
-                id=study_id,
-                metadata=metadata,
-                specification=specification,
-                ground_truth=ground_truth,
-                materials_path=materials_path
-            )
-        
-        except FileNotFoundError as e:
-            raise DataLoadError(f"Required file missing in study {study_id}: {e}")
-        except json.JSONDecodeError as e:
-            raise DataLoadError(f"Invalid JSON in study {study_id}: {e}")
-        except Exception as e:
-            raise DataLoadError(f"Error loading study {study_id}: {e}")
+        Raises:
+            DataLoadError: If the study directory does not exist (file errors
+                are raised by the attribute access that reads the file)
+        """
+        study_path = Path(study_path)
+        
+        if not study_path.exists():
+            raise DataLoadError(f"Study directory not found: {study_path}")
+        
+        return LazyStudy(study_path)
     
     def get_validation_criteria(self) -> List[Dict[str, Any]]:
         """
@@ -190,3 +197,24 @@ class Study:
     
     def __str__(self) -> str:
         return f"{self.id}: {self.metadata.get('title', 'Unknown')}"
+
+
+class LazyStudy(Study):
+    """Study whose metadata, specification and ground truth are read on first access."""
+    
+    def __init__(self, study_path: Path):
+        self.id = study_path.name
+        self.materials_path = study_path / "materials"
+        self.study_path = study_path
+    
+    @cached_property
+    def metadata(self) -> Dict[str, Any]:
+        return _read_study_file(self.study_path, "metadata.json")
+    
+    @cached_property
+    def specification(self) -> Dict[str, Any]:
+        return _read_study_file(self.study_path, "specification.json")
+    
+    @cached_property
+    def ground_truth(self) -> Dict[str, Any]:
+        return _read_study_file(self.study_path, "ground_truth.json")
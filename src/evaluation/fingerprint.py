@@ -0,0 +1,164 @@
+"""
+Input fingerprints for Stage 6 evaluation results.
+
+An ``evaluation_results.json`` depends on four files: the config folder's
+``full_benchmark.json`` (for compact storage the header embeds the SHA-256 of
+its data files, so it stands for the whole folder), the study's evaluator
+source, ``stats_lib.py`` and the study's ``ground_truth.json``. Stage 6 stores
+their hashes under a ``fingerprint`` key in the results:
+
+    "fingerprint": {
+        "version": 1,
+        "digest": "<sha256 over the input hashes>",
+        "inputs": {"benchmark": {"mtime_ns": ..., "size": ..., "sha256": ...}, ...}
+    }
+
+``check_evaluation`` compares a folder's stored fingerprint with the current
+files and names the inputs that changed, so Stage 6 and the reporting scripts
+can skip folders that are up to date. A file whose mtime and size match the
+stored record is not re-hashed, so checking an unchanged folder costs a few
+``stat`` calls and one JSON read.
+
+Bump ``FINGERPRINT_VERSION`` when Stage 6 output changes for reasons these
+files do not capture (e.g. the pipeline's own aggregation code).
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_VERSION = 1
+FINGERPRINT_KEY = "fingerprint"
+RESULTS_FILENAME = "evaluation_results.json"
+STATS_FILENAME = "detailed_stats.csv"
+STATS_LIB_PATH = Path(__file__).resolve().with_name("stats_lib.py")
+
+# Reasons reported by check_evaluation() besides the names of changed inputs
+NOT_EVALUATED = "not evaluated"
+NO_FINGERPRINT = "no fingerprint"
+VERSION_CHANGED = "fingerprint version"
+
+
+def _file_record(path: Path, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """(mtime_ns, size, sha256) of ``path``; the hash is reused from ``previous`` if the stat matches."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    record = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if previous and previous.get("sha256") and all(previous.get(k) == v for k, v in record.items()):
+        record["sha256"] = previous["sha256"]
+    else:
+        try:
+            record["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+    return record
+
+
+def evaluation_inputs(
+    cfg_dir: Union[str, Path],
+    evaluator_path: Union[str, Path],
+    study_dir: Union[str, Path],
+) -> Dict[str, Path]:
+    """Input name -> file for one config folder's evaluation."""
+    return {
+        "benchmark": Path(cfg_dir) / "full_benchmark.json",
+        "evaluator": Path(evaluator_path),
+        "stats_lib": STATS_LIB_PATH,
+        "ground_truth": Path(study_dir) / "ground_truth.json",
+    }
+
+
+def compute_fingerprint(
+    cfg_dir: Union[str, Path],
+    evaluator_path: Union[str, Path],
+    study_dir: Union[str, Path],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Fingerprint of the current evaluation inputs of a config folder.
+
+    Args:
+        cfg_dir: Config folder containing full_benchmark.json
+        evaluator_path: Path to the study's evaluator
+        study_dir: Study data directory containing ground_truth.json
+        previous: A stored fingerprint whose hashes may be reused for files with an unchanged stat
+
+    Returns:
+        Fingerprint dict (version, digest, inputs); a missing input is recorded as None
+    """
+    previous_inputs = (previous or {}).get("inputs") or {}
+    inputs = {
+        name: _file_record(path, previous_inputs.get(name))
+        for name, path in evaluation_inputs(cfg_dir, evaluator_path, study_dir).items()
+    }
+    hashes = {name: (record or {}).get("sha256") for name, record in inputs.items()}
+    blob = json.dumps({"version": FINGERPRINT_VERSION, "inputs": hashes}, sort_keys=True)
+    return {
+        "version": FINGERPRINT_VERSION,
+        "digest": hashlib.sha256(blob.encode("utf-8")).hexdigest(),
+        "inputs": inputs,
+    }
+
+
+def changed_inputs(stored: Optional[Dict[str, Any]], current: Dict[str, Any]) -> List[str]:
+    """Reasons ``stored`` no longer describes ``current`` (empty if it still does)."""
+    if not stored:
+        return [NO_FINGERPRINT]
+    if stored.get("version") != current["version"]:
+        return [VERSION_CHANGED]
+    if stored.get("digest") == current["digest"]:
+        return []
+    stored_inputs = stored.get("inputs") or {}
+    return [
+        name for name, record in current["inputs"].items()
+        if (record or {}).get("sha256") != (stored_inputs.get(name) or {}).get("sha256")
+    ] or [NO_FINGERPRINT]
+
+
+def load_evaluation_results(cfg_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """The folder's evaluation_results.json, or None if it is missing or unreadable."""
+    path = Path(cfg_dir) / RESULTS_FILENAME
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+
+
+def check_evaluation(
+    cfg_dir: Union[str, Path],
+    evaluator_path: Union[str, Path],
+    study_dir: Union[str, Path],
+) -> Tuple[List[str], Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Whether a config folder's evaluation is up to date with its inputs.
+
+    Args:
+        cfg_dir: Config folder containing full_benchmark.json
+        evaluator_path: Path to the study's evaluator
+        study_dir: Study data directory containing ground_truth.json
+
+    Returns:
+        (reasons, fingerprint, results): ``reasons`` is empty when the stored
+        fingerprint matches the current inputs, otherwise it names the changed
+        inputs ("benchmark", "evaluator", "stats_lib", "ground_truth") or says
+        why there is nothing to compare ("not evaluated", "no fingerprint",
+        "fingerprint version"). ``fingerprint`` is the current one and
+        ``results`` the stored evaluation_results.json (None if missing).
+    """
+    cfg_dir = Path(cfg_dir)
+    results = load_evaluation_results(cfg_dir)
+    stored = (results or {}).get(FINGERPRINT_KEY)
+    fingerprint = compute_fingerprint(cfg_dir, evaluator_path, study_dir, previous=stored)
+    if results is None or not (cfg_dir / STATS_FILENAME).exists():
+        return [NOT_EVALUATED], fingerprint, results
+    return changed_inputs(stored, fingerprint), fingerprint, results
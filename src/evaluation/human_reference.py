@@ -0,0 +1,162 @@
+"""
+Per-study human reference statistics.
+
+The human side of every replication test (sample sizes, degrees of freedom,
+p-value, significance, direction) depends only on a study's ground_truth.json,
+but add_statistical_replication_fields() re-derived it on every
+``evaluate_study`` call, including every bootstrap iteration of
+scripts/compute_random_alignment.py. ``HumanReference`` holds the parsed ground
+truth of one study and computes each test's human side once, on first use.
+``load_human_reference`` keeps one reference per study, keyed by the SHA-256 of
+ground_truth.json, so editing the file rebuilds it.
+
+Evaluators load their ground truth through it and pass it on:
+
+    human_ref = load_human_reference(study_dir)
+    ground_truth = human_ref.ground_truth
+    ...
+    add_statistical_replication_fields(test_result, test_gt, ..., human_reference=human_ref)
+
+Human Bayes factors need no extra layer: the JZS calculators behind
+calc_bf_t / calc_bf_anova / calc_bf_r are memoized by argument in stats_lib,
+so an evaluator's human BF10 is integrated once per process.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+GROUND_TRUTH_FILENAME = "ground_truth.json"
+
+# test_result fields compute_human_side() reads (all copied from the ground truth by evaluators)
+_HUMAN_RESULT_FIELDS = ("human_test_statistic", "human_k", "human_p0", "pi_human_source")
+_HUMAN_GT_FIELDS = ("significance_level", "reported_statistics", "expected_direction")
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable form of a JSON-like value (lists/arrays -> tuples, dicts -> sorted item tuples)."""
+    if hasattr(value, "tolist"):  # numpy arrays and scalars
+        value = value.tolist()
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    # Keep the type: "2.5" and 2.5 are parsed differently downstream
+    return (type(value).__name__, value)
+
+
+class HumanReference:
+    """
+    Ground truth and memoized human-side statistics of one study.
+
+    Attributes:
+        study_id: Study the ground truth belongs to
+        ground_truth: Parsed ground_truth.json (shared; treat as read-only)
+        sha256: SHA-256 of the ground-truth file contents
+        hits / misses: Human-side lookups served from / added to the memo
+    """
+
+    def __init__(self, study_id: str, ground_truth: Dict[str, Any], sha256: Optional[str] = None):
+        self.study_id = study_id
+        self.ground_truth = ground_truth
+        self.sha256 = sha256
+        self.hits = 0
+        self.misses = 0
+        self._human: Dict[Tuple, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._human)
+
+    @staticmethod
+    def human_key(
+        test_result: dict,
+        test_gt: dict,
+        test_type: str,
+        n_human: Optional[int],
+        n2_human: Optional[int],
+        contingency_human: Optional[list],
+        independent: bool,
+    ) -> Tuple:
+        """Memo key: every input compute_human_side() reads."""
+        return (
+            tuple(_freeze(test_gt.get(field)) for field in _HUMAN_GT_FIELDS),
+            tuple(_freeze(test_result.get(field)) for field in _HUMAN_RESULT_FIELDS),
+            bool(test_result.get("is_significant_human")),
+            test_type,
+            _freeze(n_human),
+            _freeze(n2_human),
+            _freeze(contingency_human),
+            bool(independent),
+        )
+
+    def human_side(
+        self,
+        test_result: dict,
+        test_gt: dict,
+        test_type: str = "t-test",
+        n_human: Optional[int] = None,
+        n2_human: Optional[int] = None,
+        contingency_human: Optional[list] = None,
+        independent: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Human-side statistics of one test (see stats_lib.compute_human_side), computed once.
+
+        Returns:
+            Dict with n_human, n2_human, df, p_value_human, is_significant_human,
+            confidence_human, val_human and human_direction
+        """
+        from src.evaluation.stats_lib import compute_human_side
+
+        key = self.human_key(test_result, test_gt, test_type, n_human, n2_human, contingency_human, independent)
+        entry = self._human.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = compute_human_side(
+                test_result, test_gt, test_type, n_human, n2_human, contingency_human, independent
+            )
+            self._human[key] = entry
+        else:
+            self.hits += 1
+        return dict(entry)
+
+
+# study directory (resolved) -> reference for the current ground-truth contents
+_REFERENCES: Dict[str, HumanReference] = {}
+
+
+def load_human_reference(study_dir: Union[str, Path]) -> HumanReference:
+    """
+    Return the HumanReference for a study, reusing it while ground_truth.json is unchanged.
+
+    Args:
+        study_dir: Study directory (e.g. data/studies/study_001) or the
+            ground_truth.json path itself
+
+    Returns:
+        HumanReference (the same object across calls until the file's hash changes)
+    """
+    path = Path(study_dir)
+    if path.suffix != ".json":
+        path = path / GROUND_TRUTH_FILENAME
+    raw = path.read_bytes()
+    sha256 = hashlib.sha256(raw).hexdigest()
+    cache_key = str(path.resolve())
+
+    reference = _REFERENCES.get(cache_key)
+    if reference is not None and reference.sha256 == sha256:
+        return reference
+    if reference is not None:
+        logger.info(f"{path} changed; rebuilding human reference")
+    reference = HumanReference(path.parent.name, json.loads(raw), sha256)
+    _REFERENCES[cache_key] = reference
+    return reference
+
+
+def clear_human_references() -> None:
+    """Drop all cached references (e.g. between tests)."""
+    _REFERENCES.clear()
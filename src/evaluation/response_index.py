@@ -0,0 +1,300 @@
+"""
+Parse-once index of agent responses for Stage 6.
+
+Stage 6 looks at every response three times: the raw failure rate classifies
+it (empty / refusal / malformed), the sanity check runs the evaluator's
+``parse_agent_responses`` and ``get_required_q_numbers`` on it, and the
+evaluator parses it again while scoring. This module does that work once per
+response and stores it in ``parsed_responses.json`` next to
+``full_benchmark.json``, stamped with SHA-256 hashes of both the benchmark file
+and the evaluator source. A later Stage 6 run over an unchanged folder reads
+the index instead of re-running the regexes; editing either file invalidates it.
+
+Evaluators keep calling ``parse_agent_responses(text)`` as before:
+``ParsedResponseIndex.bind(module)`` temporarily swaps the module-level
+function for a lookup into the index, falling back to the real parser for
+texts the index has not seen.
+"""
+
+import contextlib
+import hashlib
+import importlib.util
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "parsed_responses.json"
+INDEX_VERSION = 1
+
+
+def response_text_key(response_text: str) -> str:
+    """Content key for a response text."""
+    return hashlib.sha256(response_text.encode("utf-8", errors="replace")).hexdigest()[:32]
+
+
+def _file_sha256(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def iter_responses(individual_data: List[Dict[str, Any]]) -> Iterator[Tuple[Any, int, Dict[str, Any]]]:
+    """
+    Yield (participant_id, response_index, response) for flat or nested ``individual_data``.
+
+    Flat (legacy) data has one response per item; nested data (Stage 5) has
+    participants with a ``responses`` list.
+    """
+    is_flat = len(individual_data) > 0 and "responses" not in individual_data[0]
+    if is_flat:
+        for resp_idx, response in enumerate(individual_data):
+            yield response.get("participant_id", resp_idx), resp_idx, response
+    else:
+        for participant in individual_data:
+            participant_id = participant.get("participant_id")
+            for resp_idx, response in enumerate(participant.get("responses", [])):
+                yield participant_id, resp_idx, response
+
+
+def _all_runs(benchmark_data: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    runs = [benchmark_data.get("individual_data", [])]
+    for run_data in benchmark_data.get("all_runs_raw_results") or []:
+        runs.append(run_data.get("individual_data", []))
+    return runs
+
+
+def _import_evaluator(evaluator_path: Path) -> Any:
+    module_name = Path(evaluator_path).stem
+    spec = importlib.util.spec_from_file_location(module_name, evaluator_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class ParsedResponseIndex:
+    """
+    Per-response parse results for one benchmark file.
+
+    Attributes:
+        entries: One dict per response of ``individual_data`` (in iter_responses
+            order) with ``text`` (content key or None for empty text),
+            ``raw_status`` ("empty" / "refusal" / "other" / None),
+            ``required`` (sorted required Q numbers, or None if the evaluator
+            has no get_required_q_numbers) and ``parse_error``
+        parsed: Content key -> Q->value map returned by parse_agent_responses
+        has_parser: Whether the evaluator defines parse_agent_responses
+    """
+
+    def __init__(
+        self,
+        entries: Optional[List[Dict[str, Any]]] = None,
+        parsed: Optional[Dict[str, Dict[str, Any]]] = None,
+        has_parser: bool = True,
+        benchmark_sha256: Optional[str] = None,
+        evaluator_sha256: Optional[str] = None,
+    ):
+        self.entries = entries or []
+        self.parsed = parsed or {}
+        self.has_parser = has_parser
+        self.benchmark_sha256 = benchmark_sha256
+        self.evaluator_sha256 = evaluator_sha256
+        # Text -> parsed map for the evaluator hook; Python caches str hashes,
+        # so repeated lookups of the same response object are O(1)
+        self._by_text: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def build(
+        cls,
+        benchmark_data: Dict[str, Any],
+        evaluator_module: Any = None,
+        benchmark_sha256: Optional[str] = None,
+        evaluator_sha256: Optional[str] = None,
+    ) -> "ParsedResponseIndex":
+        """
+        Classify and parse every response of ``benchmark_data`` once.
+
+        Args:
+            benchmark_data: Loaded full_benchmark.json
+            evaluator_module: Study evaluator module (None = failure-rate data only)
+            benchmark_sha256: Hash of the benchmark file the data came from
+            evaluator_sha256: Hash of the evaluator source
+        """
+        from src.evaluation.sanity_check import classify_raw_response
+
+        parse_func = getattr(evaluator_module, "parse_agent_responses", None)
+        get_required_func = getattr(evaluator_module, "get_required_q_numbers", None)
+        index = cls(
+            has_parser=parse_func is not None,
+            benchmark_sha256=benchmark_sha256,
+            evaluator_sha256=evaluator_sha256,
+        )
+        parse_errors = set()
+
+        def parse(text: str) -> Optional[str]:
+            key = response_text_key(text)
+            if parse_func is not None and key not in index.parsed and key not in parse_errors:
+                try:
+                    index.parsed[key] = dict(parse_func(text))
+                except Exception as e:
+                    logger.warning(f"Error parsing response: {e}")
+                    parse_errors.add(key)
+            return key
+
+        for _, _, response in iter_responses(benchmark_data.get("individual_data", [])):
+            response_text = response.get("response_text", "")
+            raw_status = classify_raw_response(response_text)
+            entry: Dict[str, Any] = {"text": None, "raw_status": raw_status, "required": None, "parse_error": False}
+            if raw_status != "empty":
+                entry["text"] = parse(response_text)
+                entry["parse_error"] = entry["text"] in parse_errors
+                if get_required_func is not None:
+                    try:
+                        entry["required"] = sorted(get_required_func(response.get("trial_info", {})))
+                    except Exception as e:
+                        logger.warning(f"Error calling get_required_q_numbers: {e}")
+                        entry["required"] = []
+            index.entries.append(entry)
+
+        # Responses of the other repeats are scored too; parse their texts as well
+        for run in _all_runs(benchmark_data)[1:]:
+            for _, _, response in iter_responses(run):
+                text = response.get("response_text", "")
+                if isinstance(text, str) and text.strip():
+                    parse(text)
+        return index
+
+    # Evaluator hook -----------------------------------------------------------
+
+    def lookup(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Parsed Q->value map for ``response_text`` (a copy), or None if not indexed."""
+        if not isinstance(response_text, str):
+            return None
+        parsed = self._by_text.get(response_text)
+        if parsed is None:
+            parsed = self.parsed.get(response_text_key(response_text))
+            if parsed is None:
+                return None
+            self._by_text[response_text] = parsed
+        return dict(parsed)
+
+    def parser_for(self, parse_func: Callable[[str], Dict[str, Any]]) -> Callable[[str], Dict[str, Any]]:
+        """Wrap ``parse_func`` so indexed texts are served from the index and new ones are added."""
+
+        def parse_agent_responses(response_text):
+            parsed = self.lookup(response_text)
+            if parsed is not None:
+                return parsed
+            parsed = parse_func(response_text)
+            if isinstance(response_text, str) and isinstance(parsed, dict):
+                self._by_text[response_text] = dict(parsed)
+            return parsed
+
+        parse_agent_responses.__wrapped__ = parse_func
+        return parse_agent_responses
+
+    def install(self, evaluator_module: Any) -> Optional[Callable]:
+        """Replace the module's parse_agent_responses with the indexed one; returns the original."""
+        original = getattr(evaluator_module, "parse_agent_responses", None)
+        if original is not None:
+            evaluator_module.parse_agent_responses = self.parser_for(getattr(original, "__wrapped__", original))
+        return original
+
+    @contextlib.contextmanager
+    def bind(self, evaluator_module: Any) -> Iterator["ParsedResponseIndex"]:
+        """Serve the evaluator's parse_agent_responses calls from this index while in the block."""
+        original = self.install(evaluator_module)
+        try:
+            yield self
+        finally:
+            if original is not None:
+                evaluator_module.parse_agent_responses = original
+
+    # Persistence --------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "benchmark_sha256": self.benchmark_sha256,
+            "evaluator_sha256": self.evaluator_sha256,
+            "has_parser": self.has_parser,
+            "entries": self.entries,
+            "parsed": self.parsed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParsedResponseIndex":
+        return cls(
+            entries=data.get("entries", []),
+            parsed=data.get("parsed", {}),
+            has_parser=data.get("has_parser", True),
+            benchmark_sha256=data.get("benchmark_sha256"),
+            evaluator_sha256=data.get("evaluator_sha256"),
+        )
+
+    def save(self, path: Path) -> None:
+        from src.utils.io import atomic_write_json
+
+        atomic_write_json(path, self.to_dict(), indent=None)
+
+
+def load_parsed_index(
+    benchmark_file: Path,
+    evaluator_path: Optional[Path] = None,
+    evaluator_module: Any = None,
+    benchmark_data: Optional[Dict[str, Any]] = None,
+) -> ParsedResponseIndex:
+    """
+    Return the parsed-response index for ``benchmark_file``, building it if needed.
+
+    The cached ``parsed_responses.json`` is reused only when the stored hashes of
+    the benchmark file and the evaluator source both match; otherwise the index
+    is rebuilt and saved. For compact storage the header records the hashes of
+    its data files, so hashing the header covers them too.
+
+    Args:
+        benchmark_file: Path to full_benchmark.json
+        evaluator_path: Path to the study evaluator (hashed; imported if a rebuild is needed)
+        evaluator_module: Already-imported evaluator module to use for a rebuild
+        benchmark_data: Already-loaded contents of ``benchmark_file`` (saves a JSON parse)
+
+    Returns:
+        ParsedResponseIndex
+    """
+    benchmark_file = Path(benchmark_file)
+    index_path = benchmark_file.parent / INDEX_FILENAME
+    raw = benchmark_file.read_bytes()
+    benchmark_sha = hashlib.sha256(raw).hexdigest()
+    evaluator_sha = _file_sha256(evaluator_path) if evaluator_path else None
+
+    if index_path.exists():
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if (
+                cached.get("version") == INDEX_VERSION
+                and cached.get("benchmark_sha256") == benchmark_sha
+                and cached.get("evaluator_sha256") == evaluator_sha
+            ):
+                return ParsedResponseIndex.from_dict(cached)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable {index_path}: {e}")
+
+    if benchmark_data is None:
+        from src.utils.compact_store import load_benchmark
+
+        benchmark_data = load_benchmark(benchmark_file)
+    if evaluator_module is None and evaluator_path and Path(evaluator_path).exists():
+        evaluator_module = _import_evaluator(Path(evaluator_path))
+
+    index = ParsedResponseIndex.build(benchmark_data, evaluator_module, benchmark_sha, evaluator_sha)
+    try:
+        index.save(index_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not save parsed-response index to {index_path}: {e}")
+    return index
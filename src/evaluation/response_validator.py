@@ -11,6 +11,8 @@ from pathlib import Path
 from typing import Dict, Any, List
 from collections import defaultdict
 
+from src.utils.compact_store import load_benchmark
+
 def validate_responses(
     study_id: str,
     results_path: Path,
@@ -27,9 +29,8 @@ def validate_responses(
     Returns:
         Validation report with expected vs actual counts
     """
-    # Load results
-    with open(results_path, 'r') as f:
-        results = json.load(f)
+    # Load results (plain or compact full_benchmark.json)
+    results = load_benchmark(results_path)
     
     # Load specification for expected counts
     if specification_path is None:
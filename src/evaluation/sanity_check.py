@@ -5,10 +5,7 @@ Checks if agent responses can be fully extracted by evaluator's parse functions.
 If extraction fails, formats responses using deepseek formatter.
 """
 
-import json
 import re
-import importlib.util
-import sys
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Set
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -65,7 +62,29 @@ def is_refusal_response(response_text: str) -> bool:
     return False
 
 
-def calculate_raw_failure_rate(benchmark_data: Dict[str, Any]) -> Dict[str, Any]:
+def classify_raw_response(response_text: Any) -> Optional[str]:
+    """
+    Classify a response for the raw failure rate.
+    
+    Returns:
+        "empty" for empty/None text, "refusal" if the agent declined to answer,
+        "other" for very short (likely malformed) text, None for a usable response
+    """
+    # Check for empty/None
+    if not response_text or response_text == "None" or (isinstance(response_text, str) and not response_text.strip()):
+        return "empty"
+    
+    # Check for refusal
+    if is_refusal_response(response_text):
+        return "refusal"
+    
+    # Check for very short responses (might be malformed)
+    if len(response_text.strip()) < 5:
+        return "other"
+    return None
+
+
+def calculate_raw_failure_rate(benchmark_data: Dict[str, Any], parsed_index=None) -> Dict[str, Any]:
     """
     Calculate raw failure rate - includes format issues, empty responses, and refusals.
     
@@ -76,6 +95,8 @@ def calculate_raw_failure_rate(benchmark_data: Dict[str, Any]) -> Dict[str, Any]
     
     Args:
         benchmark_data: The benchmark data dictionary
+        parsed_index: Optional ParsedResponseIndex for this benchmark; its cached
+            per-response classification is used instead of re-running the checks
         
     Returns:
         {
@@ -89,97 +110,54 @@ def calculate_raw_failure_rate(benchmark_data: Dict[str, Any]) -> Dict[str, Any]
             }
         }
     """
-    individual_data = benchmark_data.get("individual_data", [])
-    
-    if not individual_data:
-        return {
-            "raw_failed": 0,
-            "raw_total": 0,
-            "raw_failure_rate": 0.0,
-            "raw_failure_breakdown": {"empty": 0, "refusal": 0, "other": 0}
-        }
-    
-    # Check if data is flat or nested
-    is_flat = len(individual_data) > 0 and 'responses' not in individual_data[0]
-    
-    raw_failed = 0
-    raw_total = 0
-    empty_count = 0
-    refusal_count = 0
-    other_count = 0
-    
-    if is_flat:
-        # Flat structure: each item is a response
-        for resp in individual_data:
-            raw_total += 1
-            response_text = resp.get("response_text", "")
-            
-            # Check for empty/None
-            if not response_text or response_text == "None" or (isinstance(response_text, str) and not response_text.strip()):
-                raw_failed += 1
-                empty_count += 1
-                continue
-            
-            # Check for refusal
-            if is_refusal_response(response_text):
-                raw_failed += 1
-                refusal_count += 1
-                continue
-            
-            # Check for very short responses (might be malformed)
-            if len(response_text.strip()) < 5:
-                raw_failed += 1
-                other_count += 1
+    from src.evaluation.response_index import iter_responses
+
+    if parsed_index is not None:
+        statuses = [entry.get("raw_status") for entry in parsed_index.entries]
     else:
-        # Nested structure: each item is a participant with multiple responses
-        for participant in individual_data:
-            for resp in participant.get("responses", []):
-                raw_total += 1
-                response_text = resp.get("response_text", "")
-                
-                # Check for empty/None
-                if not response_text or response_text == "None" or (isinstance(response_text, str) and not response_text.strip()):
-                    raw_failed += 1
-                    empty_count += 1
-                    continue
-                
-                # Check for refusal
-                if is_refusal_response(response_text):
-                    raw_failed += 1
-                    refusal_count += 1
-                    continue
-                
-                # Check for very short responses (might be malformed)
-                if len(response_text.strip()) < 5:
-                    raw_failed += 1
-                    other_count += 1
-    
+        statuses = [
+            classify_raw_response(resp.get("response_text", ""))
+            for _, _, resp in iter_responses(benchmark_data.get("individual_data", []))
+        ]
+    
+    breakdown = {"empty": 0, "refusal": 0, "other": 0}
+    for status in statuses:
+        if status is not None:
+            breakdown[status] += 1
+    
+    raw_total = len(statuses)
+    raw_failed = sum(breakdown.values())
     raw_failure_rate = (raw_failed / raw_total * 100.0) if raw_total > 0 else 0.0
     
     return {
         "raw_failed": raw_failed,
         "raw_total": raw_total,
         "raw_failure_rate": raw_failure_rate,
-        "raw_failure_breakdown": {
-            "empty": empty_count,
-            "refusal": refusal_count,
-            "other": other_count
-        }
+        "raw_failure_breakdown": breakdown
     }
 
 
 def run_sanity_check(
     study_id: str,
     benchmark_file: Path,
-    evaluator_path: Path
+    evaluator_path: Path,
+    parsed_index=None,
+    benchmark_data: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     检查所有响应是否能被evaluator的正则表达式完全提取。
     
+    Parse results come from the parsed-response index next to the benchmark
+    file (see src.evaluation.response_index), so an unchanged folder is not
+    re-parsed and the evaluator is only imported when the index is rebuilt.
+    
     Args:
         study_id: Study ID (e.g., "study_001")
         benchmark_file: Path to full_benchmark.json
         evaluator_path: Path to evaluator.py file
+        parsed_index: Optional ParsedResponseIndex already loaded for benchmark_file
+        benchmark_data: Optional contents of benchmark_file already loaded by the
+            caller (skips reading the file again)
         
     Returns:
         {
@@ -190,32 +168,30 @@ def run_sanity_check(
             "failed": int
         }
     """
-    # 1. 加载benchmark数据
-    with open(benchmark_file, 'r') as f:
-        benchmark_data = json.load(f)
-    
-    # 2. 动态加载evaluator模块
-    try:
-        spec = importlib.util.spec_from_file_location(f"{study_id}_evaluator", evaluator_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[f"{study_id}_evaluator"] = module
-        spec.loader.exec_module(module)
-    except Exception as e:
-        logger.error(f"Failed to load evaluator for {study_id}: {e}")
-        return {
-            "all_passed": False,
-            "failed_responses": [],
-            "total_checked": 0,
-            "passed": 0,
-            "failed": 0,
-            "error": str(e)
-        }
+    from src.evaluation.response_index import iter_responses, load_parsed_index
+    from src.utils.compact_store import load_benchmark
+
+    # 1. 加载benchmark数据 (plain or compact storage)
+    if benchmark_data is None:
+        benchmark_data = load_benchmark(benchmark_file)
     
-    # 3. 获取evaluator的解析函数
-    parse_func = getattr(module, 'parse_agent_responses', None)
-    get_required_func = getattr(module, 'get_required_q_numbers', None)
+    # 2. 加载(或构建)解析索引 - 需要时动态加载evaluator模块
+    if parsed_index is None:
+        try:
+            parsed_index = load_parsed_index(benchmark_file, evaluator_path, benchmark_data=benchmark_data)
+        except Exception as e:
+            logger.error(f"Failed to load evaluator for {study_id}: {e}")
+            return {
+                "all_passed": False,
+                "failed_responses": [],
+                "total_checked": 0,
+                "passed": 0,
+                "failed": 0,
+                "error": str(e)
+            }
     
-    if not parse_func:
+    # 3. 检查evaluator是否有解析函数
+    if not parsed_index.has_parser:
         logger.warning(f"No parse_agent_responses function found in {study_id}_evaluator")
         return {
             "all_passed": True,  # 无法检查，假设通过
@@ -233,123 +209,48 @@ def run_sanity_check(
     total_checked = 0
     passed = 0
     
-    individual_data = benchmark_data.get("individual_data", [])
-    
-    # Check if data is flat structure (legacy format) or nested structure (from Stage 5)
-    # Note: Flat structure is kept for backward compatibility with legacy results
-    is_flat_structure = len(individual_data) > 0 and 'responses' not in individual_data[0]
-    
-    if is_flat_structure:
-        # Handle flat structure: each item is a trial response
-        for resp_idx, response in enumerate(individual_data):
-            total_responses += 1
-            participant_id = response.get("participant_id", resp_idx)
-            response_text = response.get("response_text", "")
-            
-            # Skip if response_text is None, "None", or empty
-            if not response_text or response_text == "None" or (isinstance(response_text, str) and not response_text.strip()):
-                skipped_responses += 1
-                logger.debug(f"Skipping response with empty/None text: participant {participant_id}, response {resp_idx}")
-                continue
-            
-            total_checked += 1
-            
-            trial_info = response.get("trial_info", {})
-            
-            # 确定需要的Q编号
-            if get_required_func:
-                try:
-                    required_q_numbers = get_required_func(trial_info)
-                except Exception as e:
-                    logger.warning(f"Error calling get_required_q_numbers: {e}")
-                    required_q_numbers = set()
-            else:
-                # 如果没有get_required_q_numbers函数，无法检查
-                logger.warning(f"No get_required_q_numbers function in {study_id}_evaluator")
-                continue
-            
-            if not required_q_numbers:
-                # 无法确定需要的Q编号，跳过
-                continue
-            
-            # 使用evaluator的解析函数提取Q值
-            try:
-                parsed = parse_func(response_text)
-            except Exception as e:
-                logger.warning(f"Error parsing response: {e}")
-                parsed = {}
-            
-            # 检查是否所有需要的Q编号都被提取
-            extracted_q_numbers = set(parsed.keys())
-            missing = required_q_numbers - extracted_q_numbers
-            
-            if missing:
-                failed_responses.append({
-                    "participant_id": participant_id,
-                    "response_index": resp_idx,
-                    "missing_q_numbers": list(missing),
-                    "required_q_numbers": list(required_q_numbers),
-                    "extracted_q_numbers": list(extracted_q_numbers),
-                    "response_text_preview": response_text[:200]
-                })
-            else:
-                passed += 1
-    else:
-        # Handle nested structure: each item is a participant with multiple responses
-        for participant in individual_data:
-            participant_id = participant.get("participant_id")
-            for resp_idx, response in enumerate(participant.get("responses", [])):
-                total_responses += 1
-                response_text = response.get("response_text", "")
-                
-                # Skip if response_text is None, "None", or empty
-                if not response_text or response_text == "None" or (isinstance(response_text, str) and not response_text.strip()):
-                    skipped_responses += 1
-                    logger.debug(f"Skipping response with empty/None text: participant {participant_id}, response {resp_idx}")
-                    continue
-                
-                total_checked += 1
-                
-                trial_info = response.get("trial_info", {})
-                
-                # 确定需要的Q编号
-                if get_required_func:
-                    try:
-                        required_q_numbers = get_required_func(trial_info)
-                    except Exception as e:
-                        logger.warning(f"Error calling get_required_q_numbers: {e}")
-                        required_q_numbers = set()
-                else:
-                    # 如果没有get_required_q_numbers函数，无法检查
-                    logger.warning(f"No get_required_q_numbers function in {study_id}_evaluator")
-                    continue
-                
-                if not required_q_numbers:
-                    # 无法确定需要的Q编号，跳过
-                    continue
-                
-                # 使用evaluator的解析函数提取Q值
-                try:
-                    parsed = parse_func(response_text)
-                except Exception as e:
-                    logger.warning(f"Error parsing response: {e}")
-                    parsed = {}
-                
-                # 检查是否所有需要的Q编号都被提取
-                extracted_q_numbers = set(parsed.keys())
-                missing = required_q_numbers - extracted_q_numbers
-                
-                if missing:
-                    failed_responses.append({
-                        "participant_id": participant_id,
-                        "response_index": resp_idx,
-                        "missing_q_numbers": list(missing),
-                        "required_q_numbers": list(required_q_numbers),
-                        "extracted_q_numbers": list(extracted_q_numbers),
-                        "response_text_preview": response_text[:200]
-                    })
-                else:
-                    passed += 1
+    # Handles both the flat structure (legacy format) and the nested structure (from Stage 5)
+    responses = iter_responses(benchmark_data.get("individual_data", []))
+    for (participant_id, resp_idx, response), entry in zip(responses, parsed_index.entries):
+        total_responses += 1
+        
+        # Skip if response_text is None, "None", or empty
+        if entry["raw_status"] == "empty":
+            skipped_responses += 1
+            logger.debug(f"Skipping response with empty/None text: participant {participant_id}, response {resp_idx}")
+            continue
+        
+        total_checked += 1
+        
+        # 确定需要的Q编号
+        if entry["required"] is None:
+            # 如果没有get_required_q_numbers函数，无法检查
+            logger.warning(f"No get_required_q_numbers function in {study_id}_evaluator")
+            continue
+        required_q_numbers = set(entry["required"])
+        
+        if not required_q_numbers:
+            # 无法确定需要的Q编号，跳过
+            continue
+        
+        # 使用evaluator的解析结果 (解析失败视为未提取任何Q值)
+        parsed = {} if entry["parse_error"] else parsed_index.parsed.get(entry["text"], {})
+        
+        # 检查是否所有需要的Q编号都被提取
+        extracted_q_numbers = set(parsed.keys())
+        missing = required_q_numbers - extracted_q_numbers
+        
+        if missing:
+            failed_responses.append({
+                "participant_id": participant_id,
+                "response_index": resp_idx,
+                "missing_q_numbers": list(missing),
+                "required_q_numbers": list(required_q_numbers),
+                "extracted_q_numbers": list(extracted_q_numbers),
+                "response_text_preview": response.get("response_text", "")[:200]
+            })
+        else:
+            passed += 1
     
     return {
         "all_passed": len(failed_responses) == 0,
@@ -386,8 +287,8 @@ def format_with_deepseek(
         格式化后的响应文本
     """
     import os
-    from openai import OpenAI
     from src.core.study_config import get_study_config
+    from src.llm.client_pool import get_anthropic_client, get_openai_client
     from pathlib import Path
     
     # 如果响应为空、None或字符串"None"，直接返回
@@ -490,7 +391,7 @@ FORMATTED OUTPUT:"""
         # Route to anthropic if configured
         if formatter_provider == "anthropic" or "claude" in formatter_model.lower():
             try:
-                from anthropic import Anthropic
+                import anthropic  # noqa: F401
             except ImportError:
                 logger.warning("anthropic package not installed, returning original response")
                 return raw_response
@@ -500,7 +401,7 @@ FORMATTED OUTPUT:"""
                 logger.warning("ANTHROPIC_API_KEY not found, returning original response")
                 return raw_response
             
-            client = Anthropic(api_key=api_key)
+            client = get_anthropic_client(api_key)
             response = client.messages.create(
                 model=formatter_model,
                 max_tokens=8192,
@@ -525,10 +426,7 @@ FORMATTED OUTPUT:"""
                 logger.warning(f"No API key found for formatter provider {formatter_provider}, returning original response")
                 return raw_response
             
-            client = OpenAI(
-                base_url=base_url,
-                api_key=api_key
-            )
+            client = get_openai_client(api_key, base_url=base_url)
             
             response = client.chat.completions.create(
                 model=formatter_model,
@@ -661,9 +559,10 @@ def format_failed_responses(
     Returns:
         成功格式化的响应数量
     """
-    # 1. 加载benchmark数据
-    with open(benchmark_file, 'r') as f:
-        benchmark_data = json.load(f)
+    from src.utils.compact_store import load_benchmark, save_benchmark
+
+    # 1. 加载benchmark数据 (plain or compact storage; keep raw texts for rewriting)
+    benchmark_data = load_benchmark(benchmark_file, include_raw=True)
     
     # 2. 创建响应索引映射
     response_map = {}
@@ -767,8 +666,7 @@ def format_failed_responses(
     
     # 4. 保存更新后的benchmark数据
     if formatted_count > 0:
-        with open(benchmark_file, 'w') as f:
-            json.dump(benchmark_data, f, indent=2)
+        save_benchmark(benchmark_file, benchmark_data)
     
     return formatted_count
 
@@ -12,11 +12,12 @@ This unified metric allows us to compare evidence strength across diverse
 study types (t-tests, correlations, chi-square, etc.).
 """
 
+import functools
 import math
 import re
 import warnings
 import numpy as np
-from scipy import stats, special, integrate
+from scipy import stats, special, integrate, interpolate
 from scipy.integrate import IntegrationWarning
 from typing import Optional, Tuple, Dict, List, Any
 
@@ -28,6 +29,9 @@ warnings.filterwarnings('ignore', message='.*The algorithm.*')
 warnings.filterwarnings('ignore', message='.*Integration.*')
 warnings.filterwarnings('ignore', message='.*tolerance.*')
 
+# Distinct (statistic, design) tuples memoized by the exact JZS calculators
+_BF_CACHE_SIZE = 65536
+
 def calc_posteriors_3way(bf10: float, direction: int, prior_odds: float = 1.0) -> dict:
     """
     Calculate 3-way posterior probabilities (H+, H-, H0).
@@ -415,34 +419,37 @@ def calculate_human_p_value(
         return None
 
 
-def add_statistical_replication_fields(
+def compute_human_side(
     test_result: dict,
     test_gt: dict,
-    p_val_agent: float = None,
-    test_stat_agent: float = None,
     test_type: str = "t-test",
-    n_agent: Optional[int] = None,
-    n2_agent: Optional[int] = None,
     n_human: Optional[int] = None,
     n2_human: Optional[int] = None,
-    contingency_agent: Optional[list] = None,
     contingency_human: Optional[list] = None,
-    independent: bool = True,
-    agent_direction_override: Optional[int] = None
+    independent: bool = True
 ) -> dict:
     """
-    Add statistical replication fields to a test result dictionary.
+    Human-side statistics of one test, as used by add_statistical_replication_fields().
     
-    This function extracts human p-value and direction from ground truth,
-    determines agent significance and direction, and adds all necessary
-    fields for statistical replication analysis, including frequentist
-    consistency metrics (Z-difference and Consistency Score).
+    Everything here comes from the ground truth: ``test_gt`` and the human fields
+    the evaluator copies into ``test_result`` (human_test_statistic, human_k,
+    human_p0, pi_human_source, is_significant_human). The result is therefore the
+    same on every evaluation of a study; HumanReference (src.evaluation.human_reference)
+    computes it once per ground-truth file.
     
-    If the agent direction does not match the human direction, Pi_Agent is 
-    set to 0.0 and PAS is recalculated.
+    Args:
+        test_result: Test result dict (only the human fields above are read)
+        test_gt: Statistical test entry from ground_truth.json
+        test_type: Statistical test type
+        n_human: Human sample size (group 1), extracted from the reported statistics if None
+        n2_human: Human sample size of group 2 for two-sample designs
+        contingency_human: Human 2x2 contingency table (chi-square direction)
+        independent: Whether the design is between-subjects
     
-    CRITICAL: This function now automatically extracts sample sizes from multiple sources
-    if not provided, ensuring n_human and n_agent are never None when possible.
+    Returns:
+        Dict with n_human, n2_human, df (degrees of freedom parsed from
+        reported_statistics, or None), p_value_human, is_significant_human,
+        confidence_human, val_human (t-equivalent statistic) and human_direction
     """
     sig_level = test_gt.get("significance_level", 0.05)
     if sig_level is None:
@@ -451,9 +458,9 @@ def add_statistical_replication_fields(
     reported_stats = test_gt.get("reported_statistics", "")
     expected_dir_str = test_gt.get("expected_direction", "positive")
     
-    # ============================================================================
-    # AUTOMATIC SAMPLE SIZE EXTRACTION (CRITICAL: Ensure n_human/n_agent are never None)
-    # ============================================================================
+    # Reported degrees of freedom, e.g. "t(79) = 2.66" -> (79,), "F(1, 78) = 17.7" -> (1, 78)
+    df_match = re.search(r'(?:chi2|[tFr])\((\d+)(?:,\s*(\d+))?\)', reported_stats or "")
+    reported_df = tuple(int(g) for g in df_match.groups() if g is not None) if df_match else None
     
     # Extract human sample sizes from multiple sources if missing
     if n_human is None:
@@ -516,31 +523,6 @@ def add_statistical_replication_fields(
                     else:
                         n_human = total_n
         
-        # Method 3: Try to extract from test_result's agent_reason (for agent sample size)
-        if n_agent is None:
-            agent_reason = test_result.get("agent_reason", "")
-            if agent_reason:
-                # Pattern: "n=64 pairs" or "n1=50, n2=67" or "t(62), n=64"
-                n_match = re.search(r'n\s*=\s*(\d+)', agent_reason)
-                n1_match = re.search(r'n1\s*=\s*(\d+)', agent_reason)
-                n2_match = re.search(r'n2\s*=\s*(\d+)', agent_reason)
-                nA_match = re.search(r'nA\s*=\s*(\d+)', agent_reason)
-                nB_match = re.search(r'nB\s*=\s*(\d+)', agent_reason)
-                
-                if n1_match and n2_match:
-                    n_agent = int(n1_match.group(1))
-                    n2_agent = int(n2_match.group(1))
-                elif nA_match and nB_match:
-                    n_agent = int(nA_match.group(1))
-                    n2_agent = int(nB_match.group(1))
-                elif n_match:
-                    total_n = int(n_match.group(1))
-                    if independent:
-                        n_agent = total_n // 2
-                        n2_agent = total_n - n_agent
-                    else:
-                        n_agent = total_n
-        
         # Method 4: For binomial tests, extract from test_result fields
         if test_type in ["binomial", "binomtest", "sign_test"]:
             if n_human is None:
@@ -553,24 +535,6 @@ def add_statistical_replication_fields(
                     if n_match:
                         n_human = int(n_match.group(1))
             
-            if n_agent is None:
-                # Extract from agent_reason (e.g., "k=13, n=50")
-                agent_reason = test_result.get("agent_reason", "")
-                if agent_reason:
-                    n_match = re.search(r'n\s*=\s*(\d+)', agent_reason)
-                    if n_match:
-                        n_agent = int(n_match.group(1))
-    
-    # Store extracted sample sizes in test_result for future reference
-    if n_human is not None:
-        test_result["n_human_extracted"] = n_human
-    if n2_human is not None:
-        test_result["n2_human_extracted"] = n2_human
-    if n_agent is not None:
-        test_result["n_agent_extracted"] = n_agent
-    if n2_agent is not None:
-        test_result["n2_agent_extracted"] = n2_agent
-    
     # Try to calculate human p-value from test statistic first (preferred method)
     p_val_human = None
     is_sig_human = False
@@ -642,6 +606,143 @@ def add_statistical_replication_fields(
             is_sig_human = True
             confidence_human = "low"
 
+    # Human direction
+    human_test_stat_str = test_result.get("human_test_statistic", "")
+    val_human = None
+    if human_test_stat_str:
+        try:
+            # Clean string: remove non-numeric
+            clean_h = re.sub(r'[^0-9.-]', '', human_test_stat_str)
+            val_h_raw = float(clean_h) if clean_h else None
+            
+            # Convert F to t-equivalent for df1=1
+            if test_type in ["f-test", "f_test", "anova"] and val_h_raw is not None:
+                val_human = math.sqrt(abs(val_h_raw))
+            else:
+                val_human = val_h_raw
+        except (ValueError, TypeError):
+            pass
+            
+    human_direction = get_direction_from_statistic(val_human, test_type, expected_dir_str, contingency_table=contingency_human)
+    
+    return {
+        "n_human": n_human,
+        "n2_human": n2_human,
+        "df": reported_df,
+        "p_value_human": p_val_human,
+        "is_significant_human": is_sig_human,
+        "confidence_human": confidence_human,
+        "val_human": val_human,
+        "human_direction": human_direction,
+    }
+
+
+def add_statistical_replication_fields(
+    test_result: dict,
+    test_gt: dict,
+    p_val_agent: float = None,
+    test_stat_agent: float = None,
+    test_type: str = "t-test",
+    n_agent: Optional[int] = None,
+    n2_agent: Optional[int] = None,
+    n_human: Optional[int] = None,
+    n2_human: Optional[int] = None,
+    contingency_agent: Optional[list] = None,
+    contingency_human: Optional[list] = None,
+    independent: bool = True,
+    agent_direction_override: Optional[int] = None,
+    human_reference: Optional[Any] = None
+) -> dict:
+    """
+    Add statistical replication fields to a test result dictionary.
+    
+    This function extracts human p-value and direction from ground truth,
+    determines agent significance and direction, and adds all necessary
+    fields for statistical replication analysis, including frequentist
+    consistency metrics (Z-difference and Consistency Score).
+    
+    If the agent direction does not match the human direction, Pi_Agent is 
+    set to 0.0 and PAS is recalculated.
+    
+    CRITICAL: This function now automatically extracts sample sizes from multiple sources
+    if not provided, ensuring n_human and n_agent are never None when possible.
+    
+    The human side (sample sizes, p-value, significance, direction) depends only
+    on the ground truth and comes from compute_human_side(). Pass the study's
+    ``human_reference`` (src.evaluation.human_reference.HumanReference) to reuse
+    it across evaluations, so repeated runs such as bootstraps only compute the
+    agent side.
+    """
+    sig_level = test_gt.get("significance_level", 0.05)
+    if sig_level is None:
+        sig_level = 0.05
+    
+    expected_dir_str = test_gt.get("expected_direction", "positive")
+    
+    # Human side: sample sizes, p-value, significance and direction from the ground truth
+    human_args = (test_result, test_gt, test_type, n_human, n2_human, contingency_human, independent)
+    if human_reference is not None:
+        human = human_reference.human_side(*human_args)
+    else:
+        human = compute_human_side(*human_args)
+    
+    # ============================================================================
+    # AUTOMATIC SAMPLE SIZE EXTRACTION (CRITICAL: Ensure n_human/n_agent are never None)
+    # ============================================================================
+    
+    # Agent sample sizes are only inferred when the evaluator passed no sample sizes at all
+    if n_human is None:
+        # Method 3: Try to extract from test_result's agent_reason (for agent sample size)
+        if n_agent is None:
+            agent_reason = test_result.get("agent_reason", "")
+            if agent_reason:
+                # Pattern: "n=64 pairs" or "n1=50, n2=67" or "t(62), n=64"
+                n_match = re.search(r'n\s*=\s*(\d+)', agent_reason)
+                n1_match = re.search(r'n1\s*=\s*(\d+)', agent_reason)
+                n2_match = re.search(r'n2\s*=\s*(\d+)', agent_reason)
+                nA_match = re.search(r'nA\s*=\s*(\d+)', agent_reason)
+                nB_match = re.search(r'nB\s*=\s*(\d+)', agent_reason)
+                
+                if n1_match and n2_match:
+                    n_agent = int(n1_match.group(1))
+                    n2_agent = int(n2_match.group(1))
+                elif nA_match and nB_match:
+                    n_agent = int(nA_match.group(1))
+                    n2_agent = int(nB_match.group(1))
+                elif n_match:
+                    total_n = int(n_match.group(1))
+                    if independent:
+                        n_agent = total_n // 2
+                        n2_agent = total_n - n_agent
+                    else:
+                        n_agent = total_n
+        
+        # Method 4: For binomial tests, extract from test_result fields
+        if test_type in ["binomial", "binomtest", "sign_test"]:
+            if n_agent is None:
+                # Extract from agent_reason (e.g., "k=13, n=50")
+                agent_reason = test_result.get("agent_reason", "")
+                if agent_reason:
+                    n_match = re.search(r'n\s*=\s*(\d+)', agent_reason)
+                    if n_match:
+                        n_agent = int(n_match.group(1))
+    
+    n_human, n2_human = human["n_human"], human["n2_human"]
+    
+    # Store extracted sample sizes in test_result for future reference
+    if n_human is not None:
+        test_result["n_human_extracted"] = n_human
+    if n2_human is not None:
+        test_result["n2_human_extracted"] = n2_human
+    if n_agent is not None:
+        test_result["n_agent_extracted"] = n_agent
+    if n2_agent is not None:
+        test_result["n2_agent_extracted"] = n2_agent
+    
+    p_val_human = human["p_value_human"]
+    is_sig_human = human["is_significant_human"]
+    confidence_human = human["confidence_human"]
+    
     # NEW: Store r-equivalent effect sizes for plotting
     test_result["human_effect_r"] = FrequentistConsistency.effect_to_r_equiv(test_type, test_result.get("human_effect_size") or test_result.get("human_effect_d") or 0.0)
     test_result["agent_effect_r"] = FrequentistConsistency.effect_to_r_equiv(test_type, test_result.get("agent_effect_size") or test_result.get("agent_effect_d") or 0.0)
@@ -667,24 +768,8 @@ def add_statistical_replication_fields(
             if "score" in test_result:
                 test_result["score"] = new_pas
 
-    # Human direction
-    human_test_stat_str = test_result.get("human_test_statistic", "")
-    val_human = None
-    if human_test_stat_str:
-        try:
-            # Clean string: remove non-numeric
-            clean_h = re.sub(r'[^0-9.-]', '', human_test_stat_str)
-            val_h_raw = float(clean_h) if clean_h else None
-            
-            # Convert F to t-equivalent for df1=1
-            if test_type in ["f-test", "f_test", "anova"] and val_h_raw is not None:
-                val_human = math.sqrt(abs(val_h_raw))
-            else:
-                val_human = val_h_raw
-        except (ValueError, TypeError):
-            pass
-            
-    human_direction = get_direction_from_statistic(val_human, test_type, expected_dir_str, contingency_table=contingency_human)
+    val_human = human["val_human"]
+    human_direction = human["human_direction"]
     
     # Agent significance and direction
     is_sig_agent = p_val_agent < sig_level if p_val_agent is not None else False
@@ -1403,6 +1488,75 @@ def calc_bf_t_bic(t_stat, n1, n2=None, independent=True):
         print(f"Error calculating BF for t-test: {e}")
         return 1.0
 
+@functools.lru_cache(maxsize=_BF_CACHE_SIZE)
+def _jzs_bf_t(t_stat, n_eff, nu, r_scale):
+    """
+    Memoized JZS t-test BF10 for (t, n_eff, nu, r_scale); see calc_bf_t().
+    
+    Study evaluators recompute the same human-side BF on every run, and
+    bootstrap resamples of small samples repeat t values often, so each
+    distinct quadrature is only paid once per process.
+    """
+    t2 = t_stat**2
+    
+    # Optimization: For very large t, return bound to avoid integration overflow
+    if t2 > 100:
+        return 1e6
+
+    # Numerator integrand (Marginal Likelihood of H1)
+    # Equation 1 from Rouder et al. (2009)
+    def numerator_integrand(g):
+        term1 = (1 + n_eff * g * r_scale**2)**(-0.5)
+        term2 = (1 + t2 / ((1 + n_eff * g * r_scale**2) * nu))**(-(nu + 1) / 2)
+        term3 = (2 * math.pi)**(-0.5) * (g**(-1.5)) * math.exp(-1 / (2 * g))
+        return term1 * term2 * term3
+
+    # Integrate g from 0 to infinity
+    # Using scipy.integrate.quad is standard and accurate
+    # Suppress tolerance warnings and use relaxed tolerance for numerical stability
+    with warnings.catch_warnings():
+        # Suppress all integration-related warnings
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        warnings.filterwarnings('ignore', category=IntegrationWarning)
+        warnings.filterwarnings('ignore', message='.*tolerance.*')
+        warnings.filterwarnings('ignore', message='.*Integration.*')
+        warnings.filterwarnings('ignore', message='.*The algorithm.*')
+        # Use relaxed tolerance (epsabs=1e-6, epsrel=1e-6) to avoid warnings
+        integral_val, _ = integrate.quad(
+            numerator_integrand, 
+            0, 
+            np.inf,
+            epsabs=1e-6,
+            epsrel=1e-6,
+            limit=100
+        )
+    
+    # Denominator (Marginal Likelihood of H0)
+    # This is simply the t-distribution density under H0
+    denominator = (1 + t2 / nu)**(-(nu + 1) / 2)
+    
+    bf10 = integral_val / denominator
+    
+    # Handle edge cases
+    if math.isnan(bf10) or math.isinf(bf10):
+        # Fallback to BIC if integration fails
+        log_bf = (t2 - math.log(n_eff)) / 2
+        return math.exp(log_bf)
+        
+    return bf10
+
+
+def _t_test_dof(n1, n2=None, independent=True):
+    """Return (n_eff, nu) for a JZS t-test design."""
+    if independent:
+        if n2 is None:
+            raise ValueError("n2 must be provided for independent t-test")
+        # Effective sample size for independent t-test
+        return (n1 * n2) / (n1 + n2), n1 + n2 - 2
+    # Paired or one-sample
+    return n1, n1 - 1
+
+
 def calc_bf_t(t_stat, n1, n2=None, independent=True, r_scale=0.707):
     """
     Calculate JZS Bayes Factor (BF10) for t-test using exact numerical integration.
@@ -1410,6 +1564,9 @@ def calc_bf_t(t_stat, n1, n2=None, independent=True, r_scale=0.707):
     This is the default implementation using exact JZS calculation.
     Ref: Rouder et al. (2009). Bayesian t tests for accepting and rejecting the null hypothesis.
     
+    Results are memoized on (t, n_eff, nu, r_scale). For arrays of t statistics
+    (e.g. bootstrap resamples) use calc_bf_t_array() instead.
+    
     For the legacy BIC approximation version, use calc_bf_t_bic().
     
     Args:
@@ -1423,71 +1580,13 @@ def calc_bf_t(t_stat, n1, n2=None, independent=True, r_scale=0.707):
         float: BF10 (exact Bayes Factor)
     """
     try:
-        # 1. Determine Effective Sample Size & DoF
-        if independent:
-            if n2 is None:
-                raise ValueError("n2 must be provided for independent t-test")
-            # Effective sample size for independent t-test
-            n_eff = (n1 * n2) / (n1 + n2)
-            nu = n1 + n2 - 2  # Degrees of freedom
-        else:
-            # Paired or one-sample
-            n_eff = n1
-            nu = n1 - 1
-            
-        t2 = t_stat**2
-        
-        # 2. Optimization: For very large t, return bound to avoid integration overflow
-        if t2 > 100:
-            return 1e6
-
-        # 3. Define the numerator integrand (Marginal Likelihood of H1)
-        # Equation 1 from Rouder et al. (2009)
-        def numerator_integrand(g):
-            term1 = (1 + n_eff * g * r_scale**2)**(-0.5)
-            term2 = (1 + t2 / ((1 + n_eff * g * r_scale**2) * nu))**(-(nu + 1) / 2)
-            term3 = (2 * math.pi)**(-0.5) * (g**(-1.5)) * math.exp(-1 / (2 * g))
-            return term1 * term2 * term3
-
-        # Integrate g from 0 to infinity
-        # Using scipy.integrate.quad is standard and accurate
-        # Suppress tolerance warnings and use relaxed tolerance for numerical stability
-        with warnings.catch_warnings():
-            # Suppress all integration-related warnings
-            warnings.filterwarnings('ignore', category=RuntimeWarning)
-            warnings.filterwarnings('ignore', category=IntegrationWarning)
-            warnings.filterwarnings('ignore', message='.*tolerance.*')
-            warnings.filterwarnings('ignore', message='.*Integration.*')
-            warnings.filterwarnings('ignore', message='.*The algorithm.*')
-            # Use relaxed tolerance (epsabs=1e-6, epsrel=1e-6) to avoid warnings
-            integral_val, _ = integrate.quad(
-                numerator_integrand, 
-                0, 
-                np.inf,
-                epsabs=1e-6,
-                epsrel=1e-6,
-                limit=100
-            )
-        
-        # 4. Denominator (Marginal Likelihood of H0)
-        # This is simply the t-distribution density under H0
-        denominator = (1 + t2 / nu)**(-(nu + 1) / 2)
-        
-        bf10 = integral_val / denominator
-        
-        # Handle edge cases
-        if math.isnan(bf10) or math.isinf(bf10):
-            # Fallback to BIC if integration fails
-            log_bf = (t2 - math.log(n_eff)) / 2
-            return math.exp(log_bf)
-            
-        return bf10
+        n_eff, nu = _t_test_dof(n1, n2, independent)
+        return _jzs_bf_t(float(t_stat), float(n_eff), float(nu), float(r_scale))
         
     except Exception as e:
         print(f"Error in exact JZS calc: {e}, falling back to BIC")
         # Fallback to BIC approximation if integration fails
         try:
-            n_eff = (n1 * n2) / (n1 + n2) if independent and n2 is not None else n1
             return calc_bf_t_bic(t_stat, n1, n2, independent)
         except:
             return 1.0
@@ -1610,11 +1709,68 @@ def chi2_contingency_safe(observed):
     except (ValueError, RuntimeWarning):
         return 0.0, 1.0, dof, None
 
+@functools.lru_cache(maxsize=_BF_CACHE_SIZE)
+def _jzs_bf_anova(f_stat, df1, df2, n_total, r_scale):
+    """Memoized JZS ANOVA BF10; see calc_bf_anova(). Raises on non-finite results."""
+    # Calculate R-squared from F-statistic
+    r2 = (df1 * f_stat) / (df1 * f_stat + df2)
+    
+    # Optimization: for very large F, return bound
+    if f_stat > 100:
+        return 1e6
+
+    # Rouder et al. (2012) JZS ANOVA integration
+    # p is the number of parameters (df1)
+    p = df1
+    N = n_total
+    
+    def integrand(g):
+        # Prior on g: Inverse-Gamma(1/2, r_scale^2 * N / 2)? 
+        # No, standard JZS uses r_scale^2 / 2.
+        # Term for marginal likelihood under H1 vs H0
+        # BF = (1+Ng)^((N-p-1)/2) * (1+Ng(1-R2))^(-(N-1)/2)
+        
+        log_term = ((N - p - 1) / 2.0) * math.log(1 + N * g) - ((N - 1) / 2.0) * math.log(1 + N * g * (1 - r2))
+        
+        # Prior part (Inverse-Gamma density)
+        # shape = 0.5, scale = r_scale^2 / 2
+        log_prior = 0.5 * math.log(r_scale**2 / 2.0) - special.gammaln(0.5) - 1.5 * math.log(g) - (r_scale**2 / (2.0 * g))
+        
+        return math.exp(log_term + log_prior)
+
+    # Integrate g from 0 to infinity
+    # Suppress tolerance warnings and use relaxed tolerance for numerical stability
+    with warnings.catch_warnings():
+        # Suppress all integration-related warnings
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+        warnings.filterwarnings('ignore', category=IntegrationWarning)
+        warnings.filterwarnings('ignore', message='.*tolerance.*')
+        warnings.filterwarnings('ignore', message='.*Integration.*')
+        warnings.filterwarnings('ignore', message='.*The algorithm.*')
+        # Use relaxed tolerance (epsabs=1e-6, epsrel=1e-6) to avoid warnings
+        bf10, _ = integrate.quad(
+            integrand, 
+            0, 
+            np.inf,
+            epsabs=1e-6,
+            epsrel=1e-6,
+            limit=100
+        )
+    
+    if math.isnan(bf10) or math.isinf(bf10):
+        raise ValueError("Integration resulted in non-finite value")
+        
+    return bf10
+
+
 def calc_bf_anova(f_stat, df1, df2, n_total, r_scale=0.5):
     """
     Calculate JZS Bayes Factor (BF10) for ANOVA F-test using exact numerical integration.
     Ref: Rouder et al. (2012). Default Bayes Factors for ANOVA Designs.
     
+    Results are memoized on (F, df1, df2, N, r_scale); calc_bf_anova_array()
+    evaluates many F statistics with shared degrees of freedom at once.
+    
     Args:
         f_stat: F-statistic
         df1: Numerator degrees of freedom (number of groups - 1)
@@ -1626,55 +1782,7 @@ def calc_bf_anova(f_stat, df1, df2, n_total, r_scale=0.5):
         float: BF10 (exact Bayes Factor)
     """
     try:
-        # Calculate R-squared from F-statistic
-        r2 = (df1 * f_stat) / (df1 * f_stat + df2)
-        
-        # Optimization: for very large F, return bound
-        if f_stat > 100:
-            return 1e6
-
-        # Rouder et al. (2012) JZS ANOVA integration
-        # p is the number of parameters (df1)
-        p = df1
-        N = n_total
-        
-        def integrand(g):
-            # Prior on g: Inverse-Gamma(1/2, r_scale^2 * N / 2)? 
-            # No, standard JZS uses r_scale^2 / 2.
-            # Term for marginal likelihood under H1 vs H0
-            # BF = (1+Ng)^((N-p-1)/2) * (1+Ng(1-R2))^(-(N-1)/2)
-            
-            log_term = ((N - p - 1) / 2.0) * math.log(1 + N * g) - ((N - 1) / 2.0) * math.log(1 + N * g * (1 - r2))
-            
-            # Prior part (Inverse-Gamma density)
-            # shape = 0.5, scale = r_scale^2 / 2
-            log_prior = 0.5 * math.log(r_scale**2 / 2.0) - special.gammaln(0.5) - 1.5 * math.log(g) - (r_scale**2 / (2.0 * g))
-            
-            return math.exp(log_term + log_prior)
-
-        # Integrate g from 0 to infinity
-        # Suppress tolerance warnings and use relaxed tolerance for numerical stability
-        with warnings.catch_warnings():
-            # Suppress all integration-related warnings
-            warnings.filterwarnings('ignore', category=RuntimeWarning)
-            warnings.filterwarnings('ignore', category=IntegrationWarning)
-            warnings.filterwarnings('ignore', message='.*tolerance.*')
-            warnings.filterwarnings('ignore', message='.*Integration.*')
-            warnings.filterwarnings('ignore', message='.*The algorithm.*')
-            # Use relaxed tolerance (epsabs=1e-6, epsrel=1e-6) to avoid warnings
-            bf10, _ = integrate.quad(
-                integrand, 
-                0, 
-                np.inf,
-                epsabs=1e-6,
-                epsrel=1e-6,
-                limit=100
-            )
-        
-        if math.isnan(bf10) or math.isinf(bf10):
-            raise ValueError("Integration resulted in non-finite value")
-            
-        return bf10
+        return _jzs_bf_anova(float(f_stat), float(df1), float(df2), float(n_total), float(r_scale))
         
     except Exception as e:
         # Fallback to BIC approximation
@@ -2043,6 +2151,195 @@ def calc_bf_vsb(p_value):
     bf = 1 / (-math.e * p_value * math.log(p_value))
     return bf
 
+# -----------------------------------------------------------------------------
+# Vectorized JZS Bayes Factor Engine
+# -----------------------------------------------------------------------------
+
+# The JZS integrals over g in (0, inf) are evaluated as a trapezoid rule in
+# u = ln(g). In log space both integrands are smooth and decay at least
+# exponentially at either end, so a fixed grid converges spectrally: on these
+# nodes the result agrees with the adaptive quad() calls in calc_bf_t() /
+# calc_bf_anova() to ~1e-5 relative (the tolerance quad() itself is run at).
+_JZS_LOG_G_STEP = 0.1
+_JZS_LOG_G = np.arange(-20.0, 45.0 + _JZS_LOG_G_STEP / 2, _JZS_LOG_G_STEP)
+_JZS_LOG_WEIGHTS = np.log(np.r_[0.5, np.ones(len(_JZS_LOG_G) - 2), 0.5] * _JZS_LOG_G_STEP)
+
+# Upper bound on (statistics x quadrature nodes) evaluated at once
+_JZS_MAX_CELLS = 4_000_000
+
+
+def _jzs_chunks(n):
+    step = max(1, _JZS_MAX_CELLS // len(_JZS_LOG_G))
+    return (slice(start, start + step) for start in range(0, n, step))
+
+
+def _jzs_log_bf_t_vec(t, n_eff, nu, r_scale):
+    """ln BF10 of the JZS t-test for a 1-D array of finite t values."""
+    u = _JZS_LOG_G
+    g = np.exp(u)
+    a = 1.0 + n_eff * g * r_scale**2
+    # ln of (numerator integrand * g), the g factor being the Jacobian of u = ln g
+    base = -0.5 * np.log(a) - 0.5 * math.log(2 * math.pi) - 0.5 * u - 1.0 / (2.0 * g) + _JZS_LOG_WEIGHTS
+    out = np.empty(len(t))
+    for chunk in _jzs_chunks(len(t)):
+        t2 = t[chunk, None] ** 2
+        log_integrand = base - (nu + 1) / 2.0 * np.log1p(t2 / (a * nu))
+        out[chunk] = special.logsumexp(log_integrand, axis=1) + (nu + 1) / 2.0 * np.log1p(t2[:, 0] / nu)
+    return out
+
+
+def _jzs_log_bf_anova_vec(f, df1, df2, n_total, r_scale):
+    """ln BF10 of the JZS ANOVA for a 1-D array of finite F values."""
+    u = _JZS_LOG_G
+    g = np.exp(u)
+    N = n_total
+    base = (
+        ((N - df1 - 1) / 2.0) * np.log1p(N * g)
+        + 0.5 * math.log(r_scale**2 / 2.0) - special.gammaln(0.5) - 0.5 * u - r_scale**2 / (2.0 * g)
+        + _JZS_LOG_WEIGHTS
+    )
+    out = np.empty(len(f))
+    for chunk in _jzs_chunks(len(f)):
+        r2 = (df1 * f[chunk, None]) / (df1 * f[chunk, None] + df2)
+        out[chunk] = special.logsumexp(base - ((N - 1) / 2.0) * np.log1p(N * g * (1 - r2)), axis=1)
+    return out
+
+
+class JZSBayesFactorGrid:
+    """
+    Precomputed bicubic interpolation table of ln BF10 for JZS t-tests.
+    
+    The table spans t^2 in [0, 100] (larger |t| already saturate at 1e6) and
+    log-spaced n_eff within ``n_eff_range`` for one design family:
+    
+    - ``independent=False``: one-sample / paired tests, nu = n_eff - 1
+    - ``independent=True``: balanced two-sample tests (n1 == n2), nu = 4 * n_eff - 2
+    
+    Designs off that curve (e.g. unbalanced groups), outside the n_eff range, or
+    with another r_scale are not covered and calc_bf_t_array() falls back to
+    quadrature for them.
+    
+    Error bound: after building, ln BF10 is recomputed by quadrature at the
+    centre of every grid cell and the worst absolute deviation is stored in
+    ``max_log_error``, so a BF10 read from the grid is within a factor of
+    exp(max_log_error) of the quadrature value. With the default resolution
+    this is about 1e-3 (0.1% relative) for one-sample designs, reached only
+    at n_eff close to 2, and below 1e-4 for n_eff >= 5 and for balanced
+    two-sample designs.
+    
+    Args:
+        independent: Design family (see above)
+        r_scale: Scale parameter for Cauchy prior
+        n_eff_range: (min, max) effective sample size covered
+        n_t2: Number of grid points along t^2
+        n_n_eff: Number of grid points along ln(n_eff)
+    """
+
+    def __init__(self, independent=False, r_scale=0.707, n_eff_range=(2, 10000), n_t2=201, n_n_eff=64):
+        self.independent = independent
+        self.r_scale = float(r_scale)
+        self.n_eff_range = (float(n_eff_range[0]), float(n_eff_range[1]))
+
+        t2_nodes = np.linspace(0.0, 100.0, n_t2)
+        log_n_nodes = np.linspace(math.log(self.n_eff_range[0]), math.log(self.n_eff_range[1]), n_n_eff)
+        self._spline = interpolate.RectBivariateSpline(
+            t2_nodes, log_n_nodes, self._exact_table(t2_nodes, log_n_nodes)
+        )
+
+        t2_mid = (t2_nodes[:-1] + t2_nodes[1:]) / 2
+        log_n_mid = (log_n_nodes[:-1] + log_n_nodes[1:]) / 2
+        interpolated = self._spline(t2_mid, log_n_mid)
+        self.max_log_error = float(np.max(np.abs(interpolated - self._exact_table(t2_mid, log_n_mid))))
+
+    def _nu(self, n_eff):
+        return 4.0 * n_eff - 2.0 if self.independent else n_eff - 1.0
+
+    def _exact_table(self, t2_nodes, log_n_nodes):
+        t = np.sqrt(t2_nodes)
+        columns = []
+        for log_n in log_n_nodes:
+            n_eff = math.exp(log_n)
+            columns.append(_jzs_log_bf_t_vec(t, n_eff, self._nu(n_eff), self.r_scale))
+        return np.stack(columns, axis=1)
+
+    def covers(self, n_eff, nu, r_scale):
+        """True if (n_eff, nu, r_scale) lies on this grid's design curve and range."""
+        return (
+            math.isclose(r_scale, self.r_scale)
+            and self.n_eff_range[0] <= n_eff <= self.n_eff_range[1]
+            and math.isclose(nu, self._nu(n_eff), rel_tol=1e-9, abs_tol=1e-9)
+        )
+
+    def log_bf10(self, t, n_eff):
+        """Interpolated ln BF10 for finite t values with t^2 <= 100."""
+        t2 = np.asarray(t, dtype=float) ** 2
+        return self._spline.ev(t2, np.full(t2.shape, math.log(n_eff)))
+
+
+@functools.lru_cache(maxsize=8)
+def jzs_bf_grid(independent=False, r_scale=0.707):
+    """Shared JZSBayesFactorGrid with default resolution (built once per process)."""
+    return JZSBayesFactorGrid(independent=independent, r_scale=r_scale)
+
+
+def calc_bf_t_array(t_stats, n1, n2=None, independent=True, r_scale=0.707, grid=None):
+    """
+    Vectorized calc_bf_t() for many t statistics sharing one design.
+    
+    All t values are integrated together on a fixed log-spaced quadrature grid,
+    so a bootstrap distribution of t statistics costs one numpy pass instead of
+    one quad() call per resample. Matches calc_bf_t() to ~1e-5 relative,
+    including the 1e6 cap for t^2 > 100; NaN t values give NaN.
+    
+    Args:
+        t_stats: Array-like of t-statistics
+        n1: Sample size of group 1
+        n2: Sample size of group 2 (if independent)
+        independent: True for independent samples, False for paired/one-sample
+        r_scale: Scale parameter for Cauchy prior (default: 0.707, standard JZS)
+        grid: Optional JZSBayesFactorGrid (e.g. jzs_bf_grid()); used when it
+            covers this design, otherwise ignored
+        
+    Returns:
+        np.ndarray: BF10 values with the shape of ``t_stats``
+    """
+    t = np.asarray(t_stats, dtype=float)
+    n_eff, nu = _t_test_dof(n1, n2, independent)
+    out = np.where(np.isnan(t), np.nan, 1e6)
+    mask = np.isfinite(t) & (t**2 <= 100)
+    if mask.any():
+        values = t[mask]
+        if grid is not None and grid.covers(n_eff, nu, r_scale):
+            log_bf = grid.log_bf10(values, n_eff)
+        else:
+            log_bf = _jzs_log_bf_t_vec(values, float(n_eff), float(nu), float(r_scale))
+        out[mask] = np.exp(log_bf)
+    return out
+
+
+def calc_bf_anova_array(f_stats, df1, df2, n_total, r_scale=0.5):
+    """
+    Vectorized calc_bf_anova() for many F statistics sharing one design.
+    
+    Args:
+        f_stats: Array-like of F-statistics
+        df1: Numerator degrees of freedom (number of groups - 1)
+        df2: Denominator degrees of freedom (N - number of groups)
+        n_total: Total sample size
+        r_scale: Scale parameter for Cauchy prior (default 0.5 for ANOVA)
+        
+    Returns:
+        np.ndarray: BF10 values with the shape of ``f_stats`` (1e6 for F > 100, NaN for NaN)
+    """
+    f = np.asarray(f_stats, dtype=float)
+    out = np.where(np.isnan(f), np.nan, 1e6)
+    mask = np.isfinite(f) & (f <= 100)
+    if mask.any():
+        out[mask] = np.exp(
+            _jzs_log_bf_anova_vec(f[mask], float(df1), float(df2), float(n_total), float(r_scale))
+        )
+    return out
+
 # -----------------------------------------------------------------------------
 # Helpers for Human Ground Truth
 # -----------------------------------------------------------------------------
@@ -2076,6 +2373,11 @@ def bootstrap_metric(data_pool, metric_func, n_bootstrap=1000, random_seed=None)
         
     Returns:
         tuple: (mean, standard_error) of the bootstrap distribution
+    
+    Note:
+        This is the general fallback for arbitrary metrics. For the common
+        statistics (means, proportions, t, r, chi-square) on participant-level
+        arrays, bootstrap_statistic() / bootstrap_se() are orders of magnitude faster.
     """
     if random_seed is not None:
         np.random.seed(random_seed)
@@ -2117,6 +2419,181 @@ def bootstrap_metric(data_pool, metric_func, n_bootstrap=1000, random_seed=None)
     return bootstrap_mean, bootstrap_se
 
 
+# Upper bound on resample indices materialized at once ((rows of the index matrix) x n)
+_BOOTSTRAP_MAX_CELLS = 4_000_000
+
+
+def bootstrap_indices(n, n_bootstrap=1000, rng=None):
+    """
+    Draw all bootstrap resamples at once as an (n_bootstrap, n) index matrix.
+    
+    Args:
+        n: Number of observations to resample
+        n_bootstrap: Number of bootstrap iterations
+        rng: np.random.Generator, or a seed / None passed to np.random.default_rng
+        
+    Returns:
+        np.ndarray of shape (n_bootstrap, n) with indices in [0, n)
+    """
+    rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    return rng.integers(0, n, size=(n_bootstrap, n))
+
+
+def _boot_mean(x):
+    return x.mean(axis=1)
+
+
+def _boot_t_one_sample(x, mu0=0.0):
+    n = x.shape[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (x.mean(axis=1) - mu0) / (x.std(axis=1, ddof=1) / np.sqrt(n))
+
+
+def _boot_mean_diff(x, y):
+    return x.mean(axis=1) - y.mean(axis=1)
+
+
+def _boot_t_independent(x, y, equal_var=True):
+    n1, n2 = x.shape[1], y.shape[1]
+    v1, v2 = x.var(axis=1, ddof=1), y.var(axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if equal_var:
+            pooled = ((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2)
+            se = np.sqrt(pooled * (1.0 / n1 + 1.0 / n2))
+        else:
+            se = np.sqrt(v1 / n1 + v2 / n2)
+        return (x.mean(axis=1) - y.mean(axis=1)) / se
+
+
+def _boot_cohens_d(x, y):
+    n1, n2 = x.shape[1], y.shape[1]
+    pooled = ((n1 - 1) * x.var(axis=1, ddof=1) + (n2 - 1) * y.var(axis=1, ddof=1)) / (n1 + n2 - 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (x.mean(axis=1) - y.mean(axis=1)) / np.sqrt(pooled)
+
+
+def _boot_t_paired(x, y):
+    return _boot_t_one_sample(x - y)
+
+
+def _boot_pearson_r(x, y):
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (xc * yc).sum(axis=1) / np.sqrt((xc ** 2).sum(axis=1) * (yc ** 2).sum(axis=1))
+
+
+def _boot_chi2(cells, n_rows, n_cols):
+    """Pearson chi-square of a contingency table per bootstrap row; ``cells`` are row*n_cols+col codes."""
+    n_boot, n = cells.shape
+    k = n_rows * n_cols
+    flat = (cells + (np.arange(n_boot) * k)[:, None]).ravel()
+    observed = np.bincount(flat, minlength=n_boot * k).reshape(n_boot, n_rows, n_cols).astype(float)
+    expected = observed.sum(axis=2, keepdims=True) * observed.sum(axis=1, keepdims=True) / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0)
+    return terms.sum(axis=(1, 2))
+
+
+# name -> (function on resampled matrices, sampling design)
+#   "single": one array; "paired": arrays resampled jointly; "two_sample": each group resampled independently
+BOOTSTRAP_STATISTICS = {
+    "mean": (_boot_mean, "single"),
+    "proportion": (_boot_mean, "single"),
+    "t_one_sample": (_boot_t_one_sample, "single"),
+    "mean_diff": (_boot_mean_diff, "two_sample"),
+    "proportion_diff": (_boot_mean_diff, "two_sample"),
+    "t_independent": (_boot_t_independent, "two_sample"),
+    "cohens_d": (_boot_cohens_d, "two_sample"),
+    "t_paired": (_boot_t_paired, "paired"),
+    "pearson_r": (_boot_pearson_r, "paired"),
+    "chi2": (_boot_chi2, "paired"),
+}
+
+
+def bootstrap_statistic(statistic, *arrays, n_bootstrap=1000, random_seed=None, **kwargs):
+    """
+    Vectorized (columnar) bootstrap distribution of a common statistic.
+    
+    All resamples are drawn as one (n_bootstrap, n) index matrix from a seeded
+    np.random.Generator and the statistic is evaluated across the whole matrix
+    with NumPy reductions - no per-iteration Python work.
+    
+    Args:
+        statistic: One of BOOTSTRAP_STATISTICS:
+            "mean", "proportion" (0/1 array), "t_one_sample" (kwarg mu0): one array;
+            "mean_diff", "proportion_diff", "t_independent" (kwarg equal_var), "cohens_d":
+                two groups, each resampled independently;
+            "t_paired", "pearson_r": two paired arrays resampled jointly;
+            "chi2": two paired categorical label arrays (rows, cols) of a contingency table.
+        *arrays: Participant-level arrays (NaN observations are dropped;
+                 for paired designs, pairs with any NaN are dropped)
+        n_bootstrap: Number of bootstrap iterations
+        random_seed: Seed (or np.random.Generator) for reproducibility
+        **kwargs: Extra statistic options (mu0, equal_var)
+        
+    Returns:
+        np.ndarray of shape (n_bootstrap,) (may contain NaN/inf for degenerate resamples)
+    """
+    if statistic not in BOOTSTRAP_STATISTICS:
+        raise ValueError(f"Unknown bootstrap statistic '{statistic}'. Available: {sorted(BOOTSTRAP_STATISTICS)}")
+    func, design = BOOTSTRAP_STATISTICS[statistic]
+    expected_arrays = 1 if design == "single" else 2
+    if len(arrays) != expected_arrays:
+        raise ValueError(f"Statistic '{statistic}' needs {expected_arrays} array(s), got {len(arrays)}")
+    rng = random_seed if isinstance(random_seed, np.random.Generator) else np.random.default_rng(random_seed)
+    
+    if statistic == "chi2":
+        rows, row_codes = np.unique(np.asarray(arrays[0]), return_inverse=True)
+        cols, col_codes = np.unique(np.asarray(arrays[1]), return_inverse=True)
+        if len(row_codes) != len(col_codes):
+            raise ValueError("chi2 needs two label arrays of equal length")
+        columns = [row_codes * len(cols) + col_codes]
+        kwargs = {"n_rows": len(rows), "n_cols": len(cols)}
+    elif design == "paired":
+        x, y = (np.asarray(a, dtype=float) for a in arrays)
+        if x.shape != y.shape:
+            raise ValueError(f"Statistic '{statistic}' needs paired arrays of equal length")
+        keep = ~(np.isnan(x) | np.isnan(y))
+        columns = [x[keep], y[keep]]
+    else:
+        columns = [np.asarray(a, dtype=float) for a in arrays]
+        columns = [c[~np.isnan(c)] for c in columns]
+    
+    if any(len(c) == 0 for c in columns):
+        return np.full(n_bootstrap, np.nan)
+    
+    # Chunk the iterations so the index matrix stays bounded for large n
+    n_max = max(len(c) for c in columns)
+    chunk = max(1, min(n_bootstrap, _BOOTSTRAP_MAX_CELLS // n_max))
+    out = np.empty(n_bootstrap)
+    for start in range(0, n_bootstrap, chunk):
+        rows_in_chunk = min(chunk, n_bootstrap - start)
+        if design == "two_sample":
+            resampled = [c[bootstrap_indices(len(c), rows_in_chunk, rng)] for c in columns]
+        else:
+            idx = bootstrap_indices(len(columns[0]), rows_in_chunk, rng)
+            resampled = [c[idx] for c in columns]
+        out[start:start + rows_in_chunk] = func(*resampled, **kwargs)
+    return out
+
+
+def bootstrap_se(statistic, *arrays, n_bootstrap=1000, random_seed=None, **kwargs):
+    """
+    Columnar counterpart of bootstrap_metric(): (mean, standard_error) of the
+    bootstrap distribution of ``statistic``, ignoring NaN/inf resamples.
+    
+    See bootstrap_statistic() for the supported statistics and arguments.
+    """
+    values = bootstrap_statistic(statistic, *arrays, n_bootstrap=n_bootstrap, random_seed=random_seed, **kwargs)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return 0.0, 0.0
+    if values.size == 1:
+        return float(values[0]), 0.0
+    return float(values.mean()), float(values.std(ddof=1))
+
+
 # -----------------------------------------------------------------------------
 # Frequentist Replication Consistency Metric
 # -----------------------------------------------------------------------------
@@ -3298,9 +3775,92 @@ def weighted_ccc(x: list, y: list, w: list) -> Optional[float]:
     return float(ccc)
 
 
+def weighted_stats_by_group(
+    x: Any,
+    y: Any,
+    w: Any,
+    codes: Any,
+    n_groups: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Weighted CCC, Pearson r and regression for many groups in one pass.
+
+    Batched counterpart of weighted_ccc, weighted_corr and weighted_linreg:
+    point i belongs to group codes[i], and every weighted sum is a segment
+    reduction (np.bincount), so all groups cost a few vector operations
+    instead of a Python loop per group. Filtering, zero-variance rules and
+    clamping match the scalar functions, which return the same values for a
+    single group.
+
+    Args:
+        x: Array of x values (e.g., human effect sizes); None/NaN/inf points are dropped
+        y: Array of y values (e.g., agent effect sizes)
+        w: Array of weights; points with w <= 0 are dropped
+        codes: Integer group code per point in [0, n_groups); negative codes are dropped
+        n_groups: Number of groups (default: max(codes) + 1)
+
+    Returns:
+        dict of arrays of length n_groups: 'n' (valid points), 'ccc', 'r',
+        'slope', 'intercept'. Statistics are NaN where the scalar function
+        returns None (fewer than 2 valid points, or no x variance for the
+        regression).
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    w = np.asarray(w, dtype=float).ravel()
+    codes = np.asarray(codes, dtype=np.intp).ravel()
+    if not (len(x) == len(y) == len(w) == len(codes)):
+        raise ValueError("x, y, w and codes must have the same length")
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(w) & (w > 0) & (codes >= 0) & (codes < n_groups)
+    x, y, w, codes = x[valid], y[valid], w[valid], codes[valid]
+
+    n = np.bincount(codes, minlength=n_groups)
+    total_weight = np.bincount(codes, weights=w, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu_x = np.bincount(codes, weights=x * w, minlength=n_groups) / total_weight
+        mu_y = np.bincount(codes, weights=y * w, minlength=n_groups) / total_weight
+        dx = x - mu_x[codes]
+        dy = y - mu_y[codes]
+        cov_xy = np.bincount(codes, weights=w * dx * dy, minlength=n_groups)
+        var_x = np.bincount(codes, weights=w * dx ** 2, minlength=n_groups)
+        var_y = np.bincount(codes, weights=w * dy ** 2, minlength=n_groups)
+
+        no_var_x = var_x <= 0
+        no_var_y = var_y <= 0
+        r = np.where(no_var_x | no_var_y, 0.0, np.clip(cov_xy / np.sqrt(var_x * var_y), -1.0, 1.0))
+
+        slope = np.where(no_var_x, np.nan, cov_xy / var_x)
+        intercept = mu_y - slope * mu_x
+
+        denominator = var_x + var_y + (mu_x - mu_y) ** 2
+        ccc = np.where(denominator <= 0, 0.0, np.clip((2.0 * cov_xy) / denominator, -1.0, 1.0))
+        ccc = np.where(no_var_x | no_var_y, 0.0, ccc)
+        ccc = np.where(no_var_x & no_var_y, 1.0, ccc)
+
+    defined = (n >= 2) & (total_weight > 0)
+    return {
+        'n': n,
+        'ccc': np.where(defined, ccc, np.nan),
+        'r': np.where(defined, r, np.nan),
+        'slope': np.where(defined, slope, np.nan),
+        'intercept': np.where(defined, intercept, np.nan),
+    }
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    """float(value), or None for NaN (undefined statistic)."""
+    return None if np.isnan(value) else float(value)
+
+
 def compute_ecs_corr(
     test_results: list,
-    study_groups: Optional[Dict[str, List[str]]] = None
+    study_groups: Optional[Dict[str, List[str]]] = None,
+    n_bootstrap: int = 0,
+    ci: float = 0.95,
+    seed: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Compute ECS (Effect Consistency Score) at multiple levels using both CCC and Pearson correlation.
@@ -3314,6 +3874,10 @@ def compute_ecs_corr(
     Args:
         test_results: List of test result dicts (must have 'agent_effect_d' and 'human_effect_d')
         study_groups: Optional dict mapping domain names to study IDs (e.g., {"Cognition": ["study_001", ...]})
+        n_bootstrap: Number of bootstrap replicates for ECS confidence intervals (0 = none).
+            Tests are resampled within each study; all replicates are computed in one batch.
+        ci: Confidence level of the percentile intervals
+        seed: Random seed for the bootstrap
         
     Returns:
         dict: {
@@ -3333,9 +3897,17 @@ def compute_ecs_corr(
             'caricature_per_study': Dict[str, {'a': float, 'b': float}],
             
             'n_tests_overall': int,
-            'n_tests_per_study': Dict[str, int]
+            'n_tests_per_study': Dict[str, int],
+            
+            # Only with n_bootstrap > 0: [low, high] CCC intervals (None where ECS is undefined)
+            'n_bootstrap': int,
+            'ecs_overall_ci': List[float],
+            'ecs_domain_ci': Dict[str, List[float]],
+            'ecs_per_study_ci': Dict[str, List[float]]
         }
     """
+    if n_bootstrap > 0 and not 0.0 < ci < 1.0:
+        raise ValueError(f"ci must be between 0 and 1, got {ci}")
     result = {
         # Main ECS (CCC)
         'ecs_overall': None,
@@ -3367,20 +3939,6 @@ def compute_ecs_corr(
         if study_id:
             study_tests[study_id].append(test)
     
-    # Collect all valid test points for overall correlation
-    all_x = []  # human_effect_d
-    all_y = []  # agent_effect_d
-    all_w = []  # weights (1/N_tests per study)
-    
-    # Also collect per-study and per-domain points
-    study_x = defaultdict(list)
-    study_y = defaultdict(list)
-    study_w = defaultdict(list)
-    
-    domain_x = defaultdict(list)
-    domain_y = defaultdict(list)
-    domain_w = defaultdict(list)
-    
     # First pass: count findings and tests per study, collect VALID points
     # Two-level weighting: Study → Finding → Test
     # Each finding within a study gets equal weight, then each test within a finding gets equal weight
@@ -3418,6 +3976,15 @@ def compute_ecs_corr(
     
     # Second pass: compute correct two-level weights
     # weight = (1 / n_findings_in_study) × (1 / n_tests_in_finding)
+    # Points are laid out study by study in flat arrays with a study code and a
+    # domain code each, so every level is one batched call to weighted_stats_by_group.
+    domain_names = list(study_groups.keys()) if study_groups else []
+    study_ids = []
+    all_x = []  # human_effect_d
+    all_y = []  # agent_effect_d
+    all_w = []  # two-level weights
+    study_codes = []
+    domain_codes = []
     for study_id, points in study_valid_points_with_finding.items():
         n_valid = len(points)
         result['n_tests_per_study'][study_id] = n_valid  # Store valid count for reporting
@@ -3433,92 +4000,142 @@ def compute_ecs_corr(
         for finding_id, tests in study_finding_tests[study_id].items():
             finding_total_tests[finding_id] = len(tests)
         
+        # Domain of the study: first group that lists it (-1 = none)
+        domain_code = -1
+        for i, domain in enumerate(domain_names):
+            if study_id in study_groups[domain]:
+                domain_code = i
+                break
+        
+        study_code = len(study_ids)
+        study_ids.append(study_id)
         for h_d, a_d, finding_id in points:
-            # Correct two-level weight:
-            # weight = (1 / n_findings) × (1 / n_tests_in_finding)
             n_tests_in_finding = finding_total_tests.get(finding_id, 1)
-            weight_per_test = (1.0 / n_findings) * (1.0 / n_tests_in_finding)
-            
-            # Overall
             all_x.append(h_d)
             all_y.append(a_d)
-            all_w.append(weight_per_test)
-            
-            # Per-study
-            study_x[study_id].append(h_d)
-            study_y[study_id].append(a_d)
-            study_w[study_id].append(1.0)  # Equal weight within study
-            
-            # Per-domain (if study_groups provided)
-            if study_groups:
-                for domain, study_list in study_groups.items():
-                    if study_id in study_list:
-                        domain_x[domain].append(h_d)
-                        domain_y[domain].append(a_d)
-                        domain_w[domain].append(weight_per_test)
-                        break
+            all_w.append((1.0 / n_findings) * (1.0 / n_tests_in_finding))
+            study_codes.append(study_code)
+            domain_codes.append(domain_code)
     
     result['n_tests_overall'] = len(all_x)
     
-    # Compute overall correlation and regression
+    x = np.asarray(all_x, dtype=float)
+    y = np.asarray(all_y, dtype=float)
+    w = np.asarray(all_w, dtype=float)
+    study_codes = np.asarray(study_codes, dtype=np.intp)
+    domain_codes = np.asarray(domain_codes, dtype=np.intp)
+    equal_w = np.ones_like(x)  # Equal weight within study
+    
+    overall = weighted_stats_by_group(x, y, w, np.zeros(len(x), dtype=np.intp), 1)
+    per_study = weighted_stats_by_group(x, y, equal_w, study_codes, len(study_ids))
+    per_domain = weighted_stats_by_group(x, y, w, domain_codes, len(domain_names))
+    
     # Require at least 3 data points for meaningful correlation (with 2 points, correlation is always perfect)
-    if len(all_x) >= 3:
-        # Compute CCC (main ECS metric)
-        ccc_overall = weighted_ccc(all_x, all_y, all_w)
-        result['ecs_overall'] = ccc_overall
-        
-        # Compute Pearson correlation (retained for figures/appendix)
-        r_overall = weighted_corr(all_x, all_y, all_w)
-        result['ecs_corr_overall'] = r_overall
-        
-        # Compute caricature regression (Pearson-based)
-        a_overall, b_overall = weighted_linreg(all_x, all_y, all_w)
-        result['caricature_overall'] = {'a': a_overall, 'b': b_overall}
+    def level_stats(stats: Dict[str, np.ndarray], g: Optional[int]) -> Tuple[Any, Any, Dict[str, Any]]:
+        if g is None or stats['n'][g] < 3:
+            return None, None, {'a': None, 'b': None}
+        return (
+            _nan_to_none(stats['ccc'][g]),
+            _nan_to_none(stats['r'][g]),
+            {'a': _nan_to_none(stats['slope'][g]), 'b': _nan_to_none(stats['intercept'][g])},
+        )
+    
+    # Overall: CCC (main ECS metric), Pearson r (retained for figures/appendix), caricature regression
+    if len(x) >= 3:
+        (result['ecs_overall'], result['ecs_corr_overall'],
+         result['caricature_overall']) = level_stats(overall, 0)
     
-    # Compute per-study correlation and regression
+    # Per study (< 3 tests: correlation undefined)
+    study_index = {sid: i for i, sid in enumerate(study_ids)}
     for study_id in study_tests.keys():
-        if len(study_x[study_id]) >= 3:
-            # Compute CCC (main ECS metric)
-            ccc_study = weighted_ccc(study_x[study_id], study_y[study_id], study_w[study_id])
-            result['ecs_per_study'][study_id] = ccc_study
-            
-            # Compute Pearson correlation (retained for figures/appendix)
-            r_study = weighted_corr(study_x[study_id], study_y[study_id], study_w[study_id])
-            result['ecs_corr_per_study'][study_id] = r_study
-            
-            # Compute caricature regression (Pearson-based)
-            a_study, b_study = weighted_linreg(study_x[study_id], study_y[study_id], study_w[study_id])
-            result['caricature_per_study'][study_id] = {'a': a_study, 'b': b_study}
-        else:
-            # Study has < 3 tests: correlation undefined (insufficient data)
-            result['ecs_per_study'][study_id] = None
-            result['ecs_corr_per_study'][study_id] = None
-            result['caricature_per_study'][study_id] = {'a': None, 'b': None}
-    
-    # Compute per-domain correlation and regression
-    if study_groups:
-        for domain in study_groups.keys():
-            if len(domain_x[domain]) >= 3:
-                # Compute CCC (main ECS metric)
-                ccc_domain = weighted_ccc(domain_x[domain], domain_y[domain], domain_w[domain])
-                result['ecs_domain'][domain] = ccc_domain
-                
-                # Compute Pearson correlation (retained for figures/appendix)
-                r_domain = weighted_corr(domain_x[domain], domain_y[domain], domain_w[domain])
-                result['ecs_corr_domain'][domain] = r_domain
-                
-                # Compute caricature regression (Pearson-based)
-                a_domain, b_domain = weighted_linreg(domain_x[domain], domain_y[domain], domain_w[domain])
-                result['caricature_domain'][domain] = {'a': a_domain, 'b': b_domain}
-            else:
-                # Domain has < 3 tests: correlation undefined (insufficient data)
-                result['ecs_domain'][domain] = None
-                result['ecs_corr_domain'][domain] = None
-                result['caricature_domain'][domain] = {'a': None, 'b': None}
+        (result['ecs_per_study'][study_id], result['ecs_corr_per_study'][study_id],
+         result['caricature_per_study'][study_id]) = level_stats(per_study, study_index.get(study_id))
+    
+    # Per domain (< 3 tests: correlation undefined)
+    for i, domain in enumerate(domain_names):
+        (result['ecs_domain'][domain], result['ecs_corr_domain'][domain],
+         result['caricature_domain'][domain]) = level_stats(per_domain, i)
+    
+    if n_bootstrap > 0:
+        result['n_bootstrap'] = n_bootstrap
+        result['ecs_overall_ci'] = None
+        result['ecs_per_study_ci'] = {study_id: None for study_id in study_tests.keys()}
+        result['ecs_domain_ci'] = {domain: None for domain in domain_names}
+        if len(x):
+            overall_ci, study_ci, domain_ci = _ecs_bootstrap_ci(
+                x, y, w, study_codes, domain_codes, len(study_ids), len(domain_names),
+                n_bootstrap, ci, seed
+            )
+            if result['ecs_overall'] is not None:
+                result['ecs_overall_ci'] = overall_ci
+            for study_id, i in study_index.items():
+                if result['ecs_per_study'][study_id] is not None:
+                    result['ecs_per_study_ci'][study_id] = study_ci[i]
+            for i, domain in enumerate(domain_names):
+                if result['ecs_domain'][domain] is not None:
+                    result['ecs_domain_ci'][domain] = domain_ci[i]
     
     return result
 
 
+def _ecs_bootstrap_ci(
+    x: np.ndarray,
+    y: np.ndarray,
+    w: np.ndarray,
+    study_codes: np.ndarray,
+    domain_codes: np.ndarray,
+    n_studies: int,
+    n_domains: int,
+    n_bootstrap: int,
+    ci: float,
+    seed: Optional[int]
+) -> Tuple[Optional[List[float]], List[Optional[List[float]]], List[Optional[List[float]]]]:
+    """
+    Percentile bootstrap CIs of the CCC-based ECS (overall, per study, per domain).
+
+    Tests are resampled with replacement within each study (points must be
+    contiguous per study, as compute_ecs_corr lays them out) and keep their
+    two-level weight. All replicates are evaluated together: replicate b,
+    group g becomes group code b * n_groups + g of one weighted_stats_by_group call.
+    """
+    rng = np.random.default_rng(seed)
+    n_points = len(x)
+    counts = np.bincount(study_codes, minlength=n_studies)
+    starts = np.cumsum(counts) - counts
+    point_counts = counts[study_codes]
+    idx = starts[study_codes] + (rng.random((n_bootstrap, n_points)) * point_counts).astype(np.intp)
+    idx = np.minimum(idx, (starts + counts - 1)[study_codes])  # guard against rounding up to the count
+    idx = idx.ravel()
+    xb, yb, wb = x[idx], y[idx], w[idx]
+    replicate = np.repeat(np.arange(n_bootstrap, dtype=np.intp), n_points)
+    # Resampling is stratified, so each point keeps its study (and domain) code
+    sb = np.tile(study_codes, n_bootstrap)
+    db = np.tile(domain_codes, n_bootstrap)
+    
+    overall = weighted_stats_by_group(xb, yb, wb, replicate, n_bootstrap)['ccc'][:, None]
+    per_study = weighted_stats_by_group(
+        xb, yb, np.ones_like(wb), replicate * n_studies + sb, n_bootstrap * n_studies
+    )['ccc'].reshape(n_bootstrap, n_studies)
+    per_domain = weighted_stats_by_group(
+        xb, yb, wb, np.where(db >= 0, replicate * n_domains + db, -1), n_bootstrap * n_domains
+    )['ccc'].reshape(n_bootstrap, n_domains)
+    
+    alpha = (1.0 - ci) / 2.0
+    
+    def intervals(replicates: np.ndarray) -> List[Optional[List[float]]]:
+        out = []
+        for column in replicates.T:
+            column = column[~np.isnan(column)]
+            if len(column) == 0:
+                out.append(None)
+            else:
+                lo, hi = np.quantile(column, [alpha, 1.0 - alpha])
+                out.append([float(lo), float(hi)])
+        return out
+    
+    return intervals(overall)[0], intervals(per_study), intervals(per_domain)
+
+
 def aggregate_study_pas(test_results: list) -> Tuple[float, float, dict]:
     """
     Aggregate PAS (raw and normalized) at study level.
@@ -163,68 +163,68 @@ class EvaluatorGenerator:
                 benchmark_file = run_dir / "full_benchmark.json"
                 if benchmark_file.exists():
                     try:
-                        with open(benchmark_file, 'r') as f:
-                            data = json.load(f)
-                            studies = data.get('studies', [])
+                        from src.utils.compact_store import load_benchmark
+                        data = load_benchmark(benchmark_file)
+                        studies = data.get('studies', [])
                             
-                            # Find this study in the results
-                            for study_result in studies:
-                                if study_result.get('study_id') == study_id:
-                                    individual_data = study_result.get('individual_data', [])
-                                    if individual_data:
-                                        # Collect samples that cover EACH sub_study_id.
-                                        # Pick ONE representative full response_text per sub-study.
-                                        samples_by_sub: Dict[str, Dict[str, Any]] = {}
-
-                                        # Collect ONE complete example per sub_study_id showing the FULL nested structure
-                                        samples_by_sub: Dict[str, Dict[str, Any]] = {}
-
-                                        for p in individual_data:
-                                            for r in p.get('responses', []):
-                                                trial_info = r.get('trial_info', {}) or {}
-                                                sub_id = trial_info.get('sub_study_id') or trial_info.get('sub_id') or "unknown"
-                                                txt = r.get('response_text', '') or ''
-                                                if not txt.strip():
-                                                    continue
-
-                                                if sub_id not in samples_by_sub:
-                                                    # Keep FULL nested structure - this is critical for the LLM to understand
-                                                    samples_by_sub[sub_id] = {
-                                                        "participant_id": p.get('participant_id'),
-                                                        "responses": [
-                                                            {
-                                                                "response_text": txt,
-                                                                "trial_info": {
-                                                                    "sub_study_id": trial_info.get('sub_study_id'),
-                                                                    "group_name": trial_info.get('group_name'),
-                                                                    "items": trial_info.get('items', [])[:3]  # Show first 3 items as example
-                                                                }
+                        # Find this study in the results
+                        for study_result in studies:
+                            if study_result.get('study_id') == study_id:
+                                individual_data = study_result.get('individual_data', [])
+                                if individual_data:
+                                    # Collect samples that cover EACH sub_study_id.
+                                    # Pick ONE representative full response_text per sub-study.
+                                    samples_by_sub: Dict[str, Dict[str, Any]] = {}
+
+                                    # Collect ONE complete example per sub_study_id showing the FULL nested structure
+                                    samples_by_sub: Dict[str, Dict[str, Any]] = {}
+
+                                    for p in individual_data:
+                                        for r in p.get('responses', []):
+                                            trial_info = r.get('trial_info', {}) or {}
+                                            sub_id = trial_info.get('sub_study_id') or trial_info.get('sub_id') or "unknown"
+                                            txt = r.get('response_text', '') or ''
+                                            if not txt.strip():
+                                                continue
+
+                                            if sub_id not in samples_by_sub:
+                                                # Keep FULL nested structure - this is critical for the LLM to understand
+                                                samples_by_sub[sub_id] = {
+                                                    "participant_id": p.get('participant_id'),
+                                                    "responses": [
+                                                        {
+                                                            "response_text": txt,
+                                                            "trial_info": {
+                                                                "sub_study_id": trial_info.get('sub_study_id'),
+                                                                "group_name": trial_info.get('group_name'),
+                                                                "items": trial_info.get('items', [])[:3]  # Show first 3 items as example
                                                             }
-                                                        ]
-                                                    }
-                                                else:
-                                                    # If we already have one, prefer one that looks more "complete" 
-                                                    existing = samples_by_sub[sub_id]
-                                                    existing_txt = existing['responses'][0]['response_text']
-                                                    if txt.count('\n') > existing_txt.count('\n') or \
-                                                       txt.count('ITEM_ID:') > existing_txt.count('ITEM_ID:'):
-                                                        samples_by_sub[sub_id]['responses'][0]['response_text'] = txt
-                                                        samples_by_sub[sub_id]['responses'][0]['trial_info'] = {
-                                                            "sub_study_id": trial_info.get('sub_study_id'),
-                                                            "group_name": trial_info.get('group_name'),
-                                                            "items": trial_info.get('items', [])[:3]
                                                         }
+                                                    ]
+                                                }
+                                            else:
+                                                # If we already have one, prefer one that looks more "complete" 
+                                                existing = samples_by_sub[sub_id]
+                                                existing_txt = existing['responses'][0]['response_text']
+                                                if txt.count('\n') > existing_txt.count('\n') or \
+                                                   txt.count('ITEM_ID:') > existing_txt.count('ITEM_ID:'):
+                                                    samples_by_sub[sub_id]['responses'][0]['response_text'] = txt
+                                                    samples_by_sub[sub_id]['responses'][0]['trial_info'] = {
+                                                        "sub_study_id": trial_info.get('sub_study_id'),
+                                                        "group_name": trial_info.get('group_name'),
+                                                        "items": trial_info.get('items', [])[:3]
+                                                    }
 
-                                        flattened = list(samples_by_sub.values())
-                                        if flattened:
-                                            return (
-                                                f"**ACTUAL COMPLETE DATA STRUCTURE from benchmark run ({run_dir.name}) "
-                                                f"(one representative participant per sub_study_id, showing FULL nesting)**:\n"
-                                                f"```json\n{json.dumps(flattened, indent=2)}\n```\n\n"
-                                                f"**CRITICAL**: Notice that `trial_info` is nested INSIDE each `response` object, "
-                                                f"which is nested INSIDE each `participant` object. You MUST iterate as: "
-                                                f"`for participant in results['individual_data']: for response in participant['responses']: ...`"
-                                            )
+                                    flattened = list(samples_by_sub.values())
+                                    if flattened:
+                                        return (
+                                            f"**ACTUAL COMPLETE DATA STRUCTURE from benchmark run ({run_dir.name}) "
+                                            f"(one representative participant per sub_study_id, showing FULL nesting)**:\n"
+                                            f"```json\n{json.dumps(flattened, indent=2)}\n```\n\n"
+                                            f"**CRITICAL**: Notice that `trial_info` is nested INSIDE each `response` object, "
+                                            f"which is nested INSIDE each `participant` object. You MUST iterate as: "
+                                            f"`for participant in results['individual_data']: for response in participant['responses']: ...`"
+                                        )
                     except Exception as e:
                         continue
         
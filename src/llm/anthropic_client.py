@@ -96,12 +96,9 @@ class AnthropicClient(BaseLLMClient):
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
     ) -> str:
-        try:
-            from anthropic import Anthropic
-        except ImportError:
-            raise ImportError("anthropic package required. Install with: pip install anthropic")
+        from src.llm.client_pool import get_anthropic_client
 
-        client = Anthropic(api_key=self.api_key)
+        client = get_anthropic_client(self.api_key)
         system_text, content_blocks = _messages_to_anthropic(messages, system=system)
         if not content_blocks:
             raise ValueError("At least one user content block required")
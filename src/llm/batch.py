@@ -0,0 +1,246 @@
+"""
+Provider Batch API runners (OpenAI ``/v1/batches`` and Anthropic Message Batches).
+
+A runner takes ``(custom_id, request_body)`` pairs, writes them to a JSONL batch
+file, submits the job, polls until it finishes and returns per-request results:
+
+    {custom_id: {"body": <response dict or None>, "error": <message or None>}}
+
+``body`` is a chat.completions response (OpenAI) or a Message (Anthropic) as a
+plain dict, ready to be validated back into the SDK type by the caller.
+
+Batch jobs can take hours, so a small state file next to the JSONL records the
+submitted batch id together with a hash of the input; rerunning with identical
+input re-attaches to the running job instead of paying for it twice.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.core.exceptions import BatchJobError
+
+logger = logging.getLogger(__name__)
+
+BatchRequest = Tuple[str, Dict[str, Any]]
+BatchResults = Dict[str, Dict[str, Any]]
+
+OPENAI_CHAT_ENDPOINT = "/v1/chat/completions"
+
+
+def write_batch_jsonl(lines: List[Dict[str, Any]], path: Optional[Union[str, Path]] = None) -> bytes:
+    """Serialize batch lines to JSONL bytes, also writing them to ``path`` if given."""
+    data = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+    if path is not None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return data
+
+
+def _to_dict(obj: Any) -> Any:
+    if obj is None or isinstance(obj, dict):
+        return obj
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return obj
+
+
+class BaseBatchRunner:
+    """
+    Shared submit → poll → collect flow.
+
+    Args:
+        client: Synchronous SDK client (openai.OpenAI / anthropic.Anthropic or compatible)
+        poll_interval: Seconds between status checks
+        timeout: Give up after this many seconds (None = wait for the provider window)
+        sleep: Injectable sleep function (tests)
+    """
+
+    provider = ""
+
+    def __init__(
+        self,
+        client: Any,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._sleep = sleep
+
+    # Provider-specific hooks -------------------------------------------------
+
+    def format_line(self, custom_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def submit(self, lines: List[Dict[str, Any]], data: bytes) -> str:
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> Tuple[bool, Any]:
+        """Return (finished, batch_object)."""
+        raise NotImplementedError
+
+    def collect(self, batch: Any) -> BatchResults:
+        raise NotImplementedError
+
+    # Flow --------------------------------------------------------------------
+
+    def run(
+        self,
+        requests: List[BatchRequest],
+        jsonl_path: Optional[Union[str, Path]] = None,
+    ) -> BatchResults:
+        """
+        Submit ``requests`` as one batch (or re-attach to an identical running one) and wait.
+
+        Args:
+            requests: (custom_id, request_body) pairs
+            jsonl_path: Where to keep the JSONL batch file; its ``.state.json``
+                sibling stores the batch id for re-attaching after a crash
+        """
+        if not requests:
+            return {}
+        lines = [self.format_line(custom_id, body) for custom_id, body in requests]
+        data = write_batch_jsonl(lines, jsonl_path)
+        digest = hashlib.sha256(data).hexdigest()
+
+        state_path = Path(jsonl_path).with_suffix(".state.json") if jsonl_path else None
+        batch_id = None
+        if state_path is not None and state_path.exists():
+            try:
+                state = json.loads(state_path.read_text(encoding="utf-8"))
+                if state.get("input_sha256") == digest and state.get("provider") == self.provider:
+                    batch_id = state.get("batch_id")
+                    logger.info(f"Re-attaching to {self.provider} batch {batch_id}")
+            except (OSError, json.JSONDecodeError):
+                batch_id = None
+        if batch_id is None:
+            batch_id = self.submit(lines, data)
+            logger.info(f"Submitted {self.provider} batch {batch_id} with {len(lines)} requests")
+            if state_path is not None:
+                state_path.write_text(
+                    json.dumps({"provider": self.provider, "batch_id": batch_id, "input_sha256": digest}),
+                    encoding="utf-8",
+                )
+
+        batch = self.wait(batch_id)
+        results = self.collect(batch)
+        if state_path is not None:
+            try:
+                state_path.unlink()
+            except OSError:
+                pass
+        return results
+
+    def wait(self, batch_id: str) -> Any:
+        """Poll until the batch reaches a terminal state."""
+        start = time.monotonic()
+        while True:
+            finished, batch = self.poll(batch_id)
+            if finished:
+                return batch
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise BatchJobError(f"{self.provider} batch {batch_id} not finished after {self.timeout:.0f}s")
+            self._sleep(self.poll_interval)
+
+
+class OpenAIBatchRunner(BaseBatchRunner):
+    """OpenAI Batch API (also works with OpenAI-compatible servers exposing /v1/files and /v1/batches)."""
+
+    provider = "openai"
+    _terminal = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(self, client: Any, completion_window: str = "24h", **kwargs: Any):
+        super().__init__(client, **kwargs)
+        self.completion_window = completion_window
+
+    def format_line(self, custom_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {"custom_id": custom_id, "method": "POST", "url": OPENAI_CHAT_ENDPOINT, "body": body}
+
+    def submit(self, lines: List[Dict[str, Any]], data: bytes) -> str:
+        input_file = self.client.files.create(file=("batch_input.jsonl", data), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=OPENAI_CHAT_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[bool, Any]:
+        batch = self.client.batches.retrieve(batch_id)
+        return batch.status in self._terminal, batch
+
+    def _read_file(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        content = self.client.files.content(file_id)
+        text = content.text if hasattr(content, "text") else content.read().decode("utf-8")
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def collect(self, batch: Any) -> BatchResults:
+        if batch.status != "completed" and not getattr(batch, "output_file_id", None):
+            raise BatchJobError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+        results: BatchResults = {}
+        for line in self._read_file(getattr(batch, "output_file_id", None)) + self._read_file(
+            getattr(batch, "error_file_id", None)
+        ):
+            response = line.get("response") or {}
+            error = line.get("error")
+            status = response.get("status_code", 200)
+            if error or status >= 400:
+                message = (error or {}).get("message") if isinstance(error, dict) else error
+                results[line["custom_id"]] = {
+                    "body": None,
+                    "error": message or f"HTTP {status}: {json.dumps(response.get('body'))[:200]}",
+                }
+            else:
+                results[line["custom_id"]] = {"body": response.get("body"), "error": None}
+        return results
+
+
+class AnthropicBatchRunner(BaseBatchRunner):
+    """Anthropic Message Batches API."""
+
+    provider = "anthropic"
+
+    def format_line(self, custom_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {"custom_id": custom_id, "params": body}
+
+    def submit(self, lines: List[Dict[str, Any]], data: bytes) -> str:
+        batch = self.client.messages.batches.create(requests=lines)
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[bool, Any]:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended", batch
+
+    def collect(self, batch: Any) -> BatchResults:
+        results: BatchResults = {}
+        for item in self.client.messages.batches.results(batch.id):
+            result = item.result
+            if getattr(result, "type", None) == "succeeded":
+                results[item.custom_id] = {"body": _to_dict(result.message), "error": None}
+            else:
+                error = getattr(result, "error", None)
+                results[item.custom_id] = {
+                    "body": None,
+                    "error": str(_to_dict(error) or getattr(result, "type", "unknown")),
+                }
+        return results
+
+
+def create_batch_runner(provider: str, client: Any, **kwargs: Any) -> BaseBatchRunner:
+    """Runner for ``provider`` ("openai" or "anthropic")."""
+    if provider == "openai":
+        return OpenAIBatchRunner(client, **kwargs)
+    if provider == "anthropic":
+        return AnthropicBatchRunner(client, **kwargs)
+    raise ValueError(f"Batch API not supported for provider '{provider}'. Use 'openai' or 'anthropic'.")
@@ -0,0 +1,152 @@
+"""
+Process-wide registry of pooled SDK clients.
+
+Building an ``OpenAI``/``Anthropic`` client per request throws away its HTTP
+connection pool, so every call pays a fresh TCP+TLS handshake. Clients here
+are created once per (provider, api_base, api_key, timeout, max_retries) and
+shared by every caller in the process: all agents of a ParticipantPool, all
+repeats of a Stage 5 run, and the src/llm/*_client.py wrappers.
+
+The SDK clients (and their underlying HTTP clients) are thread-safe, so one
+instance can serve the whole ThreadPoolExecutor.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Connection pool size per client; keep-alive connections are kept up to the same limit
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("HS_BENCH_MAX_CONNECTIONS", "100"))
+
+_clients: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+
+
+def _client_key(
+    provider: str,
+    api_key: Optional[str],
+    base_url: Optional[str],
+    timeout: Optional[float],
+    max_retries: Optional[int],
+) -> Tuple:
+    """Registry key; the API key is hashed so it never sits in the key in clear text."""
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+    return (provider, (base_url or "").rstrip("/"), key_digest, timeout, max_retries)
+
+
+def _http_client(sdk: Any, max_connections: int) -> Any:
+    """
+    The SDK's own pooled HTTP client (``DefaultHttpxClient``) with keep-alive limits.
+
+    Each SDK validates ``http_client`` against the httpx flavour it is built on,
+    so a plain ``httpx.Client`` is rejected by some releases; the SDK's default
+    client class keeps its other defaults (timeouts, redirects) too. Returns None
+    when the SDK predates ``DefaultHttpxClient``.
+    """
+    client_class = getattr(sdk, "DefaultHttpxClient", None)
+    default_limits = getattr(sdk, "DEFAULT_CONNECTION_LIMITS", None)
+    if client_class is None or default_limits is None:
+        return None
+    limits = type(default_limits)(
+        max_keepalive_connections=max_connections,
+        max_connections=max_connections,
+        keepalive_expiry=default_limits.keepalive_expiry,
+    )
+    return client_class(limits=limits)
+
+
+def _get_or_create(key: Tuple, factory) -> Any:
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def get_openai_client(
+    api_key: Optional[str],
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+) -> Any:
+    """
+    Return the shared ``openai.OpenAI`` client for these settings (OpenAI, xAI, OpenRouter).
+
+    Args:
+        api_key: API key
+        base_url: Optional base URL (None = api.openai.com)
+        timeout: Request timeout in seconds (None = SDK default)
+        max_retries: SDK-level retries (None = SDK default; agents use 0 and retry themselves)
+        max_connections: Connection pool size, only used when the client is first created
+    """
+    try:
+        import openai
+        from openai import OpenAI
+    except ImportError:
+        raise ImportError("OpenAI package required. Install with: pip install openai")
+
+    def factory():
+        kwargs: Dict[str, Any] = {"api_key": api_key, "base_url": base_url}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if max_retries is not None:
+            kwargs["max_retries"] = max_retries
+        http_client = _http_client(openai, max_connections)
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        return OpenAI(**kwargs)
+
+    return _get_or_create(_client_key("openai", api_key, base_url, timeout, max_retries), factory)
+
+
+def get_anthropic_client(
+    api_key: Optional[str],
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+) -> Any:
+    """Return the shared ``anthropic.Anthropic`` client for these settings."""
+    try:
+        import anthropic
+        from anthropic import Anthropic
+    except ImportError:
+        raise ImportError("anthropic package required. Install with: pip install anthropic")
+
+    def factory():
+        kwargs: Dict[str, Any] = {"api_key": api_key}
+        if base_url:
+            kwargs["base_url"] = base_url
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if max_retries is not None:
+            kwargs["max_retries"] = max_retries
+        http_client = _http_client(anthropic, max_connections)
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        return Anthropic(**kwargs)
+
+    return _get_or_create(_client_key("anthropic", api_key, base_url, timeout, max_retries), factory)
+
+
+def registered_client_count() -> int:
+    """Number of distinct pooled clients currently alive."""
+    return len(_clients)
+
+
+def close_clients() -> None:
+    """Close every pooled client and clear the registry (e.g. at the end of a sweep or in tests)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -0,0 +1,310 @@
+"""
+Hedged LLM requests: cut the latency tail of Stage 5 runs.
+
+A run finishes when its slowest calls do, and a stalled request holds a worker
+for the whole client timeout. With hedging, a call that has not returned after
+an adaptive delay (a high quantile of recent latencies for the same
+provider/model) gets a duplicate request; whichever succeeds first is used and
+the other is cancelled where possible:
+
+- asyncio path: the losing task is cancelled, which aborts its HTTP request;
+- thread path: the SDK call cannot be interrupted, so a losing non-streamed
+  request runs to completion in the background (its reply is discarded) while
+  a losing stream is closed at its next chunk.
+
+Duplicates are extra spend, so at most ``max_extra_fraction`` of requests may
+be hedged, and hedging pauses for a while after a rate-limit error (a hedge
+would only add load). Each copy acquires its own rate-limiter slot inside the
+hedged function, so a hedge waits for capacity like any other request, and is
+dropped without being sent if the primary finishes while it is still waiting.
+Slot waits count toward the measured latency, so a throttled model hedges less.
+
+Like the rate limiters, hedgers are process-wide per (provider, model) and
+disabled until configure_hedging() is called.
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.llm.rate_limiter import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+# Seconds without hedging after a rate-limit error
+_RATE_LIMIT_PAUSE_SECONDS = 30.0
+
+
+class RequestHedger:
+    """
+    Latency tracker and hedging policy for one provider/model.
+
+    Args:
+        quantile: Latency quantile used as the hedge delay (e.g. 0.95)
+        max_extra_fraction: Max share of requests that may get a duplicate
+        min_delay: Lower bound of the hedge delay in seconds
+        min_samples: Latencies needed before hedging starts
+        window: Number of recent latencies kept
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        max_extra_fraction: float = 0.1,
+        min_delay: float = 0.5,
+        min_samples: int = 20,
+        window: int = 1000,
+    ):
+        if not 0.0 < quantile < 1.0:
+            raise ValueError(f"quantile must be in (0, 1), got {quantile}")
+        if not 0.0 <= max_extra_fraction <= 1.0:
+            raise ValueError(f"max_extra_fraction must be in [0, 1], got {max_extra_fraction}")
+        self.quantile = quantile
+        self.max_extra_fraction = max_extra_fraction
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._latencies: collections.deque = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._primary_wins = 0
+        self._both_failed = 0
+
+    # Policy ----------------------------------------------------------------------
+
+    def delay(self) -> Optional[float]:
+        """Current hedge delay in seconds, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.quantile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record_error(self, error: BaseException) -> None:
+        if is_rate_limit_error(error):
+            with self._lock:
+                self._paused_until = time.monotonic() + _RATE_LIMIT_PAUSE_SECONDS
+
+    def _admit_hedge(self) -> bool:
+        """Take a hedge from the extra-spend budget (False if exhausted or paused)."""
+        with self._lock:
+            if time.monotonic() < self._paused_until:
+                return False
+            if self._hedged + 1 > self.max_extra_fraction * self._requests:
+                return False
+            self._hedged += 1
+            return True
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _record_winner(self, winner: str) -> None:
+        with self._lock:
+            if winner == "hedge":
+                self._hedge_wins += 1
+            elif winner == "primary":
+                self._primary_wins += 1
+            else:
+                self._both_failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests, hedges fired, which copy won, the extra-spend fraction and the current delay."""
+        delay = self.delay()
+        with self._lock:
+            decided = self._hedge_wins + self._primary_wins
+            return {
+                "requests": self._requests,
+                "hedged": self._hedged,
+                "hedge_wins": self._hedge_wins,
+                "primary_wins": self._primary_wins,
+                "both_failed": self._both_failed,
+                "hedge_win_rate": round(self._hedge_wins / decided, 4) if decided else None,
+                "extra_fraction": round(self._hedged / self._requests, 4) if self._requests else 0.0,
+                "delay_s": round(delay, 3) if delay is not None else None,
+            }
+
+    # Sync --------------------------------------------------------------------------
+
+    def _timed(self, fn: Callable[[threading.Event], Any], cancel: threading.Event) -> Any:
+        start = time.monotonic()
+        try:
+            result = fn(cancel)
+        except BaseException as e:
+            self.record_error(e)
+            raise
+        if not cancel.is_set():  # a cancelled stream returns early; its duration means nothing
+            self.record_latency(time.monotonic() - start)
+        return result
+
+    def call(self, fn: Callable[[threading.Event], Any]) -> Any:
+        """
+        Run ``fn(cancel_event)``, hedged with a second call if it is slow.
+
+        ``fn`` should stop early (e.g. close its stream) once the event is set.
+        A dict result of a hedged call gets ``hedge={"winner": "primary"|"hedge"}``.
+        """
+        self._count_request()
+        delay = self.delay()
+        if delay is None:
+            return self._timed(fn, threading.Event())
+
+        executor = _executor()
+        cancels = {"primary": threading.Event(), "hedge": threading.Event()}
+        primary = executor.submit(self._timed, fn, cancels["primary"])
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._admit_hedge():
+            return primary.result()
+
+        hedge = executor.submit(self._timed, fn, cancels["hedge"])
+        futures = {primary: "primary", hedge: "hedge"}
+        pending = set(futures)
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    winner = futures[future]
+                    for other, name in futures.items():
+                        if other is not future:
+                            cancels[name].set()
+                            other.cancel()
+                    self._record_winner(winner)
+                    return _mark(future.result(), winner)
+                first_error = first_error or error
+        self._record_winner("failed")
+        raise first_error
+
+    # Async -------------------------------------------------------------------------
+
+    async def _atimed(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self.record_error(e)
+            raise
+        self.record_latency(time.monotonic() - start)
+        return result
+
+    async def acall(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of call(): ``factory()`` makes a fresh coroutine per copy; the loser is cancelled."""
+        self._count_request()
+        delay = self.delay()
+        if delay is None:
+            return await self._atimed(factory)
+
+        primary = asyncio.ensure_future(self._atimed(factory))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._admit_hedge():
+            return await primary
+
+        hedge = asyncio.ensure_future(self._atimed(factory))
+        tasks = {primary: "primary", hedge: "hedge"}
+        pending = set(tasks)
+        first_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in done if task.exception() is None]
+                for task in done:
+                    first_error = first_error or task.exception()
+                if succeeded:
+                    winner = min(succeeded, key=lambda task: tasks[task] != "primary")
+                    self._record_winner(tasks[winner])
+                    return _mark(winner.result(), tasks[winner])
+        finally:
+            for task in pending:
+                task.cancel()
+        self._record_winner("failed")
+        raise first_error
+
+
+def _mark(result: Any, winner: str) -> Any:
+    if isinstance(result, dict):
+        return dict(result, hedge={"winner": winner})
+    return result
+
+
+# ---------------------------------------------------------------------- registry
+
+_hedgers: Dict[Tuple[str, str], RequestHedger] = {}
+_hedge_config: Optional[Dict[str, Any]] = None
+_registry_lock = threading.Lock()
+_executor_instance: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Threads running hedged calls (primary and duplicate) of the thread-pool engine."""
+    global _executor_instance
+    with _registry_lock:
+        if _executor_instance is None:
+            _executor_instance = ThreadPoolExecutor(max_workers=512, thread_name_prefix="llm-hedge")
+        return _executor_instance
+
+
+def configure_hedging(
+    quantile: Optional[float] = 0.95,
+    max_extra_fraction: float = 0.1,
+    min_delay: float = 0.5,
+    min_samples: int = 20,
+) -> None:
+    """
+    Enable hedging for every provider/model (``quantile=None`` disables it).
+
+    A changed configuration replaces the existing hedgers (latencies are
+    learned afresh); the same configuration keeps them, so consecutive runs in
+    one process share what was learned.
+    """
+    global _hedge_config
+    config = None if quantile is None else {
+        "quantile": quantile, "max_extra_fraction": max_extra_fraction,
+        "min_delay": min_delay, "min_samples": min_samples,
+    }
+    with _registry_lock:
+        if config == _hedge_config:
+            return
+        _hedgers.clear()
+        _hedge_config = config
+
+
+def get_hedger(provider: str, model: str) -> Optional[RequestHedger]:
+    """Process-wide hedger for (provider, model), or None when hedging is disabled."""
+    if _hedge_config is None:
+        return None
+    key = (provider, model)
+    hedger = _hedgers.get(key)
+    if hedger is not None:
+        return hedger
+    with _registry_lock:
+        if _hedge_config is None:
+            return None
+        hedger = _hedgers.get(key)
+        if hedger is None:
+            hedger = RequestHedger(**_hedge_config)
+            _hedgers[key] = hedger
+        return hedger
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every live hedger, keyed by "provider/model"."""
+    return {f"{p}/{m}": hedger.stats() for (p, m), hedger in list(_hedgers.items())}
+
+
+def reset_hedging() -> None:
+    """Disable hedging and drop all hedgers (mainly for tests)."""
+    configure_hedging(quantile=None)
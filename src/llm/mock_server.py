@@ -0,0 +1,696 @@
+"""
+Local mock LLM server speaking the OpenAI and Anthropic wire formats.
+
+Used for offline load testing of Stage 5: agents point at it through
+``api_base`` and go through the real SDK, retry, rate-limit and save path,
+only the provider is fake. Endpoints (an optional ``/v1`` prefix is accepted
+once or twice, so both SDK base-URL conventions work):
+
+- ``POST /v1/chat/completions``                 OpenAI chat completions
+- ``POST /v1/messages``                         Anthropic messages
+- ``POST /v1/files``, ``GET /v1/files/{id}/content``,
+  ``POST /v1/batches``, ``GET /v1/batches/{id}``  OpenAI Batch API
+- ``POST /v1/messages/batches``, ``GET /v1/messages/batches/{id}[/results]``
+                                                Anthropic Message Batches
+
+Both completion endpoints honour ``"stream": true`` and answer with
+server-sent events (one token per chunk, paced at the decode rate). A client
+that closes the stream early is counted in ``streams_cancelled`` and the
+unsent tokens are taken off ``completion_tokens``.
+
+Replies are canned ``Qk=value`` lines built from the RESPONSE_SPEC of the
+study prompt (labels, ``<A/B>``-style options and ``1-10``-style ranges), so
+the study evaluators can parse them. Latency is time-to-first-token drawn from
+a distribution plus completion tokens at a fixed decode rate, and 429/5xx
+errors are injected at configurable rates.
+
+Run standalone with ``python -m src.llm.mock_server --port 8765``.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Characters per token for usage accounting (same estimate as the agents' rate limiter)
+CHARS_PER_TOKEN = 4
+
+_FILLER = (
+    "Let me think about this once more and double-check my reasoning before moving on. "
+)
+
+_Q_LABEL = re.compile(r"\bQ(\d+(?:\.\d+)?)\b")
+_Q_PLACEHOLDER = re.compile(r"\bQ(\d+(?:\.\d+)?)\s*=\s*<([^>]*)>")
+_RANGE = re.compile(r"(-?\d+)\s*(?:-|to)\s*(-?\d+)")
+
+
+class LatencyDistribution:
+    """
+    Seconds drawn from a distribution given as ``"<kind>:<params>"``.
+
+    Kinds: ``none`` (always 0), ``fixed:s``, ``uniform:lo,hi``,
+    ``exponential:mean`` and ``lognormal:median,sigma``. Values are never negative.
+    """
+
+    _KINDS = {"none": 0, "fixed": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+
+    def __init__(self, spec: str = "none"):
+        kind, _, params = (spec or "none").partition(":")
+        kind = kind.strip().lower()
+        if kind not in self._KINDS:
+            raise ValueError(f"Unknown distribution '{kind}'. Use one of: {', '.join(self._KINDS)}")
+        values = [float(p) for p in params.split(",") if p.strip()]
+        if len(values) != self._KINDS[kind]:
+            raise ValueError(f"Distribution '{kind}' takes {self._KINDS[kind]} parameter(s), got '{spec}'")
+        self.spec = spec
+        self.kind = kind
+        self.params = values
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "exponential":
+            value = rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        else:
+            median, sigma = self.params
+            value = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return max(0.0, value)
+
+
+def count_tokens(text: str) -> int:
+    """Token estimate used for usage and decode time (~4 characters per token)."""
+    return max(1, round(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def _answer_value(placeholder: str, question: str, rng: random.Random) -> str:
+    """Plausible value for one question from its ``<...>`` placeholder and question line."""
+    for hint in [placeholder] + re.findall(r"\(([^)]*)\)", question):
+        options = [o.strip() for o in hint.split("/") if o.strip()]
+        if len(options) >= 2 and all(len(o) <= 12 for o in options):
+            return rng.choice(options)
+    text = f"{placeholder} {question}"
+    lowered = text.lower()
+    if re.search(r"\ba or b\b", lowered) or "letter" in lowered or "choice" in placeholder.lower():
+        return rng.choice(["A", "B"])
+    match = _RANGE.search(text)
+    if match:
+        lo, hi = sorted((int(match.group(1)), int(match.group(2))))
+        return str(rng.randint(lo, hi))
+    if "yes" in lowered and "no" in lowered:
+        return rng.choice(["Yes", "No"])
+    return str(rng.randint(0, 100))
+
+
+def canned_answer(prompt: str, rng: random.Random, answers: Optional[Dict[str, List[str]]] = None) -> str:
+    """
+    ``Qk=value`` lines for every question label in a study prompt.
+
+    Labels are taken in order of first appearance. Values follow the
+    ``Qk=<...>`` placeholder of the RESPONSE_SPEC and the text after the label
+    on its question line (options like ``Yes/No``, ranges like ``1-10``). ``answers`` maps labels
+    (e.g. ``"Q3"``) to explicit candidate values and takes precedence.
+
+    Prompts without Q labels get a single short free-text answer.
+    """
+    answers = answers or {}
+    placeholders = {label: hint for label, hint in _Q_PLACEHOLDER.findall(prompt)}
+    question_text: Dict[str, str] = {}
+    for line in prompt.splitlines():
+        match = _Q_LABEL.search(line)
+        if match and match.group(1) not in question_text:
+            question_text[match.group(1)] = line[match.end():]
+
+    labels: List[str] = []
+    for label in _Q_LABEL.findall(prompt):
+        if label not in labels:
+            labels.append(label)
+    if not labels:
+        return "A"
+
+    lines = []
+    for label in labels:
+        key = f"Q{label}"
+        if key in answers:
+            value = str(rng.choice(answers[key]))
+        else:
+            value = _answer_value(placeholders.get(label, ""), question_text.get(label, ""), rng)
+        lines.append(f"{key}={value}")
+    return "\n".join(lines)
+
+
+def _message_text(content: Any) -> str:
+    """Flatten a string or a list of content blocks to text."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(b.get("text", "") for b in content if isinstance(b, dict) and b.get("type") == "text")
+    return ""
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            return _message_text(message.get("content"))
+    return ""
+
+
+def _prompt_tokens(body: Dict[str, Any]) -> int:
+    text = _message_text(body.get("system")) if isinstance(body.get("system"), list) else (body.get("system") or "")
+    for message in body.get("messages") or []:
+        text += _message_text(message.get("content"))
+    return count_tokens(text)
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # load tests open hundreds of connections at once
+
+
+def _jsonl(rows: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockLLMServer:
+    """
+    Threaded HTTP server emulating OpenAI/Anthropic endpoints.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 = pick a free one; see ``base_url`` after start())
+        latency: Time-to-first-token distribution (see LatencyDistribution)
+        tokens_per_second: Decode rate for completion tokens (0 = instant)
+        extra_tokens: Distribution of trailing "reasoning" tokens emitted after the
+            answers (values are token counts), to emulate verbose models
+        error_rate_429: Fraction of requests rejected with 429 + Retry-After
+        error_rate_5xx: Fraction of requests failing with 500/502/503
+        retry_after: Retry-After seconds sent with injected 429s
+        batch_delay: Seconds a batch stays in progress before it completes
+        answers: Optional {"Qk": [values]} overrides for canned answers
+        seed: Seed for answers, latencies and error injection
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "none",
+        tokens_per_second: float = 0.0,
+        extra_tokens: str = "none",
+        error_rate_429: float = 0.0,
+        error_rate_5xx: float = 0.0,
+        retry_after: float = 1.0,
+        batch_delay: float = 0.0,
+        answers: Optional[Dict[str, List[str]]] = None,
+        seed: Optional[int] = None,
+    ):
+        for name, rate in (("error_rate_429", error_rate_429), ("error_rate_5xx", error_rate_5xx)):
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1, got {rate}")
+        self.latency = LatencyDistribution(latency)
+        self.extra_tokens = LatencyDistribution(extra_tokens)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.retry_after = retry_after
+        self.batch_delay = batch_delay
+        self.answers = answers or {}
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._files: Dict[str, bytes] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._stats: Dict[str, float] = {
+            "requests": 0, "completions": 0, "errors_429": 0, "errors_5xx": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "batch_requests": 0,
+            "streams": 0, "streams_cancelled": 0,
+        }
+        self._httpd = _ThreadingServer((host, port), _make_handler(self))
+        self._thread: Optional[threading.Thread] = None
+
+    # Lifecycle -------------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI-style base URL (``http://host:port/v1``); Anthropic clients may use it too."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Serve in a background daemon thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters: requests, completions, injected errors, tokens served."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, **increments: float) -> None:
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] = self._stats.get(key, 0) + value
+
+    def _random(self) -> random.Random:
+        """Per-call RNG forked from the seeded one (handler threads run concurrently)."""
+        with self._rng_lock:
+            return random.Random(self._rng.getrandbits(64))
+
+    # Completions -----------------------------------------------------------------
+
+    def injected_error(self, rng: random.Random) -> Optional[int]:
+        """HTTP status to fail this request with, or None."""
+        draw = rng.random()
+        if draw < self.error_rate_429:
+            return 429
+        if draw < self.error_rate_429 + self.error_rate_5xx:
+            return rng.choice([500, 502, 503])
+        return None
+
+    def complete(self, prompt: str, max_tokens: Optional[int], rng: random.Random) -> Tuple[str, int, bool]:
+        """
+        Canned completion for a prompt: (text, completion_tokens, truncated).
+
+        The answers come first, then ``extra_tokens`` of filler; ``max_tokens``
+        cuts the text (and sets ``truncated``) like a real length stop.
+        """
+        text = canned_answer(prompt, rng, self.answers)
+        n_extra = int(self.extra_tokens.sample(rng))
+        if n_extra:
+            filler_chars = n_extra * CHARS_PER_TOKEN
+            text += "\n\n" + (_FILLER * (filler_chars // len(_FILLER) + 1))[:filler_chars]
+        truncated = False
+        if max_tokens is not None and count_tokens(text) > max_tokens:
+            text = text[: max_tokens * CHARS_PER_TOKEN]
+            truncated = True
+        return text, count_tokens(text), truncated
+
+    def delay(self, completion_tokens: int, rng: random.Random) -> float:
+        decode = completion_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        return self.latency.sample(rng) + decode
+
+    def stream_events(self, reply: Dict[str, Any], anthropic: bool, include_usage: bool) -> Tuple[List[Any], List[Any], List[Any]]:
+        """
+        Server-sent events for a finished reply: (head, per-token deltas, tail).
+
+        Each event is an ``(event_name, payload)`` pair; OpenAI events have no
+        name and the tail ends with the ``[DONE]`` sentinel.
+        """
+        if anthropic:
+            text = reply["content"][0]["text"]
+        else:
+            text = reply["choices"][0]["message"]["content"]
+        pieces = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+        if anthropic:
+            start = dict(reply, content=[], stop_reason=None, usage=dict(reply["usage"], output_tokens=1))
+            head = [
+                ("message_start", {"type": "message_start", "message": start}),
+                ("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+            ]
+            deltas = [
+                ("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}})
+                for piece in pieces
+            ]
+            tail = [
+                ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                ("message_delta", {"type": "message_delta",
+                                   "delta": {"stop_reason": reply["stop_reason"], "stop_sequence": None},
+                                   "usage": {"output_tokens": reply["usage"]["output_tokens"]}}),
+                ("message_stop", {"type": "message_stop"}),
+            ]
+            return head, deltas, tail
+
+        base = {"id": reply["id"], "object": "chat.completion.chunk", "created": reply["created"], "model": reply["model"]}
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}])
+
+        head = [(None, chunk({"role": "assistant", "content": ""}))]
+        deltas = [(None, chunk({"content": piece})) for piece in pieces]
+        tail = [(None, chunk({}, reply["choices"][0]["finish_reason"]))]
+        if include_usage:
+            tail.append((None, dict(base, choices=[], usage=reply["usage"])))
+        tail.append((None, "[DONE]"))
+        return head, deltas, tail
+
+    def chat_completion(self, body: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+        text, completion_tokens, truncated = self.complete(
+            _last_user_text(body.get("messages")), body.get("max_tokens") or body.get("max_completion_tokens"), rng
+        )
+        prompt_tokens = _prompt_tokens(body)
+        self._count(completions=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "length" if truncated else "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def anthropic_message(self, body: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+        text, completion_tokens, truncated = self.complete(
+            _last_user_text(body.get("messages")), body.get("max_tokens"), rng
+        )
+        prompt_tokens = _prompt_tokens(body)
+        self._count(completions=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            "id": f"msg_mock_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "max_tokens" if truncated else "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens},
+        }
+
+    # OpenAI Batch API ------------------------------------------------------------
+
+    def create_file(self, data: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:24]}"
+        with self._lock:
+            self._files[file_id] = data
+        return {
+            "id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed",
+        }
+
+    def file_content(self, file_id: str) -> Optional[bytes]:
+        with self._lock:
+            return self._files.get(file_id)
+
+    def create_openai_batch(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        data = self.file_content(body.get("input_file_id", ""))
+        if data is None:
+            return None
+        lines = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+        output, errors = [], []
+        for line in lines:
+            rng = self._random()
+            status = self.injected_error(rng)
+            if status is None:
+                response = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self.chat_completion(line["body"], rng)}
+            else:
+                response = {"status_code": status, "request_id": uuid.uuid4().hex,
+                            "body": {"error": {"message": f"Injected HTTP {status}", "type": "server_error"}}}
+            (output if status is None else errors).append(
+                {"id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": line["custom_id"], "response": response, "error": None}
+            )
+        self._count(batch_requests=len(lines))
+        output_file = self.create_file(_jsonl(output), "batch_output.jsonl", "batch_output")["id"]
+        error_file = self.create_file(_jsonl(errors), "batch_errors.jsonl", "batch_output")["id"] if errors else None
+        batch_id = f"batch_mock_{uuid.uuid4().hex[:24]}"
+        record = {
+            "created": time.time(),
+            "object": {
+                "id": batch_id, "object": "batch", "endpoint": body.get("endpoint", "/v1/chat/completions"),
+                "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+                "created_at": int(time.time()), "status": "in_progress",
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            },
+            "output_file_id": output_file, "error_file_id": error_file,
+            "counts": {"total": len(lines), "completed": len(output), "failed": len(errors)},
+        }
+        with self._lock:
+            self._batches[batch_id] = record
+        return self.openai_batch(batch_id)
+
+    def openai_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._batches.get(batch_id)
+        if record is None:
+            return None
+        batch = dict(record["object"])
+        if time.time() - record["created"] >= self.batch_delay:
+            batch.update(
+                status="completed", completed_at=int(time.time()), request_counts=record["counts"],
+                output_file_id=record["output_file_id"], error_file_id=record["error_file_id"],
+            )
+        return batch
+
+    # Anthropic Message Batches ---------------------------------------------------
+
+    def create_anthropic_batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        results = []
+        for request in body.get("requests") or []:
+            rng = self._random()
+            status = self.injected_error(rng)
+            if status is None:
+                result = {"type": "succeeded", "message": self.anthropic_message(request["params"], rng)}
+            else:
+                result = {"type": "errored", "error": {"type": "error", "error": {"type": "api_error", "message": f"Injected HTTP {status}"}}}
+            results.append({"custom_id": request["custom_id"], "result": result})
+        self._count(batch_requests=len(results))
+        batch_id = f"msgbatch_mock_{uuid.uuid4().hex[:24]}"
+        with self._lock:
+            self._batches[batch_id] = {"created": time.time(), "results": results}
+        return batch_id
+
+    def anthropic_batch(self, batch_id: str, base: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._batches.get(batch_id)
+        if record is None or "results" not in record:
+            return None
+        created = record["created"]
+        ended = time.time() - created >= self.batch_delay
+        results = record["results"]
+        succeeded = sum(1 for r in results if r["result"]["type"] == "succeeded")
+        return {
+            "id": batch_id, "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(results), "succeeded": succeeded if ended else 0,
+                "errored": len(results) - succeeded if ended else 0, "canceled": 0, "expired": 0,
+            },
+            "created_at": _iso(created), "expires_at": _iso(created + timedelta(days=1).total_seconds()),
+            "ended_at": _iso(time.time()) if ended else None, "archived_at": None, "cancel_initiated_at": None,
+            "results_url": f"{base}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def anthropic_batch_results(self, batch_id: str) -> Optional[bytes]:
+        with self._lock:
+            record = self._batches.get(batch_id)
+        if record is None or "results" not in record:
+            return None
+        return _jsonl(record["results"])
+
+
+def _error_body(status: int, anthropic: bool) -> Dict[str, Any]:
+    kind = "rate_limit_error" if status == 429 else ("api_error" if anthropic else "server_error")
+    message = "Rate limit exceeded (injected by mock server)" if status == 429 else f"Injected HTTP {status}"
+    if anthropic:
+        return {"type": "error", "error": {"type": kind, "message": message}}
+    return {"error": {"message": message, "type": kind, "code": None, "param": None}}
+
+
+def _make_handler(server: MockLLMServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - silence per-request logging
+            pass
+
+        @property
+        def route(self) -> str:
+            path = self.path.split("?", 1)[0].rstrip("/")
+            while path.startswith("/v1/"):
+                path = path[3:]
+            return path
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None, raw: bool = False) -> None:
+            data = payload if raw else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _not_found(self) -> None:
+            self._send(404, {"error": {"message": f"Unknown route {self.path}", "type": "invalid_request_error"}})
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def do_GET(self) -> None:
+            server._count(requests=1)
+            parts = self.route.strip("/").split("/")
+            if parts[:1] == ["files"] and len(parts) == 3 and parts[2] == "content":
+                data = server.file_content(parts[1])
+                return self._send(200, data, raw=True) if data is not None else self._not_found()
+            if parts[:1] == ["batches"] and len(parts) == 2:
+                batch = server.openai_batch(parts[1])
+                return self._send(200, batch) if batch else self._not_found()
+            if parts[:2] == ["messages", "batches"] and len(parts) in (3, 4):
+                if len(parts) == 4 and parts[3] == "results":
+                    data = server.anthropic_batch_results(parts[2])
+                    return self._send(200, data, raw=True) if data is not None else self._not_found()
+                batch = server.anthropic_batch(parts[2], f"http://{self.headers.get('Host')}")
+                return self._send(200, batch) if batch else self._not_found()
+            self._not_found()
+
+        def do_POST(self) -> None:
+            server._count(requests=1)
+            route = self.route
+            raw = self._body()
+            if route == "/files":
+                return self._upload(raw)
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                return self._send(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            if route == "/batches":
+                batch = server.create_openai_batch(body)
+                return self._send(200, batch) if batch else self._not_found()
+            if route == "/messages/batches":
+                batch_id = server.create_anthropic_batch(body)
+                return self._send(200, server.anthropic_batch(batch_id, f"http://{self.headers.get('Host')}"))
+            if route not in ("/chat/completions", "/messages"):
+                return self._not_found()
+
+            anthropic = route == "/messages"
+            rng = server._random()
+            status = server.injected_error(rng)
+            if status is not None:
+                server._count(**{"errors_429" if status == 429 else "errors_5xx": 1})
+                time.sleep(server.latency.sample(rng) * 0.1)  # errors come back fast
+                headers = {"Retry-After": f"{server.retry_after:g}"} if status == 429 else None
+                return self._send(status, _error_body(status, anthropic), headers=headers)
+            reply = server.anthropic_message(body, rng) if anthropic else server.chat_completion(body, rng)
+            tokens = reply["usage"]["output_tokens"] if anthropic else reply["usage"]["completion_tokens"]
+            if body.get("stream"):
+                include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+                return self._stream(server.stream_events(reply, anthropic, include_usage), tokens, rng)
+            time.sleep(server.delay(tokens, rng))
+            self._send(200, reply)
+
+        def _stream(self, events: Tuple[List[Any], List[Any], List[Any]], tokens: int, rng: random.Random) -> None:
+            """Write SSE events: first token after the TTFT draw, then one per decode step."""
+            head, deltas, tail = events
+            server._count(streams=1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")  # no Content-Length: the body ends when the socket closes
+            self.end_headers()
+            self.close_connection = True
+            step = 1.0 / server.tokens_per_second if server.tokens_per_second > 0 else 0.0
+            sent = 0
+            try:
+                time.sleep(server.latency.sample(rng))
+                for event in head:
+                    self._write_event(event)
+                for event in deltas:
+                    if step:
+                        time.sleep(step)
+                    self._write_event(event)
+                    sent += 1
+                for event in tail:
+                    self._write_event(event)
+            except (BrokenPipeError, ConnectionResetError):
+                server._count(streams_cancelled=1, completion_tokens=-max(0, tokens - sent))
+
+        def _write_event(self, event: Tuple[Optional[str], Any]) -> None:
+            name, payload = event
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            prefix = f"event: {name}\n" if name else ""
+            self.wfile.write(f"{prefix}data: {data}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _upload(self, raw: bytes) -> None:
+            """multipart/form-data upload of a batch input file (fields: file, purpose)."""
+            message = BytesParser(policy=HTTP).parsebytes(
+                b"Content-Type: " + (self.headers.get("Content-Type") or "").encode("latin-1") + b"\r\n\r\n" + raw
+            )
+            data, filename, purpose = b"", "upload.jsonl", "batch"
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if name == "file":
+                    data = part.get_payload(decode=True) or b""
+                    filename = part.get_filename() or filename
+                elif name == "purpose":
+                    purpose = (part.get_payload(decode=True) or b"batch").decode("utf-8")
+            self._send(200, server.create_file(data, filename, purpose))
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI/Anthropic-compatible mock LLM server for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.6,0.5",
+                        help="Time-to-first-token distribution: none, fixed:s, uniform:lo,hi, exponential:mean, lognormal:median,sigma")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Decode rate (0 = instant)")
+    parser.add_argument("--extra-tokens", default="none", help="Distribution of trailing filler tokens after the answers")
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--batch-delay", type=float, default=5.0, help="Seconds until a submitted batch completes")
+    parser.add_argument("--answers", default=None, help='JSON file with {"Qk": [values]} answer overrides')
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    answers = None
+    if args.answers:
+        with open(args.answers, "r", encoding="utf-8") as f:
+            answers = json.load(f)
+    server = MockLLMServer(
+        host=args.host, port=args.port, latency=args.latency, tokens_per_second=args.tokens_per_second,
+        extra_tokens=args.extra_tokens, error_rate_429=args.error_rate_429, error_rate_5xx=args.error_rate_5xx,
+        retry_after=args.retry_after, batch_delay=args.batch_delay, answers=answers, seed=args.seed,
+    )
+    print(f"Mock LLM server listening on {server.base_url} (use as api_base; any API key works)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\nServed: {json.dumps(server.stats())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -95,9 +95,9 @@ class OpenAIClient(BaseLLMClient):
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
     ) -> str:
-        from openai import OpenAI
+        from src.llm.client_pool import get_openai_client
 
-        client = OpenAI(api_key=self.api_key, base_url=self.api_base)
+        client = get_openai_client(self.api_key, base_url=self.api_base)
         openai_messages = _messages_to_openai(messages, system=system)
         kwargs = {
             "model": self.model,
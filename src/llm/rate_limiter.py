@@ -0,0 +1,413 @@
+"""
+Adaptive per-provider/model rate limiting shared by every LLM caller in the process.
+
+Each (provider, model) pair gets one AdaptiveRateLimiter that combines:
+
+- token buckets for requests/min and tokens/min budgets (optional),
+- a global pause honoring ``Retry-After`` / ``retry-after-ms`` headers on 429s,
+- an AIMD concurrency window: halved on rate-limit/overload errors, grown by
+  roughly one slot per window of successful requests.
+
+The limiter is thread-safe and usable from both the thread-pool path
+(``with limiter.request(...)``) and the asyncio path (``async with limiter.arequest(...)``),
+so both engines of ParticipantPool draw from the same budget.
+"""
+
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import CancelledError
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Poll interval while waiting for a free concurrency slot
+_SLOT_POLL_SECONDS = 0.05
+# Minimum time between two multiplicative decreases (a 429 burst counts once)
+_DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at ``rate_per_minute / 60`` per second.
+
+    The level may go negative: a request larger than the capacity is admitted once
+    the bucket is full and leaves a debt, and post-hoc corrections (actual vs.
+    estimated tokens) are applied with adjust().
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.level = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if available now). Does not consume."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def adjust(self, delta: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact."""
+        self.level = min(self.capacity, self.level - delta)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Extract a server-requested delay from an SDK exception (OpenAI/Anthropic).
+
+    Looks at ``retry-after-ms`` and ``retry-after`` (seconds or HTTP date) on
+    ``error.response.headers``. Returns None if the error carries no hint.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return max(0.0, float(value) / 1000.0)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(0.0, parsed.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an exception signals throttling/overload (HTTP 429, 529 or provider wording)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in (429, 529):
+        return True
+    message = str(error).lower()
+    return any(s in message for s in ("rate limit", "rate_limit", "429", "too many requests", "overloaded"))
+
+
+class AdaptiveRateLimiter:
+    """
+    Shared limiter for one provider/model.
+
+    Args:
+        rpm: Requests per minute budget (None = unlimited)
+        tpm: Tokens per minute budget, prompt + completion (None = unlimited)
+        max_concurrency: Upper bound for in-flight requests (None = unbounded until throttled)
+        min_concurrency: Floor for the AIMD window
+        decrease_factor: Multiplicative decrease applied on a rate-limit error
+        initial_completion_tokens: Completion-size guess used for TPM reservations
+            until real usage has been observed
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        initial_completion_tokens: int = 512,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min_concurrency)
+        self.decrease_factor = decrease_factor
+
+        self._request_bucket = TokenBucket(rpm) if rpm else None
+        self._token_bucket = TokenBucket(tpm) if tpm else None
+        # None = no window yet; the first throttle sets it from the observed in-flight count
+        self._limit: Optional[float] = float(max_concurrency) if max_concurrency else None
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._avg_completion_tokens = float(initial_completion_tokens)
+        self._lock = threading.Lock()
+
+        self._stats = {"requests": 0, "succeeded": 0, "rate_limited": 0, "errors": 0, "wait_seconds": 0.0}
+
+    # ------------------------------------------------------------------ admission
+
+    def estimate_tokens(self, prompt_tokens: int) -> int:
+        """Tokens to reserve for a request: prompt plus the running average completion size."""
+        return int(prompt_tokens + self._avg_completion_tokens)
+
+    def _try_admit(self, tokens: int) -> float:
+        """Admit one request if possible; otherwise return how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._limit is not None and self._in_flight >= max(self.min_concurrency, int(self._limit)):
+                return _SLOT_POLL_SECONDS
+            wait = 0.0
+            if self._request_bucket is not None:
+                wait = max(wait, self._request_bucket.wait_time(1, now))
+            if self._token_bucket is not None:
+                wait = max(wait, self._token_bucket.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            if self._request_bucket is not None:
+                self._request_bucket.take(1)
+            if self._token_bucket is not None:
+                self._token_bucket.take(tokens)
+            self._in_flight += 1
+            self._stats["requests"] += 1
+            return 0.0
+
+    def acquire(self, tokens: int = 0, cancel: Optional[threading.Event] = None) -> None:
+        """
+        Block the calling thread until a request of ``tokens`` estimated tokens may start.
+
+        Raises CancelledError if ``cancel`` is set before a slot is free.
+        """
+        start = time.monotonic()
+        try:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise CancelledError("cancelled while waiting for a rate-limit slot")
+                wait = self._try_admit(tokens)
+                if wait <= 0:
+                    break
+                if cancel is not None:
+                    cancel.wait(min(wait, 1.0))
+                else:
+                    time.sleep(min(wait, 1.0))
+        finally:
+            self._record_wait(time.monotonic() - start)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Asyncio counterpart of acquire()."""
+        start = time.monotonic()
+        while True:
+            wait = self._try_admit(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(min(wait, 1.0))
+        self._record_wait(time.monotonic() - start)
+
+    def _record_wait(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self._stats["wait_seconds"] += seconds
+
+    # ------------------------------------------------------------------ feedback
+
+    def release(
+        self,
+        reserved_tokens: int = 0,
+        tokens_used: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        Return the slot taken by acquire() and feed the outcome back into the limiter.
+
+        Args:
+            reserved_tokens: Tokens reserved at acquire() time
+            tokens_used: Actual total tokens (corrects the TPM bucket)
+            completion_tokens: Actual completion tokens (updates the reservation estimate)
+            error: Exception raised by the request, if any
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+
+            if error is None:
+                self._stats["succeeded"] += 1
+                if self._token_bucket is not None and tokens_used is not None:
+                    self._token_bucket.adjust(tokens_used - reserved_tokens)
+                if completion_tokens:
+                    self._avg_completion_tokens = 0.9 * self._avg_completion_tokens + 0.1 * completion_tokens
+                if self._limit is not None:
+                    # Additive increase: about +1 slot per window of successes
+                    self._limit += 1.0 / max(self._limit, 1.0)
+                    if self.max_concurrency is not None:
+                        self._limit = min(self._limit, float(self.max_concurrency))
+                return
+
+            if not is_rate_limit_error(error):
+                self._stats["errors"] += 1
+                return
+
+            self._stats["rate_limited"] += 1
+            delay = retry_after_seconds(error)
+            if delay is not None:
+                self._blocked_until = max(self._blocked_until, now + delay)
+            if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+                current = self._limit if self._limit is not None else float(self._in_flight + 1)
+                self._limit = max(float(self.min_concurrency), current * self.decrease_factor)
+                self._last_decrease = now
+                logger.info(
+                    f"Rate limited; concurrency window -> {int(self._limit)}"
+                    + (f", pausing {delay:.1f}s (Retry-After)" if delay else "")
+                )
+
+    def request(self, prompt_tokens: int = 0, cancel: Optional[threading.Event] = None) -> "_RequestSlot":
+        """
+        Context manager wrapping one API request::
+
+            with limiter.request(prompt_tokens) as slot:
+                response = client.chat.completions.create(...)
+                slot.record_usage(usage)
+
+        Setting ``cancel`` abandons the wait for a slot (a hedged request whose twin already won).
+        """
+        return _RequestSlot(self, self.estimate_tokens(prompt_tokens) if self._token_bucket else 0, cancel)
+
+    def arequest(self, prompt_tokens: int = 0) -> "_RequestSlot":
+        """Async context manager variant of request()."""
+        return self.request(prompt_tokens)
+
+    # ------------------------------------------------------------------ reporting
+
+    @property
+    def concurrency_limit(self) -> Optional[int]:
+        return int(self._limit) if self._limit is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = self.concurrency_limit
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+
+class _RequestSlot:
+    """Slot returned by AdaptiveRateLimiter.request(); releases with the observed outcome."""
+
+    def __init__(self, limiter: AdaptiveRateLimiter, reserved_tokens: int, cancel: Optional[threading.Event] = None):
+        self.limiter = limiter
+        self.reserved_tokens = reserved_tokens
+        self.cancel = cancel
+        self.tokens_used: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def record_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Record the usage dict of a parsed response (prompt/completion/total tokens)."""
+        if not usage:
+            return
+        self.tokens_used = usage.get("total_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+
+    def _release(self, error: Optional[BaseException]) -> None:
+        self.limiter.release(
+            reserved_tokens=self.reserved_tokens,
+            tokens_used=self.tokens_used,
+            completion_tokens=self.completion_tokens,
+            error=error,
+        )
+
+    def __enter__(self) -> "_RequestSlot":
+        self.limiter.acquire(self.reserved_tokens, self.cancel)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._release(exc)
+        return False
+
+    async def __aenter__(self) -> "_RequestSlot":
+        await self.limiter.aacquire(self.reserved_tokens)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self._release(exc)
+        return False
+
+
+# ---------------------------------------------------------------------- registry
+
+_limiters: Dict[Tuple[str, str], AdaptiveRateLimiter] = {}
+_limit_config: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {}
+_registry_lock = threading.Lock()
+
+
+def _env_number(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def configure_rate_limits(
+    model: Optional[str] = None,
+    provider: Optional[str] = None,
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+) -> None:
+    """
+    Set budgets for a model and/or provider (None = wildcard).
+
+    Lookup order is (provider, model), (any, model), (provider, any), then the
+    HS_BENCH_RPM / HS_BENCH_TPM environment variables. An already-created limiter
+    for a matching pair is replaced so the new budget applies immediately.
+    """
+    with _registry_lock:
+        _limit_config[(provider, model)] = {"rpm": rpm, "tpm": tpm, "max_concurrency": max_concurrency}
+        for key in list(_limiters):
+            if (provider is None or key[0] == provider) and (model is None or key[1] == model):
+                del _limiters[key]
+
+
+def get_rate_limiter(provider: str, model: str) -> AdaptiveRateLimiter:
+    """Return the process-wide limiter for (provider, model), creating it on first use."""
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is not None:
+        return limiter
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            config = (
+                _limit_config.get((provider, model))
+                or _limit_config.get((None, model))
+                or _limit_config.get((provider, None))
+                or {"rpm": _env_number("HS_BENCH_RPM"), "tpm": _env_number("HS_BENCH_TPM")}
+            )
+            limiter = AdaptiveRateLimiter(**config)
+            _limiters[key] = limiter
+        return limiter
+
+
+def rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every live limiter, keyed by "provider/model"."""
+    return {f"{p}/{m}": limiter.stats() for (p, m), limiter in list(_limiters.items())}
+
+
+def reset_rate_limiters() -> None:
+    """Drop all limiters and configured budgets (mainly for tests)."""
+    with _registry_lock:
+        _limiters.clear()
+        _limit_config.clear()
+
+
+def backoff_with_jitter(attempt: int, error: Optional[BaseException] = None) -> float:
+    """
+    Sleep before retry number ``attempt`` (1-based).
+
+    When the server sent Retry-After the limiter already pauses every caller until
+    then, so only a short jitter is needed here; otherwise exponential backoff.
+    """
+    if error is not None and retry_after_seconds(error) is not None:
+        return random.uniform(0.0, 0.25)
+    return 2 ** (attempt - 1) + random.uniform(0.0, 0.75)
@@ -0,0 +1,181 @@
+"""
+Content-addressed cache of LLM responses, stored in SQLite with size-based LRU eviction.
+
+Entries are keyed by a SHA-256 of everything that determines a completion
+(provider, API endpoint, model, messages, temperature, max_tokens, reasoning settings and a
+per-participant sampling salt), so reruns and resumed runs only pay for prompts
+that actually changed. Unlike the per-run JSON cache of Stage 5, a single edited
+prompt invalidates only its own entries.
+
+The cache is opt-in (``--response-cache PATH`` or ``HS_BENCH_RESPONSE_CACHE``)
+and safe to share between threads and between processes (SQLite WAL mode).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+# After an eviction the cache is trimmed to this fraction of max_bytes
+_EVICT_TARGET_RATIO = 0.9
+
+
+def make_cache_key(**fields: Any) -> str:
+    """Stable SHA-256 over the canonical JSON of the request fields."""
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed LRU cache of JSON-serializable LLM results.
+
+    Args:
+        path: SQLite database file (parent directories are created)
+        max_bytes: Size budget for stored values; least recently used entries are
+            evicted once it is exceeded
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.commit()
+        self._approx_bytes = self._total_bytes()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _total_bytes(self) -> int:
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return int(row[0])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key`` (refreshing its LRU position), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.warning(f"Corrupt response cache entry {key[:12]}; ignoring")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store ``value`` under ``key`` and evict LRU entries if the size budget is exceeded."""
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(data.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now),
+            )
+            self._conn.commit()
+            self._approx_bytes += size
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Re-sync first: other processes may have written or evicted in the meantime
+        total = self._total_bytes()
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        while total > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                total -= size
+                if total <= target:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", removed)
+            self.evictions += len(removed)
+        self._conn.commit()
+        self._approx_bytes = total
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for this process plus current entry count and size."""
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "size_bytes": self._approx_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def configure_response_cache(
+    path: Optional[Union[str, Path]],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Optional[ResponseCache]:
+    """
+    Enable (``path`` given) or disable (``path=None``) the process-wide response cache.
+
+    Returns:
+        The active ResponseCache, or None when disabled
+    """
+    global _cache, _cache_configured
+    with _cache_lock:
+        if _cache is not None and (path is None or Path(path) != _cache.path):
+            _cache.close()
+            _cache = None
+        if path is not None and _cache is None:
+            _cache = ResponseCache(path, max_bytes=max_bytes)
+        elif _cache is not None:
+            _cache.max_bytes = int(max_bytes)
+        _cache_configured = True
+        return _cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The active response cache; falls back to ``HS_BENCH_RESPONSE_CACHE`` if never configured."""
+    if not _cache_configured:
+        env_path = os.getenv("HS_BENCH_RESPONSE_CACHE")
+        configure_response_cache(env_path or None)
+    return _cache
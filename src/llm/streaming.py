@@ -0,0 +1,306 @@
+"""
+Streaming completions with early stop.
+
+Study prompts ask for ``Qk=value`` lines; verbose models keep generating
+(explanations, self-checks) long after the last required answer. With
+streaming, StreamAccumulator collects the chunks/events of a completion and
+checks after every finished line whether the study evaluator can already parse
+every required Q number; the caller then closes the stream, so the remaining
+output is neither waited for nor (on providers that stop decoding on
+disconnect) billed.
+
+Both wire formats are supported: OpenAI-style ``chat.completion.chunk``
+streams (OpenAI, xAI, OpenRouter) and Anthropic message events. The result has
+the shape of a parsed non-streamed reply plus a ``timing`` dict
+(time-to-first-token and time-to-complete).
+"""
+
+import logging
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STUDIES_DIR = Path(__file__).resolve().parents[1] / "studies"
+
+# Open reasoning blocks inside the content: Q lines there are drafts, not answers
+_REASONING_TAGS = ("think", "thinking", "reasoning")
+
+StopCheck = Callable[[str], bool]
+
+
+@lru_cache(maxsize=None)
+def _evaluator_hooks(study_id: str) -> Optional[Tuple[Callable, Callable]]:
+    """(parse_agent_responses, get_required_q_numbers) of a study evaluator, or None."""
+    from src.evaluation.response_index import _import_evaluator
+
+    evaluator_path = _STUDIES_DIR / f"{study_id}_evaluator.py"
+    if not evaluator_path.exists():
+        return None
+    try:
+        module = _import_evaluator(evaluator_path)
+    except Exception as e:
+        logger.warning(f"Could not import {evaluator_path.name} for early stop: {e}")
+        return None
+    parse = getattr(module, "parse_agent_responses", None)
+    required = getattr(module, "get_required_q_numbers", None)
+    if parse is None or required is None:
+        return None
+    return parse, required
+
+
+def required_answers_check(study_id: Optional[str], trial_info: Optional[Dict[str, Any]]) -> Optional[StopCheck]:
+    """
+    Predicate telling whether a partial response already answers every required Q.
+
+    Uses the study evaluator's get_required_q_numbers(trial_info) and
+    parse_agent_responses(text), exactly as the Stage 6 sanity check does.
+    Returns None (stream to the end) when the study has no evaluator hooks or
+    the trial has no required Q numbers.
+    """
+    if not study_id or not trial_info:
+        return None
+    hooks = _evaluator_hooks(study_id)
+    if hooks is None:
+        return None
+    parse, get_required = hooks
+    try:
+        required = set(get_required(trial_info))
+    except Exception as e:
+        logger.debug(f"get_required_q_numbers failed for {study_id}: {e}")
+        return None
+    if not required:
+        return None
+
+    def check(text: str) -> bool:
+        try:
+            return required.issubset(parse(text))
+        except Exception:
+            return False
+
+    return check
+
+
+def _inside_reasoning_block(text: str) -> bool:
+    lowered = text.lower()
+    return any(lowered.rfind(f"<{tag}>") > lowered.rfind(f"</{tag}>") for tag in _REASONING_TAGS)
+
+
+def _field(obj: Any, name: str) -> Any:
+    """Attribute of an SDK object or key of a dict (raw events in tests/mock replays)."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+class StreamAccumulator:
+    """
+    Collects one streamed completion and decides when it can be cut short.
+
+    Feed it OpenAI chunks with add_openai_chunk() or Anthropic events with
+    add_anthropic_event(); both return True once ``stop_check`` passes, at
+    which point the caller should close the stream. The check only sees text up
+    to the last newline, so a value is never taken while its digits are still
+    arriving, and is skipped while a <think>/<reasoning> block is open.
+
+    Args:
+        prompt_tokens_estimate: Prompt size used for usage when the stream is
+            cut before the provider reports usage
+        stop_check: Predicate on the response text so far (see required_answers_check)
+    """
+
+    def __init__(self, prompt_tokens_estimate: int = 0, stop_check: Optional[StopCheck] = None):
+        self.prompt_tokens_estimate = prompt_tokens_estimate
+        self.stop_check = stop_check
+        self.content = ""
+        self.reasoning = ""
+        self.usage: Dict[str, Any] = {}
+        self.finish_reason: Optional[str] = None
+        self.response_id: Optional[str] = None
+        self.model: Optional[str] = None
+        self.early_stop = False
+        self._start = time.perf_counter()
+        self._first_token: Optional[float] = None
+        self._end: Optional[float] = None
+        self._checked_upto = 0
+
+    # Feeding ---------------------------------------------------------------------
+
+    def add_openai_chunk(self, chunk: Any) -> bool:
+        """Consume one chat.completion.chunk; True when the answers are complete."""
+        self.response_id = self.response_id or _field(chunk, "id")
+        self.model = self.model or _field(chunk, "model")
+        usage = _field(chunk, "usage")
+        if usage:
+            self.usage = _openai_usage(usage)
+        for choice in _field(chunk, "choices") or []:
+            delta = _field(choice, "delta")
+            if delta is not None:
+                reasoning = _field(delta, "reasoning") or _field(delta, "reasoning_content")
+                if reasoning:
+                    self._add(reasoning=reasoning)
+                content = _field(delta, "content")
+                if content:
+                    self._add(content=content)
+            self.finish_reason = _field(choice, "finish_reason") or self.finish_reason
+        return self._should_stop()
+
+    def add_anthropic_event(self, event: Any) -> bool:
+        """Consume one Anthropic stream event; True when the answers are complete."""
+        kind = _field(event, "type")
+        if kind == "message_start":
+            message = _field(event, "message")
+            self.response_id = _field(message, "id")
+            self.model = _field(message, "model")
+            usage = _field(message, "usage")
+            if usage:
+                self.usage = _anthropic_usage(usage)
+        elif kind == "content_block_delta":
+            delta = _field(event, "delta")
+            delta_type = _field(delta, "type")
+            if delta_type == "text_delta":
+                self._add(content=_field(delta, "text") or "")
+            elif delta_type == "thinking_delta":
+                self._add(reasoning=_field(delta, "thinking") or "")
+        elif kind == "message_delta":
+            self.finish_reason = _field(_field(event, "delta"), "stop_reason") or self.finish_reason
+            usage = _field(event, "usage")
+            output_tokens = _field(usage, "output_tokens") if usage else None
+            if output_tokens is not None:
+                prompt_tokens = self.usage.get("prompt_tokens", self.prompt_tokens_estimate)
+                self.usage = dict(self.usage, completion_tokens=output_tokens, total_tokens=prompt_tokens + output_tokens)
+        return self._should_stop()
+
+    def _add(self, content: str = "", reasoning: str = "") -> None:
+        if self._first_token is None:
+            self._first_token = time.perf_counter()
+        self.content += content
+        self.reasoning += reasoning
+
+    def _should_stop(self) -> bool:
+        if self.stop_check is None or self.early_stop:
+            return self.early_stop
+        cut = self.content.rfind("\n")
+        if cut < self._checked_upto:  # no new finished line
+            return False
+        self._checked_upto = cut + 1
+        text = self.content[:cut]
+        if _inside_reasoning_block(text) or not self.stop_check(text):
+            return False
+        self.early_stop = True
+        self._end = time.perf_counter()
+        return True
+
+    # Result ----------------------------------------------------------------------
+
+    def result(self) -> Dict[str, Any]:
+        """
+        {"response_text", "usage", "full_api_response", "timing"} for the stream.
+
+        Reasoning is wrapped in <reasoning> tags ahead of the answer, as for
+        non-streamed replies. A stream cut short reports ``finish_reason``
+        "early_stop"; when no usage arrived, usage is estimated (~4 characters
+        per token) and marked ``"estimated": True``.
+        """
+        if self._end is None:
+            self._end = time.perf_counter()
+        content = self.content.strip()
+        response_text = content
+        if self.reasoning:
+            response_text = f"<reasoning>\n{self.reasoning}\n</reasoning>"
+            if content:
+                response_text += f"\n\n{content}"
+
+        usage = dict(self.usage)
+        if "completion_tokens" not in usage:
+            completion_tokens = (len(self.content) + len(self.reasoning)) // 4
+            prompt_tokens = usage.get("prompt_tokens", self.prompt_tokens_estimate)
+            usage = dict(usage, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                         total_tokens=prompt_tokens + completion_tokens, estimated=True)
+
+        finish_reason = "early_stop" if self.early_stop else self.finish_reason
+        message: Dict[str, Any] = {"role": "assistant", "content": self.content}
+        if self.reasoning:
+            message["reasoning"] = self.reasoning
+        full_api_response = {
+            "id": self.response_id,
+            "object": "chat.completion",
+            "model": self.model,
+            "stream": True,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+        return {
+            "response_text": response_text,
+            "usage": usage,
+            "full_api_response": full_api_response,
+            "timing": self.timing(),
+            "early_stop": self.early_stop,
+        }
+
+    def timing(self) -> Dict[str, Optional[float]]:
+        """Seconds from the request to the first token (ttft_s) and to the last one used (total_s)."""
+        end = self._end if self._end is not None else time.perf_counter()
+        return {
+            "ttft_s": round(self._first_token - self._start, 4) if self._first_token is not None else None,
+            "total_s": round(end - self._start, 4),
+        }
+
+
+def _openai_usage(usage: Any) -> Dict[str, Any]:
+    usage_info = {
+        "prompt_tokens": _field(usage, "prompt_tokens") or 0,
+        "completion_tokens": _field(usage, "completion_tokens") or 0,
+        "total_tokens": _field(usage, "total_tokens") or 0,
+    }
+    details = _field(usage, "prompt_tokens_details")
+    cached_tokens = _field(details, "cached_tokens") if details else None
+    if cached_tokens:
+        usage_info["cached_tokens"] = cached_tokens
+    cost = _field(usage, "cost")
+    if cost is not None:
+        usage_info["cost"] = cost
+    return usage_info
+
+
+def _anthropic_usage(usage: Any) -> Dict[str, Any]:
+    """Usage from message_start; completion tokens arrive later with message_delta."""
+    cache_read = _field(usage, "cache_read_input_tokens") or 0
+    cache_creation = _field(usage, "cache_creation_input_tokens") or 0
+    usage_info: Dict[str, Any] = {"prompt_tokens": (_field(usage, "input_tokens") or 0) + cache_read + cache_creation}
+    if cache_read or cache_creation:
+        usage_info["cached_tokens"] = cache_read
+        usage_info["cache_creation_tokens"] = cache_creation
+    return usage_info
+
+
+def summarize_stream_timings(responses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Run-level summary of streamed responses (records carrying ``timing``).
+
+    Returns counts, the early-stop rate and median/p95 time-to-first-token and
+    time-to-complete in seconds, or None if no response was streamed.
+    """
+    timed = [r for r in responses if isinstance(r.get("timing"), dict)]
+    if not timed:
+        return None
+
+    def quantiles(key: str) -> Dict[str, Optional[float]]:
+        values = sorted(r["timing"][key] for r in timed if r["timing"].get(key) is not None)
+        if not values:
+            return {"median": None, "p95": None}
+        return {
+            "median": round(values[len(values) // 2], 4),
+            "p95": round(values[min(len(values) - 1, int(0.95 * len(values)))], 4),
+        }
+
+    early_stopped = sum(1 for r in timed if r.get("early_stop"))
+    return {
+        "responses": len(timed),
+        "early_stopped": early_stopped,
+        "early_stop_rate": round(early_stopped / len(timed), 4),
+        "ttft_s": quantiles("ttft_s"),
+        "total_s": quantiles("total_s"),
+    }
@@ -0,0 +1,209 @@
+"""
+History-adaptive ``max_tokens`` budgets for Stage 5 trials.
+
+Every trial used to request 8192 completion tokens, although most study
+answers are a few dozen ``Qk=value`` lines. Providers admit requests against
+tokens/min limits using ``max_tokens`` and schedule long budgets behind short
+ones, so an oversized budget costs queueing time and concurrency even when the
+reply is short.
+
+TokenBudgetPlanner learns completion lengths per study and per sub-study
+(``trial_info["sub_study_id"]``) from earlier ``raw_responses.jsonl`` logs of
+the same model configuration and from the responses of the running
+simulation. It sets ``max_tokens`` at a high percentile of those lengths (plus
+headroom); responses cut off by the budget (``finish_reason`` "length" /
+``stop_reason`` "max_tokens") are retried by the agent with a larger budget,
+up to the old fixed ceiling.
+"""
+
+import bisect
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.response_log import load_response_log
+
+DEFAULT_MAX_TOKENS = 8192
+
+# finish_reason (OpenAI-compatible) / stop_reason (Anthropic) of a reply cut by max_tokens
+TRUNCATED_REASONS = ("length", "max_tokens")
+
+BudgetKey = Tuple[Optional[str], Optional[str]]
+
+
+def finish_reason(llm_result: Optional[Dict[str, Any]]) -> Optional[str]:
+    """finish_reason / stop_reason recorded in a parsed LLM result or response record."""
+    full = (llm_result or {}).get("full_api_response") or {}
+    if not isinstance(full, dict):
+        return None
+    choices = full.get("choices")
+    if choices and isinstance(choices[0], dict):
+        return choices[0].get("finish_reason")
+    return full.get("stop_reason")
+
+
+def is_truncated(llm_result: Optional[Dict[str, Any]]) -> bool:
+    return finish_reason(llm_result) in TRUNCATED_REASONS
+
+
+class TokenBudgetPlanner:
+    """
+    Per-study / per-sub-study completion-length model that picks ``max_tokens``.
+
+    Budgets fall back from the sub-study to the whole study to ``ceiling``
+    while fewer than ``min_samples`` lengths are known. Truncated responses are
+    censored observations (the true length is unknown but at least the budget),
+    so they count as unbounded: if more than ``1 - percentile`` of a group was
+    truncated, the group gets the ceiling again. Thread-safe.
+
+    Args:
+        percentile: Quantile of observed completion lengths to cover (e.g. 0.99)
+        headroom: Multiplier on that quantile
+        min_tokens: Lower bound of a budget
+        ceiling: Upper bound of a budget and of retries (the former fixed max_tokens)
+        min_samples: Observations a group needs before its budget is used
+        retry_factor: Budget multiplier for retrying a truncated response
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.99,
+        headroom: float = 1.25,
+        min_tokens: int = 256,
+        ceiling: int = DEFAULT_MAX_TOKENS,
+        min_samples: int = 20,
+        retry_factor: float = 2.0,
+    ):
+        if not 0.0 < percentile <= 1.0:
+            raise ValueError(f"percentile must be in (0, 1], got {percentile}")
+        if retry_factor <= 1.0:
+            raise ValueError(f"retry_factor must be > 1, got {retry_factor}")
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.retry_factor = retry_factor
+        self._lengths: Dict[BudgetKey, List[float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"observed": 0, "truncated": 0, "retries": 0, "history": 0}
+
+    # Learning --------------------------------------------------------------------
+
+    def observe(self, study_id: Optional[str], sub_study_id: Optional[str], completion_tokens: Optional[int], truncated: bool = False) -> None:
+        """Add one completion length (for the sub-study and for the whole study)."""
+        if not completion_tokens and not truncated:
+            return
+        value = math.inf if truncated else float(completion_tokens)
+        with self._lock:
+            self._stats["observed"] += 1
+            self._stats["truncated"] += int(truncated)
+            keys = {(study_id, sub_study_id), (study_id, None)}
+            for key in keys:
+                bisect.insort(self._lengths.setdefault(key, []), value)
+
+    def observe_response(self, study_id: Optional[str], record: Dict[str, Any]) -> bool:
+        """
+        Learn from a response record (raw_responses.jsonl line, or LLM result plus trial_info).
+
+        A reply cut off by max_tokens only counts as censored if the study
+        evaluator cannot parse every required Q from it; one truncated in a
+        trailing explanation fitted its answers into the budget. Returns whether
+        the reply was cut off before its answers (i.e. worth retrying).
+        """
+        from src.llm.streaming import required_answers_check
+
+        usage = record.get("usage") or {}
+        trial_info = record.get("trial_info") or {}
+        truncated = is_truncated(record)
+        if truncated:
+            check = required_answers_check(study_id, trial_info if isinstance(trial_info, dict) else None)
+            truncated = check is None or not check(record.get("response_text") or record.get("raw_response_text") or "")
+        if usage.get("estimated") and not record.get("early_stop"):
+            return truncated  # stream cut without a provider count: length unknown
+        self.observe(
+            study_id,
+            trial_info.get("sub_study_id") if isinstance(trial_info, dict) else None,
+            usage.get("completion_tokens"),
+            truncated=truncated,
+        )
+        return truncated
+
+    def learn_from_logs(self, study_id: str, paths: Iterable[Path]) -> int:
+        """
+        Observe every response in the given raw_responses.jsonl files; returns the count.
+
+        History only shapes the budgets: the observed/truncated counters keep
+        describing the current run.
+        """
+        with self._lock:
+            counters = dict(self._stats)
+        n = 0
+        for path in paths:
+            for records in load_response_log(Path(path)).values():
+                for record in records:
+                    self.observe_response(study_id, record)
+                    n += 1
+        with self._lock:
+            self._stats.update(observed=counters["observed"], truncated=counters["truncated"])
+            self._stats["history"] += n
+        return n
+
+    # Budgets ---------------------------------------------------------------------
+
+    def max_tokens_for(self, study_id: Optional[str], trial_info: Optional[Dict[str, Any]] = None) -> int:
+        """max_tokens for a trial: learned sub-study budget, else study budget, else the ceiling."""
+        sub_study_id = (trial_info or {}).get("sub_study_id")
+        with self._lock:
+            for key in ((study_id, sub_study_id), (study_id, None)):
+                lengths = self._lengths.get(key)
+                if lengths and len(lengths) >= self.min_samples:
+                    return self._budget(lengths)
+        return self.ceiling
+
+    def _budget(self, sorted_lengths: List[float]) -> int:
+        index = min(len(sorted_lengths) - 1, max(0, math.ceil(self.percentile * len(sorted_lengths)) - 1))
+        quantile = sorted_lengths[index]
+        if math.isinf(quantile):
+            return self.ceiling
+        budget = int(math.ceil(quantile * self.headroom / 64.0) * 64)  # round up to a multiple of 64
+        return max(self.min_tokens, min(self.ceiling, budget))
+
+    def retry_budget(self, max_tokens: int) -> int:
+        """Budget for retrying a response that was truncated at ``max_tokens``."""
+        with self._lock:
+            self._stats["retries"] += 1
+        return min(self.ceiling, int(max_tokens * self.retry_factor))
+
+    def can_retry(self, max_tokens: int) -> bool:
+        return max_tokens < self.ceiling
+
+    # Reporting -------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters (responses ``observed`` in this run, of which ``truncated`` before
+        their answers; truncation ``retries``; ``history`` responses learned from logs)
+        plus the current budget of every study / sub-study with enough data.
+        """
+        with self._lock:
+            budgets = {
+                f"{study}/{sub}" if sub else str(study): self._budget(lengths)
+                for (study, sub), lengths in sorted(self._lengths.items(), key=lambda kv: (str(kv[0][0]), str(kv[0][1])))
+                if len(lengths) >= self.min_samples
+            }
+            return dict(self._stats, percentile=self.percentile, ceiling=self.ceiling, budgets=budgets)
+
+
+def history_logs(results_root: Path, study_id: str, config_folder: str) -> List[Path]:
+    """
+    raw_responses.jsonl files of earlier runs with the same study and model
+    configuration folder (``results/<folder>/...`` and ``results/runs/<run>/...``).
+    """
+    results_root = Path(results_root)
+    patterns = (f"*/{study_id}/{config_folder}/raw_responses.jsonl", f"runs/*/{study_id}/{config_folder}/raw_responses.jsonl")
+    found = []
+    for pattern in patterns:
+        found.extend(sorted(results_root.glob(pattern)))
+    return found
@@ -13,10 +13,10 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 from typing import Dict, Any, List
 
 # Module-level cache for ground truth and metadata (loaded once, reused across bootstrap iterations)
-_ground_truth_cache = None
 _metadata_cache = None
 _finding_weights_cache = None
 _test_weights_cache = None
@@ -75,18 +75,14 @@ def evaluate_study(results):
     Uses module-level caching to avoid reloading ground truth and metadata
     on every bootstrap iteration (significant performance improvement).
     """
-    global _ground_truth_cache, _metadata_cache, _finding_weights_cache, _test_weights_cache
+    global _metadata_cache, _finding_weights_cache, _test_weights_cache
     
     # 1. Load Ground Truth Data and Metadata (with caching)
     study_id = "study_001"
     
-    # Load ground truth (cached)
-    if _ground_truth_cache is None:
-        study_dir = Path(f"data/studies/{study_id}")
-        with open(study_dir / "ground_truth.json", 'r') as f:
-            _ground_truth_cache = json.load(f)
-    
-    ground_truth = _ground_truth_cache
+    # Load ground truth (cached per file hash, with the human-side statistics)
+    human_ref = load_human_reference(Path(f"data/studies/{study_id}"))
+    ground_truth = human_ref.ground_truth
     
     # Load metadata (cached)
     if _metadata_cache is None:
@@ -557,7 +553,8 @@ def evaluate_study(results):
                     test_result, test_gt, p_val_agent, t_stat_agent, statistical_test_type,
                     n_agent=n_agent_1, n2_agent=n_agent_2,
                     n_human=n_human_1, n2_human=n_human_2,
-                    independent=True
+                    independent=True,
+                    human_reference=human_ref
                 )
                 
                 test_results.append(test_result)
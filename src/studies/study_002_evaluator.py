@@ -15,6 +15,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def extract_numeric(val: Any) -> Optional[float]:
     """Extracts the first numeric value from a string."""
@@ -73,8 +74,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_002"
     study_dir = Path(f"data/studies/{study_id}")
     
-    with open(study_dir / "ground_truth.json", "r") as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(study_dir / "ground_truth.json")
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -334,7 +335,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         test_result, f1_gt_1, p_val_agent, t_stat, "t-test",
         n_agent=len(all_ais) if len(all_ais) > 2 else None,
         n_human=103,
-        independent=False
+        independent=False,
+        human_reference=human_ref
     )
     test_results.append(test_result)
 
@@ -372,7 +374,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_2, f1_gt_2, p_val_agent_2, r_val, "correlation",
         n_agent=len(e1_valid) if len(e1_valid) > 5 else None,
-        n_human=103
+        n_human=103,
+        human_reference=human_ref
     )
     test_results.append(test_result_2)
 
@@ -423,7 +426,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         n2_agent=len(scores_low) if len(scores_low) > 2 else None,
         n_human=52,  # Approximate from df=102 (balanced groups)
         n2_human=52,
-        independent=True
+        independent=True,
+        human_reference=human_ref
     )
     test_results.append(test_result_f2)
     
@@ -492,7 +496,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         n2_agent=len(low_extreme_rates) if len(low_extreme_rates) > 2 else None,
         n_human=52,  # Approximate from df=102
         n2_human=52,
-        independent=True
+        independent=True,
+        human_reference=human_ref
     )
     test_results.append(test_result_f3)
 
@@ -558,7 +563,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f4_1, f4_gt_1, p_val_agent_f4_1, r_val, "correlation",
         n_agent=len(item_ais) if len(item_ais) > 3 else None,
-        n_human=15
+        n_human=15,
+        human_reference=human_ref
     )
     test_results.append(test_result_f4_1)
     
@@ -617,7 +623,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         test_result_f4_2, f4_gt_2, p_val_agent_f4_2, t_stat_agent, "t-test",
         n_agent=len(high_ais_pooled) if len(high_ais_pooled) > 10 else None,
         n_human=15,
-        independent=False
+        independent=False,
+        human_reference=human_ref
     )
     test_results.append(test_result_f4_2)
     
@@ -676,7 +683,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         test_result_f4_3, f4_gt_3, p_val_agent_f4_3, t_stat_agent, "t-test",
         n_agent=len(low_ais_pooled) if len(low_ais_pooled) > 10 else None,
         n_human=15,
-        independent=False
+        independent=False,
+        human_reference=human_ref
     )
     test_results.append(test_result_f4_3)
     
@@ -719,7 +727,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         n2_agent=len(conf_calib) if len(conf_calib) > 2 else None,
         n_human=78,  # Approximate from df=154
         n2_human=78,
-        independent=True
+        independent=True,
+        human_reference=human_ref
     )
     test_results.append(test_result_f4_4)
 
@@ -788,7 +797,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_exp2_1, f2_gt_1, p_val_agent_exp2_1, chi2, "chi-square",
         contingency_agent=contingency_agent_exp2_1,
-        contingency_human=contingency_human_exp2_1
+        contingency_human=contingency_human_exp2_1,
+        human_reference=human_ref
     )
     test_results.append(test_result_exp2_1)
     
@@ -843,7 +853,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_exp2_2, f2_gt_2, p_val_agent_exp2_2, chi2, "chi-square",
         contingency_agent=contingency_agent_exp2_2,
-        contingency_human=contingency_human_exp2_2
+        contingency_human=contingency_human_exp2_2,
+        human_reference=human_ref
     )
     test_results.append(test_result_exp2_2)
     
@@ -914,7 +925,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_exp3_1, f3_gt_1, p_val_agent_exp3_1, chi2, "chi-square",
         contingency_agent=contingency_agent_exp3_1,
-        contingency_human=contingency_human_exp3_1
+        contingency_human=contingency_human_exp3_1,
+        human_reference=human_ref
     )
     test_results.append(test_result_exp3_1)
     
@@ -976,7 +988,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_exp3_2, f3_gt_2, p_val_agent_exp3_2, chi2, "chi-square",
         contingency_agent=contingency_agent_exp3_2,
-        contingency_human=contingency_human_exp3_2
+        contingency_human=contingency_human_exp3_2,
+        human_reference=human_ref
     )
     test_results.append(test_result_exp3_2)
 
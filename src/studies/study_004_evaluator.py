@@ -12,6 +12,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, str]:
     """Parse Qk=<value> or Qk: <value> or Qk.n=<value> format from agent response text."""
@@ -77,8 +78,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         study_dir = Path("data/studies/study_004")
         gt_path = study_dir / "ground_truth.json"
 
-    with open(gt_path, 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -234,7 +235,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         add_statistical_replication_fields(
             test_result, test_gt, p_val_agent, chi2_agent, "chi-square",
             contingency_agent=contingency_agent,
-            contingency_human=contingency_human
+            contingency_human=contingency_human,
+            human_reference=human_ref
         )
         
         test_results.append(test_result)
@@ -423,7 +425,7 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         }
         
         # Add statistical replication fields
-        add_statistical_replication_fields(test_result_f6, test_gt_f6, p_val_agent_f6, f_stat_agent, "f-test")
+        add_statistical_replication_fields(test_result_f6, test_gt_f6, p_val_agent_f6, f_stat_agent, "f-test", human_reference=human_ref)
         
         test_results.append(test_result_f6)
 
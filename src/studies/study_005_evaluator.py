@@ -15,6 +15,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, str]:
     """Parse Qk=<value> or Qk.n=<value> format from agent response.
@@ -107,8 +108,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_005"
     study_dir = Path(f"data/studies/{study_id}")
     
-    with open(study_dir / "ground_truth.json", 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(study_dir / "ground_truth.json")
+    ground_truth = human_ref.ground_truth
     
     metadata = {}
     metadata_path = study_dir / "metadata.json"
@@ -348,7 +349,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f1, test_gt_f1, p_val_f1, chi2_f1, "chi-square",
         contingency_agent=contingency_agent_f1,
-        contingency_human=contingency_human_f1
+        contingency_human=contingency_human_f1,
+        human_reference=human_ref
     )
     test_results.append(test_result_f1)
 
@@ -389,7 +391,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
         n2_agent=len(help_moral_f2) if len(help_moral_f2) > 2 else None,
         n_human=61,  # From t(120), assuming balanced
         n2_human=61,
-        independent=True
+        independent=True,
+        human_reference=human_ref
     )
     test_results.append(test_result_f2)
 
@@ -433,7 +436,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f3, test_gt_f3, p_val_f3, chi2_f3, "chi-square",
         contingency_agent=contingency_agent_f3,
-        contingency_human=contingency_human_f3
+        contingency_human=contingency_human_f3,
+        human_reference=human_ref
     )
     test_results.append(test_result_f3)
 
@@ -474,7 +478,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f4, test_gt_f4, p_val_f4, r_val_f4, "correlation",
         n_agent=len(ints_f4) if len(ints_f4) > 5 else None,
-        n_human=122  # From r(120), n=122
+        n_human=122,  # From r(120), n=122
+        human_reference=human_ref
     )
     test_results.append(test_result_f4)
 
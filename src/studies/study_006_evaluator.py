@@ -14,6 +14,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, str]:
     """Parse Qk=<value>, Qk: <value>, or Qk.n=<value> format"""
@@ -79,8 +80,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_006"
     study_dir = Path(f"data/studies/{study_id}")
     
-    with open(study_dir / "ground_truth.json", 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(study_dir / "ground_truth.json")
+    ground_truth = human_ref.ground_truth
     
     metadata = {}
     metadata_path = study_dir / "metadata.json"
@@ -482,7 +483,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                 add_statistical_replication_fields(
                     test_result, test, p_val_agent, chi2_agent, "chi-square",
                     contingency_agent=contingency_agent,
-                    contingency_human=contingency_human
+                    contingency_human=contingency_human,
+                    human_reference=human_ref
                 )
                 
                 test_results.append(test_result)
@@ -14,6 +14,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, str]:
     """
@@ -75,8 +76,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_007"
     study_dir = Path(f"data/studies/{study_id}")
     gt_path = study_dir / "ground_truth.json"
-    with open(gt_path, 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -379,11 +380,12 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                         test_result, test, p_val_agent, t_stat_agent, "t-test",
                         n_agent=n_agent,
                         n_human=n_human,
-                        independent=False  # One-sample t-tests
+                        independent=False,  # One-sample t-tests
+                        human_reference=human_ref
                     )
                 else:
                     # F-test (F1) - not supported yet for effect sizes
-                    add_statistical_replication_fields(test_result, test, p_val_agent, t_stat_agent, "f-test")
+                    add_statistical_replication_fields(test_result, test, p_val_agent, t_stat_agent, "f-test", human_reference=human_ref)
                 
                 test_results.append(test_result)
 
@@ -14,6 +14,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, str]:
     """Parse Qk=<value> or Qk: <value> or Qk.n=<value> format from response text."""
@@ -57,8 +58,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_008"
     study_dir = Path(f"data/studies/{study_id}")
     gt_path = study_dir / "ground_truth.json"
-    with open(gt_path, 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -386,11 +387,12 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                         n2_agent=n2_agent,
                         n_human=n_human,
                         n2_human=n2_human,
-                        independent=independent
+                        independent=independent,
+                        human_reference=human_ref
                     )
                 else:
                     # F-test - not supported yet for effect sizes
-                    add_statistical_replication_fields(test_result, test, p_val_agent, test_stat, test_type)
+                    add_statistical_replication_fields(test_result, test, p_val_agent, test_stat, test_type, human_reference=human_ref)
                 
                 test_results.append(test_result)
 
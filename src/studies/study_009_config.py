@@ -1,10 +1,10 @@
+import functools
 import json
 import re
 import numpy as np
 from scipy import stats
 from pathlib import Path
 from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 from src.core.study_config import BaseStudyConfig, StudyConfigRegistry
@@ -12,8 +12,6 @@ from src.agents.prompt_builder import PromptBuilder
 from src.agents.llm_participant_agent import LLMParticipantAgent, ParticipantPool
 
 import random
-from typing import Dict, Any, List
-from pathlib import Path
 
 class CustomPromptBuilder(PromptBuilder):
     def __init__(self, study_path: Path):
@@ -320,9 +318,11 @@ class StudyStudy009Config(BaseStudyConfig):
         
         This method:
         1. Groups participants by condition (sub_study_id)
-        2. For each group, runs 4 rounds sequentially
-        3. Calculates feedback from all participants' choices each round
-        4. Provides feedback between rounds
+        2. Splits each condition into sessions of 15-18 participants
+        3. Runs the 4 rounds of every session (all conditions) on one shared
+           worker pool via SessionScheduler: each session moves to its next
+           round as soon as its own round is done
+        4. Calculates feedback from all participants' choices each round
         
         Args:
             trials: List of trial dictionaries (one per participant)
@@ -333,271 +333,244 @@ class StudyStudy009Config(BaseStudyConfig):
         Returns:
             Results dictionary with individual_data in expected format
         """
+        from src.agents.session_scheduler import SessionScheduler
+        
         if prompt_builder is None:
             prompt_builder = self.prompt_builder
         
         # Group trials by condition
         groups = self._group_participants_by_condition(trials)
         
-        all_individual_data = []
         participant_id_offset = 0  # Track offset to ensure unique IDs across groups
+        sessions = {}
         
-        # Process each condition group independently
         # Split each condition into multiple sessions (15-18 participants per session, matching human experiment)
         for sub_study_id, group_trials in groups.items():
             p_value = self.p_value_map.get(sub_study_id, 0.5)
             n_participants_total = len(group_trials)
             
-            # Split into sessions: 15-18 participants per session (matching human experiment design)
             # Use random session size between 15-18 to match human variability
-            import random
             session_size_min = 15
             session_size_max = 18
             
-            # Create sessions
-            sessions = []
+            condition_sessions = []
             remaining_trials = group_trials.copy()
             while remaining_trials:
-                # Random session size between 15-18
                 session_size = random.randint(session_size_min, session_size_max)
                 session_size = min(session_size, len(remaining_trials))  # Don't exceed remaining
-                
-                session_trials = remaining_trials[:session_size]
+                condition_sessions.append(remaining_trials[:session_size])
                 remaining_trials = remaining_trials[session_size:]
-                sessions.append(session_trials)
-            
-            print(f"Running group experiment for {sub_study_id} with {n_participants_total} participants in {len(sessions)} sessions")
             
-            # Pre-calculate participant ID offsets for each session (needed for parallel execution)
-            session_id_offsets = []
-            current_offset = participant_id_offset
-            for session_trials in sessions:
-                session_id_offsets.append(current_offset)
-                current_offset += len(session_trials)
+            print(f"Group experiment for {sub_study_id}: {n_participants_total} participants in {len(condition_sessions)} sessions")
             
-            # Define function to process a single session (for parallelization)
-            def process_session(session_data):
-                """Process a single session and return its results."""
-                session_idx, session_trials, session_participant_id_offset = session_data
-                n_participants = len(session_trials)
-                print(f"  Session {session_idx + 1}/{len(sessions)}: {n_participants} participants")
-                
-                session_results = []
-                
-                # Extract profiles from trials
-                group_profiles = [trial.get("profile", {}) for trial in session_trials]
-                
-                # Create participant pool for this session with profiles from trials
-                pool_kwargs = participant_pool_kwargs.copy()
-                # Remove study_specification since we pass it explicitly
-                pool_kwargs.pop("study_specification", None)
-                pool_kwargs["profiles"] = group_profiles
-                pool_kwargs["n_participants"] = n_participants
-                
-                pool = ParticipantPool(
-                    study_specification=self.specification,
-                    **pool_kwargs
+            # Participant IDs are sequential and unique across all groups and sessions
+            for session_idx, session_trials in enumerate(condition_sessions):
+                sessions[(sub_study_id, session_idx)] = self._run_session(
+                    sub_study_id=sub_study_id,
+                    p_value=p_value,
+                    session_idx=session_idx,
+                    session_trials=session_trials,
+                    participant_id_offset=participant_id_offset,
+                    participant_pool_kwargs=participant_pool_kwargs,
+                    prompt_builder=prompt_builder
                 )
+                participant_id_offset += len(session_trials)
+        
+        # One worker budget for the whole study instead of one pool per session
+        scheduler = SessionScheduler(max_workers=participant_pool_kwargs.get("num_workers", 1))
+        print(f"Running {len(sessions)} sessions x 4 rounds on {scheduler.max_workers} shared workers")
+        with tqdm(desc="Group rounds", unit="call") as pbar:
+            session_results = scheduler.run(sessions, progress=pbar)
+        for (sub_study_id, session_idx), error in scheduler.errors.items():
+            print(f"  Error in {sub_study_id} session {session_idx + 1}: {error}")
+        
+        all_individual_data = [data for results in session_results.values() for data in results]
+        
+        # Sort by participant_id
+        all_individual_data.sort(key=lambda x: x.get('participant_id', 0))
+        
+        return {
+            "individual_data": all_individual_data
+        }
+    
+    def _run_session(
+        self,
+        sub_study_id: str,
+        p_value: float,
+        session_idx: int,
+        session_trials: List[Dict[str, Any]],
+        participant_id_offset: int,
+        participant_pool_kwargs: Dict[str, Any],
+        prompt_builder: Any
+    ):
+        """
+        Session generator for SessionScheduler: yields one list of participant calls per round.
+        
+        Returns:
+            List of individual_data entries for the session's participants
+        """
+        n_participants = len(session_trials)
+        
+        # Extract profiles from trials
+        group_profiles = [trial.get("profile", {}) for trial in session_trials]
+        
+        # Create participant pool for this session with profiles from trials
+        pool_kwargs = participant_pool_kwargs.copy()
+        # Remove study_specification since we pass it explicitly
+        pool_kwargs.pop("study_specification", None)
+        pool_kwargs["profiles"] = group_profiles
+        pool_kwargs["n_participants"] = n_participants
+        
+        pool = ParticipantPool(
+            study_specification=self.specification,
+            **pool_kwargs
+        )
+        
+        for idx, (participant, trial) in enumerate(zip(pool.participants, session_trials)):
+            participant.participant_id = participant_id_offset + idx
+            participant.profile["participant_id"] = participant_id_offset + idx
+            # Update profile with any additional trial metadata
+            if "profile" in trial:
+                participant.profile.update(trial["profile"])
+        
+        # Initialize conversation sessions for all participants in this session
+        system_prompt = pool.participants[0]._construct_system_prompt() if pool.participants else ""
+        for participant in pool.participants:
+            participant.start_conversation(system_prompt)
+        
+        # Store round-by-round choices and usage for each participant in this session
+        participant_choices = {p.participant_id: {} for p in pool.participants}
+        participant_usage = {p.participant_id: {
+            "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0
+        } for p in pool.participants}
+        # Store raw responses for each round
+        participant_round_responses = {p.participant_id: {} for p in pool.participants}
+        round_feedbacks = []
+        
+        def get_round_choice(participant, prompt, round_num):
+            """Get a single participant's choice for this round using stateful conversation."""
+            try:
+                # Use continue_conversation for stateful interaction
+                # Use 8192 tokens (4096*2) to allow for full responses including explanations/reasoning
+                result = participant.continue_conversation(prompt, max_tokens=8192)
+                response_text = result["response_text"]
+                usage = result.get("usage", {})
+                full_api_response = result.get("full_api_response", {})
                 
-                # Ensure participant IDs are sequential and unique across all groups and sessions
-                for idx, (participant, trial) in enumerate(zip(pool.participants, session_trials)):
-                    participant.participant_id = session_participant_id_offset + idx
-                    participant.profile["participant_id"] = session_participant_id_offset + idx
-                    # Update profile with any additional trial metadata
-                    if "profile" in trial:
-                        participant.profile.update(trial["profile"])
-                
-                # Initialize conversation sessions for all participants in this session
-                system_prompt = pool.participants[0]._construct_system_prompt() if pool.participants else ""
-                for participant in pool.participants:
-                    participant.start_conversation(system_prompt)
-                
-                # Store round-by-round choices and usage for each participant in this session
-                participant_choices = {p.participant_id: {} for p in pool.participants}
-                participant_usage = {p.participant_id: {
-                    "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0
-                } for p in pool.participants}
-                # Store raw responses for each round
-                participant_round_responses = {p.participant_id: {} for p in pool.participants}
-                round_feedbacks = []
-                
-                # Run 4 rounds sequentially for this session
-                previous_feedback = None
+                # Log first few responses for debugging (especially for v1_empty)
+                if participant.participant_id < 2:
+                    print(f"      [Debug] P{participant.participant_id} R{round_num} response: {response_text[:100]}...")
                 
-                for round_num in range(1, 5):
-                    print(f"    Round {round_num}...")
-                    
-                    # Build prompts for this round with previous feedback
-                    round_prompts = {}
-                    for participant, trial in zip(pool.participants, session_trials):
-                        trial_with_profile = {**trial, "participant_profile": participant.profile}
-                        # Get this participant's previous round choice
-                        prev_choice = None
-                        if round_num > 1:
-                            prev_choice = participant_choices[participant.participant_id].get(f"Q{round_num - 1}")
-                        
-                        round_prompts[participant.participant_id] = prompt_builder.build_round_prompt(
-                            round_number=round_num,
-                            previous_round_feedback=previous_feedback,
-                            trial_metadata=trial_with_profile,
-                            p_value=p_value,
-                            participant_previous_choice=prev_choice
-                        )
-                    
-                    # Collect choices from all participants simultaneously
-                    round_choices = {}
-                    
-                    # Run all participants in parallel for this round using stateful conversation
-                    def get_round_choice(participant, prompt):
-                        """Get a single participant's choice for this round using stateful conversation."""
-                        try:
-                            # Use continue_conversation for stateful interaction
-                            # Use 8192 tokens (4096*2) to allow for full responses including explanations/reasoning
-                            result = participant.continue_conversation(prompt, max_tokens=8192)
-                            response_text = result["response_text"]
-                            usage = result.get("usage", {})
-                            full_api_response = result.get("full_api_response", {})
-                            
-                            # Log first few responses for debugging (especially for v1_empty)
-                            if participant.participant_id < 2:
-                                print(f"      [Debug] P{participant.participant_id} R{round_num} response: {response_text[:100]}...")
-                            
-                            choice = self._extract_choice_from_response(response_text, round_num)
-                            
-                            # If extraction failed, log the full response for debugging
-                            if choice is None and participant.participant_id < 2:
-                                print(f"      [Warning] P{participant.participant_id} R{round_num} failed to extract choice from: {response_text}")
-                            
-                            return participant.participant_id, choice, usage, response_text, full_api_response
-                        except Exception as e:
-                            print(f"      Warning: Participant {participant.participant_id} failed in round {round_num}: {e}")
-                            import traceback
-                            traceback.print_exc()
-                            return participant.participant_id, None, {}, "", {}
-                    
-                    # Execute all participants in parallel
-                    with ThreadPoolExecutor(max_workers=participant_pool_kwargs.get("num_workers", 1)) as executor:
-                        futures = {
-                            executor.submit(get_round_choice, p, round_prompts[p.participant_id]): p.participant_id
-                            for p in pool.participants
-                        }
-                        
-                        for future in as_completed(futures):
-                            pid, choice, usage, response_text, full_api_response = future.result()
-                            round_choices[pid] = choice
-                            participant_choices[pid][f"Q{round_num}"] = choice
-                            # Store raw response for this round
-                            participant_round_responses[pid][f"round_{round_num}"] = {
-                                "response_text": response_text,
-                                "raw_response_text": response_text,  # Keep for compatibility
-                                "full_api_response": full_api_response,
-                                "usage": usage,
-                                "extracted_choice": choice
-                            }
-                            # Accumulate usage
-                            for key in ["prompt_tokens", "completion_tokens", "total_tokens"]:
-                                participant_usage[pid][key] += usage.get(key, 0)
-                            participant_usage[pid]["cost"] += usage.get("cost", 0.0)
-                    
-                    # Calculate feedback for this round
-                    round_feedback = self._calculate_round_feedback(round_choices, p_value)
-                    
-                    # Store round feedback
-                    round_feedbacks.append({
-                        "round": round_num,
-                        "feedback": round_feedback
-                    })
-                    
-                    # Prepare feedback for next round (will be customized per participant)
-                    # The build_round_prompt will add each participant's own choice
-                    if round_num < 4:
-                        previous_feedback = {
-                            "mean": round_feedback["mean"],
-                            "p_times_mean": round_feedback["p_times_mean"],
-                            "winning_number": round_feedback["winning_number"]
-                        }
+                choice = self._extract_choice_from_response(response_text, round_num)
                 
-                # Clear conversation history for all participants in this session (cleanup)
-                # This should happen AFTER all rounds are complete
-                for participant in pool.participants:
-                    participant.clear_conversation()
+                # If extraction failed, log the full response for debugging
+                if choice is None and participant.participant_id < 2:
+                    print(f"      [Warning] P{participant.participant_id} R{round_num} failed to extract choice from: {response_text}")
                 
-                # Aggregate results per participant in expected format for this session
-                for participant in pool.participants:
-                    pid = participant.participant_id
-                    choices = participant_choices[pid]
-                    
-                    # Build response text in Q1=, Q2=, Q3=, Q4= format for evaluator compatibility
-                    response_parts = []
-                    for i in range(1, 5):
-                        choice = choices.get(f'Q{i}')
-                        if choice is not None:
-                            response_parts.append(f"Q{i}={choice}")
-                        else:
-                            response_parts.append(f"Q{i}=N/A")
-                    response_text = ", ".join(response_parts)
-                    
-                    # Find corresponding trial
-                    trial = next((t for t in session_trials if t.get("profile", {}).get("participant_id") == pid), None)
-                    if trial is None:
-                        # Fallback: match by index
-                        trial_idx = pool.participants.index(participant) if participant in pool.participants else 0
-                        trial = session_trials[trial_idx] if trial_idx < len(session_trials) else {}
-                    
-                    individual_data = {
-                        "participant_id": pid,
-                        "profile": participant.profile,
-                        "responses": [{
-                            "response_text": response_text,
-                            "raw_response_text": response_text,  # Keep for compatibility
-                            "usage": participant_usage[pid],
-                            "round_responses": participant_round_responses[pid],  # Store all round-by-round responses
-                            "trial_info": {
-                                "sub_study_id": sub_study_id,
-                                "session_id": f"{sub_study_id}_session_{session_idx}",  # Unique session identifier
-                                "session_idx": session_idx,  # Also save index for sorting
-                                "round_feedbacks": round_feedbacks.copy()  # Same feedback for all participants in session
-                            }
-                        }]
-                    }
-                    session_results.append(individual_data)
+                return participant.participant_id, choice, usage, response_text, full_api_response
+            except Exception as e:
+                print(f"      Warning: Participant {participant.participant_id} failed in round {round_num}: {e}")
+                import traceback
+                traceback.print_exc()
+                return participant.participant_id, None, {}, "", {}
+        
+        # Run 4 rounds sequentially for this session
+        previous_feedback = None
+        
+        for round_num in range(1, 5):
+            # Build prompts for this round with previous feedback
+            round_calls = []
+            for participant, trial in zip(pool.participants, session_trials):
+                trial_with_profile = {**trial, "participant_profile": participant.profile}
+                # Get this participant's previous round choice
+                prev_choice = None
+                if round_num > 1:
+                    prev_choice = participant_choices[participant.participant_id].get(f"Q{round_num - 1}")
                 
-                return session_results
-            
-            # Parallelize session execution
-            session_data_list = [
-                (idx, session_trials, session_id_offsets[idx])
-                for idx, session_trials in enumerate(sessions)
-            ]
+                prompt = prompt_builder.build_round_prompt(
+                    round_number=round_num,
+                    previous_round_feedback=previous_feedback,
+                    trial_metadata=trial_with_profile,
+                    p_value=p_value,
+                    participant_previous_choice=prev_choice
+                )
+                round_calls.append(functools.partial(get_round_choice, participant, prompt, round_num))
             
-            # Use ThreadPoolExecutor to run sessions in parallel
-            max_workers = participant_pool_kwargs.get("num_workers", 1)
-            # For sessions, we can use more workers (sessions are independent)
-            # But limit to number of sessions to avoid overhead
-            session_workers = min(max_workers, len(sessions), 10)  # Cap at 10 to avoid too many threads
+            # All participants of the round run on the shared workers; resume when all have answered
+            round_results = yield round_calls
             
-            with ThreadPoolExecutor(max_workers=session_workers) as executor:
-                futures = {
-                    executor.submit(process_session, data): data[0]
-                    for data in session_data_list
+            round_choices = {}
+            for pid, choice, usage, response_text, full_api_response in round_results:
+                round_choices[pid] = choice
+                participant_choices[pid][f"Q{round_num}"] = choice
+                # Store raw response for this round
+                participant_round_responses[pid][f"round_{round_num}"] = {
+                    "response_text": response_text,
+                    "raw_response_text": response_text,  # Keep for compatibility
+                    "full_api_response": full_api_response,
+                    "usage": usage,
+                    "extracted_choice": choice
                 }
-                
-                for future in as_completed(futures):
-                    session_idx = futures[future]
-                    try:
-                        session_results = future.result()
-                        all_individual_data.extend(session_results)
-                    except Exception as e:
-                        print(f"  Error in session {session_idx + 1}: {e}")
-                        import traceback
-                        traceback.print_exc()
+                # Accumulate usage
+                for key in ["prompt_tokens", "completion_tokens", "total_tokens"]:
+                    participant_usage[pid][key] += usage.get(key, 0)
+                participant_usage[pid]["cost"] += usage.get("cost", 0.0)
+            
+            # Calculate feedback for this round
+            round_feedback = self._calculate_round_feedback(round_choices, p_value)
             
-            # Update participant_id_offset for next condition
-            participant_id_offset = current_offset
+            # Store round feedback
+            round_feedbacks.append({
+                "round": round_num,
+                "feedback": round_feedback
+            })
+            
+            # Prepare feedback for next round (will be customized per participant)
+            # The build_round_prompt will add each participant's own choice
+            if round_num < 4:
+                previous_feedback = {
+                    "mean": round_feedback["mean"],
+                    "p_times_mean": round_feedback["p_times_mean"],
+                    "winning_number": round_feedback["winning_number"]
+                }
         
-        # Sort by participant_id
-        all_individual_data.sort(key=lambda x: x.get('participant_id', 0))
+        # Clear conversation history for all participants in this session (cleanup)
+        # This should happen AFTER all rounds are complete
+        for participant in pool.participants:
+            participant.clear_conversation()
         
-        return {
-            "individual_data": all_individual_data
-        }
+        # Aggregate results per participant in expected format for this session
+        session_results = []
+        for participant in pool.participants:
+            pid = participant.participant_id
+            choices = participant_choices[pid]
+            
+            # Build response text in Q1=, Q2=, Q3=, Q4= format for evaluator compatibility
+            response_parts = []
+            for i in range(1, 5):
+                choice = choices.get(f'Q{i}')
+                if choice is not None:
+                    response_parts.append(f"Q{i}={choice}")
+                else:
+                    response_parts.append(f"Q{i}=N/A")
+            response_text = ", ".join(response_parts)
+            
+            individual_data = {
+                "participant_id": pid,
+                "profile": participant.profile,
+                "responses": [{
+                    "response_text": response_text,
+                    "raw_response_text": response_text,  # Keep for compatibility
+                    "usage": participant_usage[pid],
+                    "round_responses": participant_round_responses[pid],  # Store all round-by-round responses
+                    "trial_info": {
+                        "sub_study_id": sub_study_id,
+                        "session_id": f"{sub_study_id}_session_{session_idx}",  # Unique session identifier
+                        "session_idx": session_idx,  # Also save index for sorting
+                        "round_feedbacks": round_feedbacks.copy()  # Same feedback for all participants in session
+                    }
+                }]
+            }
+            session_results.append(individual_data)
+        
+        return session_results
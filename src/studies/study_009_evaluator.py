@@ -17,6 +17,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, float]:
     """
@@ -56,8 +57,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_009"
     study_dir = Path(f"data/studies/{study_id}")
     gt_path = study_dir / "ground_truth.json"
-    with open(gt_path, 'r', encoding='utf-8') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -237,7 +238,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f1, t1_gt, p_val_agent_f1, u_stat_agent_f1, "mannwhitneyu",
         n_agent=len(group_05), n2_agent=len(group_066),
-        n_human=48, n2_human=67
+        n_human=48, n2_human=67,
+        human_reference=human_ref
     )
     test_results.append(test_result_f1)
 
@@ -281,7 +283,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f1_2, t2_gt, p_val_agent_f1_2, u_stat_agent_f1_2, "mannwhitneyu",
         n_agent=len(group_066), n2_agent=len(group_133),
-        n_human=67, n2_human=51
+        n_human=67, n2_human=51,
+        human_reference=human_ref
     )
     test_results.append(test_result_f1_2)
 
@@ -550,7 +553,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
             add_statistical_replication_fields(
                 test_result_f2, test_gt_f2, p_val_binom if 'p_val_binom' in locals() else None, successes if 'successes' in locals() else None, "binomial",
                 n_agent=total_n,
-                n_human=n_paper
+                n_human=n_paper,
+                human_reference=human_ref
             )
             test_results.append(test_result_f2)
 
@@ -724,7 +728,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     add_statistical_replication_fields(
         test_result_f4, test_gt_f4, p_val_agent_f4, u_stat_agent_f4, "mannwhitneyu",
         n_agent=len(median_rates_p_05), n2_agent=len(median_rates_p_066),
-        n_human=3, n2_human=4
+        n_human=3, n2_human=4,
+        human_reference=human_ref
     )
     test_results.append(test_result_f4)
 
@@ -849,7 +854,7 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                     if statistical_tests:
                         test_gt_f5 = statistical_tests[0]
                     break
-        add_statistical_replication_fields(test_result_f5_weak, test_gt_f5, p_val_binom_weak if 'p_val_binom_weak' in locals() else None, below_mean_count if 'below_mean_count' in locals() else None, "binomial")
+        add_statistical_replication_fields(test_result_f5_weak, test_gt_f5, p_val_binom_weak if 'p_val_binom_weak' in locals() else None, below_mean_count if 'below_mean_count' in locals() else None, "binomial", human_reference=human_ref)
         test_results.append(test_result_f5_weak)
         
         # Strong Hypothesis result (Period 4, session-level)
@@ -884,7 +889,7 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
             "human_test_statistic": "",
             "agent_test_statistic": agent_stat_str_strong
         }
-        add_statistical_replication_fields(test_result_f5_strong, test_gt_f5, p_val_binom_strong if 'p_val_binom_strong' in locals() else None, sessions_below_p_mean if 'sessions_below_p_mean' in locals() else None, "binomial")
+        add_statistical_replication_fields(test_result_f5_strong, test_gt_f5, p_val_binom_strong if 'p_val_binom_strong' in locals() else None, sessions_below_p_mean if 'sessions_below_p_mean' in locals() else None, "binomial", human_reference=human_ref)
         test_results.append(test_result_f5_strong)
 
     # --- Finding 6: Learning Direction Theory (LDT) ---
@@ -1010,7 +1015,7 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                     if statistical_tests:
                         test_gt_f6 = statistical_tests[0]
                     break
-        add_statistical_replication_fields(test_result_f6, test_gt_f6, p_val_binom if 'p_val_binom' in locals() else None, sessions_with_ldt_above_50 if 'sessions_with_ldt_above_50' in locals() else None, "binomial")
+        add_statistical_replication_fields(test_result_f6, test_gt_f6, p_val_binom if 'p_val_binom' in locals() else None, sessions_with_ldt_above_50 if 'sessions_with_ldt_above_50' in locals() else None, "binomial", human_reference=human_ref)
         test_results.append(test_result_f6)
 
     # 4. Two-level Weighted Aggregation
@@ -12,6 +12,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic,
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, float]:
     """
@@ -121,8 +122,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_011"
     study_dir = Path(f"data/studies/{study_id}")
     gt_path = study_dir / "ground_truth.json"
-    with open(gt_path, 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     # Load metadata for finding and test weights
     metadata = {}
@@ -317,10 +318,11 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                     n2_agent=len(a_group2),
                     n_human=h1["n"],
                     n2_human=h2["n"],
-                    independent=True
+                    independent=True,
+                    human_reference=human_ref
                 )
             else:
-                add_statistical_replication_fields(test_result, test, p_val_agent, t_agent, "t-test")
+                add_statistical_replication_fields(test_result, test, p_val_agent, t_agent, "t-test", human_reference=human_ref)
             
             test_results.append(test_result)
 
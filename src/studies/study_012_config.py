@@ -1,3 +1,4 @@
+import functools
 import json
 import re
 import numpy as np
@@ -253,16 +254,21 @@ class StudyStudy012Config(BaseStudyConfig):
         prompt_builder: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
-        Run two-stage experiment: Stage 1 (Room A) then Stage 2 (Room B).
+        Run two-stage experiment: Room A decisions, then Room B decisions.
         
         This implements the dynamic pairing where Room B decisions depend on
-        Room A's actual choices. This method is called by the pipeline when
-        REQUIRES_GROUP_TRIALS is True.
+        Room A's actual choices. Each pair is a two-round session on a shared
+        SessionScheduler, so a pair's Room B call starts as soon as its own
+        Room A response is in rather than after all of Room A. This method is
+        called by the pipeline when REQUIRES_GROUP_TRIALS is True.
         """
+        from tqdm import tqdm
+        from src.agents.session_scheduler import SessionScheduler
+        
         print("Running two-stage experiment for study_012")
-        print(f"Stage 1: Room A decisions ({len(trials)} participants)")
+        print(f"Room A decisions: {len(trials)} participants; Room B follows each pair's Room A decision")
         
-        # Stage 1: Run Room A trials
+        # Room A: each participant completes exactly 1 trial (their assigned trial)
         # CRITICAL: Set n_participants = len(trials) so each participant gets exactly 1 trial
         room_a_pool_kwargs = participant_pool_kwargs.copy()
         room_a_pool_kwargs["n_participants"] = len(trials)  # 1 participant per trial
@@ -274,148 +280,30 @@ class StudyStudy012Config(BaseStudyConfig):
             participant.profile["participant_id"] = idx
             participant.profile["role"] = "room_a"
         
-        # Run Stage 1: Each participant completes exactly 1 trial (their assigned trial)
-        # Use multithreading if num_workers > 1 and use_real_llm is True
-        num_workers = participant_pool_kwargs.get("num_workers", 1)
-        use_real_llm = participant_pool_kwargs.get("use_real_llm", False)
-        
-        room_a_individual_data = []
-        
-        def process_room_a_trial(participant_trial_pair):
-            """Process a single Room A trial."""
-            participant, trial = participant_trial_pair
-            try:
-                # Merge participant profile into trial
-                trial_with_profile = {**trial, "participant_profile": participant.profile}
-                
-                # Build prompt for this specific trial
-                trial_prompt = self.room_a_builder.build_trial_prompt(trial_with_profile)
-                
-                # Complete this single trial
-                response_data = participant.complete_trial(trial_prompt, trial_with_profile)
-                
-                # Format response data to match expected structure
-                return {
-                    "participant_id": participant.participant_id,
-                    "responses": [{
-                        "response_text": response_data.get("response_text", ""),
-                        "usage": response_data.get("usage", {}),
-                        "trial_info": trial_with_profile
-                    }]
-                }
-            except Exception as e:
-                print(f"Error processing Room A trial for participant {participant.participant_id}: {e}")
-                return {
-                    "participant_id": participant.participant_id,
-                    "responses": [{
-                        "response_text": "",
-                        "usage": {},
-                        "trial_info": trial_with_profile if 'trial_with_profile' in locals() else trial
-                    }]
-                }
-        
-        # Use multithreading if enabled
-        if num_workers > 1 and use_real_llm:
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            from tqdm import tqdm
-            
-            participant_trial_pairs = list(zip(room_a_pool.participants, trials))
-            room_a_individual_data = [None] * len(participant_trial_pairs)
-            
-            with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                # Submit all tasks
-                future_to_idx = {
-                    executor.submit(process_room_a_trial, pair): idx
-                    for idx, pair in enumerate(participant_trial_pairs)
-                }
-                
-                # Collect results with progress bar
-                with tqdm(total=len(participant_trial_pairs), desc="Stage 1 (Room A)", unit="trial") as pbar:
-                    for future in as_completed(future_to_idx):
-                        idx = future_to_idx[future]
-                        try:
-                            result = future.result()
-                            room_a_individual_data[idx] = result
-                        except Exception as e:
-                            print(f"Error in Room A trial {idx}: {e}")
-                            room_a_individual_data[idx] = {
-                                "participant_id": participant_trial_pairs[idx][0].participant_id,
-                                "responses": [{"response_text": "", "trial_info": participant_trial_pairs[idx][1]}]
-                            }
-                        pbar.update(1)
-        else:
-            # Sequential processing
-            from tqdm import tqdm
-            participant_trial_pairs = list(zip(room_a_pool.participants, trials))
-            with tqdm(total=len(participant_trial_pairs), desc="Stage 1 (Room A)", unit="trial") as pbar:
-                for participant, trial in participant_trial_pairs:
-                    result = process_room_a_trial((participant, trial))
-                    room_a_individual_data.append(result)
-                    pbar.update(1)
-        
-        # Create results structure matching run_experiment output
-        room_a_results = {"individual_data": room_a_individual_data}
-        
-        print(f"Stage 1 complete: {len(room_a_individual_data)} Room A responses")
-        
-        # Extract Room A decisions and create Room B trials
-        room_a_decisions = []
-        for participant_data in room_a_individual_data:
-            for response in participant_data.get("responses", []):
-                trial_info = response.get("trial_info", {})
-                if trial_info.get("role") == "room_a":
-                    amount_sent = self._extract_amount_sent(response.get("response_text", ""))
-                    room_a_decisions.append({
-                        "participant_id": participant_data.get("participant_id"),
-                        "trial_info": trial_info,
-                        "response_text": response.get("response_text", ""),
-                        "amount_sent": amount_sent
-                    })
-        
-        # Create Room B trials based on Room A decisions
-        room_b_trials = self.create_room_b_trials([
-            {
-                "trial_info": d["trial_info"],
-                "response_text": d["response_text"],
-                "participant_id": d["participant_id"]
-            }
-            for d in room_a_decisions
-        ])
-        
-        print(f"Stage 2: Room B decisions ({len(room_b_trials)} participants)")
-        
-        if not room_b_trials:
-            print("Warning: No Room B trials created (all Room A sent $0?)")
-            return room_a_results
-        
-        # Stage 2: Run Room B trials
+        # Room B: one participant per pair, used only if Room A sends money
         room_b_pool_kwargs = participant_pool_kwargs.copy()
-        room_b_pool_kwargs["n_participants"] = len(room_b_trials)  # 1 participant per trial
+        room_b_pool_kwargs["n_participants"] = len(trials)  # 1 participant per pair
         room_b_pool = ParticipantPool(**room_b_pool_kwargs)
         
         # Update participants to be Room B
         for idx, participant in enumerate(room_b_pool.participants):
-            participant.participant_id = len(room_a_individual_data) + idx
+            participant.participant_id = len(trials) + idx
             participant.profile["participant_id"] = participant.participant_id
             participant.profile["role"] = "room_b"
         
-        # Run Stage 2: Each participant completes exactly 1 trial (their assigned trial)
-        # Use multithreading if num_workers > 1 and use_real_llm is True
-        # Re-get num_workers and use_real_llm for clarity
+        # Calls run on one shared pool when num_workers > 1 and use_real_llm is True
         num_workers = participant_pool_kwargs.get("num_workers", 1)
         use_real_llm = participant_pool_kwargs.get("use_real_llm", False)
         
-        room_b_individual_data = []
-        
-        def process_room_b_trial(participant_trial_pair):
-            """Process a single Room B trial."""
-            participant, trial = participant_trial_pair
+        def process_trial(participant, trial, builder):
+            """Process a single Room A or Room B trial."""
+            role = trial.get("role", "room_a")
             try:
                 # Merge participant profile into trial
                 trial_with_profile = {**trial, "participant_profile": participant.profile}
                 
                 # Build prompt for this specific trial
-                trial_prompt = self.room_b_builder.build_trial_prompt(trial_with_profile)
+                trial_prompt = builder.build_trial_prompt(trial_with_profile)
                 
                 # Complete this single trial
                 response_data = participant.complete_trial(trial_prompt, trial_with_profile)
@@ -430,7 +318,7 @@ class StudyStudy012Config(BaseStudyConfig):
                     }]
                 }
             except Exception as e:
-                print(f"Error processing Room B trial for participant {participant.participant_id}: {e}")
+                print(f"Error processing {role} trial for participant {participant.participant_id}: {e}")
                 return {
                     "participant_id": participant.participant_id,
                     "responses": [{
@@ -440,88 +328,64 @@ class StudyStudy012Config(BaseStudyConfig):
                     }]
                 }
         
-        # Use multithreading if enabled
-        if num_workers > 1 and use_real_llm:
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-            from tqdm import tqdm
+        def run_pair(room_a_participant, trial, room_b_participant):
+            """Session generator: Room A call, then (if money was sent) the paired Room B call."""
+            (room_a_data,) = yield [functools.partial(process_trial, room_a_participant, trial, self.room_a_builder)]
             
-            participant_trial_pairs = list(zip(room_b_pool.participants, room_b_trials))
-            room_b_individual_data = [None] * len(participant_trial_pairs)
-            
-            with ThreadPoolExecutor(max_workers=num_workers) as executor:
-                # Submit all tasks
-                future_to_idx = {
-                    executor.submit(process_room_b_trial, pair): idx
-                    for idx, pair in enumerate(participant_trial_pairs)
-                }
-                
-                # Collect results with progress bar
-                with tqdm(total=len(participant_trial_pairs), desc="Stage 2 (Room B)", unit="trial") as pbar:
-                    for future in as_completed(future_to_idx):
-                        idx = future_to_idx[future]
-                        try:
-                            result = future.result()
-                            room_b_individual_data[idx] = result
-                        except Exception as e:
-                            print(f"Error in Room B trial {idx}: {e}")
-                            room_b_individual_data[idx] = {
-                                "participant_id": participant_trial_pairs[idx][0].participant_id,
-                                "responses": [{"response_text": "", "trial_info": participant_trial_pairs[idx][1]}]
-                            }
-                        pbar.update(1)
-        else:
-            # Sequential processing
-            from tqdm import tqdm
-            participant_trial_pairs = list(zip(room_b_pool.participants, room_b_trials))
-            with tqdm(total=len(participant_trial_pairs), desc="Stage 2 (Room B)", unit="trial") as pbar:
-                for participant, trial in participant_trial_pairs:
-                    result = process_room_b_trial((participant, trial))
-                    room_b_individual_data.append(result)
-                    pbar.update(1)
-        
-        # Create results structure matching run_experiment output
-        room_b_results = {"individual_data": room_b_individual_data}
-        
-        print(f"Stage 2 complete: {len(room_b_individual_data)} Room B responses")
-        
-        # Combine results: merge Room A and Room B data
-        # Structure: each "participant" represents a pair (Room A + Room B)
-        combined_individual_data = []
-        
-        # Create pairs
-        room_b_by_pair = {}
-        for participant_data in room_b_individual_data:
-            for response in participant_data.get("responses", []):
-                trial_info = response.get("trial_info", {})
-                pair_index = trial_info.get("pair_index")
-                if pair_index is not None:
-                    if pair_index not in room_b_by_pair:
-                        room_b_by_pair[pair_index] = []
-                    room_b_by_pair[pair_index].append({
-                        "participant_id": participant_data.get("participant_id"),
-                        "response": response
-                    })
-        
-        # Match Room A with Room B
-        for room_a_data in room_a_individual_data:
-            pair_responses = []
+            # Create the Room B trial from this pair's actual Room A decision
+            room_b_trials = []
             for response in room_a_data.get("responses", []):
                 trial_info = response.get("trial_info", {})
-                pair_index = trial_info.get("pair_index")
-                
-                # Add Room A response
-                pair_responses.append(response)
-                
-                # Add corresponding Room B response if exists
-                if pair_index in room_b_by_pair and room_b_by_pair[pair_index]:
-                    room_b_response = room_b_by_pair[pair_index][0]["response"]
-                    pair_responses.append(room_b_response)
+                if trial_info.get("role") == "room_a":
+                    room_b_trials = self.create_room_b_trials([{
+                        "trial_info": trial_info,
+                        "response_text": response.get("response_text", ""),
+                        "participant_id": room_a_data.get("participant_id")
+                    }])
             
+            room_b_data = None
+            if room_b_trials and room_b_participant is not None:
+                (room_b_data,) = yield [functools.partial(process_trial, room_b_participant, room_b_trials[0], self.room_b_builder)]
+            return room_a_data, room_b_data
+        
+        participant_trial_pairs = list(zip(room_a_pool.participants, trials))
+        sessions = {
+            idx: run_pair(
+                participant,
+                trial,
+                room_b_pool.participants[idx] if idx < len(room_b_pool.participants) else None
+            )
+            for idx, (participant, trial) in enumerate(participant_trial_pairs)
+        }
+        scheduler = SessionScheduler(max_workers=num_workers if use_real_llm else 1)
+        with tqdm(desc="Room A + Room B", unit="trial") as pbar:
+            pair_results = scheduler.run(sessions, progress=pbar)
+        
+        # Combine results: each "participant" represents a pair (Room A + Room B)
+        combined_individual_data = []
+        n_room_b = 0
+        for idx, (participant, trial) in enumerate(participant_trial_pairs):
+            if idx not in pair_results:
+                print(f"Error in Room A trial {idx}: {scheduler.errors.get(idx)}")
+                combined_individual_data.append({
+                    "participant_id": participant.participant_id,
+                    "responses": [{"response_text": "", "trial_info": trial}]
+                })
+                continue
+            room_a_data, room_b_data = pair_results[idx]
+            pair_responses = list(room_a_data.get("responses", []))
+            if room_b_data is not None:
+                pair_responses.extend(room_b_data.get("responses", [])[:1])
+                n_room_b += 1
             combined_individual_data.append({
                 "participant_id": room_a_data.get("participant_id"),
                 "responses": pair_responses
             })
         
+        print(f"Complete: {len(combined_individual_data)} Room A responses, {n_room_b} Room B responses")
+        if n_room_b == 0:
+            print("Warning: No Room B trials created (all Room A sent $0?)")
+        
         return {
             "individual_data": combined_individual_data
         }
@@ -11,6 +11,7 @@ from src.evaluation.stats_lib import (
     get_direction_from_statistic, # New import
     add_statistical_replication_fields
 )
+from src.evaluation.human_reference import load_human_reference
 
 def parse_agent_responses(response_text: str) -> Dict[str, float]:
     """
@@ -178,8 +179,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
     study_id = "study_012"
     study_dir = Path(f"data/studies/{study_id}")
     gt_path = study_dir / "ground_truth.json"
-    with open(gt_path, 'r') as f:
-        ground_truth = json.load(f)
+    human_ref = load_human_reference(gt_path)
+    ground_truth = human_ref.ground_truth
     
     metadata = {}
     metadata_path = study_dir / "metadata.json"
@@ -722,7 +723,8 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
                 add_statistical_replication_fields(
                     test_result, test_gt, None, None, "binomial",
                     n_agent=n_a,
-                    n_human=n_human
+                    n_human=n_human,
+                    human_reference=human_ref
                 )
         elif fid == "F2": # Paired t-test
             # Exp 1: 32, Exp 2: 28
@@ -730,14 +732,16 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
             n_h = 32 if "no_history" in tr["sub_study_id"] else 28
             add_statistical_replication_fields(
                 test_result, test_gt, None, test_stat_agent, "t-test",
-                n_agent=n_a, n_human=n_h, independent=False
+                n_agent=n_a, n_human=n_h, independent=False,
+                human_reference=human_ref
             )
         elif fid in ["F3", "F6"]: # Spearman correlation
             n_a = len(nh_pairs) if "no_history" in tr["sub_study_id"] else len(sh_pairs)
             n_h = 32 if "no_history" in tr["sub_study_id"] else 28
             add_statistical_replication_fields(
                 test_result, test_gt, None, test_stat_agent, "correlation",
-                n_agent=n_a, n_human=n_h
+                n_agent=n_a, n_human=n_h,
+                human_reference=human_ref
             )
         elif fid == "F5": # Mann-Whitney U
             n1_a = len(sh_returned)
@@ -747,10 +751,11 @@ def evaluate_study(results: Dict[str, Any]) -> Dict[str, Any]:
             add_statistical_replication_fields(
                 test_result, test_gt, None, test_stat_agent, "mannwhitneyu",
                 n_agent=n1_a, n2_agent=n2_a,
-                n_human=n1_h, n2_human=n2_h
+                n_human=n1_h, n2_human=n2_h,
+                human_reference=human_ref
             )
         else:
-            add_statistical_replication_fields(test_result, test_gt, None, test_stat_agent, test_type)
+            add_statistical_replication_fields(test_result, test_gt, None, test_stat_agent, test_type, human_reference=human_ref)
             
         final_test_results.append(test_result)
 
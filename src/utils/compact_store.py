@@ -0,0 +1,339 @@
+"""
+Compact, normalized on-disk format for Stage 5 results.
+
+A plain ``full_benchmark.json`` repeats the whole ``trial_info`` (material
+items, participant profile) and ``full_api_response`` in every response of
+every repeat. In compact format the same folder holds:
+
+- ``full_benchmark.json``: every top-level field (usage, statistics, summary)
+  except ``individual_data`` / ``all_runs_raw_results``, plus a ``storage``
+  block pointing at the two files below. Reporting that only needs the summary
+  reads this small file.
+- ``benchmark_tables.json.zst``: profiles, materials and trial_info dicts, each
+  stored once and referenced by content id.
+- ``responses.jsonl.zst``: one compressed line per response of every repeat,
+  with ``trial_info`` replaced by a reference.
+
+zstd is used when the ``zstandard`` package is installed, gzip otherwise.
+``load_benchmark()`` reads either format and returns the usual dict shape, so
+callers do not need to know which one a folder uses.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+from src.utils.io import atomic_write_json
+
+COMPACT_FORMAT = "compact"
+COMPACT_VERSION = 1
+TABLES_STEM = "benchmark_tables.json"
+RESPONSES_STEM = "responses.jsonl"
+
+# trial_info fields that are large and shared between responses
+_MATERIAL_KEYS = ("items",)
+_PROFILE_KEYS = ("profile", "participant_profile")
+_REF = "$ref"
+# Row bookkeeping keys: repeat index, participant position (nested data) and a
+# marker for responses whose raw_response_text equals response_text
+_RUN = "_run"
+_PARTICIPANT = "_participant"
+_RAW_SAME = "_raw_same"
+
+
+def _content_id(prefix: str, value: Any) -> str:
+    blob = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return prefix + hashlib.sha256(blob.encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def _default_suffix() -> str:
+    return ".zst" if HAS_ZSTD else ".gz"
+
+
+def _write_compressed(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    if path.suffix == ".zst":
+        tmp.write_bytes(zstandard.ZstdCompressor(level=10).compress(data))
+    else:
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(data)
+    tmp.replace(path)
+
+
+def _read_compressed(path: Path) -> bytes:
+    if path.suffix == ".zst":
+        if not HAS_ZSTD:
+            raise ImportError(
+                f"{path.name} is zstd-compressed; install zstandard to read it: pip install zstandard"
+            )
+        with open(path, "rb") as f:
+            return zstandard.ZstdDecompressor().stream_reader(f).read()
+    with gzip.open(path, "rb") as f:
+        return f.read()
+
+
+def is_compact(benchmark_data: Dict[str, Any]) -> bool:
+    """True if ``benchmark_data`` is the slim header of a compact-format folder."""
+    return (benchmark_data.get("storage") or {}).get("format") == COMPACT_FORMAT
+
+
+class _Tables:
+    """Content-addressed profile / material / trial tables built while writing."""
+
+    def __init__(self):
+        self.profiles: Dict[str, Any] = {}
+        self.materials: Dict[str, Any] = {}
+        self.trials: Dict[str, Any] = {}
+
+    def _ref(self, table: Dict[str, Any], prefix: str, value: Any) -> Dict[str, str]:
+        ref_id = _content_id(prefix, value)
+        table.setdefault(ref_id, value)
+        return {_REF: ref_id}
+
+    def profile_ref(self, profile: Any) -> Dict[str, str]:
+        return self._ref(self.profiles, "p", profile)
+
+    def trial_ref(self, trial_info: Dict[str, Any]) -> Dict[str, str]:
+        normalized = {}
+        for key, value in trial_info.items():
+            if key in _MATERIAL_KEYS and isinstance(value, list):
+                normalized[key] = self._ref(self.materials, "m", value)
+            elif key in _PROFILE_KEYS and isinstance(value, dict):
+                normalized[key] = self.profile_ref(value)
+            else:
+                normalized[key] = value
+        return self._ref(self.trials, "t", normalized)
+
+
+def _compact_response(response: Dict[str, Any], tables: _Tables) -> Dict[str, Any]:
+    row = {}
+    for key, value in response.items():
+        if key == "trial_info" and isinstance(value, dict):
+            row[key] = tables.trial_ref(value)
+        elif key == "raw_response_text" and value == response.get("response_text"):
+            row[_RAW_SAME] = True
+        else:
+            row[key] = value
+    return row
+
+
+def write_compact_benchmark(
+    benchmark_file: Union[str, Path],
+    benchmark_data: Dict[str, Any],
+    runs: Optional[List[List[Dict[str, Any]]]] = None,
+) -> Path:
+    """
+    Write ``benchmark_data`` in compact format next to ``benchmark_file``.
+
+    Args:
+        benchmark_file: Path of the full_benchmark.json to write (the slim header)
+        benchmark_data: Benchmark dict in the usual shape
+        runs: Per-repeat ``individual_data`` lists to store (default: taken from
+            ``all_runs_raw_results``, else ``individual_data``). Pass the
+            uncleaned runs to keep ``raw_response_text``.
+
+    Returns:
+        Path to the header file
+    """
+    benchmark_file = Path(benchmark_file)
+    folder = benchmark_file.parent
+    folder.mkdir(parents=True, exist_ok=True)
+    if runs is None:
+        all_runs = benchmark_data.get("all_runs_raw_results")
+        if all_runs:
+            runs = [run.get("individual_data", []) for run in all_runs]
+        else:
+            runs = [benchmark_data.get("individual_data") or []]
+
+    tables = _Tables()
+    participants: List[Optional[List[Dict[str, Any]]]] = []
+    lines = io.StringIO()
+    for run_idx, individual_data in enumerate(runs):
+        is_flat = len(individual_data) > 0 and "responses" not in individual_data[0]
+        if is_flat or not individual_data:
+            participants.append(None)
+            for response in individual_data:
+                row = {_RUN: run_idx, **_compact_response(response, tables)}
+                lines.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        else:
+            # Nested (participant -> responses) data: participant headers go to the tables
+            headers = []
+            for p_idx, participant in enumerate(individual_data):
+                header = {k: v for k, v in participant.items() if k != "responses"}
+                if isinstance(header.get("profile"), dict):
+                    header["profile"] = tables.profile_ref(header["profile"])
+                headers.append(header)
+                for response in participant.get("responses", []):
+                    row = {_RUN: run_idx, _PARTICIPANT: p_idx, **_compact_response(response, tables)}
+                    lines.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            participants.append(headers)
+
+    suffix = _default_suffix()
+    tables_name = TABLES_STEM + suffix
+    responses_name = RESPONSES_STEM + suffix
+    tables_blob = json.dumps(
+        {
+            "version": COMPACT_VERSION,
+            "profiles": tables.profiles,
+            "materials": tables.materials,
+            "trials": tables.trials,
+            "participants": participants,
+        },
+        ensure_ascii=False,
+        default=str,
+    )
+    tables_bytes = tables_blob.encode("utf-8", errors="replace")
+    responses_bytes = lines.getvalue().encode("utf-8", errors="replace")
+    _write_compressed(folder / tables_name, tables_bytes)
+    _write_compressed(folder / responses_name, responses_bytes)
+
+    header = {k: v for k, v in benchmark_data.items() if k not in ("individual_data", "all_runs_raw_results")}
+    header["storage"] = {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "tables": tables_name,
+        "responses": responses_name,
+        "n_runs": len(runs),
+        # Content hashes make the header alone a fingerprint of the whole folder
+        "tables_sha256": hashlib.sha256(tables_bytes).hexdigest(),
+        "responses_sha256": hashlib.sha256(responses_bytes).hexdigest(),
+    }
+    # Header last: readers only see a compact folder once both data files exist
+    atomic_write_json(benchmark_file, header)
+    return benchmark_file
+
+
+def _resolve(value: Any, table: Dict[str, Any]) -> Any:
+    if isinstance(value, dict) and _REF in value and len(value) == 1:
+        return table.get(value[_REF], value)
+    return value
+
+
+def read_compact_runs(
+    benchmark_file: Union[str, Path],
+    header: Optional[Dict[str, Any]] = None,
+    include_raw: bool = False,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Rehydrate every repeat of a compact folder into ``individual_data`` lists.
+
+    Responses that referenced the same trial share one ``trial_info`` dict (and
+    its items / profiles), so treat rehydrated data as read-only.
+
+    Args:
+        benchmark_file: Path to the compact full_benchmark.json header
+        header: Already-loaded header (avoids re-reading it)
+        include_raw: Also restore ``raw_response_text`` (dropped by default, as in
+            the plain full_benchmark.json)
+    """
+    benchmark_file = Path(benchmark_file)
+    if header is None:
+        with open(benchmark_file, "r", encoding="utf-8") as f:
+            header = json.load(f)
+    storage = header["storage"]
+    folder = benchmark_file.parent
+
+    tables = json.loads(_read_compressed(folder / storage["tables"]).decode("utf-8", errors="replace"))
+    profiles, materials = tables["profiles"], tables["materials"]
+    trials: Dict[str, Dict[str, Any]] = {}
+    for trial_id, trial in tables["trials"].items():
+        trials[trial_id] = {
+            key: _resolve(value, materials if key in _MATERIAL_KEYS else profiles if key in _PROFILE_KEYS else {})
+            for key, value in trial.items()
+        }
+
+    n_runs = storage.get("n_runs", len(tables["participants"]))
+    runs: List[List[Dict[str, Any]]] = [[] for _ in range(n_runs)]
+    nested: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for run_idx, headers in enumerate(tables["participants"]):
+        if headers is None:
+            continue
+        for p_idx, p_header in enumerate(headers):
+            participant = dict(p_header)
+            participant["profile"] = _resolve(participant.get("profile"), profiles)
+            participant["responses"] = []
+            runs[run_idx].append(participant)
+            nested[(run_idx, p_idx)] = participant
+
+    text = _read_compressed(folder / storage["responses"]).decode("utf-8", errors="replace")
+    for line in text.splitlines():
+        if not line:
+            continue
+        row = json.loads(line)
+        run_idx = row.pop(_RUN)
+        p_idx = row.pop(_PARTICIPANT, None)
+        raw_same = row.pop(_RAW_SAME, False)
+        trial_info = row.get("trial_info")
+        if isinstance(trial_info, dict) and _REF in trial_info:
+            row["trial_info"] = trials[trial_info[_REF]]
+        if include_raw and raw_same:
+            row["raw_response_text"] = row.get("response_text")
+        elif not include_raw:
+            row.pop("raw_response_text", None)
+        if p_idx is None:
+            runs[run_idx].append(row)
+        else:
+            nested[(run_idx, p_idx)]["responses"].append(row)
+    return runs
+
+
+def load_benchmark(benchmark_file: Union[str, Path], include_raw: bool = False) -> Dict[str, Any]:
+    """
+    Load a full_benchmark.json in either plain or compact format.
+
+    Compact folders are rehydrated to the plain shape: ``individual_data`` is
+    the first repeat and ``all_runs_raw_results`` lists every repeat when there
+    is more than one (None otherwise).
+
+    Args:
+        benchmark_file: Path to full_benchmark.json
+        include_raw: Restore ``raw_response_text`` from compact storage
+
+    Returns:
+        Benchmark dict
+    """
+    with open(benchmark_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not is_compact(data):
+        return data
+    runs = read_compact_runs(benchmark_file, header=data, include_raw=include_raw)
+    data = dict(data)
+    data["individual_data"] = runs[0] if runs else []
+    data["all_runs_raw_results"] = [{"individual_data": run} for run in runs] if len(runs) > 1 else None
+    return data
+
+
+def save_benchmark(benchmark_file: Union[str, Path], benchmark_data: Dict[str, Any], storage_format: Optional[str] = None) -> None:
+    """
+    Write ``benchmark_data`` as plain JSON or compact format.
+
+    Args:
+        benchmark_file: Path to full_benchmark.json
+        benchmark_data: Benchmark dict in the plain shape
+        storage_format: "json" or "compact"; None keeps the format of the existing file
+    """
+    benchmark_file = Path(benchmark_file)
+    if storage_format is None:
+        storage_format = "json"
+        if benchmark_file.exists():
+            try:
+                with open(benchmark_file, "r", encoding="utf-8") as f:
+                    storage_format = COMPACT_FORMAT if is_compact(json.load(f)) else "json"
+            except (OSError, json.JSONDecodeError):
+                pass
+    benchmark_data = {k: v for k, v in benchmark_data.items() if k != "storage"}
+    if storage_format == COMPACT_FORMAT:
+        write_compact_benchmark(benchmark_file, benchmark_data)
+    elif storage_format == "json":
+        atomic_write_json(benchmark_file, benchmark_data)
+    else:
+        raise ValueError(f"Unknown storage format '{storage_format}'. Use 'json' or 'compact'.")
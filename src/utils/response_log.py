@@ -0,0 +1,93 @@
+"""
+Append-only JSONL log of Stage 5 responses (``raw_responses.jsonl``).
+
+The log is the source of truth while a simulation is running: every response
+is appended exactly once, tagged with its repeat index, and resume rebuilds
+the per-repeat response lists from it. ``full_benchmark.json`` is only
+assembled once, at the end of Stage 5.
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPEAT_KEY = "repeat_idx"
+
+
+class ResponseLog:
+    """
+    Thread-safe appender for ``raw_responses.jsonl``.
+
+    Each line is one response record plus a ``repeat_idx`` field. The file handle
+    stays open for the lifetime of the log and every line is flushed, so a crash
+    loses at most the line being written.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def append(self, record: Dict[str, Any], repeat_idx: int) -> None:
+        """Append one response record for repeat ``repeat_idx``."""
+        line = json.dumps({**record, REPEAT_KEY: repeat_idx}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8", errors="replace")
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def extend(self, records: List[Dict[str, Any]], repeat_idx: int) -> None:
+        for record in records:
+            self.append(record, repeat_idx)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def __enter__(self) -> "ResponseLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def load_response_log(path: Path) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Read ``raw_responses.jsonl`` back into ``{repeat_idx: [records in append order]}``.
+
+    Lines written before repeat tagging existed carry no ``repeat_idx``; for
+    those a new repeat is assumed whenever a (participant_id, trial_number) pair
+    shows up again. Truncated or corrupt lines (e.g. from a crash) are skipped.
+    """
+    path = Path(path)
+    runs: Dict[int, List[Dict[str, Any]]] = {}
+    if not path.exists():
+        return runs
+
+    legacy_repeat = 0
+    legacy_seen = set()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            repeat_idx: Optional[int] = record.pop(REPEAT_KEY, None)
+            if repeat_idx is None:
+                key = (record.get("participant_id"), record.get("trial_number"))
+                if key in legacy_seen:
+                    legacy_repeat += 1
+                    legacy_seen = set()
+                legacy_seen.add(key)
+                repeat_idx = legacy_repeat
+            runs.setdefault(int(repeat_idx), []).append(record)
+    return runs
@@ -0,0 +1,412 @@
+"""
+SQLite warehouse of Stage 5/6 results for the reporting scripts.
+
+The reporting scripts used to walk ``study_*/*/`` and ``json.load`` every
+``full_benchmark.json`` on every run, only to sum usage and count participants.
+``ResultsWarehouse`` keeps one SQLite file per results directory
+(``results_warehouse.sqlite``, or ``HS_BENCH_RESULTS_WAREHOUSE``). It holds:
+
+- ``configs``: one row per (study, config folder) with the benchmark metadata
+  (title, model, preset), participant/run counts, the benchmark's
+  ``usage_stats``, the headline scores and the full evaluation_results.json
+- ``test_results`` / ``finding_results``: one row per test / finding of the evaluation
+- ``responses``: one row per response of the first repeat with its usage and,
+  when Stage 6 left a matching ``parsed_responses.json``, its raw-failure
+  class and parsed Q->value map
+
+``refresh()`` stats every config folder's ``full_benchmark.json``,
+``evaluation_results.json`` and ``parsed_responses.json``. Only folders whose
+mtime or size changed are re-read, so an unchanged tree costs one ``stat`` per
+file. Deleted folders are dropped.
+
+Example:
+    with open_warehouse("results/benchmark") as warehouse:
+        for row in warehouse.configs(study_id="study_001"):
+            print(row["config"], row["ecs_corr"], row["usage_stats"]["total_cost"])
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+WAREHOUSE_FILENAME = "results_warehouse.sqlite"
+# Bump when the schema or the ingested fields change; older files are rebuilt
+WAREHOUSE_VERSION = 1
+SOURCE_FILES = ("full_benchmark.json", "evaluation_results.json", "parsed_responses.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS configs (
+    study_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    path TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    benchmark_mtime REAL,
+    title TEXT,
+    model TEXT,
+    system_prompt_preset TEXT,
+    n_participants INTEGER,
+    n_runs INTEGER,
+    usage_json TEXT,
+    score REAL,
+    ecs_corr REAL,
+    ecs_corr_study REAL,
+    fingerprint TEXT,
+    evaluation_json TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (study_id, config)
+);
+CREATE TABLE IF NOT EXISTS test_results (
+    study_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    sub_study_id TEXT,
+    finding_id TEXT,
+    test_name TEXT,
+    statistical_test_type TEXT,
+    human_effect_d REAL,
+    agent_effect_d REAL,
+    pi_human REAL,
+    pi_agent REAL,
+    pas REAL,
+    PRIMARY KEY (study_id, config, idx)
+);
+CREATE TABLE IF NOT EXISTS finding_results (
+    study_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    sub_study_id TEXT,
+    finding_id TEXT,
+    finding_score REAL,
+    n_tests INTEGER,
+    PRIMARY KEY (study_id, config, idx)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    study_id TEXT NOT NULL,
+    config TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    participant_id TEXT,
+    response_index INTEGER,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached_tokens INTEGER,
+    total_tokens INTEGER,
+    cost REAL,
+    raw_status TEXT,
+    parsed_json TEXT,
+    PRIMARY KEY (study_id, config, idx)
+);
+"""
+_CHILD_TABLES = ("test_results", "finding_results", "responses")
+
+
+def _signature(cfg_dir: Path) -> str:
+    """mtime/size of the folder's source files ("-" for a missing file)."""
+    parts = []
+    for name in SOURCE_FILES:
+        try:
+            st = (cfg_dir / name).stat()
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {path}: {e}")
+        return None
+
+
+class ResultsWarehouse:
+    """
+    Incrementally refreshed SQLite index of one results directory.
+
+    Args:
+        results_dir: Directory holding the ``study_*`` folders (e.g. results/benchmark)
+        path: SQLite file (default: ``HS_BENCH_RESULTS_WAREHOUSE`` or
+            ``results_dir/results_warehouse.sqlite``)
+    """
+
+    def __init__(self, results_dir: Union[str, Path], path: Optional[Union[str, Path]] = None):
+        self.results_dir = Path(results_dir)
+        if path is None:
+            path = os.getenv("HS_BENCH_RESULTS_WAREHOUSE") or self.results_dir / WAREHOUSE_FILENAME
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(WAREHOUSE_VERSION):
+            for table in ("configs",) + _CHILD_TABLES:
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(WAREHOUSE_VERSION),))
+        self._conn.commit()
+
+    def __enter__(self) -> "ResultsWarehouse":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # Refresh ------------------------------------------------------------------
+
+    def _config_dirs(self) -> Iterator[Tuple[str, str, Path]]:
+        if not self.results_dir.exists():
+            return
+        for study_dir in sorted(self.results_dir.iterdir()):
+            if not study_dir.is_dir() or not study_dir.name.startswith("study_"):
+                continue
+            for cfg_dir in sorted(study_dir.iterdir()):
+                if cfg_dir.is_dir() and (cfg_dir / "full_benchmark.json").exists():
+                    yield study_dir.name, cfg_dir.name, cfg_dir
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-ingest config folders whose source files changed and drop deleted ones.
+
+        Returns:
+            Counts: scanned, updated, removed, failed
+        """
+        known = {
+            (row["study_id"], row["config"]): row["signature"]
+            for row in self._conn.execute("SELECT study_id, config, signature FROM configs")
+        }
+        counts = {"scanned": 0, "updated": 0, "removed": 0, "failed": 0}
+        seen = set()
+        for study_id, config, cfg_dir in self._config_dirs():
+            counts["scanned"] += 1
+            seen.add((study_id, config))
+            signature = _signature(cfg_dir)
+            if known.get((study_id, config)) == signature:
+                continue
+            try:
+                self._ingest(study_id, config, cfg_dir, signature)
+                self._conn.commit()
+                counts["updated"] += 1
+            except Exception as e:
+                logger.warning(f"Could not ingest {cfg_dir}: {e}")
+                self._conn.rollback()
+                counts["failed"] += 1
+        for key in set(known) - seen:
+            self._delete(*key)
+            counts["removed"] += 1
+        self._conn.commit()
+        if counts["updated"] or counts["removed"]:
+            logger.info(f"Results warehouse {self.path}: {counts}")
+        return counts
+
+    def _delete(self, study_id: str, config: str) -> None:
+        for table in ("configs",) + _CHILD_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE study_id = ? AND config = ?", (study_id, config))
+
+    def _ingest(self, study_id: str, config: str, cfg_dir: Path, signature: str) -> None:
+        from src.evaluation.response_index import INDEX_FILENAME, iter_responses
+        from src.utils.compact_store import load_benchmark
+
+        benchmark_file = cfg_dir / "full_benchmark.json"
+        benchmark_sha = hashlib.sha256(benchmark_file.read_bytes()).hexdigest()
+        benchmark = load_benchmark(benchmark_file)
+        evaluation = _read_json(cfg_dir / "evaluation_results.json")
+        index = _read_json(cfg_dir / INDEX_FILENAME)
+        if not index or index.get("benchmark_sha256") != benchmark_sha:
+            index = None
+
+        individual_data = benchmark.get("individual_data") or []
+        runs = benchmark.get("all_runs_raw_results") or []
+        entries = (index or {}).get("entries") or []
+        parsed = (index or {}).get("parsed") or {}
+        response_rows = []
+        for idx, (participant_id, resp_idx, response) in enumerate(iter_responses(individual_data)):
+            usage = response.get("usage") or {}
+            entry = entries[idx] if idx < len(entries) else {}
+            parsed_values = parsed.get(entry.get("text")) if entry.get("text") else None
+            response_rows.append((
+                study_id, config, idx,
+                None if participant_id is None else str(participant_id), resp_idx,
+                usage.get("prompt_tokens", 0) or 0,
+                usage.get("completion_tokens", 0) or 0,
+                usage.get("cached_tokens", 0) or 0,
+                usage.get("total_tokens", 0) or 0,
+                float(usage.get("cost", 0.0) or 0.0),
+                entry.get("raw_status"),
+                json.dumps(parsed_values, ensure_ascii=False, default=str) if parsed_values is not None else None,
+            ))
+
+        evaluation = evaluation or {}
+        self._delete(study_id, config)
+        self._conn.execute(
+            "INSERT INTO configs (study_id, config, path, signature, benchmark_mtime, title, model,"
+            " system_prompt_preset, n_participants, n_runs, usage_json, score, ecs_corr, ecs_corr_study,"
+            " fingerprint, evaluation_json, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                study_id, config, str(cfg_dir), signature, benchmark_file.stat().st_mtime,
+                benchmark.get("title"), benchmark.get("model"), benchmark.get("system_prompt_preset"),
+                len(individual_data), len(runs) or (1 if individual_data else 0),
+                json.dumps(benchmark.get("usage_stats") or {}, default=str),
+                _float(evaluation.get("score")), _float(evaluation.get("ecs_corr")),
+                _float(evaluation.get("ecs_corr_study")),
+                (evaluation.get("fingerprint") or {}).get("digest"),
+                json.dumps(evaluation, ensure_ascii=False, default=str) if evaluation else None,
+                time.time(),
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO test_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    study_id, config, idx, t.get("sub_study_id"), t.get("finding_id"), t.get("test_name"),
+                    t.get("statistical_test_type"), _float(t.get("human_effect_d")), _float(t.get("agent_effect_d")),
+                    _float(t.get("pi_human")), _float(t.get("pi_agent")), _float(t.get("pas")),
+                )
+                for idx, t in enumerate(evaluation.get("test_results") or [])
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO finding_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    study_id, config, idx, f.get("sub_study_id"), f.get("finding_id"),
+                    _float(f.get("finding_score")), f.get("n_tests"),
+                )
+                for idx, f in enumerate(evaluation.get("finding_results") or [])
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", response_rows
+        )
+
+    # Queries ------------------------------------------------------------------
+
+    def usage_stats(self, study_id: str, config: str, stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        The benchmark's own ``usage_stats`` if it recorded tokens, otherwise totals
+        summed over the config's first-repeat responses.
+        """
+        if stored is None:
+            row = self._conn.execute(
+                "SELECT usage_json FROM configs WHERE study_id = ? AND config = ?", (study_id, config)
+            ).fetchone()
+            stored = json.loads(row[0]) if row and row[0] else {}
+        if (stored or {}).get("total_tokens", 0) > 0:
+            return stored
+        row = self._conn.execute(
+            "SELECT COUNT(DISTINCT participant_id), SUM(prompt_tokens), SUM(completion_tokens),"
+            " SUM(cached_tokens), SUM(total_tokens), SUM(cost) FROM responses WHERE study_id = ? AND config = ?",
+            (study_id, config),
+        ).fetchone()
+        n, prompt, completion, cached, total, cost = row
+        if not total:
+            return stored or {}
+        return {
+            "total_prompt_tokens": prompt or 0,
+            "total_completion_tokens": completion or 0,
+            "total_cached_tokens": cached or 0,
+            "total_tokens": total,
+            "total_cost": float(cost or 0.0),
+            "avg_tokens_per_participant": float(total / n) if n else 0.0,
+            "avg_cost_per_participant": float((cost or 0.0) / n) if n else 0.0,
+        }
+
+    def configs(
+        self,
+        study_id: Optional[str] = None,
+        config: Optional[str] = None,
+        with_evaluation: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Config rows, ordered by study and config name.
+
+        Args:
+            study_id: Only this study
+            config: Only this config folder name
+            with_evaluation: Include the parsed evaluation_results.json as ``evaluation``
+
+        Returns:
+            Dicts with study_id, config, path, title, model, system_prompt_preset,
+            n_participants, n_runs, usage_stats, score, ecs_corr, ecs_corr_study,
+            fingerprint, benchmark_mtime (and evaluation; {} if not evaluated)
+        """
+        clauses, params = [], []
+        if study_id:
+            clauses.append("study_id = ?")
+            params.append(study_id)
+        if config:
+            clauses.append("config = ?")
+            params.append(config)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = []
+        for row in self._conn.execute(f"SELECT * FROM configs{where} ORDER BY study_id, config", params):
+            out = {k: row[k] for k in row.keys() if k not in ("usage_json", "evaluation_json", "signature", "updated")}
+            out["usage_stats"] = self.usage_stats(row["study_id"], row["config"], json.loads(row["usage_json"] or "{}"))
+            if with_evaluation:
+                out["evaluation"] = json.loads(row["evaluation_json"]) if row["evaluation_json"] else {}
+            rows.append(out)
+        return rows
+
+    def evaluation(self, study_id: str, config: str) -> Optional[Dict[str, Any]]:
+        """The config's evaluation_results.json, or None if it has none."""
+        row = self._conn.execute(
+            "SELECT evaluation_json FROM configs WHERE study_id = ? AND config = ?", (study_id, config)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Run a read-only SQL query against the warehouse tables."""
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def responses(self, study_id: str, config: str) -> List[Dict[str, Any]]:
+        """First-repeat responses with usage, raw-failure class and parsed values (None if not indexed)."""
+        rows = self.query(
+            "SELECT * FROM responses WHERE study_id = ? AND config = ? ORDER BY idx", (study_id, config)
+        )
+        for row in rows:
+            row["parsed"] = json.loads(row.pop("parsed_json")) if row.get("parsed_json") else None
+        return rows
+
+
+def open_warehouse(
+    results_dir: Union[str, Path],
+    path: Optional[Union[str, Path]] = None,
+    refresh: bool = True,
+) -> ResultsWarehouse:
+    """
+    Open the warehouse of ``results_dir`` and bring it up to date.
+
+    Args:
+        results_dir: Directory holding the ``study_*`` folders
+        path: SQLite file (see ResultsWarehouse)
+        refresh: Re-ingest changed config folders before returning
+
+    Returns:
+        ResultsWarehouse (use as a context manager or call close())
+    """
+    warehouse = ResultsWarehouse(results_dir, path)
+    if refresh:
+        warehouse.refresh()
+    return warehouse
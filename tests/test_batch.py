@@ -0,0 +1,190 @@
+"""
+Unit tests for the Batch API runners (src.llm.batch) and ParticipantPool batch mode.
+Provider clients are in-memory fakes that mimic the SDK batch endpoints.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.agents.llm_participant_agent import LLMParticipantAgent, ParticipantPool
+from src.core.exceptions import BatchJobError
+from src.llm.batch import AnthropicBatchRunner, OpenAIBatchRunner
+
+
+def _completion_body(text, finish_reason="stop"):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+    }
+
+
+def _answer_for(messages):
+    return f"Q1={len(messages[-1]['content'])}"
+
+
+class _FakeOpenAIBatches:
+    """files/batches endpoints; completes a batch after ``polls_needed`` retrieves."""
+
+    def __init__(self, polls_needed=1, fail_ids=(), truncate_ids=()):
+        self.uploaded = {}
+        self.batches = {}
+        self.polls_needed = polls_needed
+        self.fail_ids = set(fail_ids)
+        self.truncate_ids = set(truncate_ids)
+        self.max_tokens = {}
+        self.files = SimpleNamespace(create=self._file_create, content=self._file_content)
+        self.batches_api = SimpleNamespace(create=self._batch_create, retrieve=self._batch_retrieve)
+
+    @property
+    def client(self):
+        return SimpleNamespace(files=self.files, batches=self.batches_api)
+
+    def _file_create(self, file, purpose):
+        file_id = f"file-{len(self.uploaded)}"
+        self.uploaded[file_id] = file[1].decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self.uploaded[file_id])
+
+    def _batch_create(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {"input": input_file_id, "polls": 0}
+        return SimpleNamespace(id=batch_id)
+
+    def _batch_retrieve(self, batch_id):
+        state = self.batches[batch_id]
+        state["polls"] += 1
+        if state["polls"] < self.polls_needed:
+            return SimpleNamespace(id=batch_id, status="in_progress", output_file_id=None, error_file_id=None)
+        out = []
+        for line in self.uploaded[state["input"]].splitlines():
+            req = json.loads(line)
+            self.max_tokens[req["custom_id"]] = req["body"].get("max_tokens")
+            if req["custom_id"] in self.fail_ids:
+                out.append({"custom_id": req["custom_id"], "response": {"status_code": 500, "body": {}}, "error": None})
+            elif req["custom_id"] in self.truncate_ids:
+                body = _completion_body("Let me think", finish_reason="length")
+                out.append({"custom_id": req["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+            else:
+                body = _completion_body(_answer_for(req["body"]["messages"]))
+                out.append({"custom_id": req["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+        output_id = f"file-{len(self.uploaded)}"
+        self.uploaded[output_id] = "\n".join(json.dumps(o) for o in out)
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id=output_id, error_file_id=None)
+
+
+def test_openai_runner_polls_and_maps_results(tmp_path):
+    fake = _FakeOpenAIBatches(polls_needed=3)
+    sleeps = []
+    runner = OpenAIBatchRunner(fake.client, poll_interval=5, sleep=sleeps.append)
+    requests = [("a", {"model": "gpt-4", "messages": [{"role": "user", "content": "xx"}]})]
+    results = runner.run(requests, jsonl_path=tmp_path / "b.jsonl")
+
+    assert results["a"]["body"]["choices"][0]["message"]["content"] == "Q1=2"
+    assert sleeps == [5, 5]
+    line = json.loads((tmp_path / "b.jsonl").read_text().splitlines()[0])
+    assert line["url"] == "/v1/chat/completions" and line["custom_id"] == "a"
+    assert not (tmp_path / "b.state.json").exists()
+
+
+def test_runner_reattaches_to_submitted_batch(tmp_path):
+    fake = _FakeOpenAIBatches(polls_needed=10**6)
+    requests = [("a", {"model": "gpt-4", "messages": [{"role": "user", "content": "x"}]})]
+    runner = OpenAIBatchRunner(fake.client, poll_interval=0, timeout=0, sleep=lambda s: None)
+    with pytest.raises(BatchJobError):
+        runner.run(requests, jsonl_path=tmp_path / "b.jsonl")
+    fake.polls_needed = 0
+    OpenAIBatchRunner(fake.client, sleep=lambda s: None).run(requests, jsonl_path=tmp_path / "b.jsonl")
+    assert len(fake.batches) == 1  # second run re-attached instead of resubmitting
+
+
+def test_anthropic_runner_collects_errors():
+    message = SimpleNamespace(model_dump=lambda: {"id": "msg"})
+    items = [
+        SimpleNamespace(custom_id="ok", result=SimpleNamespace(type="succeeded", message=message)),
+        SimpleNamespace(custom_id="bad", result=SimpleNamespace(type="expired")),
+    ]
+    batches = SimpleNamespace(
+        create=lambda requests: SimpleNamespace(id="mb-1"),
+        retrieve=lambda batch_id: SimpleNamespace(id=batch_id, processing_status="ended"),
+        results=lambda batch_id: iter(items),
+    )
+    client = SimpleNamespace(messages=SimpleNamespace(batches=batches))
+    results = AnthropicBatchRunner(client).run([("ok", {}), ("bad", {})])
+    assert results["ok"] == {"body": {"id": "msg"}, "error": None}
+    assert results["bad"]["body"] is None and "expired" in results["bad"]["error"]
+
+
+def _pool(mode, **kwargs):
+    return ParticipantPool(
+        study_specification={"participants": {"n": 4, "age_range": [18, 25]}},
+        use_real_llm=True,
+        model="gpt-4",
+        api_key="test-key",
+        random_seed=0,
+        execution_mode=mode,
+        **kwargs,
+    )
+
+
+def test_pool_batch_mode_matches_threads(monkeypatch, tmp_path):
+    fake = _FakeOpenAIBatches(fail_ids={"p2-t1"})
+    monkeypatch.setattr(LLMParticipantAgent, "_get_sync_client", lambda self: fake.client)
+    sync_calls = []
+
+    def fake_call(self, messages, max_retries=3, max_tokens=8192):
+        sync_calls.append(self.participant_id)
+        return {"response_text": _answer_for(messages), "usage": {}, "full_api_response": {}}
+
+    monkeypatch.setattr(LLMParticipantAgent, "_call_llm_with_history", fake_call)
+    trials = [{"trial_number": i + 1, "prompt": "x" * (i + 1)} for i in range(2)]
+
+    threaded = _pool("threads", num_workers=2).run_experiment(trials, "")
+    sync_calls.clear()
+    saved = []
+    batched = _pool("batch", batch_dir=str(tmp_path), batch_poll_interval=0).run_experiment(
+        trials, "", save_callback=saved.append
+    )
+
+    def strip(results):
+        return [(r["participant_id"], r["trial_number"], r["response_text"]) for r in results["individual_data"]]
+
+    assert strip(batched) == strip(threaded)
+    assert sync_calls == [2]  # the failed batch item was retried synchronously
+    assert len(saved) == 8
+    assert (tmp_path / "batch_gpt-4_seed0.jsonl").exists()
+
+
+def test_truncated_batch_replies_are_retried_with_a_larger_budget(monkeypatch):
+    from src.llm.token_budget import TokenBudgetPlanner
+
+    fake = _FakeOpenAIBatches(truncate_ids={"p1-t0"})
+    monkeypatch.setattr(LLMParticipantAgent, "_get_sync_client", lambda self: fake.client)
+    sync_calls = []
+
+    def fake_call(self, messages, max_retries=3, max_tokens=8192):
+        sync_calls.append((self.participant_id, max_tokens))
+        return {"response_text": _answer_for(messages), "usage": {}, "full_api_response": {}}
+
+    monkeypatch.setattr(LLMParticipantAgent, "_call_llm_with_history", fake_call)
+    planner = TokenBudgetPlanner(min_tokens=64, min_samples=1, ceiling=1024)
+    planner.observe(None, None, 40)
+    trials = [{"trial_number": 1, "prompt": "x"}]
+    results = _pool("batch", batch_poll_interval=0, token_budget=planner).run_experiment(trials, "")
+
+    assert fake.max_tokens["p1-t0"] == 64  # the learned budget went into the batch
+    assert sync_calls == [(1, 128)]  # the truncated reply was redone with the retry budget
+    records = {r["participant_id"]: r for r in results["individual_data"]}
+    assert records[1]["token_budget"] == {"max_tokens": 128, "retries": 1}
+    assert records[1]["response_text"] == "Q1=1"
+    assert records[0]["token_budget"] == {"max_tokens": 64, "retries": 0}
+    assert planner.stats()["truncated"] == 1
@@ -22,3 +22,76 @@ def test_data_directory_exists():
     assert (data_dir / "registry.json").exists()
     assert (data_dir / "schemas").exists()
     assert (data_dir / "studies").exists()
+
+
+def _make_data_dir(root, n_studies=3):
+    import json
+
+    studies = []
+    for i in range(1, n_studies + 1):
+        study_id = f"study_{i:03d}"
+        studies.append({"id": study_id, "title": f"Study {i}", "status": "active",
+                        "domain": "social" if i % 2 else "cognitive", "difficulty": "easy", "tags": [f"t{i}"]})
+        study_dir = root / "studies" / study_id
+        study_dir.mkdir(parents=True)
+        (study_dir / "metadata.json").write_text(json.dumps({"id": study_id, "title": f"Study {i}"}))
+        (study_dir / "specification.json").write_text(json.dumps({"study_id": study_id}))
+        (study_dir / "ground_truth.json").write_text(json.dumps({"study_id": study_id}))
+    (root / "registry.json").write_text(json.dumps({"version": "0.1.0", "total_studies": n_studies, "studies": studies}))
+    return root
+
+
+def test_catalog_filters_without_opening_study_files(tmp_path, monkeypatch):
+    import builtins
+    from src.core.benchmark import HumanStudyBench
+
+    _make_data_dir(tmp_path)
+    bench = HumanStudyBench(tmp_path)
+    opened = []
+    original_open = builtins.open
+    monkeypatch.setattr(builtins, "open", lambda file, *a, **kw: opened.append(Path(file)) or original_open(file, *a, **kw))
+
+    studies = bench.get_studies(domain="social")
+    assert [s.id for s in studies] == ["study_001", "study_003"]
+    assert [e.id for e in bench.catalog.query(tags=["t2"])] == ["study_002"]
+    assert opened == []
+
+    # Each file is read on first access to its attribute
+    assert studies[0].metadata["title"] == "Study 1"
+    assert [p.name for p in opened] == ["metadata.json"]
+    assert bench.load_study("study_001") is bench.get_studies(tags=["t1"])[0]
+
+    # A second instance shares the parsed registry and the loaded studies
+    again = HumanStudyBench(tmp_path)
+    assert again.catalog is bench.catalog and again.registry is bench.registry
+    assert again.load_study("study_001") is studies[0]
+    assert again.get_all_study_ids() == ["study_001", "study_002", "study_003"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["registry.json", "studies"]
+
+
+def test_catalog_lru_and_change_detection(tmp_path):
+    import json
+    import os
+    from src.core.catalog import StudyCatalog, get_catalog
+
+    _make_data_dir(tmp_path)
+    catalog = StudyCatalog(tmp_path, cache_size=2)
+    first = catalog.load("study_001")
+    catalog.load("study_002")
+    catalog.load("study_003")
+    assert list(catalog.cache) == ["study_002", "study_003"] and catalog.loads == 3
+
+    spec = tmp_path / "studies" / "study_003" / "specification.json"
+    assert catalog.load("study_003") is catalog.cache["study_003"] and catalog.loads == 3
+    spec.write_text('{"study_id": "study_003", "edited": true}')
+    os.utime(spec, ns=(1, 1))
+    assert catalog.load("study_003").specification["edited"] is True and catalog.loads == 4
+    assert catalog.load("study_001") is not first
+
+    # The shared catalog is rebuilt when registry.json changes
+    shared = get_catalog(tmp_path)
+    assert get_catalog(tmp_path) is shared
+    registry = json.loads((tmp_path / "registry.json").read_text())
+    registry["studies"] = registry["studies"][:1]
+    (tmp_path / "registry.json").write_text(json.dumps(registry))
+    assert get_catalog(tmp_path) is not shared and len(get_catalog(tmp_path)) == 1
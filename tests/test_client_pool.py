@@ -0,0 +1,58 @@
+"""
+Unit tests for the process-wide SDK client registry (src.llm.client_pool).
+No network calls: clients are only constructed, never used.
+"""
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.agents.llm_participant_agent import LLMParticipantAgent
+from src.llm import client_pool
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    client_pool.close_clients()
+    yield
+    client_pool.close_clients()
+
+
+def test_same_settings_share_one_client():
+    a = client_pool.get_openai_client("k1", timeout=45.0, max_retries=0)
+    b = client_pool.get_openai_client("k1", timeout=45.0, max_retries=0)
+    assert a is b
+    assert client_pool.registered_client_count() == 1
+
+
+def test_distinct_settings_get_distinct_clients():
+    base = client_pool.get_openai_client("k1")
+    assert client_pool.get_openai_client("k2") is not base
+    assert client_pool.get_openai_client("k1", base_url="https://openrouter.ai/api/v1") is not base
+    assert client_pool.get_openai_client("k1", timeout=30.0) is not base
+    assert client_pool.registered_client_count() == 4
+
+
+def test_agents_share_client_across_instances():
+    agents = [
+        LLMParticipantAgent(participant_id=i, profile={}, model="mistralai/mistral-nemo", api_key="k")
+        for i in range(3)
+    ]
+    clients = {id(agent._get_sync_client()) for agent in agents}
+    assert len(clients) == 1
+
+
+def test_close_clients_empties_registry():
+    first = client_pool.get_openai_client("k1")
+    client_pool.close_clients()
+    assert client_pool.registered_client_count() == 0
+    assert client_pool.get_openai_client("k1") is not first
+
+
+def test_anthropic_client_is_pooled():
+    anthropic = pytest.importorskip("anthropic")
+    client = client_pool.get_anthropic_client("k1", base_url="http://127.0.0.1:1", max_retries=0)
+    assert client_pool.get_anthropic_client("k1", base_url="http://127.0.0.1:1", max_retries=0) is client
+    assert isinstance(client._client, anthropic.DefaultHttpxClient)
+    agent = LLMParticipantAgent(participant_id=0, profile={}, model="claude-3-5-haiku-latest", api_key="k1")
+    assert agent._get_sync_client() is client_pool.get_anthropic_client("k1")
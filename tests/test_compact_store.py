@@ -0,0 +1,88 @@
+"""
+Unit tests for the compact Stage 5 storage format (src.utils.compact_store).
+"""
+
+import json
+
+from src.evaluation.response_index import load_parsed_index
+from src.utils.compact_store import is_compact, load_benchmark, save_benchmark, write_compact_benchmark
+
+ITEMS = [{"id": f"item_{i}", "text": "x" * 200} for i in range(20)]
+PROFILE = {"age": 30, "gender": "female", "background": "y" * 300}
+
+
+def _response(pid, trial, text):
+    return {
+        "participant_id": pid,
+        "trial_number": trial,
+        "response_text": text,
+        "raw_response_text": text,
+        "trial_info": {"sub_study_id": "s1", "items": ITEMS, "profile": PROFILE},
+    }
+
+
+def _benchmark(n_runs=2, n_participants=5):
+    runs = [[_response(p, 1, f"Q1={p + r}") for p in range(n_participants)] for r in range(n_runs)]
+    return {
+        "study_id": "study_999",
+        "usage_stats": {"total_tokens": 10},
+        "individual_data": runs[0],
+        "all_runs_raw_results": [{"individual_data": run} for run in runs] if n_runs > 1 else None,
+    }
+
+
+def _strip_raw(runs):
+    return [[{k: v for k, v in r.items() if k != "raw_response_text"} for r in run] for run in runs]
+
+
+def test_round_trip_flat_runs_and_dedup(tmp_path):
+    data = _benchmark()
+    benchmark_file = tmp_path / "full_benchmark.json"
+    write_compact_benchmark(benchmark_file, data)
+
+    header = json.loads(benchmark_file.read_text())
+    assert is_compact(header) and header["usage_stats"] == {"total_tokens": 10}
+    assert "individual_data" not in header and header["storage"]["n_runs"] == 2
+    # Items and profile are stored once, far smaller than the plain JSON
+    plain_size = len(json.dumps(data))
+    compact_size = sum(p.stat().st_size for p in tmp_path.iterdir())
+    assert compact_size * 5 < plain_size
+
+    loaded = load_benchmark(benchmark_file)
+    runs = [run["individual_data"] for run in data["all_runs_raw_results"]]
+    assert loaded["individual_data"] == _strip_raw(runs)[0]
+    assert [r["individual_data"] for r in loaded["all_runs_raw_results"]] == _strip_raw(runs)
+
+    with_raw = load_benchmark(benchmark_file, include_raw=True)
+    assert [r["individual_data"] for r in with_raw["all_runs_raw_results"]] == runs
+
+
+def test_round_trip_nested_single_run(tmp_path):
+    individual_data = [
+        {"participant_id": p, "profile": PROFILE, "responses": [_response(p, t, f"Q{t}=A") for t in (1, 2)]}
+        for p in range(3)
+    ]
+    benchmark_file = tmp_path / "full_benchmark.json"
+    write_compact_benchmark(benchmark_file, {"individual_data": individual_data})
+
+    loaded = load_benchmark(benchmark_file, include_raw=True)
+    assert loaded["individual_data"] == individual_data
+    assert loaded["all_runs_raw_results"] is None
+
+
+def test_save_benchmark_keeps_format_and_invalidates_index(tmp_path):
+    benchmark_file = tmp_path / "full_benchmark.json"
+    plain = _benchmark(n_runs=1)
+    save_benchmark(benchmark_file, plain)
+    assert load_benchmark(benchmark_file) == plain
+
+    write_compact_benchmark(benchmark_file, plain)
+    index = load_parsed_index(benchmark_file)
+
+    data = load_benchmark(benchmark_file, include_raw=True)
+    data["individual_data"][0]["response_text"] = "Q1=edited"
+    save_benchmark(benchmark_file, data)
+    assert is_compact(json.loads(benchmark_file.read_text()))
+    assert load_benchmark(benchmark_file)["individual_data"][0]["response_text"] == "Q1=edited"
+    # The header hashes its data files, so the parse index sees the change
+    assert load_parsed_index(benchmark_file).benchmark_sha256 != index.benchmark_sha256
@@ -0,0 +1,60 @@
+"""
+Unit tests for Stage 6 input fingerprints (src.evaluation.fingerprint).
+"""
+
+import json
+import os
+
+from src.evaluation.fingerprint import (
+    FINGERPRINT_KEY,
+    NO_FINGERPRINT,
+    NOT_EVALUATED,
+    check_evaluation,
+    compute_fingerprint,
+)
+
+
+def _setup(tmp_path):
+    cfg_dir = tmp_path / "results" / "study_001" / "cfg"
+    study_dir = tmp_path / "data" / "study_001"
+    cfg_dir.mkdir(parents=True)
+    study_dir.mkdir(parents=True)
+    (cfg_dir / "full_benchmark.json").write_text(json.dumps({"individual_data": [1, 2]}))
+    (study_dir / "ground_truth.json").write_text(json.dumps({"studies": []}))
+    evaluator = tmp_path / "study_001_evaluator.py"
+    evaluator.write_text("def evaluate_study(results):\n    return {}\n")
+    return cfg_dir, evaluator, study_dir
+
+
+def _write_results(cfg_dir, fingerprint):
+    results = {"ecs_corr": 0.5}
+    if fingerprint is not None:
+        results[FINGERPRINT_KEY] = fingerprint
+    (cfg_dir / "evaluation_results.json").write_text(json.dumps(results))
+    (cfg_dir / "detailed_stats.csv").write_text("Study_ID\n")
+
+
+def test_unchanged_inputs_are_up_to_date_and_touch_is_ignored(tmp_path):
+    cfg_dir, evaluator, study_dir = _setup(tmp_path)
+    assert check_evaluation(cfg_dir, evaluator, study_dir)[0] == [NOT_EVALUATED]
+
+    _write_results(cfg_dir, compute_fingerprint(cfg_dir, evaluator, study_dir))
+    stale, fingerprint, results = check_evaluation(cfg_dir, evaluator, study_dir)
+    assert stale == [] and results["ecs_corr"] == 0.5
+
+    # New mtime, same content: still up to date
+    benchmark = cfg_dir / "full_benchmark.json"
+    st = benchmark.stat()
+    os.utime(benchmark, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert check_evaluation(cfg_dir, evaluator, study_dir)[0] == []
+
+
+def test_changed_inputs_are_named(tmp_path):
+    cfg_dir, evaluator, study_dir = _setup(tmp_path)
+    _write_results(cfg_dir, None)
+    assert check_evaluation(cfg_dir, evaluator, study_dir)[0] == [NO_FINGERPRINT]
+
+    _write_results(cfg_dir, compute_fingerprint(cfg_dir, evaluator, study_dir))
+    evaluator.write_text("def evaluate_study(results):\n    return {'x': 1}\n")
+    (study_dir / "ground_truth.json").write_text(json.dumps({"studies": [1]}))
+    assert check_evaluation(cfg_dir, evaluator, study_dir)[0] == ["evaluator", "ground_truth"]
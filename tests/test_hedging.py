@@ -0,0 +1,221 @@
+"""
+Unit tests for hedged requests (src.llm.hedging).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.llm import hedging
+from src.llm.hedging import RequestHedger
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    hedging.reset_hedging()
+    yield
+    hedging.reset_hedging()
+
+
+def _warm(hedger, latency=0.01, n=None):
+    for _ in range(n or hedger.min_samples):
+        hedger.record_latency(latency)
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+def test_delay_needs_samples_and_follows_quantile():
+    hedger = RequestHedger(quantile=0.9, min_delay=0.0, min_samples=10)
+    assert hedger.delay() is None
+    for i in range(1, 11):
+        hedger.record_latency(i / 10)
+    assert hedger.delay() == 1.0
+    assert RequestHedger(min_delay=2.0, min_samples=1).delay() is None
+    with pytest.raises(ValueError):
+        RequestHedger(quantile=1.0)
+
+
+def test_slow_primary_loses_to_hedge_and_is_cancelled():
+    hedger = RequestHedger(min_delay=0.05, min_samples=5, max_extra_fraction=1.0)
+    _warm(hedger)
+    calls = []
+
+    def attempt(cancel):
+        calls.append(cancel)
+        if len(calls) == 1:  # stalled primary, stops once cancelled
+            cancel.wait(5)
+            return {"response_text": "late"}
+        return {"response_text": "fast"}
+
+    start = time.monotonic()
+    result = hedger.call(attempt)
+    assert time.monotonic() - start < 1.0
+    assert result == {"response_text": "fast", "hedge": {"winner": "hedge"}}
+    assert calls[0].is_set()
+    stats = hedger.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1 and stats["hedge_win_rate"] == 1.0
+
+
+def test_extra_spend_cap_and_rate_limit_pause():
+    hedger = RequestHedger(min_delay=0.02, min_samples=1, max_extra_fraction=0.0)
+    _warm(hedger)
+    result = hedger.call(lambda cancel: (time.sleep(0.1), {"ok": True})[1])
+    assert result == {"ok": True} and hedger.stats()["hedged"] == 0
+
+    hedger = RequestHedger(min_delay=0.02, min_samples=1, max_extra_fraction=1.0)
+    _warm(hedger)
+    with pytest.raises(_RateLimited):
+        hedger.call(lambda cancel: (_ for _ in ()).throw(_RateLimited("429 Too Many Requests")))
+    assert hedger.call(lambda cancel: (time.sleep(0.1), {"ok": True})[1]) == {"ok": True}
+    assert hedger.stats()["hedged"] == 0  # paused after the 429
+
+
+def test_async_loser_task_is_cancelled():
+    hedger = RequestHedger(min_delay=0.05, min_samples=5, max_extra_fraction=1.0)
+    _warm(hedger)
+    state = {"calls": 0, "cancelled": False}
+
+    async def attempt():
+        state["calls"] += 1
+        if state["calls"] == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+        return {"response_text": "fast"}
+
+    result = asyncio.run(hedger.acall(attempt))
+    assert result["hedge"] == {"winner": "hedge"}
+    assert state["cancelled"] is True
+
+
+def test_registry_is_off_until_configured():
+    assert hedging.get_hedger("openai", "m") is None
+    hedging.configure_hedging(quantile=0.9)
+    hedger = hedging.get_hedger("openai", "m")
+    assert hedger is hedging.get_hedger("openai", "m")
+    hedging.configure_hedging(quantile=0.9)  # unchanged config keeps learned latencies
+    assert hedging.get_hedger("openai", "m") is hedger
+    assert set(hedging.hedging_stats()) == {"openai/m"}
+
+
+def test_agent_calls_are_hedged_against_mock_server():
+    pytest.importorskip("openai")
+    from src.agents.llm_participant_agent import LLMParticipantAgent
+    from src.llm import client_pool
+    from src.llm.mock_server import MockLLMServer
+
+    hedging.configure_hedging(quantile=0.5, max_extra_fraction=1.0, min_delay=0.01, min_samples=4)
+    client_pool.close_clients()
+    with MockLLMServer(latency="uniform:0,0.2", seed=1) as server:
+        agent = LLMParticipantAgent(0, {}, model="gpt-4o-mini", api_key="k", use_real_llm=True, api_base=server.base_url)
+        records = [agent.complete_trial("Q1 (Yes/No): ok?", {"trial_number": i}) for i in range(16)]
+    client_pool.close_clients()
+    stats = hedging.hedging_stats()["openai/gpt-4o-mini"]
+    assert stats["requests"] == 16 and stats["hedged"] > 0
+    assert sum(1 for r in records if "hedge" in r) == stats["hedge_wins"] + stats["primary_wins"]
+    assert all(r["raw_response_text"].startswith("Q1=") for r in records)
+
+
+class _FlakyCreate:
+    """SDK create() stand-in: the first call fails with a retryable 503, later calls succeed."""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("503 Service Unavailable")
+        return self.response
+
+
+@pytest.mark.parametrize("model", ["gpt-4o-mini", "claude-3-5-haiku-latest"])
+@pytest.mark.parametrize("hedged", [False, True])
+def test_agent_retries_after_retryable_error(monkeypatch, model, hedged):
+    from types import SimpleNamespace
+    from src.agents.llm_participant_agent import LLMParticipantAgent
+
+    if hedged:
+        hedging.configure_hedging(min_samples=1000)
+    agent = LLMParticipantAgent(0, {}, model=model, api_key="k", use_real_llm=True)
+    monkeypatch.setattr(LLMParticipantAgent, "_retry_wait_time", staticmethod(lambda attempt, error=None: 0.0))
+    if agent.provider == "anthropic":
+        create = _FlakyCreate(SimpleNamespace(
+            content=[SimpleNamespace(text="Q1=Yes")],
+            usage=SimpleNamespace(input_tokens=10, output_tokens=3),
+        ))
+        client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    else:
+        create = _FlakyCreate(SimpleNamespace(
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content="Q1=Yes", reasoning=None, reasoning_details=None),
+                finish_reason="stop",
+            )],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3, total_tokens=13),
+        ))
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(agent, "_get_sync_client", lambda: client)
+
+    result = agent._request_llm_with_history([{"role": "user", "content": "Q1 (Yes/No): ok?"}])
+    assert result["response_text"] == "Q1=Yes" and create.calls == 2
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    create.calls = 0
+    if agent.provider == "anthropic":
+        agent._async_client = SimpleNamespace(messages=SimpleNamespace(create=acreate))
+    else:
+        agent._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate)))
+    result = asyncio.run(agent._arequest_llm_with_history([{"role": "user", "content": "Q1 (Yes/No): ok?"}]))
+    assert result["response_text"] == "Q1=Yes" and create.calls == 2
+
+
+def test_hedge_waits_for_its_own_limiter_slot(monkeypatch):
+    import threading
+    from types import SimpleNamespace
+    from src.agents.llm_participant_agent import LLMParticipantAgent
+    from src.llm import rate_limiter
+
+    rate_limiter.reset_rate_limiters()
+    rate_limiter.configure_rate_limits(model="gpt-4o-mini", max_concurrency=1)
+    hedging.configure_hedging(quantile=0.5, max_extra_fraction=1.0, min_delay=0.05, min_samples=5)
+    _warm(hedging.get_hedger("openai", "gpt-4o-mini"))
+    state = {"active": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+
+    def create(**kwargs):
+        with lock:
+            state["calls"] += 1
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.3)  # slower than the hedge delay while holding the only slot
+        with lock:
+            state["active"] -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content="Q1=Yes", reasoning=None, reasoning_details=None),
+                finish_reason="stop",
+            )],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3, total_tokens=13),
+        )
+
+    agent = LLMParticipantAgent(0, {}, model="gpt-4o-mini", api_key="k", use_real_llm=True)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(agent, "_get_sync_client", lambda: client)
+    try:
+        result = agent._request_llm_with_history([{"role": "user", "content": "Q1 (Yes/No): ok?"}])
+        # The hedge fired but queued behind the primary's slot instead of exceeding the budget
+        assert result["hedge"] == {"winner": "primary"}
+        assert hedging.hedging_stats()["openai/gpt-4o-mini"]["hedged"] == 1
+        assert state["peak"] == 1
+    finally:
+        rate_limiter.reset_rate_limiters()
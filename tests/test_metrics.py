@@ -1,5 +1,5 @@
 """
-Unit tests for metric calculations: calc_pas, aggregate_*, FrequentistConsistency.
+Unit tests for metric calculations: calc_pas, aggregate_*, FrequentistConsistency, bootstrap.
 """
 
 import math
@@ -13,6 +13,20 @@ from src.evaluation.stats_lib import (
     aggregate_study_pas,
     aggregate_pas_inverse_variance,
     FrequentistConsistency,
+    bootstrap_indices,
+    bootstrap_metric,
+    bootstrap_se,
+    bootstrap_statistic,
+    calc_bf_t,
+    calc_bf_t_array,
+    calc_bf_anova,
+    calc_bf_anova_array,
+    JZSBayesFactorGrid,
+    weighted_ccc,
+    weighted_corr,
+    weighted_linreg,
+    weighted_stats_by_group,
+    compute_ecs_corr,
 )
 
 
@@ -260,3 +274,207 @@ def test_log_odds_ratio_se():
     a, b, c, d = 10.0, 5.0, 3.0, 12.0
     se = FrequentistConsistency.log_odds_ratio_se(a, b, c, d)
     assert se > 0
+
+
+# -----------------------------------------------------------------------------
+# Columnar bootstrap
+# -----------------------------------------------------------------------------
+
+def _loop_reference(func, n, n_bootstrap, seed):
+    idx = bootstrap_indices(n, n_bootstrap, np.random.default_rng(seed))
+    return np.array([func(row) for row in idx])
+
+
+def test_bootstrap_statistic_matches_per_sample_scipy():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0.3, 1.0, 40)
+    y = x * 0.5 + rng.normal(0, 1.0, 40)
+
+    t = bootstrap_statistic("t_one_sample", x, n_bootstrap=50, random_seed=7)
+    ref = _loop_reference(lambda i: stats.ttest_1samp(x[i], 0).statistic, 40, 50, 7)
+    np.testing.assert_allclose(t, ref, rtol=1e-10)
+
+    r = bootstrap_statistic("pearson_r", x, y, n_bootstrap=50, random_seed=7)
+    ref = _loop_reference(lambda i: stats.pearsonr(x[i], y[i])[0], 40, 50, 7)
+    np.testing.assert_allclose(r, ref, rtol=1e-10)
+
+
+def test_bootstrap_chi2_matches_contingency():
+    rng = np.random.default_rng(1)
+    a = rng.choice(["yes", "no"], 60)
+    b = rng.choice(["x", "y", "z"], 60)
+    chi2 = bootstrap_statistic("chi2", a, b, n_bootstrap=30, random_seed=3)
+
+    def ref_chi2(i):
+        table = np.array([[np.sum((a[i] == ra) & (b[i] == cb)) for cb in ("x", "y", "z")] for ra in ("no", "yes")])
+        table = table[:, table.sum(axis=0) > 0][table.sum(axis=1) > 0]
+        return stats.chi2_contingency(table, correction=False)[0]
+
+    np.testing.assert_allclose(chi2, _loop_reference(ref_chi2, 60, 30, 3), rtol=1e-10)
+
+
+def test_bootstrap_two_sample_is_seeded_and_close_to_analytic_se():
+    rng = np.random.default_rng(2)
+    x, y = rng.normal(1.0, 1.0, 200), rng.normal(0.0, 1.0, 300)
+    first = bootstrap_statistic("mean_diff", x, y, n_bootstrap=2000, random_seed=11)
+    assert np.array_equal(first, bootstrap_statistic("mean_diff", x, y, n_bootstrap=2000, random_seed=11))
+    mean, se = bootstrap_se("mean_diff", x, y, n_bootstrap=2000, random_seed=11)
+    analytic_se = math.sqrt(x.var(ddof=1) / 200 + y.var(ddof=1) / 300)
+    assert mean == pytest.approx(x.mean() - y.mean(), abs=0.02)
+    assert se == pytest.approx(analytic_se, rel=0.1)
+
+
+def test_bootstrap_se_agrees_with_list_fallback():
+    rng = np.random.default_rng(4)
+    values = rng.integers(0, 2, 80)
+    pool = [{"choice": int(v)} for v in values]
+    _, se_loop = bootstrap_metric(pool, lambda d: np.mean([p["choice"] for p in d]), n_bootstrap=2000, random_seed=0)
+    _, se_vec = bootstrap_se("proportion", values, n_bootstrap=2000, random_seed=0)
+    assert se_vec == pytest.approx(se_loop, rel=0.1)
+
+
+def test_bootstrap_statistic_handles_nan_and_bad_input():
+    x = np.array([1.0, np.nan, 2.0, 3.0])
+    assert np.all(np.isfinite(bootstrap_statistic("mean", x, n_bootstrap=20, random_seed=0)))
+    assert np.all(np.isnan(bootstrap_statistic("mean", [np.nan], n_bootstrap=5)))
+    with pytest.raises(ValueError):
+        bootstrap_statistic("median_of_means", x)
+    with pytest.raises(ValueError):
+        bootstrap_statistic("pearson_r", x)
+
+
+# -----------------------------------------------------------------------------
+# JZS Bayes factor engine
+# -----------------------------------------------------------------------------
+
+def test_calc_bf_t_array_matches_scalar_quadrature():
+    t_values = np.array([-4.0, -1.5, 0.0, 0.3, 2.0, 6.5, 11.0, np.nan])
+    for n1, n2, independent in [(48, 67, True), (30, None, False), (3, None, False)]:
+        expected = np.array([calc_bf_t(t, n1, n2, independent=independent) for t in t_values])
+        got = calc_bf_t_array(t_values, n1, n2, independent=independent)
+        assert got.shape == t_values.shape
+        np.testing.assert_allclose(got, expected, rtol=1e-4)
+    assert calc_bf_t_array([np.inf], 10, independent=False)[0] == 1e6
+
+
+def test_calc_bf_anova_array_matches_scalar():
+    f_values = np.array([0.0, 0.5, 3.2, 18.0, 150.0])
+    expected = np.array([calc_bf_anova(f, 2, 57, 60) for f in f_values])
+    np.testing.assert_allclose(calc_bf_anova_array(f_values, 2, 57, 60), expected, rtol=1e-4)
+
+
+def test_calc_bf_t_is_memoized():
+    from src.evaluation.stats_lib import _jzs_bf_t
+
+    calc_bf_t(2.345, 21, independent=False)
+    hits = _jzs_bf_t.cache_info().hits
+    calc_bf_t(2.345, 21, independent=False)
+    assert _jzs_bf_t.cache_info().hits == hits + 1
+
+
+def test_interpolation_grid_respects_its_error_bound():
+    grid = JZSBayesFactorGrid(independent=False, n_eff_range=(5, 500), n_t2=101, n_n_eff=24)
+    t_values = np.linspace(-9.5, 9.5, 39)
+    exact = calc_bf_t_array(t_values, 37, independent=False)
+    interpolated = calc_bf_t_array(t_values, 37, independent=False, grid=grid)
+    assert grid.max_log_error < 1e-2
+    assert np.max(np.abs(np.log(interpolated / exact))) <= grid.max_log_error * 1.5 + 1e-6
+    # Off-curve designs (unbalanced groups here) are computed exactly
+    assert not grid.covers(20.0, 50.0, 0.707)
+
+
+# -----------------------------------------------------------------------------
+# Batched weighted statistics and ECS bootstrap
+# -----------------------------------------------------------------------------
+
+def test_weighted_stats_by_group_matches_scalar_functions():
+    rng = np.random.default_rng(5)
+    groups = [rng.normal(size=(k, 2)) for k in (2, 5, 12)] + [np.array([[1.0, 2.0], [1.0, 3.0], [1.0, 4.0]])]
+    x = np.concatenate([g[:, 0] for g in groups])
+    y = np.concatenate([g[:, 1] for g in groups])
+    w = rng.uniform(0.1, 2.0, len(x))
+    codes = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+    batched = weighted_stats_by_group(x, y, w, codes, len(groups) + 1)
+
+    for g in range(len(groups)):
+        sel = codes == g
+        args = (list(x[sel]), list(y[sel]), list(w[sel]))
+        assert batched["ccc"][g] == pytest.approx(weighted_ccc(*args), abs=1e-12)
+        assert batched["r"][g] == pytest.approx(weighted_corr(*args), abs=1e-12)
+        slope, intercept = weighted_linreg(*args)
+        if slope is None:
+            assert np.isnan(batched["slope"][g])
+        else:
+            assert batched["slope"][g] == pytest.approx(slope, abs=1e-12)
+            assert batched["intercept"][g] == pytest.approx(intercept, abs=1e-12)
+    # Empty trailing group is undefined
+    assert batched["n"][-1] == 0 and np.isnan(batched["ccc"][-1])
+
+
+def _ecs_test_results(n_studies=12, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for s in range(n_studies):
+        for f in range(1 + s % 3):
+            for _ in range(2 + s % 2):
+                h = rng.normal()
+                results.append({"study_id": f"study_{s:03d}", "finding_id": f"F{f}",
+                                "human_effect_d": h, "agent_effect_d": 0.6 * h + rng.normal(0, 0.5)})
+    return results
+
+
+def test_compute_ecs_corr_bootstrap_ci_is_seeded_and_brackets_estimate():
+    results = _ecs_test_results()
+    groups = {"A": [f"study_{s:03d}" for s in range(6)], "B": [f"study_{s:03d}" for s in range(6, 12)], "C": []}
+    plain = compute_ecs_corr(results, study_groups=groups)
+    boot = compute_ecs_corr(results, study_groups=groups, n_bootstrap=500, seed=3)
+    assert "ecs_overall_ci" not in plain
+    assert boot["ecs_overall"] == plain["ecs_overall"] and boot["ecs_domain"] == plain["ecs_domain"]
+
+    low, high = boot["ecs_overall_ci"]
+    assert low <= boot["ecs_overall"] <= high
+    assert boot["ecs_domain_ci"]["C"] is None and boot["ecs_domain_ci"]["A"] is not None
+    assert set(boot["ecs_per_study_ci"]) == set(plain["ecs_per_study"])
+    assert boot == compute_ecs_corr(results, study_groups=groups, n_bootstrap=500, seed=3)
+    with pytest.raises(ValueError):
+        compute_ecs_corr(results, n_bootstrap=10, ci=95)
+
+
+# -----------------------------------------------------------------------------
+# Human reference (human side memoized per ground-truth file)
+# -----------------------------------------------------------------------------
+
+def _replication_test_result():
+    return {"human_test_statistic": "2.66", "pi_human": 0.9, "pi_agent": 0.7, "pas": 0.5}
+
+
+def test_human_reference_matches_direct_computation_and_is_reused(tmp_path):
+    from src.evaluation.human_reference import load_human_reference
+    from src.evaluation.stats_lib import add_statistical_replication_fields
+
+    test_gt = {"reported_statistics": "t(79) = 2.66, p < .01", "expected_direction": "positive"}
+    (tmp_path / "ground_truth.json").write_text('{"studies": []}')
+    human_ref = load_human_reference(tmp_path)
+    assert load_human_reference(tmp_path) is human_ref
+
+    for t_agent in (2.1, -0.4, 3.3):
+        direct = add_statistical_replication_fields(_replication_test_result(), test_gt, 0.03, t_agent, "t-test", n_agent=60)
+        cached = add_statistical_replication_fields(
+            _replication_test_result(), test_gt, 0.03, t_agent, "t-test", n_agent=60, human_reference=human_ref
+        )
+        assert cached == direct
+    assert direct["n_human_extracted"] == 40 and direct["n2_human_extracted"] == 41
+    assert (human_ref.misses, human_ref.hits) == (1, 2)
+    assert human_ref.human_side(_replication_test_result(), test_gt)["df"] == (79,)
+
+
+def test_human_reference_is_rebuilt_when_ground_truth_changes(tmp_path):
+    from src.evaluation.human_reference import load_human_reference
+
+    gt_file = tmp_path / "ground_truth.json"
+    gt_file.write_text('{"version": 1}')
+    first = load_human_reference(gt_file)
+    gt_file.write_text('{"version": 2}')
+    second = load_human_reference(tmp_path)
+    assert second is not first and second.ground_truth == {"version": 2}
+    assert second.sha256 != first.sha256
@@ -0,0 +1,107 @@
+"""
+Unit tests for the local mock LLM server (src.llm.mock_server).
+The server binds to 127.0.0.1 on a free port with zero latency; agents and
+batch runners talk to it through the real SDK clients.
+"""
+
+import random
+
+import pytest
+
+pytest.importorskip("openai")
+
+from src.agents.llm_participant_agent import LLMParticipantAgent
+from src.llm import client_pool
+from src.llm.batch import OpenAIBatchRunner
+from src.llm.mock_server import LatencyDistribution, MockLLMServer, canned_answer
+
+PROMPT = (
+    "Q1 (Yes/No): Did the chairman intentionally harm the environment?\n"
+    "Q2.1 (answer with number only, 1-10): Rate your confidence.\n"
+    "RESPONSE_SPEC: Q1=<Yes/No>, Q2.1=<number>, Q3=<A/B>"
+)
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    client_pool.close_clients()
+    yield
+    client_pool.close_clients()
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(seed=0) as srv:
+        yield srv
+
+
+def test_canned_answer_follows_response_spec():
+    for seed in range(20):
+        answers = dict(line.split("=") for line in canned_answer(PROMPT, random.Random(seed)).splitlines())
+        assert list(answers) == ["Q1", "Q2.1", "Q3"]
+        assert answers["Q1"] in ("Yes", "No")
+        assert 1 <= int(answers["Q2.1"]) <= 10
+        assert answers["Q3"] in ("A", "B")
+    assert canned_answer(PROMPT, random.Random(0), answers={"Q3": ["B"]}).endswith("Q3=B")
+
+
+def test_latency_distribution_parsing():
+    rng = random.Random(0)
+    assert LatencyDistribution("none").sample(rng) == 0.0
+    assert LatencyDistribution("fixed:0.25").sample(rng) == 0.25
+    assert 0.1 <= LatencyDistribution("uniform:0.1,0.2").sample(rng) <= 0.2
+    with pytest.raises(ValueError):
+        LatencyDistribution("gamma:1")
+    with pytest.raises(ValueError):
+        LatencyDistribution("lognormal:0.5")
+
+
+def test_agent_completes_trial_through_api_base(server):
+    agent = LLMParticipantAgent(0, {}, model="gpt-4o-mini", api_key="k", use_real_llm=True, api_base=server.base_url)
+    record = agent.complete_trial(PROMPT, {"trial_number": 1})
+    assert record["raw_response_text"].startswith("Q1=")
+    assert record["usage"]["completion_tokens"] > 0
+    assert server.stats()["completions"] == 1
+
+
+def test_max_tokens_truncates_like_a_length_stop():
+    with MockLLMServer(extra_tokens="fixed:400") as srv:
+        client = client_pool.get_openai_client("k", base_url=srv.base_url, max_retries=0)
+        response = client.chat.completions.create(
+            model="m", messages=[{"role": "user", "content": PROMPT}], max_tokens=50
+        )
+    assert response.choices[0].finish_reason == "length"
+    assert response.usage.completion_tokens == 50
+
+
+def test_injected_429_carries_retry_after():
+    from openai import RateLimitError
+
+    with MockLLMServer(error_rate_429=1.0, retry_after=7) as srv:
+        client = client_pool.get_openai_client("k", base_url=srv.base_url, max_retries=0)
+        with pytest.raises(RateLimitError) as excinfo:
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": PROMPT}])
+        assert excinfo.value.response.headers["retry-after"] == "7"
+        assert srv.stats()["errors_429"] == 1
+
+
+def test_openai_batch_round_trip(server):
+    agent = LLMParticipantAgent(0, {}, model="gpt-4o-mini", api_key="k", use_real_llm=True, api_base=server.base_url)
+    runner = OpenAIBatchRunner(agent._get_sync_client(), poll_interval=0.01)
+    results = runner.run([(f"r{i}", agent.build_batch_request(PROMPT, {})) for i in range(3)])
+    assert set(results) == {"r0", "r1", "r2"}
+    record = agent.complete_trial_from_batch(results["r0"]["body"], {"trial_number": 1})
+    assert record["raw_response_text"].startswith("Q1=")
+
+
+def test_anthropic_messages_and_batches(server):
+    anthropic = pytest.importorskip("anthropic")
+    from src.llm.batch import AnthropicBatchRunner
+
+    client = anthropic.Anthropic(api_key="k", base_url=server.base_url[: -len("/v1")], max_retries=0)
+    message = client.messages.create(model="claude-mock", max_tokens=100, messages=[{"role": "user", "content": PROMPT}])
+    assert message.content[0].text.startswith("Q1=") and message.stop_reason == "end_turn"
+
+    body = {"model": "claude-mock", "max_tokens": 100, "messages": [{"role": "user", "content": PROMPT}]}
+    results = AnthropicBatchRunner(client, poll_interval=0.01).run([("a", body)])
+    assert results["a"]["error"] is None and results["a"]["body"]["content"][0]["text"].startswith("Q1=")
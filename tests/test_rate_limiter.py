@@ -0,0 +1,124 @@
+"""
+Unit tests for the adaptive rate limiter (src.llm.rate_limiter).
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.llm import rate_limiter
+from src.llm.rate_limiter import AdaptiveRateLimiter, TokenBucket
+
+
+class _RateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__("Error code: 429 - rate limit exceeded")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers=headers or {}, status_code=429)
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    rate_limiter.reset_rate_limiters()
+    yield
+    rate_limiter.reset_rate_limiters()
+
+
+def test_token_bucket_wait_and_refund():
+    bucket = TokenBucket(rate_per_minute=600)  # 10/s
+    now = time.monotonic()
+    assert bucket.wait_time(600, now) == 0.0
+    bucket.take(600)
+    assert bucket.wait_time(10, now) == pytest.approx(1.0, abs=0.05)
+    bucket.adjust(-300)  # refund over-reservation
+    assert bucket.wait_time(10, now) == 0.0
+
+
+def test_retry_after_parsing():
+    assert rate_limiter.retry_after_seconds(_RateLimitError({"retry-after": "3"})) == 3.0
+    assert rate_limiter.retry_after_seconds(_RateLimitError({"retry-after-ms": "250"})) == 0.25
+    assert rate_limiter.retry_after_seconds(_RateLimitError()) is None
+    assert rate_limiter.retry_after_seconds(ValueError("boom")) is None
+
+
+def test_aimd_decrease_on_429_and_additive_increase():
+    limiter = AdaptiveRateLimiter(max_concurrency=16)
+    for _ in range(8):
+        limiter.acquire()
+    limiter.release(error=_RateLimitError())
+    assert limiter.concurrency_limit == 8
+    # A second 429 from the same burst does not halve again
+    limiter.release(error=_RateLimitError())
+    assert limiter.concurrency_limit == 8
+    for _ in range(40):
+        limiter.acquire()
+        limiter.release()
+    assert 8 < limiter.concurrency_limit <= 16
+
+
+def test_unbounded_window_set_from_in_flight_on_first_throttle():
+    limiter = AdaptiveRateLimiter()
+    assert limiter.concurrency_limit is None
+    for _ in range(10):
+        limiter.acquire()
+    limiter.release(error=_RateLimitError())
+    assert limiter.concurrency_limit == 5
+
+
+def test_retry_after_pauses_all_callers():
+    limiter = AdaptiveRateLimiter()
+    limiter.acquire()
+    limiter.release(error=_RateLimitError({"retry-after-ms": "200"}))
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_concurrency_window_blocks_threads():
+    limiter = AdaptiveRateLimiter(max_concurrency=2)
+    peak = []
+    active = [0]
+    lock = threading.Lock()
+
+    def work():
+        with limiter.request():
+            with lock:
+                active[0] += 1
+                peak.append(active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert max(peak) <= 2
+    assert limiter.stats()["succeeded"] == 6
+
+
+def test_async_slot_releases_on_error():
+    limiter = AdaptiveRateLimiter(max_concurrency=1)
+
+    async def run():
+        with pytest.raises(_RateLimitError):
+            async with limiter.arequest():
+                raise _RateLimitError()
+        async with limiter.arequest():
+            pass
+
+    asyncio.run(run())
+    stats = limiter.stats()
+    assert stats["rate_limited"] == 1 and stats["succeeded"] == 1
+
+
+def test_registry_uses_configured_budgets():
+    rate_limiter.configure_rate_limits(model="gpt-4", rpm=60, tpm=1000)
+    limiter = rate_limiter.get_rate_limiter("openai", "gpt-4")
+    assert limiter.rpm == 60 and limiter.tpm == 1000
+    assert rate_limiter.get_rate_limiter("openai", "gpt-4") is limiter
+    assert rate_limiter.get_rate_limiter("openai", "gpt-4o").rpm is None
@@ -0,0 +1,132 @@
+"""
+Unit tests for the SQLite response cache (src.llm.response_cache) and its agent hook.
+"""
+
+import pytest
+
+from src.agents.llm_participant_agent import LLMParticipantAgent
+from src.llm import response_cache
+from src.llm.response_cache import ResponseCache, make_cache_key
+
+
+@pytest.fixture(autouse=True)
+def _no_global_cache():
+    response_cache.configure_response_cache(None)
+    yield
+    response_cache.configure_response_cache(None)
+
+
+def test_roundtrip_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    assert cache.get("k") is None
+    cache.put("k", {"response_text": "Q1=A", "usage": {"total_tokens": 3}})
+    assert cache.get("k") == {"response_text": "Q1=A", "usage": {"total_tokens": 3}}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_persists_across_instances(tmp_path):
+    ResponseCache(tmp_path / "cache.sqlite").put("k", {"response_text": "x"})
+    assert ResponseCache(tmp_path / "cache.sqlite").get("k") == {"response_text": "x"}
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    value = {"response_text": "x" * 100}
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=450)
+    for key in ("a", "b", "c"):
+        cache.put(key, value)
+    cache.get("a")  # refresh "a"
+    cache.put("d", value)  # exceeds budget -> evict least recently used ("b", then "c")
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("d") is not None
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_cache_key_is_content_addressed():
+    base = dict(model="gpt-4", messages=[{"role": "user", "content": "hi"}], temperature=1.0)
+    assert make_cache_key(**base) == make_cache_key(**dict(reversed(list(base.items()))))
+    assert make_cache_key(**base) != make_cache_key(**{**base, "temperature": 0.0})
+
+
+def test_agent_serves_repeat_prompts_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_request(self, messages, max_retries=3, max_tokens=8192):
+        calls.append(messages)
+        return {"response_text": "Q1=A", "usage": {"total_tokens": 5}, "full_api_response": {}}
+
+    monkeypatch.setattr(LLMParticipantAgent, "_request_llm_with_history", fake_request)
+    cache = response_cache.configure_response_cache(tmp_path / "cache.sqlite")
+
+    def agent(pid, salt="seed0"):
+        return LLMParticipantAgent(participant_id=pid, profile={}, model="gpt-4", api_key="k", cache_salt=salt)
+
+    messages = [{"role": "user", "content": "Question 1"}]
+    first = agent(0)._call_llm_with_history(messages)
+    second = agent(0)._call_llm_with_history(messages)
+    assert len(calls) == 1
+    assert "cache_hit" not in first and second["cache_hit"] is True
+    assert second["response_text"] == "Q1=A"
+
+    # Other participants / seeds are independent samples
+    agent(1)._call_llm_with_history(messages)
+    agent(0, salt="seed1")._call_llm_with_history(messages)
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_early_stopped_streams_are_not_replayed(tmp_path, monkeypatch):
+    import asyncio
+
+    calls = []
+    full = "Let me think.\nQ1=A\nQ2=B"
+
+    def fake_request(self, messages, max_retries=3, max_tokens=8192, early_stop=None):
+        calls.append(early_stop is not None)
+        if early_stop is not None:
+            return {"response_text": "Q1=A", "usage": {}, "full_api_response": {}, "early_stop": True}
+        return {"response_text": full, "usage": {}, "full_api_response": {}, "early_stop": False}
+
+    async def afake_request(self, *args, **kwargs):
+        return fake_request(self, *args, **kwargs)
+
+    monkeypatch.setattr(LLMParticipantAgent, "_request_llm_with_history", fake_request)
+    monkeypatch.setattr(LLMParticipantAgent, "_arequest_llm_with_history", afake_request)
+    cache = response_cache.configure_response_cache(tmp_path / "cache.sqlite")
+    agent = LLMParticipantAgent(participant_id=0, profile={}, model="gpt-4", api_key="k")
+    messages = [{"role": "user", "content": "Question 1"}]
+    stop = lambda text: "Q1=" in text
+
+    # A stream cut at the answers is not stored, so a non-streamed run still gets the full reply
+    assert agent._call_llm_with_history(messages, early_stop=stop)["early_stop"] is True
+    assert asyncio.run(agent._acall_llm_with_history(messages, early_stop=stop))["early_stop"] is True
+    assert agent._call_llm_with_history(messages)["response_text"] == full
+    assert calls == [True, True, False]
+
+    # A complete reply is reusable by both streaming and non-streaming runs
+    assert agent._call_llm_with_history(messages, early_stop=stop)["response_text"] == full
+    assert asyncio.run(agent._acall_llm_with_history(messages))["cache_hit"] is True
+    assert len(calls) == 3 and cache.stats()["hits"] == 2
+
+
+def test_endpoints_do_not_share_entries(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_request(self, messages, max_retries=3, max_tokens=8192):
+        calls.append(self.api_base)
+        return {"response_text": f"Q1={len(calls)}", "usage": {}, "full_api_response": {}}
+
+    monkeypatch.setattr(LLMParticipantAgent, "_request_llm_with_history", fake_request)
+    response_cache.configure_response_cache(tmp_path / "cache.sqlite")
+
+    def agent(api_base=None):
+        return LLMParticipantAgent(participant_id=0, profile={}, model="gpt-4", api_key="k", api_base=api_base)
+
+    messages = [{"role": "user", "content": "Question 1"}]
+    mock = agent("http://127.0.0.1:8000/v1")._call_llm_with_history(messages)
+    real = agent()._call_llm_with_history(messages)
+    assert calls == ["http://127.0.0.1:8000/v1", None]
+    assert "cache_hit" not in real and real["response_text"] != mock["response_text"]
+    # A trailing slash is the same endpoint
+    assert agent("http://127.0.0.1:8000/v1/")._call_llm_with_history(messages)["cache_hit"] is True
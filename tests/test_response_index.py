@@ -0,0 +1,114 @@
+"""
+Unit tests for the parsed-response index (src.evaluation.response_index) and
+its consumers in src.evaluation.sanity_check.
+"""
+
+import json
+import re
+
+import pytest
+
+from src.evaluation.response_index import INDEX_FILENAME, ParsedResponseIndex, load_parsed_index
+from src.evaluation.sanity_check import calculate_raw_failure_rate, run_sanity_check
+
+EVALUATOR_SOURCE = '''
+import re
+
+def parse_agent_responses(response_text):
+    return dict(re.findall(r"(Q\\d+)=(\\w+)", response_text))
+
+def get_required_q_numbers(trial_info):
+    return {f"Q{i}" for i in range(1, trial_info.get("n_questions", 1) + 1)}
+
+def evaluate_study(results):
+    n = 0
+    for participant in results["individual_data"]:
+        for response in participant["responses"]:
+            n += len(parse_agent_responses(response["response_text"]))
+    return {"score": n}
+'''
+
+
+def _response(text, n_questions=2):
+    return {"response_text": text, "trial_info": {"n_questions": n_questions}}
+
+
+@pytest.fixture
+def study(tmp_path):
+    evaluator_path = tmp_path / "study_999_evaluator.py"
+    evaluator_path.write_text(EVALUATOR_SOURCE, encoding="utf-8")
+    benchmark = {
+        "individual_data": [
+            {"participant_id": 0, "responses": [_response("Q1=A Q2=B"), _response("")]},
+            {"participant_id": 1, "responses": [_response("Q1=A only"), _response("I cannot answer that question.")]},
+        ]
+    }
+    benchmark_file = tmp_path / "cfg" / "full_benchmark.json"
+    benchmark_file.parent.mkdir()
+    benchmark_file.write_text(json.dumps(benchmark), encoding="utf-8")
+    return benchmark_file, evaluator_path
+
+
+def test_index_is_cached_and_invalidated_by_content(study, monkeypatch):
+    benchmark_file, evaluator_path = study
+    index = load_parsed_index(benchmark_file, evaluator_path)
+    assert (benchmark_file.parent / INDEX_FILENAME).exists()
+    assert [e["raw_status"] for e in index.entries] == [None, "empty", None, "refusal"]
+
+    # Unchanged files: served from disk without building
+    monkeypatch.setattr(ParsedResponseIndex, "build", classmethod(lambda *a, **k: pytest.fail("rebuilt")))
+    cached = load_parsed_index(benchmark_file, evaluator_path)
+    assert cached.entries == index.entries and cached.parsed == index.parsed
+    monkeypatch.undo()
+
+    # Editing the evaluator changes its hash and forces a rebuild
+    evaluator_path.write_text(EVALUATOR_SOURCE + "\n# edited\n", encoding="utf-8")
+    rebuilt = load_parsed_index(benchmark_file, evaluator_path)
+    assert rebuilt.evaluator_sha256 != index.evaluator_sha256
+
+
+def test_sanity_check_and_failure_rate_use_index(study, monkeypatch):
+    benchmark_file, evaluator_path = study
+    benchmark = json.loads(benchmark_file.read_text())
+    index = load_parsed_index(benchmark_file, evaluator_path)
+
+    result = run_sanity_check("study_999", benchmark_file, evaluator_path, parsed_index=index)
+    assert (result["total_responses"], result["skipped_responses"], result["total_checked"]) == (4, 1, 3)
+    assert result["passed"] == 1
+    assert sorted(sorted(f["missing_q_numbers"]) for f in result["failed_responses"]) == [["Q1", "Q2"], ["Q2"]]
+
+    # Data the caller already loaded is not read from disk again
+    from src.utils import compact_store
+    monkeypatch.setattr(compact_store, "load_benchmark", lambda *a, **k: pytest.fail("benchmark reloaded"))
+    reused = run_sanity_check("study_999", benchmark_file, evaluator_path, parsed_index=index, benchmark_data=benchmark)
+    assert reused == result
+    monkeypatch.undo()
+
+    with_index = calculate_raw_failure_rate(benchmark, parsed_index=index)
+    assert with_index == calculate_raw_failure_rate(benchmark)
+    assert with_index["raw_failure_breakdown"] == {"empty": 1, "refusal": 1, "other": 0}
+
+
+def test_bind_serves_evaluator_parses_from_index(study):
+    benchmark_file, evaluator_path = study
+    from src.evaluation.response_index import _import_evaluator
+
+    module = _import_evaluator(evaluator_path)
+    original = module.parse_agent_responses
+    calls = []
+
+    def counting_parse(text):
+        calls.append(text)
+        return original(text)
+
+    module.parse_agent_responses = counting_parse
+    index = load_parsed_index(benchmark_file, evaluator_path)
+    benchmark = json.loads(benchmark_file.read_text())
+
+    with index.bind(module):
+        score = module.evaluate_study(benchmark)["score"]
+    # Only texts the index skipped (the empty one) reach the real parser
+    assert calls == [""]
+    assert score == 3
+    assert module.parse_agent_responses is counting_parse
+    assert re.search("Q1", json.dumps(index.parsed))
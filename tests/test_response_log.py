@@ -0,0 +1,64 @@
+"""
+Unit tests for the append-only Stage 5 response log (src.utils.response_log).
+"""
+
+import json
+import threading
+
+from src.utils.response_log import ResponseLog, load_response_log
+
+
+def _resp(pid, trial=1):
+    return {"participant_id": pid, "trial_number": trial, "response_text": f"Q1={pid}"}
+
+
+def test_append_and_load_groups_by_repeat(tmp_path):
+    path = tmp_path / "raw_responses.jsonl"
+    with ResponseLog(path) as log:
+        log.append(_resp(0), 0)
+        log.append(_resp(1), 0)
+        log.extend([_resp(0), _resp(1)], 1)
+        log.append(_resp(0), 2)
+
+    runs = load_response_log(path)
+    assert sorted(runs) == [0, 1, 2]
+    assert [r["participant_id"] for r in runs[0]] == [0, 1]
+    assert len(runs[2]) == 1
+    # The repeat tag is a storage detail and is stripped on load
+    assert "repeat_idx" not in runs[0][0]
+
+
+def test_concurrent_appends_produce_whole_lines(tmp_path):
+    path = tmp_path / "raw_responses.jsonl"
+    log = ResponseLog(path)
+    threads = [
+        threading.Thread(target=lambda i=i: [log.append(_resp(i, t), 0) for t in range(50)])
+        for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+    assert len(load_response_log(path)[0]) == 400
+
+
+def test_truncated_line_is_skipped(tmp_path):
+    path = tmp_path / "raw_responses.jsonl"
+    with ResponseLog(path) as log:
+        log.append(_resp(0), 0)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"participant_id": 1, "resp')  # crash mid-write
+    assert len(load_response_log(path)[0]) == 1
+
+
+def test_legacy_lines_split_into_repeats(tmp_path):
+    path = tmp_path / "raw_responses.jsonl"
+    lines = [_resp(0), _resp(1), _resp(0), _resp(1), _resp(0)]
+    path.write_text("".join(json.dumps(r) + "\n" for r in lines), encoding="utf-8")
+    runs = load_response_log(path)
+    assert [len(runs[i]) for i in sorted(runs)] == [2, 2, 1]
+
+
+def test_missing_file_loads_empty(tmp_path):
+    assert load_response_log(tmp_path / "nope.jsonl") == {}
@@ -0,0 +1,63 @@
+"""
+Unit tests for the reporting results warehouse (src.utils.results_warehouse).
+"""
+
+import json
+
+from src.utils.results_warehouse import open_warehouse
+
+
+def _write_config(results_dir, study_id, config, n_participants=3, score=0.5, tokens=10):
+    cfg_dir = results_dir / study_id / config
+    cfg_dir.mkdir(parents=True, exist_ok=True)
+    benchmark = {
+        "title": f"Title {study_id}",
+        "model": "m",
+        "system_prompt_preset": "v1_empty",
+        "usage_stats": {},
+        "individual_data": [
+            {"participant_id": p, "response_text": "Q1=1", "usage": {"total_tokens": tokens, "cost": 0.01}}
+            for p in range(n_participants)
+        ],
+    }
+    (cfg_dir / "full_benchmark.json").write_text(json.dumps(benchmark))
+    evaluation = {
+        "score": score,
+        "ecs_corr": 0.25,
+        "test_results": [{"finding_id": "F1", "test_name": "t", "pi_agent": 0.4}],
+        "finding_results": [{"finding_id": "F1", "finding_score": score, "n_tests": 1}],
+    }
+    (cfg_dir / "evaluation_results.json").write_text(json.dumps(evaluation))
+    return cfg_dir
+
+
+def test_ingest_query_and_usage_fallback(tmp_path):
+    _write_config(tmp_path, "study_001", "cfg_a")
+    _write_config(tmp_path, "study_002", "cfg_a", n_participants=2, tokens=5)
+    with open_warehouse(tmp_path) as warehouse:
+        rows = warehouse.configs()
+        assert [(r["study_id"], r["config"]) for r in rows] == [("study_001", "cfg_a"), ("study_002", "cfg_a")]
+        first = rows[0]
+        assert first["n_participants"] == 3 and first["title"] == "Title study_001"
+        assert first["evaluation"]["test_results"][0]["pi_agent"] == 0.4
+        # No usage_stats in the benchmark: summed over responses
+        assert first["usage_stats"]["total_tokens"] == 30
+        assert abs(first["usage_stats"]["total_cost"] - 0.03) < 1e-9
+        assert warehouse.configs(study_id="study_002")[0]["usage_stats"]["total_tokens"] == 10
+        assert warehouse.query("SELECT COUNT(*) AS n FROM finding_results")[0]["n"] == 2
+
+
+def test_refresh_only_reingests_changed_and_drops_deleted(tmp_path):
+    cfg_dir = _write_config(tmp_path, "study_001", "cfg_a")
+    _write_config(tmp_path, "study_001", "cfg_b")
+    with open_warehouse(tmp_path) as warehouse:
+        assert warehouse.refresh()["updated"] == 0
+
+        _write_config(tmp_path, "study_001", "cfg_b", score=0.9)
+        for name in ("full_benchmark.json", "evaluation_results.json"):
+            (cfg_dir / name).unlink()
+        cfg_dir.rmdir()
+        counts = warehouse.refresh()
+        assert counts["updated"] == 1 and counts["removed"] == 1
+        rows = warehouse.configs()
+        assert [r["config"] for r in rows] == ["cfg_b"] and rows[0]["score"] == 0.9
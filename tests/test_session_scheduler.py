@@ -0,0 +1,82 @@
+"""
+Unit tests for the multi-round session scheduler (src.agents.session_scheduler).
+"""
+
+import functools
+import threading
+import time
+
+from src.agents.session_scheduler import SessionScheduler
+
+
+def _session(n_players, n_rounds, delay, log):
+    history = []
+    for round_num in range(1, n_rounds + 1):
+        calls = [functools.partial(_call, delay, round_num, p, log) for p in range(n_players)]
+        history.append((yield calls))
+    return history
+
+
+def _call(delay, round_num, player, log):
+    time.sleep(delay)
+    log.append(round_num)
+    return (round_num, player)
+
+
+def test_rounds_return_results_in_order_and_share_workers():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def tracked(value):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+        return value
+
+    def session(key):
+        first = yield [functools.partial(tracked, (key, i)) for i in range(5)]
+        second = yield [functools.partial(tracked, sum(i for _, i in first))]
+        return second[0]
+
+    scheduler = SessionScheduler(max_workers=3)
+    results = scheduler.run({k: session(k) for k in "abcd"})
+    assert results == {k: 10 for k in "abcd"}
+    assert scheduler.calls_completed == 24
+    assert peak[0] <= 3
+
+
+def test_slow_session_does_not_block_others():
+    fast_log, slow_log = [], []
+    scheduler = SessionScheduler(max_workers=8)
+    start = time.monotonic()
+    results = scheduler.run({
+        "slow": _session(2, 1, 0.3, slow_log),
+        "fast": _session(2, 4, 0.01, fast_log),
+    })
+    assert len(results["fast"]) == 4 and len(results["slow"]) == 1
+    # The fast session ran all four rounds while the slow one was still on round 1
+    assert fast_log == [1, 1, 2, 2, 3, 3, 4, 4] and slow_log == [1, 1]
+    assert time.monotonic() - start < 0.6
+
+
+def test_failing_call_is_thrown_into_session_and_failed_session_is_isolated():
+    def boom():
+        raise RuntimeError("api down")
+
+    def handles_error():
+        try:
+            yield [boom, lambda: 1]
+        except RuntimeError:
+            retry = yield [lambda: 2]
+            return retry[0]
+
+    def unhandled():
+        yield [boom]
+        return "unreachable"
+
+    scheduler = SessionScheduler(max_workers=2)
+    results = scheduler.run({"ok": handles_error(), "bad": unhandled(), "empty": _session(0, 2, 0, [])})
+    assert results == {"ok": 2, "empty": [[], []]}
+    assert isinstance(scheduler.errors["bad"], RuntimeError)
@@ -0,0 +1,43 @@
+"""
+Unit tests for Stage 6 config-folder evaluation on a process pool
+(generation_pipeline.pipeline.run_stage6_tasks).
+"""
+
+import multiprocessing
+import time
+
+import pytest
+
+from generation_pipeline import pipeline as pipeline_module
+
+
+def _fake_evaluate(study_id, cfg_dir, evaluator_path, disable_formatter=True, force=False):
+    # The first folder finishes last, so worker completion order differs from task order
+    time.sleep(0.3 if cfg_dir.name.endswith("a") else 0.0)
+    print(f"  - evaluating {study_id}/{cfg_dir.name}")
+    return {"study_id": study_id, "config": cfg_dir.name, "ecs_corr": len(cfg_dir.name) / 10, "up_to_date": False, "stale": []}
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method(allow_none=False) != "fork",
+    reason="workers must inherit the patched evaluate_config_folder",
+)
+def test_process_pool_matches_sequential_run(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(pipeline_module, "evaluate_config_folder", _fake_evaluate)
+    tasks = [
+        ("study_001", tmp_path / "model_x_v1-empty_a", tmp_path / "study_001_evaluator.py", True, False),
+        ("study_001", tmp_path / "model_y_v1-empty_bb", tmp_path / "study_001_evaluator.py", True, False),
+    ]
+
+    sequential = pipeline_module.run_stage6_tasks(tasks, jobs=1)
+    sequential_out = capsys.readouterr().out
+    parallel = pipeline_module.run_stage6_tasks(tasks, jobs=2)
+    parallel_out = capsys.readouterr().out
+
+    assert parallel == sequential
+    assert [r["config"] for r in parallel] == ["model_x_v1-empty_a", "model_y_v1-empty_bb"]
+    # Worker output is relayed under each task's header, in task order
+    assert "Evaluating on 2 worker processes" in parallel_out
+    relayed = [line for line in parallel_out.splitlines() if "Evaluating on" not in line]
+    assert relayed == sequential_out.splitlines()
+    assert parallel_out.index("evaluating study_001/model_x_v1-empty_a") < parallel_out.index("[2/2]")
@@ -0,0 +1,136 @@
+"""
+Unit tests for streamed completions with early stop (src.llm.streaming).
+End-to-end cases stream from the local mock server, whose replies put the
+Q answers first and trailing filler after them.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.llm.streaming import StreamAccumulator, required_answers_check, summarize_stream_timings
+
+PROMPT = (
+    "Q1.1 (answer with number only, 0-100): Estimate the percentage.\n"
+    "Q1.2 (answer with number only, 1-10): Rate your confidence.\n"
+    "Q2.1 (answer with number only, 0-100): Estimate again.\n"
+    "RESPONSE_SPEC: Q1.1=<number>, Q1.2=<number>, Q2.1=<number>"
+)
+TRIAL_INFO = {"items": [{"q_idx_estimate": "Q1.1"}, {"q_idx_estimate": "Q1.2"}, {"q_idx_estimate": "Q2.1"}]}
+
+
+def _chunk(content=None, finish_reason=None, usage=None):
+    choices = [] if content is None and finish_reason is None else [{"delta": {"content": content}, "finish_reason": finish_reason}]
+    return {"id": "c1", "model": "m", "choices": choices, "usage": usage}
+
+
+def test_stop_waits_for_the_end_of_the_line():
+    acc = StreamAccumulator(prompt_tokens_estimate=10, stop_check=lambda text: "Q2=" in text)
+    assert acc.add_openai_chunk(_chunk("Q1=1\nQ2=3")) is False  # Q2 value may still be arriving
+    assert acc.add_openai_chunk(_chunk("5\nThat")) is True
+    result = acc.result()
+    assert result["early_stop"] is True
+    assert result["response_text"] == "Q1=1\nQ2=35\nThat"
+    assert result["full_api_response"]["choices"][0]["finish_reason"] == "early_stop"
+    assert result["usage"]["estimated"] is True and result["usage"]["prompt_tokens"] == 10
+    assert result["timing"]["ttft_s"] is not None and result["timing"]["total_s"] >= result["timing"]["ttft_s"]
+
+
+def test_draft_answers_inside_reasoning_do_not_stop_the_stream():
+    acc = StreamAccumulator(stop_check=lambda text: "Q1=" in text)
+    assert acc.add_openai_chunk(_chunk("<think>\nmaybe Q1=2\n")) is False
+    assert acc.add_openai_chunk(_chunk("</think>\nQ1=3\n")) is True
+
+
+def test_full_stream_keeps_provider_usage_and_finish_reason():
+    acc = StreamAccumulator(stop_check=None)
+    for chunk in (_chunk("Q1=4"), _chunk(finish_reason="stop"), _chunk(usage={"prompt_tokens": 7, "completion_tokens": 2, "total_tokens": 9})):
+        assert acc.add_openai_chunk(chunk) is False
+    result = acc.result()
+    assert result["usage"] == {"prompt_tokens": 7, "completion_tokens": 2, "total_tokens": 9}
+    assert result["full_api_response"]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_anthropic_events_with_thinking():
+    acc = StreamAccumulator(stop_check=None)
+    events = [
+        {"type": "message_start", "message": {"id": "msg", "model": "claude", "usage": {"input_tokens": 12, "output_tokens": 1}}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": "hmm"}},
+        {"type": "content_block_delta", "index": 1, "delta": {"type": "text_delta", "text": "Q1=Yes"}},
+        {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 5}},
+    ]
+    for event in events:
+        acc.add_anthropic_event(event)
+    result = acc.result()
+    assert result["response_text"] == "<reasoning>\nhmm\n</reasoning>\n\nQ1=Yes"
+    assert result["usage"] == {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17}
+
+
+def test_required_answers_check_uses_study_evaluator():
+    check = required_answers_check("study_002", TRIAL_INFO)
+    assert check("Q1.1=40\nQ1.2=7\nQ2.1=55") is True
+    assert check("Q1.1=40\nQ1.2=7") is False
+    assert required_answers_check("study_002", {"items": []}) is None
+    assert required_answers_check("study_does_not_exist", TRIAL_INFO) is None
+    assert required_answers_check(None, TRIAL_INFO) is None
+
+
+def test_summarize_stream_timings():
+    responses = [
+        {"timing": {"ttft_s": 0.1, "total_s": 0.5}, "early_stop": True},
+        {"timing": {"ttft_s": 0.3, "total_s": 1.5}, "early_stop": False},
+        {"usage": {}},
+    ]
+    summary = summarize_stream_timings(responses)
+    assert summary["responses"] == 2 and summary["early_stopped"] == 1
+    assert summary["ttft_s"]["median"] == 0.3
+    assert summarize_stream_timings([{"usage": {}}]) is None
+
+
+# End-to-end against the mock server ---------------------------------------------
+
+@pytest.fixture
+def streaming_agent():
+    pytest.importorskip("openai")
+    from src.agents.llm_participant_agent import LLMParticipantAgent
+    from src.llm import client_pool
+    from src.llm.mock_server import MockLLMServer
+
+    client_pool.close_clients()
+    # ~2 s of filler after the answers at 2000 tokens/s unless the stream is cut
+    with MockLLMServer(extra_tokens="fixed:4000", tokens_per_second=2000, seed=0) as server:
+        agent = LLMParticipantAgent(
+            0, {"study_id": "study_002"}, model="gpt-4o-mini", api_key="k",
+            use_real_llm=True, api_base=server.base_url, streaming=True,
+        )
+        yield agent, server
+    client_pool.close_clients()
+
+
+def _wait_for_cancel(server, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline and not server.stats()["streams_cancelled"]:
+        time.sleep(0.02)
+    return server.stats()
+
+
+def test_agent_stream_stops_after_required_answers(streaming_agent):
+    agent, server = streaming_agent
+    record = agent.complete_trial(PROMPT, TRIAL_INFO)
+    assert record["early_stop"] is True
+    assert [line.split("=")[0] for line in record["raw_response_text"].splitlines()] == ["Q1.1", "Q1.2", "Q2.1"]
+    assert "Let me think" not in record["raw_response_text"]
+    assert record["timing"]["total_s"] < 1.0
+    assert record["usage"]["estimated"] is True
+    stats = _wait_for_cancel(server)
+    assert stats["streams"] == 1 and stats["streams_cancelled"] == 1
+    assert stats["completion_tokens"] < 4000
+
+
+def test_async_agent_stream_stops_after_required_answers(streaming_agent):
+    agent, server = streaming_agent
+    record = asyncio.run(agent.acomplete_trial(PROMPT, TRIAL_INFO))
+    assert record["early_stop"] is True
+    assert record["raw_response_text"].count("=") == 3
+    assert _wait_for_cancel(server)["streams_cancelled"] == 1
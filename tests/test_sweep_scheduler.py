@@ -0,0 +1,140 @@
+"""
+Unit tests for the in-process sweep scheduler (generation_pipeline.scheduler).
+"""
+
+import threading
+import time
+
+import pytest
+
+from generation_pipeline import scheduler as scheduler_module
+from generation_pipeline.scheduler import SweepScheduler, SweepTask, build_sweep
+from src.llm import rate_limiter
+
+
+class FakePipeline:
+    """run_stage5 stand-in: reports progress and writes a full_benchmark.json per config folder."""
+
+    def __init__(self, root, n_responses=6, delay=0.01, fail=()):
+        self.root = root
+        self.n_responses = n_responses
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def run_stage5(self, study_id, model, system_prompt_preset, progress_callback=None, reasoning="default", temperature=1.0, **kwargs):
+        with self.lock:
+            self.calls.append((study_id, model, system_prompt_preset, kwargs))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            print(f"simulating {study_id} {model}")
+            if (study_id, model) in self.fail:
+                raise RuntimeError("provider down")
+            progress_callback(0, self.n_responses)
+            for i in range(1, self.n_responses + 1):
+                time.sleep(self.delay)
+                progress_callback(i, self.n_responses)
+            folder = scheduler_module.stage5_config_folder(model, system_prompt_preset, reasoning, temperature)
+            path = self.root / study_id / folder / "full_benchmark.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("{}")
+            return path
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def prepare_evaluator(self, study_id):
+        return self.root / f"{study_id}_evaluator.py"
+
+
+@pytest.fixture
+def evaluated(monkeypatch):
+    calls = []
+
+    def fake_evaluate(study_id, cfg_dir, evaluator_path, disable_formatter=True, force=False):
+        calls.append((study_id, cfg_dir.name, force))
+        return {"study_id": study_id, "config": cfg_dir.name, "ecs_corr": 0.5, "up_to_date": False, "stale": []}
+
+    monkeypatch.setattr(scheduler_module, "evaluate_config_folder", fake_evaluate)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def _clean_limiters():
+    rate_limiter.reset_rate_limiters()
+    yield
+    rate_limiter.reset_rate_limiters()
+
+
+def test_build_sweep_graph():
+    tasks = build_sweep(["openai/gpt-4o", "mistralai/mistral-nemo"], ["v1_empty", "v2_human"], ["study_001", "study_002"])
+    simulations = [t for t in tasks if t.kind == "simulate"]
+    assert len(simulations) == 8 and len(tasks) == 16
+    # Models alternate so concurrent simulations spread over providers
+    assert [t.model for t in simulations[:2]] == ["openai/gpt-4o", "mistralai/mistral-nemo"]
+    assert simulations[0].task_id == "simulate:study_001/openai_gpt_4o_v1-empty"
+    evaluate = next(t for t in tasks if t.kind == "evaluate")
+    assert evaluate.deps == [simulations[0].task_id]
+
+    tasks = build_sweep(["m"], ["v1_empty", "v1_empty"], ["study_001"], temperature=0.7, generate_evaluators=True)
+    assert [t.task_id for t in tasks] == [
+        "evaluator:study_001", "simulate:study_001/m_temp0.7_v1-empty", "evaluate:study_001/m_temp0.7_v1-empty",
+    ]
+    assert tasks[2].deps == ["simulate:study_001/m_temp0.7_v1-empty", "evaluator:study_001"]
+
+
+def test_runs_graph_in_process_with_shared_limits(tmp_path, evaluated):
+    pipeline = FakePipeline(tmp_path)
+    tasks = build_sweep(["model-a", "model-b"], ["v1_empty"], ["study_001", "study_002", "study_003"])
+    log_path = tmp_path / "sweep.log"
+    scheduler = SweepScheduler(
+        pipeline, tasks, {"use_real_llm": False, "repeats": 2}, max_parallel=2,
+        max_in_flight=16, force_evaluation=True, log_path=log_path, report_interval=0.02,
+    )
+    summary = scheduler.run()
+
+    assert pipeline.peak == 2
+    assert {call[3]["repeats"] for call in pipeline.calls} == {2}
+    assert summary["done"] == 12 and summary["failed"] == 0
+    assert summary["responses"] == 36 and summary["eta_s"] == 0.0
+    assert summary["by_model"]["model-a"]["responses"] == 18
+    assert len(evaluated) == 6 and all(force for _, _, force in evaluated)
+    assert summary["evaluations"][0]["ecs_corr"] == 0.5
+    # One budget per model for the whole sweep
+    assert rate_limiter.get_rate_limiter("openai", "model-a").max_concurrency == 16
+    # Task output went to the log, not the console
+    log = log_path.read_text()
+    assert "simulating study_003 model-b" in log and "[simulate:study_001/model_a_v1-empty] done" in log
+
+
+def test_failed_simulation_skips_its_evaluation(tmp_path, evaluated, capsys):
+    pipeline = FakePipeline(tmp_path, fail={("study_002", "model-a")})
+    tasks = build_sweep(["model-a"], ["v1_empty"], ["study_001", "study_002"])
+    summary = SweepScheduler(pipeline, tasks, max_parallel=4).run()
+    assert summary["failed_tasks"] == [{"task": "simulate:study_002/model_a_v1-empty", "error": "RuntimeError: provider down"}]
+    assert summary["skipped_tasks"] == ["evaluate:study_002/model_a_v1-empty"]
+    assert [call[0] for call in evaluated] == ["study_001"]
+    assert "provider down" in capsys.readouterr().out
+
+
+def test_eta_estimates_unstarted_simulations_from_their_study():
+    tasks = [
+        SweepTask("simulate:s1/a", "simulate", "s1", status="done", responses_done=100),
+        SweepTask("simulate:s1/b", "simulate", "s1", status="running", responses_done=40, responses_expected=100),
+        SweepTask("simulate:s1/c", "simulate", "s1"),
+        SweepTask("simulate:s2/a", "simulate", "s2"),  # no data for s2: sweep-wide average
+    ]
+    scheduler = SweepScheduler(None, tasks)
+    scheduler._start = time.monotonic() - 10.0
+    progress = scheduler.progress()
+    assert progress["responses"] == 140
+    assert progress["responses_remaining"] == 60 + 100 + 100
+    assert progress["eta_s"] == pytest.approx(260 / 14.0, rel=0.05)
+    assert "ETA" in scheduler.progress_line()
+
+    with pytest.raises(ValueError):
+        SweepScheduler(None, tasks, {"rpm": 100})
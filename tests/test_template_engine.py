@@ -0,0 +1,72 @@
+"""
+Unit tests for the compiled prompt template engine (src.agents.template_engine).
+"""
+
+import re
+
+from src.agents.template_engine import compile_template, render_template
+
+
+def _regex_fill(template, data):
+    """The previous four-pass regex implementation, kept as the reference."""
+
+    def replace_nested(match):
+        value = data
+        for part in match.group(1).split('.'):
+            if isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                return match.group(0)
+        return str(value)
+
+    def replace_if(match):
+        return match.group(2) if match.group(1) in data and data[match.group(1)] else ""
+
+    def replace_each(match):
+        items, content = data.get(match.group(1)), match.group(2)
+        if isinstance(items, dict):
+            return "\n".join(content.replace("{{@key}}", str(k)).replace("{{this}}", str(v)) for k, v in items.items())
+        if isinstance(items, list):
+            return "\n".join(
+                content.replace("{{@index}}", str(i + 1)).replace("{{this}}", str(v)) for i, v in enumerate(items)
+            )
+        return ""
+
+    result = re.sub(r'\{\{([\w.]+)\}\}', replace_nested, template)
+    result = re.sub(r'\{\{#if\s+(\w+)\}\}(.*?)\{\{/if\}\}', replace_if, result, flags=re.DOTALL)
+    result = re.sub(r'\{\{#each\s+(\w+)\}\}(.*?)\{\{/each\}\}', replace_each, result, flags=re.DOTALL)
+    return re.sub(r'\{\{[^}]+\}\}', '', result)
+
+
+DATA = {
+    "name": "Alex",
+    "trial": {"number": 3, "lines": {"A": 10.5, "B": 8}},
+    "show_hint": True,
+    "hidden": 0,
+    "options": ["red", "green"],
+    "scores": {"math": 90, "art": 75},
+    "empty": [],
+}
+
+TEMPLATES = [
+    "Hello {{name}}, trial {{trial.number}}: A={{trial.lines.A}} B={{trial.lines.B}}",
+    "{{missing}} and {{trial.missing}} and {{ name }} and {{unknown tag}}",
+    "{{#if show_hint}}Hint for {{name}}{{/if}}{{#if hidden}}never{{/if}}{{#if missing}}no{{/if}}.",
+    "Options:\n{{#each options}}{{@index}}. {{this}} ({{name}}){{/each}}\nEnd",
+    "{{#each scores}}{{@key}}={{this}}{{@index}}{{/each}}|{{#each empty}}x{{/each}}|{{#each name}}x{{/each}}",
+    "unclosed {{#if hidden}}still shown {{/each}} and {{this}} {{@index}}",
+    "{{#if show_hint}}\nmulti\nline {{trial.number}}\n{{/if}}{{#each missing}}gone{{/each}}",
+]
+
+
+def test_matches_previous_regex_implementation():
+    for template in TEMPLATES:
+        assert render_template(template, DATA) == _regex_fill(template, DATA), template
+
+
+def test_nested_blocks_and_template_cache():
+    template = "{{#if show_hint}}Choose:\n{{#each options}}- {{this}}{{#if name}}!{{/if}}{{/each}}{{/if}}{{#if hidden}}{{#each options}}x{{/each}}{{/if}}"
+    assert render_template(template, DATA) == "Choose:\n- red!\n- green!"
+    assert render_template(template, {**DATA, "show_hint": False}) == ""
+    assert compile_template(template) is compile_template(template)
+    assert render_template("{{#each scores}}{{#each options}}{{this}}{{/each}}{{/each}}", DATA) == "red\ngreen\nred\ngreen"
@@ -0,0 +1,105 @@
+"""
+Unit tests for the adaptive max_tokens planner (src.llm.token_budget).
+"""
+
+import pytest
+
+from src.llm.token_budget import TokenBudgetPlanner, finish_reason, history_logs
+from src.utils.response_log import ResponseLog
+
+TRIAL_INFO = {
+    "sub_study_id": "exp_1",
+    "items": [{"q_idx_estimate": "Q1.1"}, {"q_idx_estimate": "Q1.2"}, {"q_idx_estimate": "Q2.1"}],
+}
+PROMPT = (
+    "Q1.1 (answer with number only, 0-100): Estimate the percentage.\n"
+    "Q1.2 (answer with number only, 1-10): Rate your confidence.\n"
+    "Q2.1 (answer with number only, 0-100): Estimate again.\n"
+    "RESPONSE_SPEC: Q1.1=<number>, Q1.2=<number>, Q2.1=<number>"
+)
+
+
+def _record(completion_tokens, reason="stop", text="Q1.1=1\nQ1.2=2\nQ2.1=3", sub_study_id="exp_1"):
+    return {
+        "response_text": text,
+        "usage": {"completion_tokens": completion_tokens},
+        "full_api_response": {"choices": [{"finish_reason": reason}]},
+        "trial_info": dict(TRIAL_INFO, sub_study_id=sub_study_id),
+    }
+
+
+def test_budget_follows_percentile_with_fallbacks():
+    planner = TokenBudgetPlanner(percentile=0.9, headroom=1.0, min_tokens=64, min_samples=10)
+    assert planner.max_tokens_for("study_002", TRIAL_INFO) == 8192  # nothing learned yet
+    for n in range(1, 11):
+        planner.observe("study_002", "exp_1", n * 100)
+    # 90th percentile of 100..1000 is 900, rounded up to a multiple of 64
+    assert planner.max_tokens_for("study_002", TRIAL_INFO) == 960
+    # Unknown sub-study falls back to the study-wide lengths
+    assert planner.max_tokens_for("study_002", {"sub_study_id": "exp_2"}) == 960
+    assert planner.max_tokens_for("study_003", TRIAL_INFO) == 8192
+
+
+def test_truncation_before_answers_is_censored():
+    planner = TokenBudgetPlanner(percentile=0.9, min_samples=5)
+    for _ in range(8):
+        planner.observe_response("study_002", _record(50))
+    assert planner.max_tokens_for("study_002", TRIAL_INFO) == 256  # min_tokens
+    # Truncated after the answers: the budget was enough, not censored
+    assert planner.observe_response("study_002", _record(300, reason="length")) is False
+    # Cut off before Q2.1 (x2): unknown length, the group goes back to the ceiling
+    for _ in range(2):
+        assert planner.observe_response("study_002", _record(300, reason="length", text="Q1.1=1\nQ1.2=2")) is True
+    assert planner.max_tokens_for("study_002", TRIAL_INFO) == 8192
+    assert planner.stats()["truncated"] == 2
+
+
+def test_retry_budget_is_capped_by_ceiling():
+    planner = TokenBudgetPlanner(ceiling=1000, retry_factor=2.0)
+    assert planner.retry_budget(256) == 512
+    assert planner.retry_budget(640) == 1000
+    assert not planner.can_retry(1000)
+    with pytest.raises(ValueError):
+        TokenBudgetPlanner(percentile=0)
+
+
+def test_finish_reason_reads_both_wire_formats():
+    assert finish_reason({"full_api_response": {"choices": [{"finish_reason": "length"}]}}) == "length"
+    assert finish_reason({"full_api_response": {"stop_reason": "max_tokens"}}) == "max_tokens"
+    assert finish_reason({}) is None
+
+
+def test_learns_from_history_logs(tmp_path):
+    config_dir = tmp_path / "runs" / "old_run" / "study_002" / "gpt_4o_v3"
+    with ResponseLog(config_dir / "raw_responses.jsonl") as log:
+        log.extend([_record(n) for n in range(100, 130)], repeat_idx=0)
+    paths = history_logs(tmp_path, "study_002", "gpt_4o_v3")
+    assert paths == [config_dir / "raw_responses.jsonl"]
+
+    planner = TokenBudgetPlanner(percentile=1.0, headroom=1.0, min_tokens=1)
+    assert planner.learn_from_logs("study_002", paths) == 30
+    assert planner.max_tokens_for("study_002", TRIAL_INFO) == 192  # max 129 -> next multiple of 64
+    stats = planner.stats()
+    assert stats["history"] == 30 and stats["observed"] == 0
+
+
+def test_agent_retries_reply_cut_before_its_answers():
+    pytest.importorskip("openai")
+    from src.agents.llm_participant_agent import LLMParticipantAgent
+    from src.llm import client_pool
+    from src.llm.mock_server import MockLLMServer
+
+    planner = TokenBudgetPlanner(min_tokens=64, min_samples=1, ceiling=1024)
+    planner.observe("study_002", "exp_1", 40)
+    client_pool.close_clients()
+    # A 100-token first answer does not fit the learned 64-token budget
+    with MockLLMServer(extra_tokens="fixed:2000", answers={"Q1.1": ["1" * 400]}) as server:
+        agent = LLMParticipantAgent(
+            0, {"study_id": "study_002"}, model="gpt-4o-mini", api_key="k",
+            use_real_llm=True, api_base=server.base_url, token_budget=planner,
+        )
+        record = agent.complete_trial(PROMPT, TRIAL_INFO)
+        assert server.stats()["completions"] == 2
+    client_pool.close_clients()
+    assert record["token_budget"] == {"max_tokens": 128, "retries": 1}
+    assert "Q2.1=" in record["raw_response_text"]